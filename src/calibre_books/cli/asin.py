@@ -225,6 +225,11 @@ def lookup(
     is_flag=True,
     help="Only update books without ASINs.",
 )
+@click.option(
+    "--changed-only",
+    is_flag=True,
+    help="Only process books added or changed since the last changed-only run.",
+)
 @click.option(
     "--parallel",
     "-p",
@@ -245,6 +250,7 @@ def batch_update(
     library: Optional[Path],
     filter: Optional[str],
     missing_only: bool,
+    changed_only: bool,
     parallel: int,
     sources: tuple[str, ...],
 ) -> None:
@@ -253,6 +259,7 @@ def batch_update(
 
     Examples:
         book-tool asin batch-update --library ~/Calibre-Library --missing-only
+        book-tool asin batch-update --missing-only --changed-only
         book-tool asin batch-update --filter "Sanderson" --parallel 4
         book-tool asin batch-update --sources amazon goodreads
     """
@@ -263,15 +270,29 @@ def batch_update(
         calibre = CalibreIntegration(config)
         lookup_service = ASINLookupService(config)
 
+        # Restrict to books changed since the last changed-only run
+        changes = None
+        if changed_only:
+            changes = calibre.get_library_changes("asin", library_path=library)
+            if changes is None:
+                console.print(
+                    "[yellow]Change tracking unavailable, processing all books[/yellow]"
+                )
+
         # Get list of books to process
         books_to_process = calibre.get_books_for_asin_update(
             library_path=library,
             filter_pattern=filter,
             missing_only=missing_only,
+            book_ids=changes.modified_ids if changes else None,
         )
 
         if not books_to_process:
             console.print("[yellow]No books found matching criteria[/yellow]")
+            if changes and not dry_run:
+                calibre.mark_library_changes_processed(
+                    "asin", changes, library_path=library
+                )
             return
 
         if dry_run:
@@ -295,8 +316,28 @@ def batch_update(
                 progress_callback=progress.update,
             )
 
-        # Update Calibre library with new ASINs
-        updated_count = calibre.update_asins(results)
+        # Update Calibre library with new ASINs (results follow book order)
+        failed_ids = set()
+        updates = []
+        for book, result in zip(books_to_process, results):
+            if result.asin:
+                updates.append({"book_id": book.calibre_id, "asin": result.asin})
+            elif book.calibre_id:
+                failed_ids.add(book.calibre_id)
+
+        outcomes = calibre.update_asins_batch(updates, library_path=library)
+        written_ids = {o.book_id for o in outcomes if o.success and o.book_id}
+        failed_ids.update(o.book_id for o in outcomes if o.book_id and not o.success)
+        updated_count = sum(1 for outcome in outcomes if outcome.success)
+
+        if changes:
+            calibre.mark_library_changes_processed(
+                "asin",
+                changes,
+                library_path=library,
+                failed_ids=failed_ids,
+                written_ids=written_ids,
+            )
 
         console.print("[green]Batch ASIN update completed[/green]")
         console.print(f"  Books processed: {len(books_to_process)}")
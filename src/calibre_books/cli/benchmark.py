@@ -0,0 +1,275 @@
+"""
+Benchmark command module for Calibre Books CLI.
+
+This module provides commands for measuring conversion performance on
+synthetic corpora and comparing the results across versions.
+"""
+
+import logging
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+from calibre_books.core.conversion.kfx import KFXConverter
+from calibre_books.core.conversion_benchmark import (
+    CORPUS_FORMATS,
+    ConversionBenchmark,
+    CorpusSpec,
+    generate_corpus,
+)
+from calibre_books.core.converter import FormatConverter
+
+console = Console()
+logger = logging.getLogger(__name__)
+
+
+def _int_list(ctx: click.Context, param: click.Parameter, value: str):
+    """Parse a comma separated list of positive integers."""
+    try:
+        values = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise click.BadParameter("expected comma separated numbers")
+    if not values or any(v < 1 for v in values):
+        raise click.BadParameter("expected positive numbers")
+    return values
+
+
+def _name_list(ctx: click.Context, param: click.Parameter, value: str):
+    """Parse a comma separated list of names."""
+    return [part.strip().lower() for part in value.split(",") if part.strip()]
+
+
+@click.group()
+@click.pass_context
+def benchmark(ctx: click.Context) -> None:
+    """Measure book-tool performance."""
+
+
+@benchmark.command("convert")
+@click.option(
+    "--input-dir",
+    "-i",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help="Benchmark an existing corpus instead of generating one.",
+)
+@click.option(
+    "--formats",
+    default=",".join(CORPUS_FORMATS),
+    show_default=True,
+    callback=_name_list,
+    help="Formats of the generated corpus.",
+)
+@click.option(
+    "--files",
+    "-n",
+    "files_per_format",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="Generated books per format.",
+)
+@click.option(
+    "--size-kb",
+    type=click.IntRange(min=1),
+    default=200,
+    show_default=True,
+    help="Approximate content size of each generated book.",
+)
+@click.option(
+    "--image-density",
+    type=click.FloatRange(0.0, 0.95),
+    default=0.3,
+    show_default=True,
+    help="Fraction of each generated book that is image data.",
+)
+@click.option(
+    "--seed",
+    type=int,
+    default=0,
+    show_default=True,
+    help="Seed of the generated corpus.",
+)
+@click.option(
+    "--workers",
+    "-w",
+    default="1,2,4",
+    show_default=True,
+    callback=_int_list,
+    help="Worker counts to measure.",
+)
+@click.option(
+    "--quality",
+    "-q",
+    default="high",
+    show_default=True,
+    callback=_name_list,
+    help="Quality settings to measure (comma separated).",
+)
+@click.option(
+    "--format",
+    "-f",
+    "output_format",
+    type=click.Choice(["epub", "mobi", "azw3", "pdf", "kfx"]),
+    default="epub",
+    show_default=True,
+    help="Target conversion format.",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(path_type=Path),
+    help="Save the results as JSON.",
+)
+@click.option(
+    "--baseline",
+    "-b",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Compare against results saved by an earlier run.",
+)
+@click.pass_context
+def convert_benchmark(
+    ctx: click.Context,
+    input_dir: Optional[Path],
+    formats: list,
+    files_per_format: int,
+    size_kb: int,
+    image_density: float,
+    seed: int,
+    workers: list,
+    quality: list,
+    output_format: str,
+    output: Optional[Path],
+    baseline: Optional[Path],
+) -> None:
+    """
+    Benchmark batch conversion throughput.
+
+    Converts a synthetic corpus (or an existing directory of books) once for
+    every combination of worker count and quality setting, and reports
+    files/s, MB/s, p95 job latency, CPU utilisation and peak RSS.
+
+    Examples:
+        book-tool benchmark convert --workers 1,2,4,8
+        book-tool benchmark convert -f kfx --formats epub --size-kb 500
+        book-tool benchmark convert -o after.json --baseline before.json
+    """
+    config = ctx.obj["config"]
+    dry_run = ctx.obj["dry_run"]
+
+    spec = CorpusSpec(
+        formats=formats,
+        files_per_format=files_per_format,
+        size_kb=size_kb,
+        image_density=image_density,
+        seed=seed,
+    )
+
+    if dry_run:
+        console.print("[yellow]DRY RUN: Would benchmark conversion:[/yellow]")
+        if input_dir:
+            console.print(f"  Corpus: {input_dir}")
+        else:
+            console.print(
+                f"  Corpus: {files_per_format} × {', '.join(formats)} books of "
+                f"~{size_kb} KB, {image_density:.0%} images"
+            )
+        console.print(f"  Target format: {output_format}")
+        console.print(f"  Workers: {', '.join(str(w) for w in workers)}")
+        console.print(f"  Quality: {', '.join(quality)}")
+        return
+
+    try:
+        converter = FormatConverter(config)
+        kfx_converter = KFXConverter(config) if output_format == "kfx" else None
+        bench = ConversionBenchmark(converter, kfx_converter)
+
+        with tempfile.TemporaryDirectory(prefix="book-tool-bench-") as tmp:
+            if input_dir:
+                files = converter.find_convertible_files(input_dir, recursive=False)
+            else:
+                console.print("[cyan]Generating benchmark corpus...[/cyan]")
+                files = generate_corpus(Path(tmp) / "corpus", spec)
+
+            if not files:
+                console.print(
+                    f"[yellow]No convertible eBook files found in {input_dir}[/yellow]"
+                )
+                return
+
+            results = bench.run_matrix(
+                files,
+                output_format=output_format,
+                workers=workers,
+                qualities=quality,
+                work_dir=Path(tmp),
+                progress_callback=lambda msg: console.print(
+                    f"[cyan]Benchmarking {msg}...[/cyan]"
+                ),
+            )
+
+        table = Table(title=f"Conversion Benchmark ({len(files)} files)")
+        table.add_column("Workers", justify="right")
+        table.add_column("Quality")
+        table.add_column("Files/s", justify="right")
+        table.add_column("MB/s", justify="right")
+        table.add_column("p95 (s)", justify="right")
+        table.add_column("CPU", justify="right")
+        table.add_column("Peak RSS", justify="right")
+        table.add_column("OK", justify="right")
+
+        for result in results:
+            table.add_row(
+                str(result.workers),
+                result.quality,
+                f"{result.files_per_second:.2f}",
+                f"{result.mb_per_second:.2f}",
+                f"{result.timing_percentiles.get('p95', 0.0):.2f}",
+                (
+                    f"{result.cpu_utilisation:.0f}%"
+                    if result.cpu_utilisation is not None
+                    else "n/a"
+                ),
+                (
+                    f"{result.peak_memory_usage / 1024 / 1024:.0f} MB"
+                    if result.peak_memory_usage is not None
+                    else "n/a"
+                ),
+                f"{result.success_count}/{result.file_count}",
+            )
+
+        console.print(table)
+
+        if output:
+            bench.save_results(results, output)
+            console.print(f"[green]Results saved to {output}[/green]")
+
+        if baseline:
+            comparisons = bench.compare_runs(bench.load_results(baseline), results)
+            if not comparisons:
+                console.print(
+                    "[yellow]No configuration of this run is in the baseline[/yellow]"
+                )
+            for comparison in comparisons:
+                current = comparison.optimized
+                console.print(
+                    f"\n[bold]{current.workers} workers, {current.quality}:[/bold] "
+                    f"{comparison.overall_improvement:+.1f}% overall "
+                    f"(baseline {comparison.baseline.tool_version})"
+                )
+                for metric, value in sorted(comparison.improvements.items()):
+                    console.print(
+                        f"  [green]{metric.replace('_', ' ')}: +{value:.1f}%[/green]"
+                    )
+                for metric, value in sorted(comparison.regressions.items()):
+                    console.print(
+                        f"  [red]{metric.replace('_', ' ')}: -{value:.1f}%[/red]"
+                    )
+
+    except Exception as e:
+        logger.error(f"Conversion benchmark failed: {e}")
+        console.print(f"[red]Conversion benchmark failed: {e}[/red]")
+        ctx.exit(1)
@@ -529,3 +529,73 @@ def list_profiles(ctx: click.Context) -> None:
         logger.error(f"Failed to list profiles: {e}")
         console.print(f"[red]Failed to list profiles: {e}[/red]")
         ctx.exit(1)
+
+
+@config.command()
+@click.option(
+    "--refresh",
+    "-r",
+    is_flag=True,
+    help="Probe the Calibre installation again instead of using cached results.",
+)
+@click.pass_context
+def capabilities(ctx: click.Context, refresh: bool) -> None:
+    """
+    Show what the local Calibre installation supports.
+
+    Probe results are cached and reused until Calibre, its plugins or
+    Kindle Previewer change.
+
+    Examples:
+        book-tool config capabilities
+        book-tool config capabilities --refresh
+    """
+    try:
+        from ..core.capabilities import get_capability_registry
+        from ..core.conversion.kfx import KFXConverter
+
+        registry = get_capability_registry()
+        if refresh:
+            registry.clear()
+
+        config_manager = ConfigManager()
+        kfx_converter = KFXConverter(config_manager)
+        converter = kfx_converter._format_converter
+        formats = converter.get_supported_formats()
+
+        table = Table(title="Calibre Capabilities")
+        table.add_column("Capability", style="cyan")
+        table.add_column("Status", style="white")
+
+        table.add_row(
+            "Calibre version", converter.calibre_version() or "[red]n/a[/red]"
+        )
+        table.add_row(
+            "KFX Output plugin",
+            (
+                "[green]available[/green]"
+                if converter.validate_kfx_plugin()
+                else "[red]missing[/red]"
+            ),
+        )
+        table.add_row(
+            "Kindle Previewer",
+            (
+                "[green]available[/green]"
+                if kfx_converter._check_kindle_previewer()
+                else "[dim]not found[/dim]"
+            ),
+        )
+        table.add_row("Input formats", ", ".join(f.name for f in formats.input_formats))
+        table.add_row(
+            "Output formats", ", ".join(f.name for f in formats.output_formats)
+        )
+
+        console.print(table)
+        if registry.cache_path:
+            console.print(f"[dim]Cached in {registry.cache_path}[/dim]")
+
+    except Exception as e:
+        logger.error(f"Failed to probe capabilities: {e}")
+        console.print(f"[red]Failed to probe capabilities: {e}[/red]")
+        ctx.exit(1)
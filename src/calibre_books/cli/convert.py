@@ -46,21 +46,27 @@ def convert(ctx: click.Context) -> None:
     "--parallel",
     "-p",
     type=int,
-    default=4,
-    help="Number of parallel conversion processes.",
+    help="Number of parallel conversion processes "
+    "(default: configured maximum, limited by available cores and memory).",
 )
 @click.option(
     "--check-requirements",
     is_flag=True,
     help="Check system requirements for KFX conversion.",
 )
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Continue an interrupted conversion and retry failed books.",
+)
 @click.pass_context
 def kfx(
     ctx: click.Context,
     input_dir: Path,
     output_dir: Optional[Path],
-    parallel: int,
+    parallel: Optional[int],
     check_requirements: bool,
+    resume: bool,
 ) -> None:
     """
     Convert eBook files to KFX format for Goodreads integration.
@@ -72,6 +78,7 @@ def kfx(
         book-tool convert kfx --input-dir ./books --parallel 4
         book-tool convert kfx --input-dir ./books --check-requirements
         book-tool convert kfx --input-dir ./mobi_books --output-dir ./kfx_output
+        book-tool convert kfx --input-dir ./books --resume
     """
     config = ctx.obj["config"]
     dry_run = ctx.obj["dry_run"]
@@ -161,7 +168,7 @@ def kfx(
             )
             console.print(f"  Input directory: {input_dir}")
             console.print(f"  Output directory: {output_dir or './kfx_output'}")
-            console.print(f"  Parallel processes: {parallel}")
+            console.print(f"  Parallel processes: {parallel or 'auto'}")
 
             for book in books[:5]:  # Show first 5
                 console.print(f"    • {book.metadata.title} ({book.format.value})")
@@ -180,6 +187,7 @@ def kfx(
                 parallel=parallel,
                 progress_callback=progress.update,
                 dry_run=dry_run,
+                resume=resume,
             )
 
         # Display results
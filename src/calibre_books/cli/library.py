@@ -107,6 +107,28 @@ def status(
 
                 console.print(author_table)
 
+            # Top series
+            if stats.top_series:
+                series_table = Table(title="Top Series (by book count)")
+                series_table.add_column("Series", style="cyan")
+                series_table.add_column("Books", style="white")
+
+                for series_name, count in stats.top_series[:10]:
+                    series_table.add_row(series_name, str(count))
+
+                console.print(series_table)
+
+            # Book size distribution
+            if stats.size_percentiles:
+                size_table = Table(title="Book Size Distribution")
+                size_table.add_column("Percentile", style="cyan")
+                size_table.add_column("Size", style="white")
+
+                for name, size in stats.size_percentiles_human.items():
+                    size_table.add_row(name, size)
+
+                console.print(size_table)
+
             # Library health indicators
             health_table = Table(title="Library Health")
             health_table.add_column("Indicator", style="cyan")
@@ -139,7 +161,12 @@ def status(
     "--remove-duplicates",
     "-d",
     is_flag=True,
-    help="Remove duplicate book entries.",
+    help="Remove books whose files are identical to another book's.",
+)
+@click.option(
+    "--include-identifier-matches",
+    is_flag=True,
+    help="With --remove-duplicates, also remove books sharing an ISBN or ASIN.",
 )
 @click.option(
     "--fix-metadata",
@@ -151,7 +178,12 @@ def status(
     "--cleanup-files",
     "-f",
     is_flag=True,
-    help="Remove orphaned and temporary files.",
+    help="Remove temporary files no book uses.",
+)
+@click.option(
+    "--all-orphans",
+    is_flag=True,
+    help="With --cleanup-files, also remove every orphaned file and directory.",
 )
 @click.option(
     "--rebuild-index",
@@ -159,14 +191,28 @@ def status(
     is_flag=True,
     help="Rebuild search index.",
 )
+@click.option(
+    "--report",
+    type=click.Path(path_type=Path),
+    help="Write a JSON report of orphaned files (also in dry-run mode).",
+)
+@click.option(
+    "--from-report",
+    type=click.Path(exists=True, path_type=Path),
+    help="Remove the orphaned files listed in a previously written report.",
+)
 @click.pass_context
 def cleanup(
     ctx: click.Context,
     library: Optional[Path],
     remove_duplicates: bool,
+    include_identifier_matches: bool,
     fix_metadata: bool,
     cleanup_files: bool,
+    all_orphans: bool,
     rebuild_index: bool,
+    report: Optional[Path],
+    from_report: Optional[Path],
 ) -> None:
     """
     Clean up and optimize Calibre library.
@@ -175,6 +221,8 @@ def cleanup(
         book-tool library cleanup --remove-duplicates
         book-tool library cleanup --fix-metadata --cleanup-files
         book-tool library cleanup --library ~/Books --rebuild-index
+        book-tool --dry-run library cleanup --cleanup-files --report orphans.json
+        book-tool library cleanup -f --all-orphans --from-report orphans.json
     """
     config = ctx.obj["config"]
     dry_run = ctx.obj["dry_run"]
@@ -195,9 +243,28 @@ def cleanup(
             if fix_metadata:
                 console.print("  • Fix common metadata issues")
             if cleanup_files:
-                console.print("  • Remove orphaned and temporary files")
+                if all_orphans:
+                    console.print("  • Remove orphaned files and directories")
+                else:
+                    console.print("  • Remove temporary files")
             if rebuild_index:
                 console.print("  • Rebuild search index")
+
+            if cleanup_files and report:
+                with ProgressManager("Scanning for orphaned files") as progress:
+                    result = calibre.cleanup_orphaned_files(
+                        library_path=library,
+                        dry_run=True,
+                        report_path=report,
+                        progress_callback=progress.update,
+                    )
+                console.print(
+                    f"Orphan report written to {report}: "
+                    f"{result.orphaned_files_found} orphaned files, "
+                    f"{result.missing_files_found} missing files, "
+                    f"{result.extra_directories_found} extra directories "
+                    f"({result.space_freed_human} reclaimable)"
+                )
             return
 
         cleanup_results = {}
@@ -206,25 +273,35 @@ def cleanup(
             with ProgressManager("Removing duplicates") as progress:
                 result = calibre.remove_duplicates(
                     library_path=library,
+                    dry_run=False,
                     progress_callback=progress.update,
+                    remove_identifier_matches=include_identifier_matches,
                 )
-            cleanup_results["duplicates_removed"] = result.count
+            cleanup_results["duplicates_removed"] = result.books_removed
+            cleanup_results["duplicates_for_review"] = result.duplicates_for_review
 
         if fix_metadata:
             with ProgressManager("Fixing metadata") as progress:
                 result = calibre.fix_metadata_issues(
                     library_path=library,
+                    dry_run=False,
                     progress_callback=progress.update,
                 )
-            cleanup_results["metadata_fixed"] = result.count
+            cleanup_results["metadata_fixed"] = result.issues_fixed
+            cleanup_results["metadata_rules"] = result.rule_stats
 
         if cleanup_files:
             with ProgressManager("Cleaning up files") as progress:
                 result = calibre.cleanup_orphaned_files(
                     library_path=library,
+                    dry_run=False,
                     progress_callback=progress.update,
+                    report_path=report,
+                    from_report=from_report,
+                    remove_all_orphans=all_orphans,
                 )
-            cleanup_results["files_cleaned"] = result.count
+            cleanup_results["files_cleaned"] = result.files_removed
+            cleanup_results["files_missing"] = result.missing_files_found
             cleanup_results["space_freed"] = result.space_freed_human
 
         if rebuild_index:
@@ -242,17 +319,40 @@ def cleanup(
             console.print(
                 f"  Duplicates removed: {cleanup_results['duplicates_removed']}"
             )
+            if cleanup_results["duplicates_for_review"]:
+                console.print(
+                    f"  [yellow]Possible duplicates left for review: "
+                    f"{cleanup_results['duplicates_for_review']}[/yellow]"
+                )
 
         if "metadata_fixed" in cleanup_results:
             console.print(
                 f"  Metadata issues fixed: {cleanup_results['metadata_fixed']}"
             )
+            rule_table = Table(title="Metadata Rules")
+            rule_table.add_column("Rule", style="cyan")
+            rule_table.add_column("Issues", style="white")
+            rule_table.add_column("Fixed", style="white")
+            rule_table.add_column("Time", style="dim")
+            for stats in cleanup_results["metadata_rules"]:
+                rule_table.add_row(
+                    stats.name,
+                    str(stats.issues_found),
+                    str(stats.issues_fixed),
+                    f"{stats.seconds * 1000:.1f} ms",
+                )
+            console.print(rule_table)
 
         if "files_cleaned" in cleanup_results:
             console.print(
                 f"  Orphaned files removed: {cleanup_results['files_cleaned']}"
             )
             console.print(f"  Space freed: {cleanup_results['space_freed']}")
+            if cleanup_results["files_missing"]:
+                console.print(
+                    f"  [yellow]Book files missing on disk: "
+                    f"{cleanup_results['files_missing']}[/yellow]"
+                )
 
         if cleanup_results.get("index_rebuilt"):
             console.print("  Search index rebuilt successfully")
@@ -281,14 +381,14 @@ def cleanup(
 @click.option(
     "--format",
     "-f",
-    type=click.Choice(["calibre", "csv", "json", "xml"]),
+    type=click.Choice(["calibre", "csv", "json", "ndjson", "xml", "parquet"]),
     default="calibre",
-    help="Export format.",
+    help="Export format (parquet requires pyarrow).",
 )
 @click.option(
     "--include-files",
     is_flag=True,
-    help="Include book files in export (calibre format only).",
+    help="Hardlink or copy book files next to the export (always on for calibre).",
 )
 @click.option(
     "--filter",
@@ -309,6 +409,7 @@ def export(
     Examples:
         book-tool library export -s ~/Library -d ~/Backup --format calibre
         book-tool library export -s ~/Library -d library.csv --format csv
+        book-tool library export -s ~/Library -d books.parquet --format parquet
         book-tool library export -s ~/Library -d ~/Export --filter "Sanderson"
     """
     config = ctx.obj["config"]
@@ -339,6 +440,11 @@ def export(
 
         console.print(f"[green]Library exported successfully[/green]")
         console.print(f"  Books exported: {result.book_count}")
+        if result.files_exported:
+            console.print(
+                f"  Files exported: {result.files_exported} "
+                f"({result.files_linked} hardlinked)"
+            )
         console.print(f"  Export size: {result.export_size_human}")
         console.print(f"  Location: {result.export_path}")
 
@@ -367,6 +473,12 @@ def export(
     default=20,
     help="Maximum number of results to show.",
 )
+@click.option(
+    "--offset",
+    type=int,
+    default=0,
+    help="Number of results to skip (for paging through results).",
+)
 @click.option(
     "--format",
     "-f",
@@ -380,6 +492,7 @@ def search(
     library: Optional[Path],
     query: str,
     limit: int,
+    offset: int,
     format: str,
 ) -> None:
     """
@@ -395,19 +508,22 @@ def search(
     try:
         calibre = CalibreIntegration(config)
 
-        with ProgressManager("Searching library") as progress:
-            results = calibre.search_library(
+        with ProgressManager("Searching library"):
+            page = calibre.search_library_page(
                 query=query,
                 library_path=library,
                 limit=limit,
-                progress_callback=progress.update,
+                offset=offset,
             )
 
-        if not results:
+        if not page.rows:
             console.print("[yellow]No books found matching query[/yellow]")
             return
 
-        console.print(f"[green]Found {len(results)} books[/green]")
+        console.print(
+            f"[green]Found {page.total} books "
+            f"(showing {page.offset + 1}-{page.offset + len(page.rows)})[/green]"
+        )
 
         if format == "table":
             table = Table(title=f"Search Results: '{query}'")
@@ -416,32 +532,38 @@ def search(
             table.add_column("Series", style="dim")
             table.add_column("Rating", style="yellow")
 
-            for book in results:
+            for row in page.rows:
                 table.add_row(
-                    book.title,
-                    book.author,
-                    book.series or "-",
-                    str(book.rating) if book.rating else "-",
+                    row.title,
+                    row.author or "-",
+                    row.series or "-",
+                    f"{row.stars:g}" if row.stars else "-",
                 )
 
             console.print(table)
 
         elif format == "list":
-            for book in results:
-                console.print(f"• {book.title} by {book.author}")
-                if book.series:
-                    console.print(f"  Series: {book.series}")
-                if book.rating:
-                    console.print(f"  Rating: {book.rating}/5")
+            for row in page.rows:
+                console.print(f"• {row.title} by {row.author}")
+                if row.series:
+                    console.print(f"  Series: {row.series}")
+                if row.stars:
+                    console.print(f"  Rating: {row.stars:g}/5")
                 console.print()
 
         elif format == "csv":
             console.print("Title,Author,Series,Rating")
-            for book in results:
+            for row in page.rows:
                 console.print(
-                    f'"{book.title}","{book.author}","{book.series or ""}","{book.rating or ""}"'
+                    f'"{row.title}","{row.author or ""}","{row.series or ""}",'
+                    f'"{row.stars or ""}"'
                 )
 
+        if page.has_more and format != "csv":
+            console.print(
+                f"[dim]More results available: use --offset {page.next_offset}[/dim]"
+            )
+
     except Exception as e:
         logger.error(f"Library search failed: {e}")
         console.print(f"[red]Library search failed: {e}[/red]")
@@ -26,6 +26,8 @@ from .config import config as config_cmd
 from .library import library
 from .download import download
 from .validate import validate
+from .benchmark import benchmark
+from .pipeline import pipeline
 
 console = Console()
 
@@ -139,7 +141,11 @@ def main(
                 "  • [bold]download[/bold] - Download books from various sources"
             )
             console.print("  • [bold]library[/bold] - Manage Calibre library")
+            console.print(
+                "  • [bold]pipeline[/bold] - Download, convert and import in one run"
+            )
             console.print("  • [bold]config[/bold] - Configuration management")
+            console.print("  • [bold]benchmark[/bold] - Measure performance")
             console.print("\nExample: book-tool process scan -i ./books")
 
     except Exception as e:
@@ -158,6 +164,8 @@ main.add_command(download)
 main.add_command(library)
 main.add_command(config_cmd)
 main.add_command(validate)
+main.add_command(benchmark)
+main.add_command(pipeline)
 
 
 def cli_entry_point() -> None:
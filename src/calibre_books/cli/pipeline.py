@@ -0,0 +1,196 @@
+"""
+Pipeline command module for Calibre Books CLI.
+
+This module provides commands that take books from download all the way
+into the Calibre library in one streaming run.
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional
+
+import click
+from rich.console import Console
+from rich.table import Table
+
+from calibre_books.core.pipeline import DEFAULT_QUEUE_SIZE, BookPipeline
+from calibre_books.utils.progress import ProgressManager
+
+console = Console()
+logger = logging.getLogger(__name__)
+
+
+@click.group()
+@click.pass_context
+def pipeline(ctx: click.Context) -> None:
+    """Run books through download, conversion and import in one go."""
+
+
+@pipeline.command("run")
+@click.option(
+    "--input-file",
+    "-i",
+    type=click.Path(exists=True, path_type=Path),
+    required=True,
+    help="File containing list of books to download.",
+)
+@click.option(
+    "--format",
+    "-f",
+    type=click.Choice(["mobi", "epub", "pdf", "azw3"]),
+    default="mobi",
+    help="Preferred download format.",
+)
+@click.option(
+    "--output-dir",
+    "-o",
+    type=click.Path(path_type=Path),
+    help="Output directory for downloaded and converted books.",
+)
+@click.option(
+    "--convert-to",
+    type=click.Choice(["epub", "mobi", "azw3", "pdf"]),
+    help="Convert downloaded books to this format before importing.",
+)
+@click.option(
+    "--skip-asin",
+    is_flag=True,
+    help="Do not look up and write ASINs.",
+)
+@click.option(
+    "--skip-import",
+    is_flag=True,
+    help="Do not import the books into the Calibre library.",
+)
+@click.option(
+    "--download-workers",
+    type=click.IntRange(min=1),
+    help="Parallel downloads (defaults to the download configuration).",
+)
+@click.option(
+    "--convert-workers",
+    type=click.IntRange(min=1),
+    help="Parallel conversions (defaults to the conversion configuration).",
+)
+@click.option(
+    "--queue-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_QUEUE_SIZE,
+    show_default=True,
+    help="Books waiting in front of each stage.",
+)
+@click.pass_context
+def run(
+    ctx: click.Context,
+    input_file: Path,
+    format: str,
+    output_dir: Optional[Path],
+    convert_to: Optional[str],
+    skip_asin: bool,
+    skip_import: bool,
+    download_workers: Optional[int],
+    convert_workers: Optional[int],
+    queue_size: int,
+) -> None:
+    """
+    Download, validate, tag, convert and import a list of books.
+
+    Every stage runs in its own worker pool connected by bounded queues, so
+    a book is converted and imported while the next ones are still being
+    downloaded. The input file uses the format of 'download batch'.
+
+    Examples:
+        book-tool pipeline run -i books_list.txt
+        book-tool pipeline run -i books_list.txt --convert-to epub
+        book-tool pipeline run -i books_list.txt --skip-import --download-workers 4
+    """
+    config = ctx.obj["config"]
+    dry_run = ctx.obj["dry_run"]
+
+    try:
+        workers = {}
+        if download_workers:
+            workers["download"] = download_workers
+        if convert_workers:
+            workers["convert"] = convert_workers
+
+        book_pipeline = BookPipeline(
+            config,
+            output_dir=output_dir,
+            download_format=format,
+            convert_to=convert_to,
+            lookup_asin=not skip_asin,
+            import_books=not skip_import,
+            workers=workers,
+            queue_size=queue_size,
+        )
+        books = book_pipeline.downloader.parse_book_list(input_file)
+
+        if dry_run:
+            stages = book_pipeline.stages()
+            console.print(
+                f"[yellow]DRY RUN: Would run {len(books)} books through the "
+                f"pipeline:[/yellow]"
+            )
+            for stage in stages:
+                console.print(f"  • {stage.name} ({stage.workers} workers)")
+            console.print(f"  Queue size: {queue_size}")
+            for book in books[:5]:  # Show first 5
+                console.print(f"  • {book.title} by {book.author}")
+            if len(books) > 5:
+                console.print(f"  ... and {len(books) - 5} more")
+            return
+
+        with ProgressManager(
+            f"Processing {len(books)} books", total=len(books)
+        ) as progress:
+
+            def on_finished(item):
+                queues = ", ".join(
+                    f"{stats.name} {stats.queue_depth}"
+                    for stats in book_pipeline.stats()
+                )
+                progress.update(advance=1, description=f"Queued: {queues}")
+
+            items = book_pipeline.run(books, progress_callback=on_finished)
+
+        table = Table(title="Pipeline Stages")
+        table.add_column("Stage", style="cyan")
+        table.add_column("Workers", justify="right")
+        table.add_column("Done", justify="right")
+        table.add_column("Failed", justify="right")
+        table.add_column("Books/min", justify="right")
+        table.add_column("Busy", justify="right")
+        table.add_column("Peak queue", justify="right")
+        for stats in book_pipeline.stats():
+            table.add_row(
+                stats.name,
+                str(stats.workers),
+                str(stats.processed - stats.failed),
+                str(stats.failed),
+                f"{stats.throughput:.1f}",
+                f"{stats.utilisation:.0%}",
+                str(stats.max_queue_depth),
+            )
+        console.print(table)
+
+        successful = [item for item in items if item.success]
+        failed = [item for item in items if not item.success]
+
+        console.print("[green]Pipeline completed[/green]")
+        console.print(f"  Successful: {len(successful)}")
+        if failed:
+            console.print(f"  Failed: {len(failed)}")
+            for item in failed:
+                console.print(
+                    f"  • {item.request.title}: {item.failed_stage} failed: "
+                    f"{item.error}"
+                )
+        for item in successful:
+            for warning in item.warnings:
+                console.print(f"  [yellow]• {item.request.title}: {warning}[/yellow]")
+
+    except Exception as e:
+        logger.error(f"Pipeline failed: {e}")
+        console.print(f"[red]Pipeline failed: {e}[/red]")
+        ctx.exit(1)
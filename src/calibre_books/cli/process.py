@@ -59,6 +59,29 @@ def process(ctx: click.Context) -> None:
     is_flag=True,
     help="Validate files before processing to detect corruption/issues.",
 )
+@click.option(
+    "--parallel",
+    "-p",
+    type=click.IntRange(min=1),
+    help="Files to process concurrently (default: number of CPUs).",
+)
+@click.option(
+    "--executor",
+    type=click.Choice(["thread", "process"]),
+    default="thread",
+    show_default=True,
+    help="Worker pool: threads for I/O bound, processes for CPU bound scans.",
+)
+@click.option(
+    "--no-index",
+    is_flag=True,
+    help="Process every file instead of only files changed since the last scan.",
+)
+@click.option(
+    "--diff",
+    is_flag=True,
+    help="Save only files added, changed or removed since the last scan.",
+)
 @click.pass_context
 def scan(
     ctx: click.Context,
@@ -68,6 +91,10 @@ def scan(
     output_json: Optional[Path],
     check_asin: bool,
     validate_first: bool,
+    parallel: Optional[int],
+    executor: str,
+    no_index: bool,
+    diff: bool,
 ) -> None:
     """
     Scan directory for existing eBook files.
@@ -77,14 +104,21 @@ def scan(
         book-tool process scan --input-dir ~/Downloads --format mobi
         book-tool process scan --recursive --format "mobi,epub"
         book-tool process scan --input-dir ./books --validate-first
+        book-tool process scan -i ./books --check-asin --executor process
+        book-tool process scan -i ./books -r --diff -o changes.json
     """
     config = ctx.obj["config"]
     dry_run = ctx.obj["dry_run"]
 
+    if diff and no_index:
+        raise click.UsageError("--diff needs the scan index of the last scan")
+
     try:
-        from calibre_books.core.file_scanner import FileScanner
+        from calibre_books.core.file_scanner import FileScanner, default_scan_workers
+        from calibre_books.core.scan_index import ScanIndex
 
         scanner = FileScanner(config)
+        parallel = parallel or default_scan_workers()
 
         if dry_run:
             console.print("[yellow]DRY RUN: Would scan directory:[/yellow]")
@@ -94,6 +128,8 @@ def scan(
                 console.print(f"  Formats: {format}")
             console.print(f"  Check ASIN: {check_asin}")
             console.print(f"  Validate first: {validate_first}")
+            console.print(f"  Workers: {parallel} ({executor})")
+            console.print(f"  Scan index: {not no_index}")
             return
 
         # Parse format filter
@@ -144,8 +180,23 @@ def scan(
                 formats=formats,
                 check_metadata=check_asin,
                 progress_callback=progress.update,
+                parallel=parallel,
+                executor=executor,
+                index=None if no_index else ScanIndex(),
             )
 
+        if scanner.last_diff is not None:
+            changes = scanner.last_diff
+            console.print(
+                f"[cyan]Since the last scan: {len(changes.added)} added, "
+                f"{len(changes.changed)} changed, {len(changes.removed)} removed, "
+                f"{changes.unchanged} unchanged[/cyan]"
+            )
+
+        if diff and output_json:
+            scanner.save_results(results, output_json, diff=scanner.last_diff)
+            console.print(f"\n[green]Changes saved to: {output_json}[/green]")
+
         if results:
             console.print(f"[green]Found {len(results)} eBook files[/green]")
 
@@ -166,7 +217,7 @@ def scan(
                 console.print(f"  • Without ASIN: {without_asin}")
 
             # Save to JSON if requested
-            if output_json:
+            if output_json and not diff:
                 scanner.save_results(results, output_json)
                 console.print(f"\n[green]Results saved to: {output_json}[/green]")
         else:
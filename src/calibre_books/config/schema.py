@@ -24,6 +24,9 @@ class DownloadConfig(BaseModel):
     max_parallel: int = Field(
         default=1, ge=1, le=8, description="Max parallel downloads"
     )
+    max_per_host: int = Field(
+        default=2, ge=1, le=8, description="Max parallel downloads per host"
+    )
     quality: str = Field(default="high", description="Download quality preference")
     search_timeout: int = Field(
         default=60, ge=10, le=300, description="Search timeout in seconds"
@@ -102,6 +105,31 @@ class ConversionConfig(BaseModel):
         default="~/Converted-Books", description="Conversion output path"
     )
     kfx_plugin_required: bool = Field(default=True, description="Require KFX plugin")
+    job_memory_mb: int = Field(
+        default=4096, ge=0, description="Address space limit per conversion (0: none)"
+    )
+    job_cpu_seconds: int = Field(
+        default=1800, ge=0, description="CPU time limit per conversion (0: none)"
+    )
+    job_rss_mb: int = Field(
+        default=1024, ge=1, description="Expected memory use per conversion"
+    )
+    job_nice: int = Field(
+        default=10, ge=0, le=19, description="Niceness of conversion processes"
+    )
+    cache_enabled: bool = Field(default=True, description="Reuse identical conversions")
+    cache_path: str = Field(
+        default="~/.book-tool/cache/conversions", description="Conversion cache path"
+    )
+    cache_max_mb: int = Field(
+        default=10240, ge=0, description="Conversion cache size limit in MB"
+    )
+    max_attempts: int = Field(
+        default=3, ge=1, description="Attempts per conversion when resuming"
+    )
+    retry_backoff: float = Field(
+        default=30.0, ge=0, description="Delay before retrying a failed conversion"
+    )
 
     @field_validator("output_path")
     @classmethod
@@ -203,6 +231,7 @@ download:
   download_path: ~/Downloads/Books  # Directory for downloaded books
   librarian_path: librarian     # Path to librarian CLI tool
   max_parallel: 1               # Maximum parallel downloads (1-8)
+  max_per_host: 2               # Maximum parallel downloads per host (1-8)
   quality: high                 # Download quality preference (high, medium, low)
   search_timeout: 60            # Search timeout in seconds (10-300)
   download_timeout: 300         # Download timeout in seconds (60-3600)
@@ -226,6 +255,15 @@ conversion:
   max_parallel: 4                   # Maximum parallel conversion processes
   output_path: ~/Converted-Books    # Output directory for converted books
   kfx_plugin_required: true         # Require KFX plugin for conversions
+  job_memory_mb: 4096               # Memory limit per conversion process (0 = none)
+  job_cpu_seconds: 1800             # CPU time limit per conversion process (0 = none)
+  job_rss_mb: 1024                  # Expected memory use per conversion process
+  job_nice: 10                      # Scheduling priority of conversion processes
+  cache_enabled: true               # Reuse outputs of identical earlier conversions
+  cache_path: ~/.book-tool/cache/conversions  # Conversion output cache
+  cache_max_mb: 10240               # Conversion cache size limit
+  max_attempts: 3                   # Attempts per conversion with --resume
+  retry_backoff: 30                 # Seconds before a retry, doubled per failure
 
 # Logging settings
 logging:
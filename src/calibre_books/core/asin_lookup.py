@@ -729,10 +729,15 @@ class ASINLookupService(LoggerMixin):
         parallel: int = 2,
         progress_callback=None,
     ) -> List[ASINLookupResult]:
-        """Perform batch ASIN lookup for multiple books."""
+        """Perform batch ASIN lookup for multiple books.
+
+        Returns:
+            One ASINLookupResult per book, in the order of ``books``
+        """
         self.logger.info(f"Starting batch ASIN lookup for {len(books)} books")
 
-        results = []
+        results: List[Optional[ASINLookupResult]] = [None] * len(books)
+        completed = 0
 
         def lookup_single_book(book: Book) -> ASINLookupResult:
             """Lookup ASIN for a single book."""
@@ -770,11 +775,11 @@ class ASINLookupService(LoggerMixin):
 
         # Use ThreadPoolExecutor for parallel processing
         with concurrent.futures.ThreadPoolExecutor(max_workers=parallel) as executor:
-            futures = []
+            futures = {}
 
             for i, book in enumerate(books):
                 future = executor.submit(lookup_single_book, book)
-                futures.append(future)
+                futures[future] = i
 
                 # Update progress if callback provided
                 if progress_callback:
@@ -786,29 +791,28 @@ class ASINLookupService(LoggerMixin):
                 time.sleep(self.rate_limit / parallel)
 
             # Collect results as they complete
-            for i, future in enumerate(concurrent.futures.as_completed(futures)):
+            for future in concurrent.futures.as_completed(futures):
+                i = futures[future]
+                completed += 1
                 try:
-                    result = future.result()
-                    results.append(result)
+                    results[i] = future.result()
 
                     if progress_callback:
                         progress_callback(
-                            description=f"Completed lookup {len(results)}/{len(books)}"
+                            description=f"Completed lookup {completed}/{len(books)}"
                         )
 
                 except Exception as e:
                     self.logger.error(f"Batch lookup failed for future {i}: {e}")
                     # Create a failed result
-                    results.append(
-                        ASINLookupResult(
-                            query_title="Unknown",
-                            query_author=None,
-                            asin=None,
-                            metadata=None,
-                            source=None,
-                            success=False,
-                            error=str(e),
-                        )
+                    results[i] = ASINLookupResult(
+                        query_title="Unknown",
+                        query_author=None,
+                        asin=None,
+                        metadata=None,
+                        source=None,
+                        success=False,
+                        error=str(e),
                     )
 
         successful_lookups = sum(1 for r in results if r.success)
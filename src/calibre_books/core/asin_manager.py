@@ -12,6 +12,12 @@ from typing import List, Optional, Dict, Any, Callable
 from ..core.book import Book, ASINLookupResult
 from ..utils.logging import LoggerMixin
 from ..utils.validation import validate_asin
+from .ebook_metadata import (
+    MetadataError,
+    read_asin,
+    supports_native_metadata,
+    write_asin,
+)
 
 
 class ASINManager(LoggerMixin):
@@ -165,7 +171,7 @@ class ASINManager(LoggerMixin):
 
         # Update file metadata with ASIN
         try:
-            self._update_file_asin(book.file_path, asin)
+            self.write_file_asin(book.file_path, asin)
 
             # Update book object
             book.metadata.asin = asin
@@ -190,9 +196,12 @@ class ASINManager(LoggerMixin):
                 error=f"Failed to update file: {e}",
             )
 
-    def _update_file_asin(self, file_path: Path, asin: str) -> None:
+    def write_file_asin(self, file_path: Path, asin: str) -> None:
         """
-        Update eBook file with ASIN metadata using ebook-meta.
+        Update eBook file with ASIN metadata.
+
+        EPUB and MOBI/AZW3 files are updated natively, other formats with
+        ebook-meta.
 
         Args:
             file_path: Path to eBook file
@@ -201,6 +210,14 @@ class ASINManager(LoggerMixin):
         if not validate_asin(asin):
             raise ValueError(f"Invalid ASIN format: {asin}")
 
+        if supports_native_metadata(file_path):
+            try:
+                write_asin(file_path, asin)
+                self.logger.debug(f"Successfully added ASIN {asin} to {file_path}")
+                return
+            except MetadataError as e:
+                self.logger.debug(f"{e}, falling back to ebook-meta")
+
         try:
             # Use Calibre's ebook-meta tool to add ASIN identifier
             cmd = ["ebook-meta", str(file_path), "--identifier", f"amazon:{asin}"]
@@ -260,6 +277,12 @@ class ASINManager(LoggerMixin):
         Returns:
             ASIN if found, None otherwise
         """
+        if supports_native_metadata(file_path):
+            try:
+                return read_asin(file_path)
+            except MetadataError as e:
+                self.logger.debug(f"{e}, falling back to ebook-meta")
+
         try:
             result = subprocess.run(
                 ["ebook-meta", str(file_path)],
@@ -296,6 +319,13 @@ class ASINManager(LoggerMixin):
         Returns:
             True if successful, False otherwise
         """
+        if supports_native_metadata(file_path):
+            try:
+                write_asin(file_path, None)
+                return True
+            except MetadataError as e:
+                self.logger.debug(f"{e}, falling back to ebook-meta")
+
         try:
             # First, get current metadata
             result = subprocess.run(
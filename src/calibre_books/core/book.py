@@ -247,6 +247,7 @@ class ConversionResult:
     conversion_time: Optional[float] = None
     file_size_before: Optional[int] = None
     file_size_after: Optional[int] = None
+    from_cache: bool = False
 
 
 @dataclass
@@ -274,6 +275,8 @@ class LibraryStats(BaseModel):
     last_updated: datetime = Field(default_factory=datetime.now)
     format_distribution: Dict[str, int] = Field(default_factory=dict)
     top_authors: List[tuple[str, int]] = Field(default_factory=list)
+    top_series: List[tuple[str, int]] = Field(default_factory=list)
+    size_percentiles: Dict[str, int] = Field(default_factory=dict)  # in bytes
     books_without_asin: int = 0
     duplicate_titles: int = 0
     missing_covers: int = 0
@@ -282,7 +285,18 @@ class LibraryStats(BaseModel):
     @property
     def library_size_human(self) -> str:
         """Human-readable library size."""
-        size = self.library_size
+        return self._human_size(self.library_size)
+
+    @property
+    def size_percentiles_human(self) -> Dict[str, str]:
+        """Human-readable book size percentiles."""
+        return {
+            name: self._human_size(size) for name, size in self.size_percentiles.items()
+        }
+
+    @staticmethod
+    def _human_size(size: float) -> str:
+        """Format a size in bytes."""
         for unit in ["B", "KB", "MB", "GB", "TB"]:
             if size < 1024.0:
                 return f"{size:.1f} {unit}"
@@ -5,17 +5,46 @@ This module provides integration with Calibre's command-line tools
 and database for managing book libraries and metadata.
 """
 
+import os
 import subprocess
 import json
 import shlex
 import re
+import tempfile
 from pathlib import Path
-from typing import List, Optional, Dict, Any, TYPE_CHECKING
+from typing import List, Optional, Dict, Any, Iterable, Iterator, IO, TYPE_CHECKING
 from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
 
 from ..utils.logging import LoggerMixin
 from .book import Book, LibraryStats, BookMetadata, BookFormat
+from .metadata_store import CalibreMetadataStore, MetadataStoreError
+from .metadata_writer import CalibreMetadataWriter
+from .library_snapshot import LibrarySnapshot, SnapshotDiff
+from .duplicates import (
+    CONTENT_EVIDENCE,
+    IDENTIFIER_EVIDENCE,
+    DuplicateFinder,
+    DuplicateGroup,
+    FileHashCache,
+)
+from .orphan_scan import OrphanReport, OrphanScanner
+from .library_stats import LibraryStatsReader, StatsCache
+from .library_export import EXPORT_FIELDS, LibraryExporter
+from .metadata_rules import (
+    DEFAULT_BATCH_SIZE,
+    MetadataRule,
+    MetadataRuleEngine,
+    RuleBatchResult,
+    RuleStats,
+)
+from .library_search import (
+    DEFAULT_SEARCH_FIELDS,
+    LibrarySearchRow,
+    SearchIdCache,
+    SearchPage,
+)
 
 if TYPE_CHECKING:
     from ..config.manager import ConfigManager
@@ -37,6 +66,76 @@ class CalibreResult:
         return self.success and bool(self.output.strip())
 
 
+def _iter_json_array(stream: IO[str], chunk_size: int = 65536) -> Iterator[Any]:
+    """Incrementally decode the elements of a top-level JSON array.
+
+    Only the current chunk and the element being decoded are held in memory,
+    so arbitrarily large ``calibredb list --for-machine`` output can be
+    consumed element by element.
+
+    Args:
+        stream: Text stream positioned at the start of a JSON array
+        chunk_size: Number of characters to read at a time
+
+    Yields:
+        Decoded array elements in order
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Skip whitespace and separators between elements
+        while pos < len(buffer) and (
+            buffer[pos].isspace() or (started and buffer[pos] == ",")
+        ):
+            pos += 1
+
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise json.JSONDecodeError("Expected JSON array", buffer, pos)
+                started = True
+                pos += 1
+                continue
+
+            if buffer[pos] == "]":
+                return
+
+            try:
+                element, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Element is incomplete; read more unless the stream ended
+                if eof:
+                    raise
+            else:
+                yield element
+                continue
+
+        if eof:
+            if started:
+                raise json.JSONDecodeError("Unterminated JSON array", buffer, pos)
+            return
+
+        chunk = stream.read(chunk_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+
+@dataclass
+class ASINUpdateOutcome:
+    """Per-book result of writing an ASIN to the Calibre library."""
+
+    book_id: Optional[int]
+    asin: Optional[str]
+    success: bool
+    previous_asin: Optional[str] = None
+    error: Optional[str] = None
+
+
 class CalibreError(Exception):
     """Base exception for Calibre operations."""
 
@@ -223,6 +322,106 @@ class CalibreDB(LoggerMixin):
 
         return self.execute_command(command)
 
+    def list_books_iter(
+        self,
+        fields: List[str] = None,
+        search: str = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream books from ``calibredb list --for-machine``.
+
+        Unlike list_books, the output is decoded incrementally while
+        calibredb is still writing it, so memory use stays flat regardless
+        of library size.
+
+        Args:
+            fields: List of fields to include in output
+            search: Search query string
+            timeout: Seconds to wait for calibredb to exit after its output
+                has been consumed
+
+        Yields:
+            Book dictionaries as produced by calibredb
+
+        Raises:
+            CalibreError: If calibredb fails or its output cannot be parsed
+        """
+        full_command = [self.cli_path, "list"]
+
+        if fields:
+            full_command.extend(["--fields", ",".join(fields)])
+
+        if search:
+            full_command.extend(["--search", search])
+
+        full_command.extend(["--for-machine", "--library-path", str(self.library_path)])
+
+        self.logger.debug(
+            f"Streaming: {' '.join(shlex.quote(arg) for arg in full_command)}"
+        )
+
+        # stderr goes to a file so a chatty calibredb cannot block on a full pipe
+        with tempfile.TemporaryFile(mode="w+") as stderr_file:
+            try:
+                process = subprocess.Popen(
+                    full_command,
+                    stdout=subprocess.PIPE,
+                    stderr=stderr_file,
+                    text=True,
+                    encoding="utf-8",
+                )
+            except OSError as e:
+                raise CalibreError(f"Command execution failed: {e}")
+
+            try:
+                try:
+                    yield from _iter_json_array(process.stdout)
+                except json.JSONDecodeError as e:
+                    raise CalibreError(f"Failed to parse library data: {e}")
+
+                return_code = process.wait(timeout=timeout)
+                if return_code != 0:
+                    stderr_file.seek(0)
+                    raise CalibreError(
+                        f"Command failed (code {return_code}): {stderr_file.read()}"
+                    )
+            except subprocess.TimeoutExpired as e:
+                raise CalibreError(f"Command timed out after {e.timeout}s")
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                process.wait()
+                process.stdout.close()
+
+    def search_ids(self, query: str, limit: int = None) -> List[int]:
+        """Resolve a Calibre search expression to matching book ids.
+
+        Args:
+            query: Search query string (Calibre search syntax)
+            limit: Maximum number of ids to return
+
+        Returns:
+            List of matching book ids (empty if nothing matches)
+
+        Raises:
+            CalibreError: If the search command fails
+        """
+        command = ["search"]
+
+        if limit is not None:
+            command.extend(["--limit", str(limit)])
+
+        command.append(query)
+        result = self.execute_command(command)
+
+        if not result.success:
+            # calibredb exits non-zero when the search simply has no matches
+            if "no books" in result.error.lower():
+                return []
+            raise CalibreError(f"Search failed: {result.error}")
+
+        return [int(book_id) for book_id in re.findall(r"\d+", result.output)]
+
     def get_metadata(self, book_id: int) -> CalibreResult:
         """Get detailed metadata for specific book.
 
@@ -274,6 +473,33 @@ class CalibreDB(LoggerMixin):
         command = ["remove"] + [str(book_id) for book_id in book_ids]
         return self.execute_command(command)
 
+    def add_books(self, file_paths: List[Path], timeout: int = 300) -> List[int]:
+        """Add book files to the library.
+
+        Files whose book is already in the library are skipped by calibredb.
+
+        Args:
+            file_paths: Book files to add
+            timeout: Command timeout in seconds
+
+        Returns:
+            Ids of the added books
+
+        Raises:
+            CalibreError: If the add command fails
+        """
+        command = ["add"] + [str(path) for path in file_paths]
+        result = self.execute_command(command, timeout=timeout)
+
+        if not result.success:
+            raise CalibreError(f"Adding books failed: {result.error}")
+
+        # calibredb prints "Added book ids: 12, 13"
+        match = re.search(r"Added book ids?:\s*([\d,\s]+)", result.output)
+        if not match:
+            return []
+        return [int(book_id) for book_id in re.findall(r"\d+", match.group(1))]
+
     def check_library(self) -> CalibreResult:
         """Check library for integrity issues.
 
@@ -343,6 +569,22 @@ class CalibreIntegration(LoggerMixin):
 
         # Initialize CalibreDB wrapper (lazy initialization)
         self._calibre_db = None
+        self._calibre_dbs: Dict[Path, CalibreDB] = {}
+
+        # Read-only metadata.db stores per library (None = use calibredb)
+        self._metadata_stores: Dict[Path, Optional[CalibreMetadataStore]] = {}
+
+        # Directory for search, snapshot and file hash caches
+        self.cache_dir = Path("~/.book-tool/cache").expanduser()
+
+        # Cache of ordered search result ids (lazy initialization)
+        self._search_cache: Optional[SearchIdCache] = None
+
+        # Cache of computed library statistics (lazy initialization)
+        self._stats_cache: Optional[StatsCache] = None
+
+        # Incremental library snapshots per library
+        self._snapshots: Dict[Path, LibrarySnapshot] = {}
 
         self.logger.info(
             f"Initialized Calibre integration with library: {self.library_path}"
@@ -355,6 +597,249 @@ class CalibreIntegration(LoggerMixin):
             self._calibre_db = CalibreDB(self.library_path, self.cli_path)
         return self._calibre_db
 
+    @property
+    def search_cache(self) -> SearchIdCache:
+        """Lazy initialization of the search result id cache."""
+        if self._search_cache is None:
+            self._search_cache = SearchIdCache(self.cache_dir / "search_cache.db")
+        return self._search_cache
+
+    @property
+    def stats_cache(self) -> StatsCache:
+        """Lazy initialization of the library statistics cache."""
+        if self._stats_cache is None:
+            self._stats_cache = StatsCache(self.cache_dir / "library_stats.db")
+        return self._stats_cache
+
+    def _library_version(self, library_path: Path) -> Optional[str]:
+        """Token that changes whenever the library's metadata.db is written."""
+        try:
+            stat = (library_path / "metadata.db").stat()
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _get_calibre_db(self, library_path: Optional[Path] = None) -> CalibreDB:
+        """Get a (cached) CalibreDB wrapper for the given or default library."""
+        if not library_path:
+            return self.calibre_db
+
+        path = Path(library_path).expanduser()
+        if path == self.library_path:
+            return self.calibre_db
+        if path not in self._calibre_dbs:
+            self._calibre_dbs[path] = CalibreDB(path, self.cli_path)
+        return self._calibre_dbs[path]
+
+    def _get_metadata_store(
+        self, library_path: Optional[Path] = None
+    ) -> Optional[CalibreMetadataStore]:
+        """Get a read-only metadata.db store, or None to fall back to calibredb.
+
+        Args:
+            library_path: Path to library (uses default if None)
+
+        Returns:
+            CalibreMetadataStore, or None if metadata.db cannot be read
+            directly (missing, unreadable or unknown schema version)
+        """
+        path = Path(library_path).expanduser() if library_path else self.library_path
+
+        if path not in self._metadata_stores:
+            try:
+                self._metadata_stores[path] = CalibreMetadataStore(path)
+            except MetadataStoreError as e:
+                self.logger.debug(f"Using calibredb for reads ({e})")
+                self._metadata_stores[path] = None
+
+        return self._metadata_stores[path]
+
+    def _get_snapshot(
+        self, library_path: Optional[Path] = None
+    ) -> Optional[LibrarySnapshot]:
+        """Get the incremental snapshot of a library.
+
+        Args:
+            library_path: Path to library (uses default if None)
+
+        Returns:
+            LibrarySnapshot, or None if metadata.db cannot be read directly
+        """
+        store = self._get_metadata_store(library_path)
+        if store is None:
+            return None
+
+        if store.library_path not in self._snapshots:
+            self._snapshots[store.library_path] = LibrarySnapshot(
+                store, self.cache_dir / "library_snapshot.db"
+            )
+        return self._snapshots[store.library_path]
+
+    def get_library_changes(
+        self, consumer: str, library_path: Optional[Path] = None
+    ) -> Optional[SnapshotDiff]:
+        """
+        Get the books that changed since a command last processed the library.
+
+        Refreshes the library snapshot incrementally before computing the
+        changes. Pass the returned diff to ``mark_library_changes_processed``
+        once the books have been handled.
+
+        Args:
+            consumer: Name of the consuming command (e.g. ``"asin"``)
+            library_path: Path to library (uses default if None)
+
+        Returns:
+            SnapshotDiff, or None if change tracking is unavailable for the
+            library (the caller should then process every book)
+        """
+        snapshot = self._get_snapshot(library_path)
+        if snapshot is None:
+            return None
+
+        try:
+            snapshot.refresh()
+            return snapshot.changes_since(consumer)
+        except MetadataStoreError as e:
+            self.logger.warning(f"Library change tracking unavailable: {e}")
+            return None
+
+    def mark_library_changes_processed(
+        self,
+        consumer: str,
+        changes: SnapshotDiff,
+        library_path: Optional[Path] = None,
+        failed_ids: Iterable[int] = (),
+        written_ids: Iterable[int] = (),
+    ):
+        """
+        Record that a command has processed the given library changes.
+
+        Books in ``failed_ids`` are offered to the command again on its next
+        run. Books the command modified itself (``written_ids``) are not
+        reported back to it as changed.
+
+        Args:
+            consumer: Name of the consuming command
+            changes: SnapshotDiff returned by ``get_library_changes``
+            library_path: Path to library (uses default if None)
+            failed_ids: Ids of books the command could not process
+            written_ids: Ids of books the command wrote to the library
+        """
+        snapshot = self._get_snapshot(library_path)
+        if snapshot is None:
+            return
+
+        written_ids = list(written_ids)
+        own_writes = None
+        if written_ids:
+            try:
+                # Snapshot the command's own writes so they are not changes
+                snapshot.refresh()
+                own_writes = written_ids
+            except MetadataStoreError as e:
+                self.logger.warning(f"Could not refresh library snapshot: {e}")
+
+        snapshot.mark_processed(
+            consumer, changes.generation, pending=failed_ids, own_writes=own_writes
+        )
+
+    def _iter_books_data(
+        self,
+        fields: List[str],
+        library_path: Optional[Path] = None,
+        search: Optional[str] = None,
+        missing_asin: bool = False,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        book_ids: Optional[List[int]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream book records from metadata.db, falling back to calibredb list.
+
+        Args:
+            fields: calibredb field names to read
+            library_path: Path to library (uses default if None)
+            search: Optional Calibre search expression
+            missing_asin: Only return books without an Amazon identifier
+            limit: Maximum number of books to return
+            offset: Number of matching books to skip
+            book_ids: Restrict results to these book ids
+
+        Yields:
+            Book dictionaries in ``calibredb list --for-machine`` shape
+
+        Raises:
+            CalibreError: If the books cannot be read
+        """
+        store = self._get_metadata_store(library_path)
+
+        if store is not None:
+            yielded = 0
+            try:
+                if search:
+                    # Calibre's search language is only implemented by calibredb
+                    matches = self._get_calibre_db(library_path).search_ids(search)
+                    book_ids = (
+                        matches
+                        if book_ids is None
+                        else list(set(matches).intersection(book_ids))
+                    )
+                rows = store.iter_books(
+                    fields,
+                    book_ids=book_ids,
+                    without_identifier="amazon" if missing_asin else None,
+                )
+                start = offset or 0
+                stop = start + limit if limit is not None else None
+                for row in islice(rows, start, stop):
+                    yield row
+                    yielded += 1
+                return
+            except MetadataStoreError as e:
+                if yielded:
+                    raise CalibreError(f"Failed to read metadata.db: {e}")
+                self.logger.warning(f"Direct metadata.db read failed: {e}")
+
+        if book_ids is not None:
+            if not book_ids:
+                return
+            id_query = " or ".join(f"id:{book_id}" for book_id in book_ids)
+            search = f"({search}) and ({id_query})" if search else id_query
+
+        if missing_asin:
+            missing_query = 'not identifiers:"amazon:*"'
+            search = f"({missing_query}) and ({search})" if search else missing_query
+
+        calibre_db = self._get_calibre_db(library_path)
+
+        if limit is None and offset is None:
+            yield from calibre_db.list_books_iter(fields=fields, search=search)
+            return
+
+        # Paged requests are small enough to parse in one go. calibredb list
+        # has no --offset, so fetch up to the end of the page and skip ahead.
+        start = offset or 0
+        result = calibre_db.list_books(
+            fields=fields,
+            search=search,
+            limit=start + limit if limit is not None else None,
+        )
+        if not result.success:
+            raise CalibreError(f"Failed to list books: {result.error}")
+
+        if not result.has_data:
+            return
+
+        try:
+            yield from json.loads(result.output)[start:]
+        except json.JSONDecodeError as e:
+            self.logger.error(f"Failed to parse library data: {e}")
+            raise CalibreError(f"Failed to parse library data: {e}")
+
+    def _read_books_data(self, fields: List[str], **kwargs) -> List[Dict[str, Any]]:
+        """Read book records into a list (see _iter_books_data for arguments)."""
+        return list(self._iter_books_data(fields, **kwargs))
+
     def get_library_stats(
         self,
         library_path: Optional[Path] = None,
@@ -375,135 +860,39 @@ class CalibreIntegration(LoggerMixin):
         self.logger.info("Getting library statistics")
 
         try:
-            # Use provided library path or default
-            if library_path:
-                calibre_db = CalibreDB(library_path, self.cli_path)
-            else:
-                calibre_db = self.calibre_db
-
-            stats = LibraryStats()
-
             if progress_callback:
                 progress_callback(0, "Analyzing library structure...")
 
-            # Get basic book count and metadata
-            result = calibre_db.list_books(
-                fields=["id", "title", "authors", "series", "formats", "size"]
-            )
-            if not result.success:
-                raise CalibreError(f"Failed to list books: {result.error}")
+            # Aggregates are computed inside metadata.db and cached until the
+            # library changes; calibredb output is only streamed as a fallback
+            stats = self._read_library_stats(library_path)
+            if stats is None:
+                stats = self._aggregate_library_stats(
+                    library_path, detailed, progress_callback
+                )
 
-            if result.has_data:
+            if detailed:
+                if progress_callback:
+                    progress_callback(80, "Calculating detailed statistics...")
+
+                # Check for potential duplicates (basic title matching)
                 try:
-                    books_data = json.loads(result.output)
-                    stats.total_books = len(books_data)
-
-                    # Track authors, series, and formats
-                    authors_set = set()
-                    series_set = set()
-                    format_counts = {}
-                    total_size = 0
-
-                    if progress_callback:
-                        progress_callback(20, "Processing book metadata...")
-
-                    for i, book in enumerate(books_data):
-                        # Process authors
-                        if "authors" in book and book["authors"]:
-                            if isinstance(book["authors"], list):
-                                authors_set.update(book["authors"])
-                            else:
-                                # Handle case where authors is a string
-                                authors = book["authors"].split(" & ")
-                                authors_set.update(authors)
-
-                        # Process series
-                        if "series" in book and book["series"]:
-                            series_set.add(book["series"])
-
-                        # Process formats
-                        if "formats" in book and book["formats"]:
-                            for format_name in book["formats"]:
-                                format_counts[format_name.lower()] = (
-                                    format_counts.get(format_name.lower(), 0) + 1
-                                )
-
-                        # Process size
-                        if "size" in book and book["size"]:
-                            try:
-                                total_size += int(book["size"])
-                            except (ValueError, TypeError):
-                                pass
-
-                        # Update progress for large libraries
-                        if progress_callback and i % 1000 == 0:
-                            progress = 20 + int(60 * i / len(books_data))
-                            progress_callback(
-                                progress, f"Processing book {i+1}/{len(books_data)}..."
-                            )
-
-                    stats.total_authors = len(authors_set)
-                    stats.total_series = len(series_set)
-                    stats.library_size = total_size
-                    stats.format_distribution = format_counts
-
-                    # Get top authors if detailed analysis requested
-                    if detailed:
-                        if progress_callback:
-                            progress_callback(80, "Calculating detailed statistics...")
-
-                        # Count books per author
-                        author_counts = {}
-                        for book in books_data:
-                            if "authors" in book and book["authors"]:
-                                if isinstance(book["authors"], list):
-                                    authors = book["authors"]
-                                else:
-                                    authors = book["authors"].split(" & ")
-                                for author in authors:
-                                    author_counts[author] = (
-                                        author_counts.get(author, 0) + 1
-                                    )
-
-                        # Get top 10 authors
-                        stats.top_authors = sorted(
-                            author_counts.items(), key=lambda x: x[1], reverse=True
-                        )[:10]
-
-                        # Check for books without ASIN if custom column exists
-                        try:
-                            asin_result = calibre_db.list_books(
-                                fields=["id", "identifiers"],
-                                search='not identifiers:"amazon:*"',
-                            )
-                            if asin_result.success and asin_result.has_data:
-                                asin_data = json.loads(asin_result.output)
-                                stats.books_without_asin = len(asin_data)
-                        except Exception as e:
-                            self.logger.debug(f"Could not check ASIN status: {e}")
-
-                        # Check for potential duplicates (basic title matching)
-                        try:
-                            duplicate_result = calibre_db.find_duplicates()
-                            if duplicate_result.success and duplicate_result.output:
-                                # Count duplicate groups
-                                duplicate_lines = duplicate_result.output.strip().split(
-                                    "\n"
-                                )
-                                stats.duplicate_titles = len(
-                                    [line for line in duplicate_lines if line.strip()]
-                                )
-                        except Exception as e:
-                            self.logger.debug(f"Could not check duplicates: {e}")
-
-                    if progress_callback:
-                        progress_callback(100, "Library analysis complete")
-
-                    stats.last_updated = datetime.now()
+                    duplicate_result = self._get_calibre_db(
+                        library_path
+                    ).find_duplicates()
+                    if duplicate_result.success and duplicate_result.output:
+                        # Count duplicate groups
+                        duplicate_lines = duplicate_result.output.strip().split("\n")
+                        stats.duplicate_titles = len(
+                            [line for line in duplicate_lines if line.strip()]
+                        )
+                except Exception as e:
+                    self.logger.debug(f"Could not check duplicates: {e}")
 
-                except json.JSONDecodeError as e:
-                    self.logger.error(f"Failed to parse library data: {e}")
-                    raise CalibreError(f"Failed to parse library data: {e}")
+            if progress_callback:
+                progress_callback(100, "Library analysis complete")
+
+            stats.last_updated = datetime.now()
 
             self.logger.info(
                 f"Library analysis complete: {stats.total_books} books, {stats.total_authors} authors"
@@ -516,11 +905,132 @@ class CalibreIntegration(LoggerMixin):
             self.logger.error(f"Failed to get library stats: {e}")
             raise CalibreError(f"Failed to analyze library: {e}")
 
+    def _read_library_stats(
+        self, library_path: Optional[Path] = None
+    ) -> Optional[LibraryStats]:
+        """Get library statistics computed in metadata.db, cached per version.
+
+        Args:
+            library_path: Path to library (uses default if None)
+
+        Returns:
+            LibraryStats, or None if metadata.db cannot be read directly
+        """
+        store = self._get_metadata_store(library_path)
+        if store is None:
+            return None
+
+        try:
+            reader = LibraryStatsReader(store.library_path)
+            version = reader.version_key()
+            stats = self.stats_cache.get(store.library_path, version)
+            if stats is not None:
+                self.logger.debug("Using cached library statistics")
+                return stats
+
+            stats = reader.read_stats()
+            self.stats_cache.put(store.library_path, version, stats)
+            return stats
+        except MetadataStoreError as e:
+            self.logger.debug(f"Computing statistics via calibredb ({e})")
+            return None
+
+    def _aggregate_library_stats(
+        self,
+        library_path: Optional[Path] = None,
+        detailed: bool = False,
+        progress_callback=None,
+    ) -> LibraryStats:
+        """Aggregate library statistics from streamed calibredb output."""
+        stats = LibraryStats()
+
+        # Track authors, series, and formats
+        authors_set = set()
+        series_set = set()
+        format_counts = {}
+        author_counts = {}
+        series_counts = {}
+        total_size = 0
+
+        if progress_callback:
+            progress_callback(20, "Processing book metadata...")
+
+        # Aggregate while streaming so the library is never held in memory
+        books_data = self._iter_books_data(
+            ["id", "title", "authors", "series", "formats", "size"],
+            library_path=library_path,
+        )
+
+        for i, book in enumerate(books_data):
+            stats.total_books += 1
+
+            # Process authors
+            if "authors" in book and book["authors"]:
+                if isinstance(book["authors"], list):
+                    authors = book["authors"]
+                else:
+                    # Handle case where authors is a string
+                    authors = book["authors"].split(" & ")
+                authors_set.update(authors)
+                for author in authors:
+                    author_counts[author] = author_counts.get(author, 0) + 1
+
+            # Process series
+            if "series" in book and book["series"]:
+                series_set.add(book["series"])
+                series_counts[book["series"]] = series_counts.get(book["series"], 0) + 1
+
+            # Process formats
+            if "formats" in book and book["formats"]:
+                for format_name in book["formats"]:
+                    format_counts[format_name.lower()] = (
+                        format_counts.get(format_name.lower(), 0) + 1
+                    )
+
+            # Process size
+            if "size" in book and book["size"]:
+                try:
+                    total_size += int(book["size"])
+                except (ValueError, TypeError):
+                    pass
+
+            # Update progress for large libraries
+            if progress_callback and i % 1000 == 0:
+                progress_callback(50, f"Processing book {i+1}...")
+
+        stats.total_authors = len(authors_set)
+        stats.total_series = len(series_set)
+        stats.library_size = total_size
+        stats.format_distribution = format_counts
+
+        if detailed:
+            # Get top 10 authors and series
+            stats.top_authors = sorted(
+                author_counts.items(), key=lambda x: x[1], reverse=True
+            )[:10]
+            stats.top_series = sorted(
+                series_counts.items(), key=lambda x: x[1], reverse=True
+            )[:10]
+
+            # Check for books without an Amazon identifier
+            try:
+                stats.books_without_asin = sum(
+                    1
+                    for _ in self._iter_books_data(
+                        ["id"], library_path=library_path, missing_asin=True
+                    )
+                )
+            except Exception as e:
+                self.logger.debug(f"Could not check ASIN status: {e}")
+
+        return stats
+
     def get_books_for_asin_update(
         self,
         library_path: Optional[Path] = None,
         filter_pattern: Optional[str] = None,
         missing_only: bool = False,
+        book_ids: Optional[List[int]] = None,
     ) -> List[Book]:
         """
         Get list of books that need ASIN updates.
@@ -529,6 +1039,8 @@ class CalibreIntegration(LoggerMixin):
             library_path: Path to library
             filter_pattern: Pattern to filter books
             missing_only: Only return books without ASINs
+            book_ids: Only consider these book ids (e.g. the ``modified_ids``
+                of ``get_library_changes``)
 
         Returns:
             List of books needing ASIN updates
@@ -536,26 +1048,8 @@ class CalibreIntegration(LoggerMixin):
         self.logger.info("Getting books for ASIN update")
 
         try:
-            # Use provided library path or default
-            if library_path:
-                calibre_db = CalibreDB(library_path, self.cli_path)
-            else:
-                calibre_db = self.calibre_db
-
             books = []
 
-            # Build search query
-            search_query = None
-            if missing_only:
-                # Look for books without Amazon identifier
-                search_query = 'not identifiers:"amazon:*"'
-
-            if filter_pattern:
-                if search_query:
-                    search_query = f"({search_query}) and ({filter_pattern})"
-                else:
-                    search_query = filter_pattern
-
             # Get books from Calibre
             fields = [
                 "id",
@@ -569,28 +1063,23 @@ class CalibreIntegration(LoggerMixin):
                 "formats",
                 "path",
             ]
-            result = calibre_db.list_books(fields=fields, search=search_query)
-
-            if not result.success:
-                raise CalibreError(f"Failed to retrieve books: {result.error}")
+            books_data = self._iter_books_data(
+                fields,
+                library_path=library_path,
+                search=filter_pattern,
+                missing_asin=missing_only,
+                book_ids=book_ids,
+            )
 
-            if result.has_data:
+            for book_data in books_data:
                 try:
-                    books_data = json.loads(result.output)
-
-                    for book_data in books_data:
-                        try:
-                            book = self._convert_calibre_data_to_book(book_data)
-                            books.append(book)
-                        except Exception as e:
-                            self.logger.warning(
-                                f"Failed to convert book data {book_data.get('id', 'unknown')}: {e}"
-                            )
-                            continue
-
-                except json.JSONDecodeError as e:
-                    self.logger.error(f"Failed to parse books data: {e}")
-                    raise CalibreError(f"Failed to parse books data: {e}")
+                    book = self._convert_calibre_data_to_book(book_data)
+                    books.append(book)
+                except Exception as e:
+                    self.logger.warning(
+                        f"Failed to convert book data {book_data.get('id', 'unknown')}: {e}"
+                    )
+                    continue
 
             self.logger.info(f"Retrieved {len(books)} books for ASIN update")
             return books
@@ -690,79 +1179,196 @@ class CalibreIntegration(LoggerMixin):
 
         return book
 
-    def update_asins(self, asin_results: List[Any], dry_run: bool = False) -> int:
+    def update_asins(
+        self,
+        asin_results: List[Any],
+        dry_run: bool = False,
+        library_path: Optional[Path] = None,
+    ) -> int:
         """
         Update ASINs in the Calibre library.
 
         Args:
             asin_results: List of ASIN lookup results with book_id and asin
             dry_run: If True, only simulate updates without making changes
+            library_path: Path to library (uses default if None)
 
         Returns:
             Number of books updated
         """
+        outcomes = self.update_asins_batch(
+            asin_results, dry_run=dry_run, library_path=library_path
+        )
+        return sum(1 for outcome in outcomes if outcome.success)
+
+    def update_asins_batch(
+        self,
+        asin_results: List[Any],
+        dry_run: bool = False,
+        library_path: Optional[Path] = None,
+    ) -> List[ASINUpdateOutcome]:
+        """
+        Write ASINs for many books at once, merging with existing identifiers.
+
+        All updates are applied to metadata.db in a single transaction after
+        backing the database up. If metadata.db cannot be written directly
+        (unknown schema, database locked), each book is updated through
+        calibredb instead, still preserving its other identifiers.
+
+        Args:
+            asin_results: List of ASIN lookup results with book_id and asin
+            dry_run: If True, only simulate updates without making changes
+            library_path: Path to library (uses default if None)
+
+        Returns:
+            One ASINUpdateOutcome per input result
+        """
         self.logger.info(
             f"Updating ASINs for {len(asin_results)} books (dry_run={dry_run})"
         )
 
-        if not asin_results:
-            return 0
+        outcomes: List[ASINUpdateOutcome] = []
+        pending: Dict[int, str] = {}
+
+        for result in asin_results:
+            # Extract data from result (handle different result formats)
+            if hasattr(result, "book_id") and hasattr(result, "asin"):
+                book_id = result.book_id
+                asin = result.asin
+            elif isinstance(result, dict):
+                book_id = result.get("book_id") or result.get("calibre_id")
+                asin = result.get("asin")
+            else:
+                self.logger.warning(f"Unexpected result format: {result}")
+                outcomes.append(
+                    ASINUpdateOutcome(None, None, False, error="Unexpected format")
+                )
+                continue
+
+            if not book_id or not asin:
+                self.logger.warning(f"Missing book_id or ASIN in result: {result}")
+                outcomes.append(
+                    ASINUpdateOutcome(
+                        book_id, asin, False, error="Missing book_id or ASIN"
+                    )
+                )
+                continue
 
-        updated_count = 0
+            pending[int(book_id)] = asin
+
+        if dry_run:
+            for book_id, asin in pending.items():
+                self.logger.info(
+                    f"DRY RUN: Would update book {book_id} with ASIN {asin}"
+                )
+                outcomes.append(ASINUpdateOutcome(book_id, asin, True))
+            self.logger.info(f"Would update {len(pending)} books with ASINs")
+            return outcomes
+
+        if not pending:
+            return outcomes
 
         try:
-            for result in asin_results:
-                try:
-                    # Extract data from result (handle different result formats)
-                    if hasattr(result, "book_id") and hasattr(result, "asin"):
-                        book_id = result.book_id
-                        asin = result.asin
-                    elif isinstance(result, dict):
-                        book_id = result.get("book_id") or result.get("calibre_id")
-                        asin = result.get("asin")
-                    else:
-                        self.logger.warning(f"Unexpected result format: {result}")
-                        continue
+            written = None
+            if self._get_metadata_store(library_path) is not None:
+                written = self._write_asins_direct(pending, library_path)
 
-                    if not book_id or not asin:
-                        self.logger.warning(
-                            f"Missing book_id or ASIN in result: {result}"
-                        )
-                        continue
+            if written is None:
+                written = self._write_asins_calibredb(pending, library_path)
 
-                    if dry_run:
-                        self.logger.info(
-                            f"DRY RUN: Would update book {book_id} with ASIN {asin}"
-                        )
-                        updated_count += 1
-                        continue
+        except CalibreError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Failed to update ASINs: {e}")
+            raise CalibreError(f"ASIN update failed: {e}")
 
-                    # Update the book's Amazon identifier in Calibre
-                    metadata_update = {"identifiers": f"amazon:{asin}"}
+        outcomes.extend(written)
+        updated_count = sum(1 for outcome in written if outcome.success)
+        self.logger.info(f"Updated {updated_count} books with ASINs")
+        return outcomes
 
-                    update_result = self.calibre_db.set_metadata(
-                        int(book_id), metadata_update
-                    )
+    def _write_asins_direct(
+        self, pending: Dict[int, str], library_path: Optional[Path]
+    ) -> Optional[List[ASINUpdateOutcome]]:
+        """Write ASINs to metadata.db in one transaction.
 
-                    if update_result.success:
-                        updated_count += 1
-                        self.logger.debug(f"Updated book {book_id} with ASIN {asin}")
-                    else:
-                        self.logger.warning(
-                            f"Failed to update book {book_id}: {update_result.error}"
-                        )
+        Returns:
+            Per-book outcomes, or None if the direct write was not possible
+        """
+        path = Path(library_path).expanduser() if library_path else self.library_path
 
-                except Exception as e:
-                    self.logger.error(f"Failed to update ASIN for result {result}: {e}")
-                    continue
+        try:
+            writer = CalibreMetadataWriter(path)
+            results = writer.upsert_identifiers(
+                {book_id: {"amazon": asin} for book_id, asin in pending.items()}
+            )
+        except MetadataStoreError as e:
+            self.logger.warning(f"Direct ASIN write failed, using calibredb: {e}")
+            return None
+
+        outcomes = []
+        for book_id, asin in pending.items():
+            write = results[book_id]
+            outcomes.append(
+                ASINUpdateOutcome(
+                    book_id,
+                    asin,
+                    write.success,
+                    previous_asin=(write.previous or {}).get("amazon"),
+                    error=write.error,
+                )
+            )
+        return outcomes
 
-            action = "Would update" if dry_run else "Updated"
-            self.logger.info(f"{action} {updated_count} books with ASINs")
-            return updated_count
+    def _write_asins_calibredb(
+        self, pending: Dict[int, str], library_path: Optional[Path]
+    ) -> List[ASINUpdateOutcome]:
+        """Write ASINs one book at a time through calibredb set_metadata."""
+        calibre_db = self._get_calibre_db(library_path)
 
+        # calibredb replaces the whole identifiers field, so read the current
+        # identifiers once and send the merged set for every book.
+        existing: Dict[int, Dict[str, str]] = {}
+        try:
+            for book_data in self._read_books_data(
+                ["id", "identifiers"], library_path=library_path
+            ):
+                if int(book_data["id"]) in pending:
+                    existing[int(book_data["id"])] = dict(
+                        book_data.get("identifiers") or {}
+                    )
         except Exception as e:
-            self.logger.error(f"Failed to update ASINs: {e}")
-            raise CalibreError(f"ASIN update failed: {e}")
+            self.logger.warning(f"Could not read existing identifiers: {e}")
+
+        outcomes = []
+        for book_id, asin in pending.items():
+            identifiers = existing.get(book_id)
+            if identifiers is None:
+                # Writing only the ASIN would drop every other identifier
+                error = "existing identifiers could not be read"
+                self.logger.warning(f"Skipping book {book_id}: {error}")
+                outcomes.append(ASINUpdateOutcome(book_id, asin, False, error=error))
+                continue
+
+            previous_asin = identifiers.get("amazon")
+            identifiers["amazon"] = asin
+            value = ",".join(f"{key}:{val}" for key, val in identifiers.items())
+
+            update_result = calibre_db.set_metadata(book_id, {"identifiers": value})
+
+            if update_result.success:
+                self.logger.debug(f"Updated book {book_id} with ASIN {asin}")
+                outcomes.append(
+                    ASINUpdateOutcome(book_id, asin, True, previous_asin=previous_asin)
+                )
+            else:
+                self.logger.warning(
+                    f"Failed to update book {book_id}: {update_result.error}"
+                )
+                outcomes.append(
+                    ASINUpdateOutcome(book_id, asin, False, error=update_result.error)
+                )
+        return outcomes
 
     def search_library(
         self,
@@ -787,12 +1393,6 @@ class CalibreIntegration(LoggerMixin):
         self.logger.info(f"Searching library with query: {query}")
 
         try:
-            # Use provided library path or default
-            if library_path:
-                calibre_db = CalibreDB(library_path, self.cli_path)
-            else:
-                calibre_db = self.calibre_db
-
             if progress_callback:
                 progress_callback(0, f"Searching for: {query}")
 
@@ -811,44 +1411,35 @@ class CalibreIntegration(LoggerMixin):
                 "rating",
                 "tags",
             ]
-            result = calibre_db.list_books(
-                fields=fields, search=query, limit=limit, offset=offset
+            books_data = self._read_books_data(
+                fields,
+                library_path=library_path,
+                search=query,
+                limit=limit,
+                offset=offset,
             )
 
-            if not result.success:
-                raise CalibreError(f"Search failed: {result.error}")
-
             books = []
-            if result.has_data:
-                try:
-                    books_data = json.loads(result.output)
-
-                    if progress_callback:
-                        progress_callback(
-                            50, f"Processing {len(books_data)} results..."
-                        )
+            if progress_callback:
+                progress_callback(50, f"Processing {len(books_data)} results...")
 
-                    for i, book_data in enumerate(books_data):
-                        try:
-                            book = self._convert_calibre_data_to_book(book_data)
-                            books.append(book)
-                        except Exception as e:
-                            self.logger.warning(
-                                f"Failed to convert search result {book_data.get('id', 'unknown')}: {e}"
-                            )
-                            continue
-
-                        # Update progress for large result sets
-                        if progress_callback and i % 100 == 0:
-                            progress = 50 + int(50 * i / len(books_data))
-                            progress_callback(
-                                progress,
-                                f"Processing result {i+1}/{len(books_data)}...",
-                            )
+            for i, book_data in enumerate(books_data):
+                try:
+                    book = self._convert_calibre_data_to_book(book_data)
+                    books.append(book)
+                except Exception as e:
+                    self.logger.warning(
+                        f"Failed to convert search result {book_data.get('id', 'unknown')}: {e}"
+                    )
+                    continue
 
-                except json.JSONDecodeError as e:
-                    self.logger.error(f"Failed to parse search results: {e}")
-                    raise CalibreError(f"Failed to parse search results: {e}")
+                # Update progress for large result sets
+                if progress_callback and i % 100 == 0:
+                    progress = 50 + int(50 * i / len(books_data))
+                    progress_callback(
+                        progress,
+                        f"Processing result {i+1}/{len(books_data)}...",
+                    )
 
             if progress_callback:
                 progress_callback(100, f"Search complete: {len(books)} results")
@@ -862,130 +1453,201 @@ class CalibreIntegration(LoggerMixin):
             self.logger.error(f"Search failed: {e}")
             raise CalibreError(f"Search failed: {e}")
 
+    def search_library_page(
+        self,
+        query: str,
+        library_path: Optional[Path] = None,
+        limit: int = 20,
+        offset: int = 0,
+        fields: Optional[List[str]] = None,
+        use_cache: bool = True,
+    ) -> SearchPage:
+        """Fetch one page of search results with only the requested fields.
+
+        The ordered ids matching ``query`` are resolved once with calibredb
+        and cached until metadata.db changes, so later pages only read the
+        rows for their own ids.
+
+        Args:
+            query: Search query string (Calibre search syntax)
+            library_path: Path to library (uses default if None)
+            limit: Maximum number of results on the page
+            offset: Index of the first result on the page
+            fields: calibredb fields to load (defaults to DEFAULT_SEARCH_FIELDS)
+            use_cache: Whether to reuse cached result ids
+
+        Returns:
+            SearchPage with lightweight LibrarySearchRow objects
+        """
+        path = Path(library_path).expanduser() if library_path else self.library_path
+        fields = list(fields or DEFAULT_SEARCH_FIELDS)
+        version = self._library_version(path)
+
+        try:
+            book_ids = None
+            if use_cache and version:
+                book_ids = self.search_cache.get(path, query, version)
+            from_cache = book_ids is not None
+
+            if book_ids is None:
+                book_ids = self._get_calibre_db(library_path).search_ids(query)
+                if use_cache and version:
+                    self.search_cache.put(path, query, version, book_ids)
+
+            page_ids = book_ids[offset : offset + limit]
+            rows_by_id = {
+                int(book_data["id"]): LibrarySearchRow.from_dict(book_data)
+                for book_data in self._iter_books_data(
+                    fields, library_path=library_path, book_ids=page_ids
+                )
+            }
+
+        except CalibreError:
+            raise
+        except Exception as e:
+            self.logger.error(f"Search failed: {e}")
+            raise CalibreError(f"Search failed: {e}")
+
+        self.logger.debug(
+            f"Search page {offset}-{offset + len(page_ids)} of {len(book_ids)} "
+            f"for {query!r} (cached ids: {from_cache})"
+        )
+        return SearchPage(
+            query=query,
+            rows=[rows_by_id[book_id] for book_id in page_ids if book_id in rows_by_id],
+            offset=offset,
+            limit=limit,
+            total=len(book_ids),
+            from_cache=from_cache,
+        )
+
+    def add_books(
+        self, file_paths: List[Path], library_path: Optional[Path] = None
+    ) -> List[int]:
+        """Import book files into the library.
+
+        Args:
+            file_paths: Book files to import
+            library_path: Library to import into (defaults to configured)
+
+        Returns:
+            Ids of the added books (empty if they were already in the library)
+
+        Raises:
+            CalibreError: If calibredb cannot add the files
+        """
+        book_ids = self._get_calibre_db(library_path).add_books(file_paths)
+        self.logger.info(
+            f"Added {len(book_ids)} of {len(file_paths)} books to the library"
+        )
+        return book_ids
+
     def remove_duplicates(
         self,
         library_path: Optional[Path] = None,
         dry_run: bool = True,
         progress_callback=None,
+        match_metadata: bool = True,
+        remove_identifier_matches: bool = False,
     ):
         """Remove duplicate books from the library.
 
+        Duplicates are books with byte-identical files, a shared ISBN or
+        ASIN, or (with ``match_metadata``) the same normalized title and
+        authors. In each group the book with the most preferred format and
+        largest file is kept.
+
+        Only books whose files are identical to a kept book are removed.
+        Books matched by a shared identifier are removed only with
+        ``remove_identifier_matches``; metadata matches are only reported.
+
         Args:
             library_path: Path to library (uses default if None)
             dry_run: If True, only identify duplicates without removing
             progress_callback: Optional progress callback function
+            match_metadata: Also treat matching title/author as duplicates
+            remove_identifier_matches: Also remove books that only share an
+                ISBN or ASIN with a kept book
 
         Returns:
-            Result object with removal details
+            Result object with removal details. Each entry of
+            ``duplicate_groups`` lists the kept book id first.
         """
         self.logger.info(f"Finding duplicate books (dry_run={dry_run})")
 
         @dataclass
         class DuplicateResult:
             duplicates_found: int = 0
+            duplicates_for_review: int = 0
             books_removed: int = 0
             space_freed: int = 0
             space_freed_human: str = "0 B"
             duplicate_groups: List[List[int]] = field(default_factory=list)
+            groups: List[DuplicateGroup] = field(default_factory=list)
 
         try:
-            # Use provided library path or default
-            if library_path:
-                calibre_db = CalibreDB(library_path, self.cli_path)
-            else:
-                calibre_db = self.calibre_db
-
             if progress_callback:
                 progress_callback(0, "Scanning for duplicates...")
 
-            # Find duplicates using Calibre's built-in detection
-            duplicate_result = calibre_db.find_duplicates()
+            books, files = self._read_books_and_files(
+                ["id", "title", "authors", "identifiers", "isbn"], library_path
+            )
 
-            if not duplicate_result.success:
-                self.logger.warning(
-                    f"Duplicate detection failed: {duplicate_result.error}"
-                )
-                return DuplicateResult()
+            finder = DuplicateFinder(
+                hash_cache=FileHashCache(self.cache_dir / "file_hashes.db")
+            )
+            removable_evidence = CONTENT_EVIDENCE
+            if remove_identifier_matches:
+                removable_evidence += IDENTIFIER_EVIDENCE
+            groups = finder.find(
+                books,
+                files,
+                match_metadata=match_metadata,
+                progress_callback=progress_callback,
+                removable_evidence=removable_evidence,
+            )
 
-            result = DuplicateResult()
+            result = DuplicateResult(groups=groups)
+            result.duplicate_groups = [
+                [group.keeper_id, *group.duplicate_ids] for group in groups
+            ]
+            result.duplicates_found = sum(len(group.duplicate_ids) for group in groups)
 
-            if duplicate_result.output and duplicate_result.output.strip():
-                # Parse duplicate output
-                duplicate_lines = duplicate_result.output.strip().split("\n")
-                current_group = []
+            books_to_remove = [
+                book_id for group in groups for book_id in group.removable_ids
+            ]
+            result.duplicates_for_review = result.duplicates_found - len(
+                books_to_remove
+            )
+            removed_ids = set(books_to_remove)
+            result.space_freed = sum(
+                file_info.get("size") or 0
+                for file_info in files
+                if file_info["book_id"] in removed_ids
+            )
+            result.space_freed_human = self._format_size(result.space_freed)
 
-                for line in duplicate_lines:
-                    line = line.strip()
-                    if not line:
-                        if current_group:
-                            result.duplicate_groups.append(current_group)
-                            current_group = []
-                    else:
-                        # Extract book ID from line (format varies)
-                        import re
-
-                        id_match = re.search(r"\b(\d+)\b", line)
-                        if id_match:
-                            book_id = int(id_match.group(1))
-                            current_group.append(book_id)
-
-                # Add last group
-                if current_group:
-                    result.duplicate_groups.append(current_group)
-
-                result.duplicates_found = sum(
-                    len(group) - 1
-                    for group in result.duplicate_groups
-                    if len(group) > 1
+            if progress_callback:
+                progress_callback(
+                    90, f"Found {result.duplicates_found} duplicate books..."
                 )
 
-                if progress_callback:
-                    progress_callback(
-                        50, f"Found {result.duplicates_found} duplicate books..."
-                    )
-
-                # If not dry run, remove duplicates (keep first in each group)
-                if not dry_run and result.duplicate_groups:
-                    books_to_remove = []
+            # If not dry run, remove everything but the keeper of each group
+            if not dry_run and books_to_remove:
+                self.logger.info(f"Removing {len(books_to_remove)} duplicate books")
 
-                    for group in result.duplicate_groups:
-                        if len(group) > 1:
-                            # Keep first book, mark others for removal
-                            books_to_remove.extend(group[1:])
-
-                    if books_to_remove:
-                        self.logger.info(
-                            f"Removing {len(books_to_remove)} duplicate books"
-                        )
-
-                        # Calculate space to be freed (approximate)
-                        try:
-                            # Get sizes of books to remove
-                            size_result = calibre_db.list_books(
-                                fields=["id", "size"],
-                                search=f"id:{','.join(map(str, books_to_remove))}",
-                            )
-                            if size_result.success and size_result.has_data:
-                                size_data = json.loads(size_result.output)
-                                total_size = sum(
-                                    int(book.get("size", 0)) for book in size_data
-                                )
-                                result.space_freed = total_size
-                                result.space_freed_human = self._format_size(total_size)
-                        except Exception as e:
-                            self.logger.debug(f"Could not calculate space savings: {e}")
-
-                        # Remove duplicates
-                        remove_result = calibre_db.remove_books(books_to_remove)
-                        if remove_result.success:
-                            result.books_removed = len(books_to_remove)
-                        else:
-                            self.logger.error(
-                                f"Failed to remove duplicates: {remove_result.error}"
-                            )
-                            raise CalibreError(
-                                f"Duplicate removal failed: {remove_result.error}"
-                            )
+                remove_result = self._get_calibre_db(library_path).remove_books(
+                    books_to_remove
+                )
+                if remove_result.success:
+                    result.books_removed = len(books_to_remove)
+                else:
+                    self.logger.error(
+                        f"Failed to remove duplicates: {remove_result.error}"
+                    )
+                    raise CalibreError(
+                        f"Duplicate removal failed: {remove_result.error}"
+                    )
 
             if progress_callback:
                 progress_callback(100, "Duplicate processing complete")
@@ -1000,6 +1662,48 @@ class CalibreIntegration(LoggerMixin):
             self.logger.error(f"Duplicate processing failed: {e}")
             raise CalibreError(f"Duplicate processing failed: {e}")
 
+    def _read_books_and_files(
+        self, fields: List[str], library_path: Optional[Path] = None
+    ):
+        """Read book rows and the files recorded for each book.
+
+        Args:
+            fields: calibredb fields to read for each book
+            library_path: Path to library (uses default if None)
+
+        Returns:
+            Tuple of (book dictionaries, file dictionaries with ``book_id``,
+            ``format``, ``path`` and ``size``)
+        """
+        store = self._get_metadata_store(library_path)
+        if store is not None:
+            try:
+                return list(store.iter_books(fields)), list(store.iter_files())
+            except MetadataStoreError as e:
+                self.logger.warning(f"Falling back to calibredb: {e}")
+
+        # calibredb reports each format as the full path of the book file
+        books = self._read_books_data(
+            list(dict.fromkeys(fields + ["formats"])), library_path=library_path
+        )
+        files = []
+        for book in books:
+            for file_path in book.get("formats") or []:
+                path = Path(file_path)
+                try:
+                    size = path.stat().st_size
+                except OSError:
+                    size = None
+                files.append(
+                    {
+                        "book_id": int(book["id"]),
+                        "format": path.suffix.lstrip(".").upper(),
+                        "path": path,
+                        "size": size,
+                    }
+                )
+        return books, files
+
     def _format_size(self, size_bytes: int) -> str:
         """Format size in bytes to human-readable string."""
         for unit in ["B", "KB", "MB", "GB", "TB"]:
@@ -1013,13 +1717,26 @@ class CalibreIntegration(LoggerMixin):
         library_path: Optional[Path] = None,
         dry_run: bool = True,
         progress_callback=None,
+        rules: Optional[List[MetadataRule]] = None,
+        max_workers: Optional[int] = None,
     ):
         """Fix common metadata issues in the library.
 
+        Only the fields the rules declare are read. Books are checked in
+        batches on a process pool. Once every book has been read, the fixes
+        of each batch that Calibre does not need to apply itself (see
+        ``CalibreMetadataWriter.WRITABLE_BOOK_COLUMNS``) are written to
+        metadata.db in one transaction, the rest through calibredb.
+        Writing only after the read has finished keeps the read cursor from
+        holding metadata.db's lock while the writer waits for it.
+
         Args:
             library_path: Path to library (uses default if None)
             dry_run: If True, only identify issues without fixing
             progress_callback: Optional progress callback function
+            rules: Metadata rules to run (DEFAULT_RULES if None)
+            max_workers: Worker processes for checking books (CPU count if
+                None)
 
         Returns:
             Result object with fix details
@@ -1031,140 +1748,88 @@ class CalibreIntegration(LoggerMixin):
             issues_found: int = 0
             issues_fixed: int = 0
             issues_by_type: Dict[str, int] = field(default_factory=dict)
+            rule_stats: List[RuleStats] = field(default_factory=list)
 
         try:
-            # Use provided library path or default
-            if library_path:
-                calibre_db = CalibreDB(library_path, self.cli_path)
-            else:
-                calibre_db = self.calibre_db
-
             result = MetadataResult()
 
             if progress_callback:
                 progress_callback(0, "Scanning for metadata issues...")
 
-            # Get all books with metadata
-            fields = [
-                "id",
-                "title",
-                "authors",
-                "series",
-                "series_index",
-                "pubdate",
-                "isbn",
-                "tags",
-            ]
-            book_result = calibre_db.list_books(fields=fields)
-
-            if not book_result.success:
-                raise CalibreError(f"Failed to retrieve books: {book_result.error}")
-
-            if book_result.has_data:
-                books_data = json.loads(book_result.output)
-                total_books = len(books_data)
-
-                for i, book_data in enumerate(books_data):
-                    book_id = book_data.get("id")
-                    if not book_id:
-                        continue
-
-                    issues_found = 0
-                    fixes = {}
-
-                    # Check title issues
-                    title = book_data.get("title", "")
-                    if title:
-                        # Fix title case (simple approach)
-                        if title.isupper() or title.islower():
-                            fixed_title = title.title()
-                            # Don't capitalize common words incorrectly
-                            fixed_title = re.sub(
-                                r"\b(And|Or|But|The|A|An|In|On|At|To|For|Of|With|By)\b",
-                                lambda m: m.group().lower(),
-                                fixed_title,
-                            )
-                            if fixed_title != title:
-                                fixes["title"] = fixed_title
-                                issues_found += 1
-                                result.issues_by_type["title_case"] = (
-                                    result.issues_by_type.get("title_case", 0) + 1
-                                )
-
-                    # Check author name standardization
-                    authors = book_data.get("authors", [])
-                    if authors and isinstance(authors, list):
-                        fixed_authors = []
-                        authors_changed = False
-                        for author in authors:
-                            # Fix author name case
-                            if author.isupper() or author.islower():
-                                fixed_author = author.title()
-                                fixed_authors.append(fixed_author)
-                                authors_changed = True
-                            else:
-                                fixed_authors.append(author)
-
-                        if authors_changed:
-                            fixes["authors"] = " & ".join(fixed_authors)
-                            issues_found += 1
-                            result.issues_by_type["author_case"] = (
-                                result.issues_by_type.get("author_case", 0) + 1
-                            )
-
-                    # Check series index issues
-                    series = book_data.get("series")
-                    series_index = book_data.get("series_index")
-                    if series and series_index is None:
-                        fixes["series_index"] = "1.0"  # Default to first book
-                        issues_found += 1
-                        result.issues_by_type["missing_series_index"] = (
-                            result.issues_by_type.get("missing_series_index", 0) + 1
-                        )
-                    elif series_index is not None:
-                        try:
-                            # Ensure series index is properly formatted
-                            index_float = float(series_index)
-                            if index_float != series_index or index_float <= 0:
-                                fixes["series_index"] = str(
-                                    max(1.0, round(index_float, 1))
-                                )
-                                issues_found += 1
-                                result.issues_by_type["invalid_series_index"] = (
-                                    result.issues_by_type.get("invalid_series_index", 0)
-                                    + 1
-                                )
-                        except (ValueError, TypeError):
-                            fixes["series_index"] = "1.0"
-                            issues_found += 1
-                            result.issues_by_type["invalid_series_index"] = (
-                                result.issues_by_type.get("invalid_series_index", 0) + 1
-                            )
-
-                    result.issues_found += issues_found
-
-                    # Apply fixes if not dry run
-                    if fixes and not dry_run:
-                        fix_result = calibre_db.set_metadata(int(book_id), fixes)
-                        if fix_result.success:
-                            result.issues_fixed += len(fixes)
-                        else:
-                            self.logger.warning(
-                                f"Failed to fix metadata for book {book_id}: {fix_result.error}"
-                            )
-                    elif fixes and dry_run:
-                        result.issues_fixed += len(fixes)  # Count what would be fixed
-
-                    # Update progress
-                    if progress_callback and i % 100 == 0:
-                        progress = int(100 * i / total_books)
-                        progress_callback(
-                            progress, f"Processed {i}/{total_books} books..."
-                        )
+            store = self._get_metadata_store(library_path)
+            total_books = store.count_books() if store is not None else None
+
+            # Worker processes only pay off beyond a single batch of books
+            if total_books is not None and total_books <= DEFAULT_BATCH_SIZE:
+                max_workers = 1
+            engine = MetadataRuleEngine(
+                rules, max_workers=max_workers or os.cpu_count() or 1
+            )
+
+            writer = None
+            if store is not None and not dry_run:
+                try:
+                    writer = CalibreMetadataWriter(store.library_path)
+                    writer.backup()
+                except MetadataStoreError as e:
+                    self.logger.warning(f"Writing fixes through calibredb: {e}")
+                    writer = None
+
+            books_checked = 0
+            pending: List[RuleBatchResult] = []
+
+            for batch in engine.run(
+                self._iter_books_data(engine.fields, library_path=library_path)
+            ):
+                books_checked += batch.books_checked
+                found = sum(len(issues) for issues in batch.issues.values())
+                result.issues_found += found
+
+                if dry_run:
+                    # Count what would be fixed
+                    result.issues_fixed += found
+                    engine.record_fixed(batch.issues, batch.fixes)
+                elif batch.fixes:
+                    pending.append(batch)
+
+                if progress_callback:
+                    if total_books:
+                        progress = min(90, int(90 * books_checked / total_books))
+                        message = f"Processed {books_checked}/{total_books} books..."
+                    else:
+                        progress = 50
+                        message = f"Processed {books_checked} books..."
+                    progress_callback(progress, message)
+
+            # The read cursor is closed now, so writes do not wait for it
+            for batch in pending:
+                fixed_ids = self._apply_metadata_fixes(
+                    batch.fixes, writer, library_path
+                )
+                result.issues_fixed += sum(
+                    len(batch.issues[book_id]) for book_id in fixed_ids
+                )
+                engine.record_fixed(batch.issues, fixed_ids)
+
+            if pending and progress_callback:
+                progress_callback(99, f"Wrote fixes for {result.issues_fixed} issues")
+
+            result.rule_stats = list(engine.stats.values())
+            result.issues_by_type = {
+                stats.name: stats.issues_found
+                for stats in result.rule_stats
+                if stats.issues_found
+            }
 
             if progress_callback:
                 progress_callback(100, "Metadata analysis complete")
 
+            for stats in result.rule_stats:
+                self.logger.debug(
+                    f"Rule {stats.name}: {stats.issues_found} issues in "
+                    f"{stats.books_checked} books ({stats.seconds:.3f}s)"
+                )
+
             action = "Would fix" if dry_run else "Fixed"
             self.logger.info(
                 f"Metadata analysis: found {result.issues_found} issues, {action} {result.issues_fixed}"
@@ -1177,18 +1842,78 @@ class CalibreIntegration(LoggerMixin):
             self.logger.error(f"Metadata fixing failed: {e}")
             raise CalibreError(f"Metadata fixing failed: {e}")
 
+    def _apply_metadata_fixes(
+        self,
+        fixes: Dict[int, Dict[str, Any]],
+        writer: Optional[CalibreMetadataWriter],
+        library_path: Optional[Path] = None,
+    ) -> List[int]:
+        """Write the fixes of one batch of books.
+
+        Args:
+            fixes: Mapping of book id to ``{field: value}``
+            writer: Direct metadata.db writer, or None to use calibredb only
+            library_path: Path to library (uses default if None)
+
+        Returns:
+            Ids of books whose fixes were all written
+        """
+        direct: Dict[int, Dict[str, Any]] = {}
+        through_calibredb: Dict[int, Dict[str, Any]] = {}
+        for book_id, book_fixes in fixes.items():
+            for name, value in book_fixes.items():
+                if writer is not None and name in writer.WRITABLE_BOOK_COLUMNS:
+                    direct.setdefault(book_id, {})[name] = value
+                else:
+                    through_calibredb.setdefault(book_id, {})[name] = value
+
+        failed = set()
+        if direct:
+            try:
+                written = writer.update_book_columns(direct, backup=False)
+                failed.update(book_id for book_id, ok in written.items() if not ok)
+            except MetadataStoreError as e:
+                self.logger.warning(f"Direct metadata write failed: {e}")
+                for book_id, columns in direct.items():
+                    through_calibredb.setdefault(book_id, {}).update(columns)
+
+        for book_id, book_fixes in through_calibredb.items():
+            calibre_db = self._get_calibre_db(library_path)
+            fix_result = calibre_db.set_metadata(book_id, book_fixes)
+            if not fix_result.success:
+                failed.add(book_id)
+                self.logger.warning(
+                    f"Failed to fix metadata for book {book_id}: {fix_result.error}"
+                )
+
+        return [book_id for book_id in fixes if book_id not in failed]
+
     def cleanup_orphaned_files(
         self,
         library_path: Optional[Path] = None,
         dry_run: bool = True,
         progress_callback=None,
+        report_path: Optional[Path] = None,
+        from_report: Optional[Path] = None,
+        remove_all_orphans: bool = False,
     ):
         """Clean up orphaned files in the library.
 
+        Compares the book files recorded in the library's metadata with a
+        parallel walk of the library directory. Orphaned temporary files are
+        removed; other orphaned files and extra directories only with
+        ``remove_all_orphans``, after checking them against the library's
+        current book paths. Missing files are only reported.
+
         Args:
             library_path: Path to library (uses default if None)
             dry_run: If True, only identify files without removing
             progress_callback: Optional progress callback function
+            report_path: Write the JSON orphan report to this path
+            from_report: Delete the entries of a previously written report
+                instead of scanning the library again
+            remove_all_orphans: Also remove orphaned non-temporary files and
+                extra directories
 
         Returns:
             Result object with cleanup details
@@ -1198,105 +1923,75 @@ class CalibreIntegration(LoggerMixin):
         @dataclass
         class CleanupResult:
             orphaned_files_found: int = 0
+            missing_files_found: int = 0
+            extra_directories_found: int = 0
             files_removed: int = 0
             space_freed: int = 0
             space_freed_human: str = "0 B"
             orphaned_paths: List[Path] = field(default_factory=list)
+            report: Optional[OrphanReport] = None
 
         try:
-            # Use provided library path or default
-            target_library = library_path if library_path else self.library_path
+            target_library = (
+                Path(library_path).expanduser() if library_path else self.library_path
+            )
+            scanner = OrphanScanner(target_library)
 
             if progress_callback:
                 progress_callback(0, "Scanning library for orphaned files...")
 
-            # First, let Calibre check its own library
-            if library_path:
-                calibre_db = CalibreDB(library_path, self.cli_path)
+            books, files = self._read_books_and_files(["id", "path"], library_path)
+            book_dirs = [book["path"] for book in books if book.get("path")]
+            if from_report:
+                report = OrphanReport.from_json(from_report)
             else:
-                calibre_db = self.calibre_db
-
-            check_result = calibre_db.check_library()
-            result = CleanupResult()
-
-            if check_result.success and check_result.output:
-                # Parse Calibre's library check output
-                lines = check_result.output.strip().split("\n")
-                orphaned_files = []
-
-                for line in lines:
-                    if "orphaned" in line.lower() or "missing" in line.lower():
-                        # Extract file paths from output (basic pattern matching)
-                        import re
-
-                        path_match = re.search(r"([^\s]+\.\w+)", line)
-                        if path_match:
-                            orphaned_files.append(path_match.group(1))
-
-                result.orphaned_files_found = len(orphaned_files)
-
-            if progress_callback:
-                progress_callback(30, "Checking file system for additional orphans...")
-
-            # Additional manual scan for common orphaned file patterns
-            orphaned_patterns = [
-                "**/*.tmp",
-                "**/*.bak",
-                "**/.DS_Store",
-                "**/Thumbs.db",
-                "**/*~",
-                "**/*.part",
-            ]
-
-            additional_orphans = []
-            for pattern in orphaned_patterns:
-                for orphan_file in target_library.glob(pattern):
-                    if orphan_file.is_file():
-                        additional_orphans.append(orphan_file)
-                        result.orphaned_paths.append(orphan_file)
-
-            result.orphaned_files_found += len(additional_orphans)
+                report = scanner.scan(
+                    files, book_dirs, progress_callback=progress_callback
+                )
+                if report_path:
+                    report.write_json(report_path)
+                    self.logger.info(f"Orphan report written to {report_path}")
+
+            result = CleanupResult(
+                orphaned_files_found=len(report.orphaned_files),
+                missing_files_found=len(report.missing_files),
+                extra_directories_found=len(report.extra_directories),
+                space_freed=report.reclaimable_size,
+                orphaned_paths=[
+                    target_library / entry.path
+                    for entry in report.orphaned_files + report.extra_directories
+                ],
+                report=report,
+            )
 
             if progress_callback:
                 progress_callback(
-                    60, f"Found {result.orphaned_files_found} orphaned files..."
+                    80, f"Found {result.orphaned_files_found} orphaned files..."
                 )
 
-            # Calculate total size
-            total_size = 0
-            for orphan_path in result.orphaned_paths:
-                try:
-                    if orphan_path.exists():
-                        total_size += orphan_path.stat().st_size
-                except (OSError, IOError):
-                    continue
-
-            result.space_freed = total_size
-            result.space_freed_human = self._format_size(total_size)
-
             # Remove files if not dry run
-            if not dry_run and result.orphaned_paths:
-                removed_count = 0
-                for orphan_path in result.orphaned_paths:
-                    try:
-                        if orphan_path.exists():
-                            orphan_path.unlink()
-                            removed_count += 1
-                            self.logger.debug(f"Removed orphaned file: {orphan_path}")
-                    except (OSError, IOError) as e:
-                        self.logger.warning(f"Failed to remove {orphan_path}: {e}")
-                        continue
-
-                result.files_removed = removed_count
+            if not dry_run:
+                result.files_removed, result.space_freed = scanner.delete_orphans(
+                    report,
+                    include_temporary_only=not remove_all_orphans,
+                    expected_files=files,
+                    book_dirs=book_dirs,
+                )
+
+            result.space_freed_human = self._format_size(result.space_freed)
 
             if progress_callback:
                 progress_callback(100, "File cleanup complete")
 
-            action = "Would remove" if dry_run else "Removed"
+            if dry_run:
+                action, removed = "Would remove", len(result.orphaned_paths)
+            else:
+                action, removed = "Removed", result.files_removed
             self.logger.info(
                 f"File cleanup: found {result.orphaned_files_found} orphaned files, "
-                f"{action} {result.files_removed if not dry_run else result.orphaned_files_found} "
-                f"({result.space_freed_human})"
+                f"{result.missing_files_found} missing files and "
+                f"{result.extra_directories_found} extra directories; "
+                f"{action} {removed} ({result.space_freed_human})"
             )
             return result
 
@@ -1363,10 +2058,18 @@ class CalibreIntegration(LoggerMixin):
     ):
         """Export library to different formats.
 
+        Books are streamed from the library to the export file, which is
+        written atomically. With ``include_files`` the book files are
+        hardlinked (or copied across filesystems) into
+        ``<destination stem>_files/``, mirroring the library layout. The
+        ``calibre`` format exports into the destination directory instead:
+        ``metadata.ndjson`` plus all book files.
+
         Args:
             source_path: Source library path
             destination_path: Destination path for export
-            export_format: Format for export ('csv', 'json', 'xml')
+            export_format: Format for export ('csv', 'json', 'ndjson', 'xml',
+                'parquet' or 'calibre')
             include_files: Whether to include book files in export
             filter_pattern: Pattern to filter books for export
             progress_callback: Optional progress callback function
@@ -1384,113 +2087,64 @@ class CalibreIntegration(LoggerMixin):
             export_size: int = 0
             export_size_human: str = "0 B"
             export_path: Path = destination_path
+            files_exported: int = 0
+            files_linked: int = 0
+            files_size: int = 0
             success: bool = False
 
         try:
-            # Create destination directory if needed
-            destination_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # Use source library
-            calibre_db = CalibreDB(source_path, self.cli_path)
             result = ExportResult()
+            export_format = export_format.lower()
+
+            if export_format == "calibre":
+                metadata_path = destination_path / "metadata.ndjson"
+                files_dir = destination_path
+                export_format = "ndjson"
+                include_files = True
+            else:
+                metadata_path = destination_path
+                files_dir = destination_path.with_name(f"{destination_path.stem}_files")
 
             if progress_callback:
                 progress_callback(0, "Preparing library export...")
 
-            if export_format.lower() == "csv":
-                # Export as CSV using Calibre's built-in functionality
-                export_result = calibre_db.export(destination_path, "csv")
+            exporter = LibraryExporter(source_path)
+            exported_ids: List[int] = []
 
-                if export_result.success:
-                    result.success = True
+            def books() -> Iterator[Dict[str, Any]]:
+                for book in self._iter_books_data(
+                    EXPORT_FIELDS, library_path=source_path, search=filter_pattern
+                ):
+                    if include_files:
+                        exported_ids.append(int(book["id"]))
+                    yield book
 
-                    # Count books exported
-                    if filter_pattern:
-                        count_result = calibre_db.list_books(
-                            search=filter_pattern, fields=["id"]
-                        )
-                    else:
-                        count_result = calibre_db.list_books(fields=["id"])
+            if progress_callback:
+                progress_callback(20, "Writing book data...")
 
-                    if count_result.success and count_result.has_data:
-                        books_data = json.loads(count_result.output)
-                        result.book_count = len(books_data)
+            result.book_count = exporter.write(
+                books(), metadata_path, export_format, progress_callback
+            )
+            result.export_size = metadata_path.stat().st_size
 
-            else:
-                # For JSON/XML, we need to export manually
+            if include_files and exported_ids:
                 if progress_callback:
-                    progress_callback(20, "Retrieving book data...")
-
-                fields = [
-                    "id",
-                    "title",
-                    "authors",
-                    "series",
-                    "series_index",
-                    "isbn",
-                    "identifiers",
-                    "pubdate",
-                    "rating",
-                    "tags",
-                    "formats",
-                    "size",
-                    "path",
-                ]
-
-                books_result = calibre_db.list_books(
-                    fields=fields, search=filter_pattern
-                )
-
-                if not books_result.success:
-                    raise CalibreError(
-                        f"Failed to retrieve books for export: {books_result.error}"
+                    progress_callback(
+                        70, f"Exporting files of {len(exported_ids)} books..."
                     )
+                (
+                    result.files_exported,
+                    result.files_size,
+                    result.files_linked,
+                ) = exporter.export_files(
+                    self._iter_book_files(exported_ids, library_path=source_path),
+                    files_dir,
+                    progress_callback,
+                )
+                result.export_size += result.files_size
 
-                if books_result.has_data:
-                    books_data = json.loads(books_result.output)
-                    result.book_count = len(books_data)
-
-                    if progress_callback:
-                        progress_callback(60, f"Formatting {len(books_data)} books...")
-
-                    if export_format.lower() == "json":
-                        with open(destination_path, "w", encoding="utf-8") as f:
-                            json.dump(
-                                books_data, f, indent=2, default=str, ensure_ascii=False
-                            )
-                        result.success = True
-
-                    elif export_format.lower() == "xml":
-                        import xml.etree.ElementTree as ET
-
-                        root = ET.Element("library")
-                        for book in books_data:
-                            book_elem = ET.SubElement(root, "book")
-                            for key, value in book.items():
-                                if value is not None:
-                                    elem = ET.SubElement(book_elem, key)
-                                    elem.text = str(value)
-
-                        tree = ET.ElementTree(root)
-                        tree.write(
-                            str(destination_path),
-                            encoding="utf-8",
-                            xml_declaration=True,
-                        )
-                        result.success = True
-
-                    else:
-                        raise CalibreError(
-                            f"Unsupported export format: {export_format}"
-                        )
-
-            if progress_callback:
-                progress_callback(80, "Calculating export size...")
-
-            # Calculate export file size
-            if destination_path.exists():
-                result.export_size = destination_path.stat().st_size
-                result.export_size_human = self._format_size(result.export_size)
+            result.export_size_human = self._format_size(result.export_size)
+            result.success = True
 
             if progress_callback:
                 progress_callback(100, "Export complete")
@@ -1506,3 +2160,40 @@ class CalibreIntegration(LoggerMixin):
         except Exception as e:
             self.logger.error(f"Library export failed: {e}")
             raise CalibreError(f"Library export failed: {e}")
+
+    def _iter_book_files(
+        self, book_ids: List[int], library_path: Optional[Path] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream the files recorded for the given books.
+
+        Args:
+            book_ids: Books whose files to list
+            library_path: Path to library (uses default if None)
+
+        Yields:
+            File dictionaries with ``book_id``, ``format``, ``path`` and ``size``
+        """
+        store = self._get_metadata_store(library_path)
+        if store is not None:
+            try:
+                yield from store.iter_files(book_ids)
+                return
+            except MetadataStoreError as e:
+                self.logger.warning(f"Falling back to calibredb: {e}")
+
+        # calibredb reports each format as the full path of the book file.
+        # Ids are queried in chunks to keep the search expression short.
+        for start in range(0, len(book_ids), 500):
+            for book in self._iter_books_data(
+                ["id", "formats"],
+                library_path=library_path,
+                book_ids=book_ids[start : start + 500],
+            ):
+                for file_path in book.get("formats") or []:
+                    path = Path(file_path)
+                    yield {
+                        "book_id": int(book["id"]),
+                        "format": path.suffix.lstrip(".").upper(),
+                        "path": path,
+                        "size": None,
+                    }
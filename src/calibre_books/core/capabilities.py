@@ -0,0 +1,209 @@
+"""
+Capability registry for Calibre Books CLI.
+
+Checking what the local Calibre installation can do means running
+subprocesses (``calibre-customize -l``, ``ebook-convert --version``, ...)
+that take a noticeable fraction of a second each. The registry runs every
+probe once and remembers the result, in memory and on disk, keyed by a
+fingerprint of what the result depends on: the resolved paths and
+modification times of the probed binaries plus any extra watched paths
+(such as Calibre's plugin directory). Installing, upgrading or removing
+Calibre or a plugin changes the fingerprint, and the next lookup probes
+again.
+
+A single registry is shared per process (see ``get_capability_registry``),
+so FormatConverter, KFXConverter and the CLI commands reuse each other's
+probes.
+"""
+
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Default location of the persisted probe results
+DEFAULT_CAPABILITIES_PATH = Path("~/.book-tool/cache/capabilities.json")
+
+# Install locations of Kindle Previewer 3
+KINDLE_PREVIEWER_PATHS = (
+    "/Applications/Kindle Previewer 3.app",  # macOS
+    "/usr/local/bin/kindle-previewer",  # Linux
+    "C:\\Program Files (x86)\\Amazon\\Kindle Previewer 3\\Kindle Previewer.exe",
+)
+
+
+def calibre_config_dir() -> Path:
+    """Calibre's configuration directory on this platform."""
+    if os.environ.get("CALIBRE_CONFIG_DIRECTORY"):
+        return Path(os.environ["CALIBRE_CONFIG_DIRECTORY"])
+    if sys.platform == "darwin":
+        return Path("~/Library/Preferences/calibre").expanduser()
+    if sys.platform == "win32":
+        return Path(os.environ.get("APPDATA", "~")).expanduser() / "calibre"
+    return Path("~/.config/calibre").expanduser()
+
+
+def calibre_plugin_paths() -> Tuple[Path, ...]:
+    """Paths that change when Calibre plugins are added or removed."""
+    config_dir = calibre_config_dir()
+    return (config_dir / "plugins", config_dir / "customize.py.json")
+
+
+class CapabilityRegistry:
+    """
+    Memoized, persisted results of capability probes.
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            cache_path: JSON file the probe results are persisted to; None
+                keeps them in memory only
+        """
+        self.cache_path = Path(cache_path).expanduser() if cache_path else None
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.RLock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Read persisted entries on first use."""
+        if self._entries is None:
+            self._entries = {}
+            if self.cache_path and self.cache_path.exists():
+                try:
+                    with open(self.cache_path, "r", encoding="utf-8") as f:
+                        self._entries = json.load(f)
+                except (OSError, ValueError) as e:
+                    self.logger.debug(f"Ignoring unreadable capability cache: {e}")
+        return self._entries
+
+    def _save(self):
+        """Write all entries atomically."""
+        if not self.cache_path:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.cache_path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self._entries, f, indent=2)
+                os.replace(tmp_name, self.cache_path)
+            except BaseException:
+                Path(tmp_name).unlink(missing_ok=True)
+                raise
+        except (OSError, TypeError) as e:
+            self.logger.debug(f"Failed to persist capability cache: {e}")
+
+    @staticmethod
+    def fingerprint(
+        binaries: Iterable[str] = (), watch: Iterable[Path] = ()
+    ) -> Optional[List[List[Any]]]:
+        """
+        Fingerprint the files a probe result depends on.
+
+        Args:
+            binaries: Executables looked up on PATH
+            watch: Additional paths whose modification time matters; missing
+                paths are part of the fingerprint too
+
+        Returns:
+            List of [path, mtime_ns] pairs, or None if a binary is not on
+            PATH (results are then not memoized, so installing the tool
+            takes effect immediately)
+        """
+        parts: List[List[Any]] = []
+        for binary in binaries:
+            path = shutil.which(binary)
+            if not path:
+                return None
+            try:
+                parts.append([os.path.realpath(path), os.stat(path).st_mtime_ns])
+            except OSError:
+                return None
+        for path in watch:
+            try:
+                parts.append([str(path), os.stat(path).st_mtime_ns])
+            except OSError:
+                parts.append([str(path), None])
+        return parts
+
+    def probe(
+        self,
+        name: str,
+        probe_fn: Callable[[], Any],
+        binaries: Iterable[str] = (),
+        watch: Iterable[Path] = (),
+    ) -> Any:
+        """
+        Get a capability, running its probe only if nothing it depends on
+        changed since the last probe.
+
+        Args:
+            name: Capability name
+            probe_fn: Function computing the JSON-serializable value; a None
+                result means the probe failed and is not remembered
+            binaries: Executables the result depends on
+            watch: Other paths the result depends on
+
+        Returns:
+            Probe result
+
+        Raises:
+            Exception: Whatever ``probe_fn`` raises (not remembered)
+        """
+        fingerprint = self.fingerprint(binaries, watch)
+        # Hold the lock while probing, so concurrent conversions starting at
+        # the same time probe only once
+        with self._lock:
+            entry = self._load().get(name)
+            if (
+                fingerprint is not None
+                and entry
+                and entry.get("fingerprint") == fingerprint
+            ):
+                return entry["value"]
+
+            value = probe_fn()
+            if fingerprint is not None and value is not None:
+                self._entries[name] = {"fingerprint": fingerprint, "value": value}
+                self._save()
+            return value
+
+    def clear(self):
+        """Forget all probe results, forcing every capability to be probed again."""
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+
+_registry: Optional[CapabilityRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_capability_registry() -> CapabilityRegistry:
+    """Get the process-wide capability registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = CapabilityRegistry(DEFAULT_CAPABILITIES_PATH)
+        return _registry
+
+
+def set_capability_registry(registry: Optional[CapabilityRegistry]):
+    """
+    Replace the process-wide capability registry.
+
+    Args:
+        registry: Registry to use, or None to create the default one on
+            next use
+    """
+    global _registry
+    with _registry_lock:
+        _registry = registry
@@ -5,21 +5,35 @@ This module provides specialized KFX conversion functionality that extends
 the base FormatConverter with KFX-specific features and optimizations.
 """
 
+import json
 import subprocess
 import os
+import re
 import time
-import concurrent.futures
 from pathlib import Path
 from threading import Lock
-from typing import List, Optional, Dict, TYPE_CHECKING, Union
+from typing import Iterable, List, Optional, Dict, Tuple, TYPE_CHECKING, Union
 
+from ...utils.files import partial_output_path
 from ...utils.logging import LoggerMixin
 from ..book import Book, BookFormat, ConversionResult
+from ..capabilities import KINDLE_PREVIEWER_PATHS
+from ..conversion_scheduler import (
+    DEFAULT_JOB_TIMEOUT,
+    ConversionJob,
+    run_limited,
+)
 from ..converter import FormatConverter
+from ..library_snapshot import LibrarySnapshot
+from ..metadata_store import CalibreMetadataStore, MetadataStoreError
 
 if TYPE_CHECKING:
     from ...config.manager import ConfigManager
 
+# Library formats converted by convert_library_to_kfx, most preferred first
+# (the order of Calibre's own input format preference)
+LIBRARY_KFX_SOURCE_FORMATS = ("EPUB", "AZW3", "MOBI", "AZW", "PDF")
+
 
 class KFXConverter(LoggerMixin):
     """
@@ -129,12 +143,10 @@ class KFXConverter(LoggerMixin):
             if not self._format_converter.validate_kfx_plugin():
                 return False
 
-            # Additional KFX plugin validation
-            result = subprocess.run(
-                ["calibre-customize", "-l"], capture_output=True, text=True, timeout=10
-            )
-
-            if result.returncode != 0:
+            # Additional KFX plugin validation on the plugin list the base
+            # validation already probed
+            plugins = self._format_converter.list_calibre_plugins()
+            if plugins is None:
                 return False
 
             # Check for specific KFX plugin features
@@ -144,9 +156,7 @@ class KFXConverter(LoggerMixin):
             ]
 
             for pattern in kfx_patterns:
-                import re
-
-                if re.search(pattern, result.stdout, re.IGNORECASE):
+                if re.search(pattern, plugins, re.IGNORECASE):
                     self.logger.info(
                         "Advanced KFX Output plugin validated successfully"
                     )
@@ -160,13 +170,15 @@ class KFXConverter(LoggerMixin):
 
     def _check_kindle_previewer(self) -> bool:
         """Check if Kindle Previewer 3 is available."""
-        previewer_paths = [
-            "/Applications/Kindle Previewer 3.app",  # macOS
-            "/usr/local/bin/kindle-previewer",  # Linux
-            "C:\\Program Files (x86)\\Amazon\\Kindle Previewer 3\\Kindle Previewer.exe",  # Windows
-        ]
+        return self._format_converter.capabilities.probe(
+            "kindle_previewer",
+            self._find_kindle_previewer,
+            watch=[Path(path) for path in KINDLE_PREVIEWER_PATHS],
+        )
 
-        for path in previewer_paths:
+    def _find_kindle_previewer(self) -> bool:
+        """Look for a Kindle Previewer 3 installation."""
+        for path in KINDLE_PREVIEWER_PATHS:
             if os.path.exists(path):
                 self.logger.debug(f"Found Kindle Previewer at: {path}")
                 return True
@@ -197,6 +209,7 @@ class KFXConverter(LoggerMixin):
         preserve_metadata: bool = True,
         progress_callback=None,
         dry_run: bool = False,
+        resume: bool = False,
     ) -> List[ConversionResult]:
         """
         Convert multiple books to KFX format with enhanced options.
@@ -204,11 +217,13 @@ class KFXConverter(LoggerMixin):
         Args:
             books: List of Book objects to convert
             output_dir: Output directory (uses config default if None)
-            parallel: Number of parallel workers (uses config default if None)
+            parallel: Number of parallel workers (sized from the configuration
+                and machine resources if None)
             quality: Conversion quality setting
             preserve_metadata: Whether to preserve metadata
             progress_callback: Progress callback function
             dry_run: If True, only validate without converting
+            resume: Continue an interrupted batch from its job journal
 
         Returns:
             List of ConversionResult objects
@@ -252,12 +267,10 @@ class KFXConverter(LoggerMixin):
         # Use configured defaults if not specified
         if output_dir is None:
             output_dir = self.output_path
-        if parallel is None:
-            parallel = self.max_workers
 
         self.logger.info(
             f"Converting {len(valid_books)} books to KFX format "
-            f"(parallel: {parallel}, quality: {quality})"
+            f"(parallel: {parallel or 'auto'}, quality: {quality})"
         )
 
         # Use the base converter's regular batch conversion to convert TO KFX
@@ -271,6 +284,7 @@ class KFXConverter(LoggerMixin):
             preserve_metadata=preserve_metadata,
             progress_callback=progress_callback,
             dry_run=dry_run,
+            resume=resume,
         )
 
         # Combine results from invalid books and successful conversions
@@ -398,29 +412,66 @@ class KFXConverter(LoggerMixin):
                     error=error_msg,
                 )
 
+        # ebook-convert writes next to the output, which is only replaced
+        # once the conversion succeeded
+        partial_path = partial_output_path(output_path)
+
         try:
             # Build enhanced KFX conversion command
             cmd = self._build_enhanced_kfx_command(
                 input_path=input_path,
-                output_path=output_path,
+                output_path=partial_path,
                 conversion_options=conversion_options,
             )
 
+            # Reuse the output of an identical earlier conversion
+            cache_key = self._format_converter._conversion_cache_key(
+                input_path, "kfx", cmd
+            )
+            if cache_key:
+                method = self._format_converter.conversion_cache.fetch(
+                    cache_key, output_path
+                )
+                if method:
+                    self.logger.info(
+                        f"Reused cached KFX conversion of {input_path.name} ({method})"
+                    )
+                    return ConversionResult(
+                        input_file=input_path,
+                        output_file=output_path,
+                        input_format=self._format_converter._detect_format(input_path)
+                        or BookFormat.EPUB,
+                        output_format=BookFormat.KFX,
+                        success=True,
+                        conversion_time=time.time() - start_time,
+                        file_size_before=input_path.stat().st_size,
+                        file_size_after=output_path.stat().st_size,
+                        from_cache=True,
+                    )
+
             with self._conversion_lock:
                 self.logger.info(f"Converting: {input_path.name} → KFX")
 
             self.logger.debug(f"KFX command: {' '.join(str(x) for x in cmd)}")
 
-            # Execute conversion with timeout
-            result = subprocess.run(
-                cmd, capture_output=True, text=True, timeout=600  # 10 minute timeout
+            # Execute conversion in a resource limited child process
+            result = run_limited(
+                cmd,
+                self._format_converter.resource_limits,
+                timeout=DEFAULT_JOB_TIMEOUT,
+                progress_callback=progress_callback,
             )
 
             conversion_time = time.time() - start_time
             success = result.returncode == 0
 
-            if success and output_path.exists():
+            if success and partial_path.exists():
+                os.replace(partial_path, output_path)
                 file_size_after = output_path.stat().st_size
+                if cache_key:
+                    self._format_converter.conversion_cache.store(
+                        cache_key, output_path
+                    )
 
                 with self._conversion_lock:
                     self.logger.info(
@@ -443,8 +494,11 @@ class KFXConverter(LoggerMixin):
                     file_size_after=file_size_after,
                 )
             else:
+                # Only the tail of the conversion log is kept
                 error_msg = (
-                    result.stderr.strip() if result.stderr else "KFX conversion failed"
+                    result.stderr.strip()
+                    or result.stdout.strip()
+                    or "KFX conversion failed"
                 )
 
                 with self._conversion_lock:
@@ -464,7 +518,10 @@ class KFXConverter(LoggerMixin):
                 )
 
         except subprocess.TimeoutExpired:
-            error_msg = f"KFX conversion timeout (600s exceeded) for {input_path.name}"
+            error_msg = (
+                f"KFX conversion timeout ({DEFAULT_JOB_TIMEOUT}s exceeded) "
+                f"for {input_path.name}"
+            )
             self.logger.error(error_msg)
             return ConversionResult(
                 input_file=input_path,
@@ -491,6 +548,9 @@ class KFXConverter(LoggerMixin):
                 conversion_time=time.time() - start_time,
                 file_size_before=input_path.stat().st_size,
             )
+        finally:
+            # Never leave a partially written output behind
+            partial_path.unlink(missing_ok=True)
 
     def _build_enhanced_kfx_command(
         self,
@@ -560,6 +620,8 @@ class KFXConverter(LoggerMixin):
         input_formats: Optional[List[str]] = None,
         dry_run: bool = False,
         progress_callback=None,
+        resume: bool = False,
+        parallel: Optional[int] = None,
     ) -> List[ConversionResult]:
         """
         Parallel batch conversion of directory to KFX format.
@@ -573,6 +635,10 @@ class KFXConverter(LoggerMixin):
             input_formats: List of input formats to include
             dry_run: If True, only show what would be converted
             progress_callback: Progress callback function
+            resume: Continue an interrupted batch from its job journal and
+                retry failed conversions with backoff
+            parallel: Number of parallel workers (sized from the configuration
+                and machine resources if None)
 
         Returns:
             List of ConversionResult objects
@@ -645,20 +711,54 @@ class KFXConverter(LoggerMixin):
 
             return results
 
-        # Parallel conversion using ThreadPoolExecutor
-        conversion_jobs = []
-        for candidate in filtered_candidates:
-            output_filename = f"{candidate.stem}_kfx.azw3"
-            output_path = output_dir / output_filename
-
-            # Skip if already exists
-            if not output_path.exists():
-                conversion_jobs.append(
-                    {
-                        "input_path": candidate,
-                        "output_path": output_path,
-                    }
+        return self._run_kfx_jobs(
+            [
+                ConversionJob(
+                    input_file=candidate,
+                    output_file=output_dir / f"{candidate.stem}_kfx.azw3",
+                    output_format="kfx",
                 )
+                for candidate in filtered_candidates
+            ],
+            progress_callback=progress_callback,
+            resume=resume,
+            parallel=parallel,
+        )
+
+    def _run_kfx_jobs(
+        self,
+        jobs: List[ConversionJob],
+        progress_callback=None,
+        resume: bool = False,
+        parallel: Optional[int] = None,
+    ) -> List[ConversionResult]:
+        """
+        Run KFX conversion jobs on a single shared worker pool.
+
+        Jobs are journaled per output directory, so one batch may write into
+        any number of directories while the pool stays saturated.
+
+        Args:
+            jobs: Conversion jobs of the batch
+            progress_callback: Called with (fraction, message) after each job
+            resume: Continue interrupted jobs and retry failed ones
+            parallel: Number of workers (sized from the configuration and
+                machine resources if None)
+
+        Returns:
+            List of ConversionResult objects in completion order
+        """
+        # Skip conversions finished by this or an earlier run
+        jobs_by_dir: Dict[Path, List[ConversionJob]] = {}
+        for job in jobs:
+            jobs_by_dir.setdefault(job.output_file.parent, []).append(job)
+
+        journals = {}
+        conversion_jobs = []
+        for output_dir, dir_jobs in jobs_by_dir.items():
+            journal = self._format_converter._journal(output_dir)
+            journals[output_dir] = journal
+            conversion_jobs.extend(journal.plan(dir_jobs, resume=resume))
 
         if not conversion_jobs:
             self.logger.info("All files already converted to KFX")
@@ -669,53 +769,59 @@ class KFXConverter(LoggerMixin):
         results = []
         completed = 0
 
-        with concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.max_workers
-        ) as executor:
-            # Submit all jobs
-            future_to_job = {
-                executor.submit(
-                    self.convert_single_to_kfx, job["input_path"], job["output_path"]
-                ): job
-                for job in conversion_jobs
-            }
+        # Resource limited conversions, longest expected first
+        cost_model = self._format_converter.cost_model
+        scheduler = self._format_converter._scheduler(
+            self._format_converter.effective_parallel(parallel),
+            list(journals.values()),
+        )
+        for job, future in scheduler.run(
+            conversion_jobs,
+            lambda job: journals[job.output_file.parent].run(
+                job,
+                lambda job: self.convert_single_to_kfx(job.input_file, job.output_file),
+                retry=resume,
+            ),
+        ):
+            try:
+                result = future.result()
+                results.append(result)
+                completed += 1
+                cost_model.observe(job, result)
 
-            # Collect results as they complete
-            for future in concurrent.futures.as_completed(future_to_job):
-                job = future_to_job[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                    completed += 1
-
-                    # Progress reporting
-                    if progress_callback:
-                        progress_percentage = completed / len(conversion_jobs)
-                        status_msg = f"KFX {completed}/{len(conversion_jobs)}"
-                        if result.success:
-                            status_msg += f" - ✓ {result.input_file.name}"
-                        else:
-                            status_msg += f" - ✗ {result.input_file.name}"
-                        progress_callback(progress_percentage, status_msg)
-
-                except Exception as exc:
-                    # Handle unexpected exceptions
-                    error_result = ConversionResult(
-                        input_file=job["input_path"],
-                        output_file=job["output_path"],
-                        input_format=self._format_converter._detect_format(
-                            job["input_path"]
-                        )
-                        or BookFormat.EPUB,
-                        output_format=BookFormat.KFX,
-                        success=False,
-                        error=f"Unexpected KFX conversion error: {str(exc)}",
-                    )
-                    results.append(error_result)
-                    completed += 1
+                # Progress reporting
+                if progress_callback:
+                    progress_percentage = completed / len(conversion_jobs)
+                    status_msg = f"KFX {completed}/{len(conversion_jobs)}"
+                    if result.success:
+                        status_msg += f" - ✓ {result.input_file.name}"
+                    else:
+                        status_msg += f" - ✗ {result.input_file.name}"
+                    progress_callback(progress_percentage, status_msg)
+
+            except Exception as exc:
+                # Handle unexpected exceptions
+                error_result = ConversionResult(
+                    input_file=job.input_file,
+                    output_file=job.output_file,
+                    input_format=self._format_converter._detect_format(job.input_file)
+                    or BookFormat.EPUB,
+                    output_format=BookFormat.KFX,
+                    success=False,
+                    error=f"Unexpected KFX conversion error: {str(exc)}",
+                )
+                results.append(error_result)
+                completed += 1
+
+                self.logger.error(
+                    f"✗ KFX job for {job.input_file.name} generated exception: {exc}"
+                )
 
-                    self.logger.error(
-                        f"✗ KFX job for {job['input_path'].name} generated exception: {exc}"
+                if progress_callback:
+                    progress_callback(
+                        completed / len(conversion_jobs),
+                        f"KFX {completed}/{len(conversion_jobs)}"
+                        f" - ✗ {job.input_file.name}",
                     )
 
         # Summary
@@ -728,6 +834,9 @@ class KFXConverter(LoggerMixin):
         self.logger.info(f"  ✓ Successful: {len(successful)}")
         self.logger.info(f"  ✗ Failed: {len(failed)}")
         self.logger.info(f"  📊 Total KFX output: {total_size:.1f} MB")
+        estimate = cost_model.summary(scheduler.expected_costs, results)
+        if estimate:
+            self.logger.info(f"  ⏱️ {estimate}")
 
         if failed:
             self.logger.warning("Failed KFX conversions:")
@@ -744,18 +853,26 @@ class KFXConverter(LoggerMixin):
         limit: Optional[int] = None,
         dry_run: bool = False,
         progress_callback=None,
+        changed_only: bool = False,
+        resume: bool = False,
     ) -> List[ConversionResult]:
         """
         Convert books from Calibre library to KFX format.
 
-        This method provides library-based conversion similar to the legacy
-        ParallelKFXConverter but with enhanced CLI integration.
+        The source file of every selected book is chosen from metadata.db
+        up front (the most preferred of its formats, see
+        ``LIBRARY_KFX_SOURCE_FORMATS``; calibredb lists the books if
+        metadata.db cannot be read) and converted on one shared worker
+        pool, with progress reported per book.
 
         Args:
             book_filter: Search filter for selecting books
             limit: Maximum number of books to convert
             dry_run: If True, only show what would be converted
             progress_callback: Progress callback function
+            changed_only: Only convert books added or changed since the last
+                changed-only library conversion
+            resume: Continue interrupted conversions from their job journals
 
         Returns:
             List of ConversionResult objects
@@ -770,85 +887,93 @@ class KFXConverter(LoggerMixin):
             self.logger.error(error_msg)
             raise RuntimeError(error_msg)
 
-        try:
-            # Build calibredb command
-            cmd = ["calibredb", "--library-path", str(self.library_path)]
-            cmd.extend(["list", "--fields", "id,title,authors,formats,path"])
+        # Restrict to books changed since the last changed-only conversion
+        snapshot = None
+        changes = None
+        changed_ids = None
+        if changed_only:
+            try:
+                snapshot = LibrarySnapshot(CalibreMetadataStore(self.library_path))
+                snapshot.refresh()
+                changes = snapshot.changes_since("kfx")
+            except MetadataStoreError as e:
+                self.logger.warning(
+                    f"Library change tracking unavailable, checking all books: {e}"
+                )
+                snapshot = None
+
+            if changes is not None:
+                changed_ids = set(changes.modified_ids)
+                if not changed_ids:
+                    self.logger.info(
+                        "No library books changed since last KFX conversion"
+                    )
+                    return []
 
+        try:
+            book_ids = None
             if book_filter:
-                cmd.extend(["-s", book_filter])
-            if limit:
-                cmd.extend(["--limit", str(limit)])
+                book_ids = set(self._search_library_ids(book_filter))
+            if changed_ids is not None:
+                book_ids = changed_ids if book_ids is None else book_ids & changed_ids
 
+            # Enumerate every source file up front from metadata.db
             self.logger.info(f"Querying Calibre library: {self.library_path}")
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+            try:
+                store = CalibreMetadataStore(self.library_path)
+                books = self._library_books_needing_kfx(
+                    store.iter_books(["title", "authors", "formats"], book_ids),
+                    limit,
+                )
+                book_jobs = self._library_kfx_jobs(store.iter_files(books))
+            except MetadataStoreError as e:
+                self.logger.warning(f"Direct metadata.db read failed: {e}")
+                records, book_files = self._calibredb_library_books(book_ids)
+                books = self._library_books_needing_kfx(records, limit)
+                book_jobs = self._library_kfx_jobs(
+                    book_file
+                    for book_file in book_files
+                    if book_file["book_id"] in books
+                )
+            jobs = list(book_jobs.values())
 
-            if result.returncode != 0:
-                error_msg = f"Failed to query Calibre library: {result.stderr}"
-                self.logger.error(error_msg)
-                raise RuntimeError(error_msg)
-
-            # Parse library books
-            books = []
-            lines = result.stdout.strip().split("\n")[1:]  # Skip header
-
-            for line in lines:
-                if line.strip():
-                    parts = line.split("\t")
-                    if len(parts) >= 5:
-                        book_id, title, authors, formats, path = parts[:5]
-
-                        # Check if KFX conversion is needed
-                        if "KFX" not in formats.upper():
-                            book_path = self.library_path / path
-                            if book_path.exists():
-                                books.append(
-                                    {
-                                        "id": book_id,
-                                        "title": title,
-                                        "authors": authors,
-                                        "formats": formats,
-                                        "path": book_path,
-                                    }
-                                )
-
-            if not books:
+            if not jobs:
                 self.logger.info("No books found needing KFX conversion")
+                if snapshot is not None and not dry_run:
+                    snapshot.mark_processed("kfx", changes.generation)
                 return []
 
-            self.logger.info(f"Found {len(books)} library books for KFX conversion")
+            self.logger.info(
+                f"Found {len(jobs)} of {len(books)} library books with a source "
+                f"file for KFX conversion (workers: {self.max_workers})"
+            )
 
             if dry_run:
                 self.logger.info("DRY RUN: Library KFX conversion preview")
-                for book in books:
+                for book in books.values():
                     self.logger.info(
-                        f"Would convert: {book['title']} by {book['authors']}"
+                        f"Would convert: {book['title']} by "
+                        f"{' & '.join(book['authors'])}"
                     )
                 return []
 
-            # Convert each book directory
-            all_results = []
-            for i, book in enumerate(books):
-                self.logger.info(
-                    f"Converting library book ({i + 1}/{len(books)}): {book['title']}"
-                )
-
-                try:
-                    # Convert all files in the book's directory
-                    book_results = self.parallel_batch_convert(
-                        input_dir=book["path"],
-                        dry_run=False,
-                        progress_callback=progress_callback,
-                    )
-                    all_results.extend(book_results)
+            # All files share one worker pool, so small books do not leave
+            # workers idle while a large one converts
+            results = self._run_kfx_jobs(
+                jobs, progress_callback=progress_callback, resume=resume
+            )
 
-                except Exception as e:
-                    self.logger.error(
-                        f"Failed to convert library book {book['title']}: {e}"
-                    )
-                    # Continue with next book
+            if snapshot is not None:
+                # Books whose conversion failed are converted again next time
+                failed_files = {r.input_file for r in results if not r.success}
+                failed_ids = [
+                    book_id
+                    for book_id, job in book_jobs.items()
+                    if job.input_file in failed_files
+                ]
+                snapshot.mark_processed("kfx", changes.generation, pending=failed_ids)
 
-            return all_results
+            return results
 
         except subprocess.TimeoutExpired:
             error_msg = "Timeout querying Calibre library"
@@ -859,6 +984,146 @@ class KFXConverter(LoggerMixin):
             self.logger.error(error_msg)
             raise RuntimeError(error_msg)
 
+    def _search_library_ids(self, book_filter: str) -> List[int]:
+        """Resolve a Calibre search expression to book ids with calibredb."""
+        cmd = ["calibredb", "--library-path", str(self.library_path)]
+        cmd.extend(["search", book_filter])
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+
+        if result.returncode != 0:
+            # calibredb exits non-zero when the search simply has no matches
+            if "no books" in result.stderr.lower():
+                return []
+            error_msg = f"Failed to query Calibre library: {result.stderr}"
+            self.logger.error(error_msg)
+            raise RuntimeError(error_msg)
+
+        return [int(book_id) for book_id in re.findall(r"\d+", result.stdout)]
+
+    def _calibredb_library_books(self, book_ids=None) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Read library books and their files with calibredb.
+
+        Used when metadata.db cannot be read directly, e.g. because its
+        schema version is unknown.
+
+        Args:
+            book_ids: Restrict the result to these book ids
+
+        Returns:
+            Tuple of (book dictionaries shaped like
+            ``CalibreMetadataStore.iter_books``, file dictionaries shaped
+            like ``CalibreMetadataStore.iter_files``), in id order
+
+        Raises:
+            RuntimeError: If calibredb fails
+        """
+        if book_ids is not None and not book_ids:
+            return [], []
+
+        cmd = ["calibredb", "--library-path", str(self.library_path)]
+        cmd.extend(["list", "--for-machine", "--fields", "id,title,authors,formats"])
+        if book_ids is not None:
+            cmd.extend(["--search", " or ".join(f"id:{i}" for i in sorted(book_ids))])
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+
+        if result.returncode != 0:
+            error_msg = f"Failed to query Calibre library: {result.stderr}"
+            self.logger.error(error_msg)
+            raise RuntimeError(error_msg)
+
+        books = []
+        book_files = []
+        for record in sorted(json.loads(result.stdout or "[]"), key=lambda r: r["id"]):
+            # calibredb lists the full path of every format file
+            paths = [Path(path) for path in record.get("formats") or []]
+            books.append(
+                {
+                    "id": record["id"],
+                    "title": record.get("title", ""),
+                    "authors": [
+                        author.strip()
+                        for author in (record.get("authors") or "").split("&")
+                        if author.strip()
+                    ],
+                    "formats": [path.suffix[1:].upper() for path in paths],
+                }
+            )
+            book_files.extend(
+                {
+                    "book_id": record["id"],
+                    "format": path.suffix[1:].upper(),
+                    "path": path,
+                    "size": None,
+                }
+                for path in paths
+            )
+        return books, book_files
+
+    def _library_books_needing_kfx(
+        self, records: Iterable[Dict], limit: Optional[int] = None
+    ) -> Dict[int, Dict]:
+        """
+        Select library books without a KFX format.
+
+        Args:
+            records: Book dictionaries with ``id``, ``title``, ``authors``
+                and ``formats``, in id order
+            limit: Maximum number of books to select
+
+        Returns:
+            Book dictionaries by book id, in id order
+        """
+        books = {}
+        for book in records:
+            if "KFX" in (fmt.upper() for fmt in book.get("formats", [])):
+                continue
+            books[book["id"]] = book
+            if limit and len(books) >= limit:
+                break
+        return books
+
+    def _library_kfx_jobs(self, book_files: Iterable[Dict]) -> Dict[int, ConversionJob]:
+        """
+        Build one conversion job per book.
+
+        The formats of a book are copies of the same text, so only its most
+        preferred source format (see ``LIBRARY_KFX_SOURCE_FORMATS``) is
+        converted; all of them would write the same output file. Outputs
+        go to a ``kfx_output`` directory inside each book directory.
+
+        Args:
+            book_files: File dictionaries of the books to convert, shaped
+                like ``CalibreMetadataStore.iter_files``
+
+        Returns:
+            ConversionJob objects by book id
+        """
+        sources: Dict[int, Dict] = {}
+        for book_file in book_files:
+            if book_file["format"] not in LIBRARY_KFX_SOURCE_FORMATS:
+                continue
+            path = book_file["path"]
+            if not path.exists():
+                self.logger.warning(f"Library file missing, skipping: {path}")
+                continue
+            current = sources.get(book_file["book_id"])
+            if current is None or LIBRARY_KFX_SOURCE_FORMATS.index(
+                book_file["format"]
+            ) < LIBRARY_KFX_SOURCE_FORMATS.index(current["format"]):
+                sources[book_file["book_id"]] = book_file
+
+        jobs: Dict[int, ConversionJob] = {}
+        for book_id, book_file in sources.items():
+            path = book_file["path"]
+            jobs[book_id] = ConversionJob(
+                input_file=path,
+                output_file=path.parent / "kfx_output" / f"{path.stem}_kfx.azw3",
+                output_format="kfx",
+                input_size=book_file["size"] or -1,
+            )
+        return jobs
+
     def install_kfx_plugin_guidance(self):
         """
         Provide guidance for KFX Output plugin installation.
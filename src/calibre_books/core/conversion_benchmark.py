@@ -0,0 +1,770 @@
+"""
+Conversion benchmarking for Calibre Books CLI.
+
+This module measures batch conversion throughput on synthetic corpora, so
+conversion performance can be tracked across versions without a real
+library. It complements the ASIN lookup benchmarks in ``benchmark.py``:
+results are plain dataclasses saved as JSON and two runs are compared
+metric by metric.
+
+Corpora are generated deterministically from a seed: EPUBs with XHTML
+chapters and PNG images, MOBI 6 files with uncompressed text and image
+records, and plain text files. Image density is the fraction of each
+book's content that is image data.
+"""
+
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import struct
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+from .. import __version__
+from .converter import FormatConverter
+
+# Formats the corpus generator can produce
+CORPUS_FORMATS = ("epub", "mobi", "txt")
+
+# Approximate size of a single generated image
+IMAGE_CHUNK_SIZE = 32 * 1024
+
+# Size of the text of one EPUB chapter and of one MOBI text record
+CHAPTER_SIZE = 16 * 1024
+MOBI_RECORD_SIZE = 4096
+
+# Seconds between samples of the conversion processes' memory use
+MEMORY_SAMPLE_INTERVAL = 0.05
+
+_WORDS = (
+    "the of and to in a is that for it as was with be by on not he this are "
+    "or his from at which but have an they you were her she there one all "
+    "we their been has when who will more no if out so said what up its "
+    "about into than them can only other new some could time these two may "
+    "then do first any my now such like our over man me even most made "
+    "after also did many before must through back years where much your "
+    "way well down should because each just those people how too little "
+    "state good very make world still own see men work long get here "
+    "between both life being under never day same another know while last "
+    "might us great old year off come since against go came right used take"
+).split()
+
+
+@dataclass
+class CorpusSpec:
+    """Shape of a synthetic benchmark corpus."""
+
+    formats: Sequence[str] = CORPUS_FORMATS
+    files_per_format: int = 10
+    size_kb: int = 200  # Approximate uncompressed content per book
+    image_density: float = 0.3  # Fraction of content that is image data
+    seed: int = 0
+
+
+@dataclass
+class ConversionBenchmarkResult:
+    """Result of one benchmark configuration."""
+
+    test_name: str
+    converter: str  # "format" or "kfx"
+    output_format: str
+    workers: int
+    quality: str
+    file_count: int
+    input_bytes: int
+    total_time: float
+    success_count: int
+    success_rate: float
+    error_count: int
+    errors: List[str]
+    timestamp: str
+
+    # Throughput
+    files_per_second: float
+    mb_per_second: float
+
+    # Per job latency: p50, p95, max
+    timing_percentiles: Dict[str, float] = field(default_factory=dict)
+
+    # Resource usage
+    cpu_utilisation: Optional[float] = None  # Percent of all cores
+    peak_memory_usage: Optional[int] = None  # Peak RSS of all children in bytes
+
+    # Environment, to tell apart runs of different versions
+    tool_version: str = __version__
+    calibre_version: Optional[str] = None
+    cpu_count: int = field(default_factory=lambda: os.cpu_count() or 1)
+
+    @property
+    def key(self) -> Tuple[str, str, int, str]:
+        """Configuration identifying comparable results."""
+        return (self.converter, self.output_format, self.workers, self.quality)
+
+
+@dataclass
+class ConversionBenchmarkComparison:
+    """Comparison between two results of the same configuration."""
+
+    baseline: ConversionBenchmarkResult
+    optimized: ConversionBenchmarkResult
+    improvements: Dict[str, float]  # Percentage improvements
+    regressions: Dict[str, float]  # Percentage regressions
+    overall_improvement: float  # Overall performance improvement percentage
+
+
+def _random_text(rng: random.Random, size: int) -> str:
+    """Generate roughly ``size`` characters of ASCII prose."""
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def _paragraphs(rng: random.Random, size: int) -> List[str]:
+    """Split ``size`` characters of prose into paragraphs."""
+    paragraphs = []
+    while size > 0:
+        length = min(size, rng.randint(400, 1200))
+        paragraphs.append(_random_text(rng, length))
+        size -= length
+    return paragraphs
+
+
+def _png(rng: random.Random, size: int) -> bytes:
+    """Generate an incompressible RGB PNG of roughly ``size`` bytes."""
+    width = 128
+    height = max(1, size // (width * 3 + 1))
+    raw = b"".join(
+        b"\x00" + rng.getrandbits(width * 3 * 8).to_bytes(width * 3, "little")
+        for _ in range(height)
+    )
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data))
+            + tag
+            + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+        )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw, 1))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _content_plan(spec: CorpusSpec) -> Tuple[int, List[int]]:
+    """Split a book's size into text length and image sizes."""
+    total = max(1, spec.size_kb) * 1024
+    density = min(max(spec.image_density, 0.0), 0.95)
+    image_bytes = int(total * density)
+    count = math.ceil(image_bytes / IMAGE_CHUNK_SIZE)
+    images = [image_bytes // count] * count if count else []
+    return total - image_bytes, images
+
+
+def _write_epub(path: Path, title: str, rng: random.Random, spec: CorpusSpec):
+    """Write a synthetic EPUB 2 book."""
+    text_size, image_sizes = _content_plan(spec)
+    chapter_count = max(1, math.ceil(text_size / CHAPTER_SIZE))
+    images = [_png(rng, size) for size in image_sizes]
+
+    manifest = []
+    spine = []
+    nav_points = []
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as book:
+        book.writestr(
+            zipfile.ZipInfo("mimetype"), "application/epub+zip", zipfile.ZIP_STORED
+        )
+        book.writestr(
+            "META-INF/container.xml",
+            '<?xml version="1.0"?>\n'
+            '<container version="1.0" '
+            'xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="OEBPS/content.opf" '
+            'media-type="application/oebps-package+xml"/></rootfiles>'
+            "</container>",
+        )
+
+        for i, image in enumerate(images):
+            book.writestr(f"OEBPS/images/img{i}.png", image)
+            manifest.append(
+                f'<item id="img{i}" href="images/img{i}.png" media-type="image/png"/>'
+            )
+
+        for chapter in range(chapter_count):
+            body = "".join(
+                f"<p>{p}</p>" for p in _paragraphs(rng, text_size // chapter_count)
+            )
+            # Spread the images evenly across the chapters
+            for i in range(len(images)):
+                if i % chapter_count == chapter:
+                    body += f'<p><img src="images/img{i}.png" alt=""/></p>'
+            book.writestr(
+                f"OEBPS/chapter{chapter}.xhtml",
+                '<?xml version="1.0" encoding="utf-8"?>\n'
+                '<html xmlns="http://www.w3.org/1999/xhtml">'
+                f"<head><title>Chapter {chapter + 1}</title></head>"
+                f"<body><h1>Chapter {chapter + 1}</h1>{body}</body></html>",
+            )
+            manifest.append(
+                f'<item id="c{chapter}" href="chapter{chapter}.xhtml" '
+                'media-type="application/xhtml+xml"/>'
+            )
+            spine.append(f'<itemref idref="c{chapter}"/>')
+            nav_points.append(
+                f'<navPoint id="n{chapter}" playOrder="{chapter + 1}">'
+                f"<navLabel><text>Chapter {chapter + 1}</text></navLabel>"
+                f'<content src="chapter{chapter}.xhtml"/></navPoint>'
+            )
+
+        book.writestr(
+            "OEBPS/toc.ncx",
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">'
+            f"<head/><docTitle><text>{title}</text></docTitle>"
+            f"<navMap>{''.join(nav_points)}</navMap></ncx>",
+        )
+        book.writestr(
+            "OEBPS/content.opf",
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="2.0" '
+            'unique-identifier="uid">'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f"<dc:title>{title}</dc:title><dc:creator>Benchmark Author</dc:creator>"
+            f'<dc:identifier id="uid">benchmark-{title}</dc:identifier>'
+            "<dc:language>en</dc:language></metadata>"
+            '<manifest><item id="ncx" href="toc.ncx" '
+            'media-type="application/x-dtbncx+xml"/>'
+            f"{''.join(manifest)}</manifest>"
+            f'<spine toc="ncx">{"".join(spine)}</spine></package>',
+        )
+
+
+def _write_mobi(path: Path, title: str, rng: random.Random, spec: CorpusSpec):
+    """Write a synthetic MOBI 6 book with uncompressed text records."""
+    text_size, image_sizes = _content_plan(spec)
+    body = "".join(f"<p>{p}</p>" for p in _paragraphs(rng, text_size))
+    for i in range(len(image_sizes)):
+        body += f'<p><img recindex="{i + 1:05d}"/></p>'
+    text = f"<html><head></head><body>{body}</body></html>".encode("ascii")
+
+    text_records = [
+        text[i : i + MOBI_RECORD_SIZE] for i in range(0, len(text), MOBI_RECORD_SIZE)
+    ]
+    first_image = len(text_records) + 1
+    name = title.encode("ascii")
+
+    palmdoc = struct.pack(
+        ">HHIHHHH", 1, 0, len(text), len(text_records), MOBI_RECORD_SIZE, 0, 0
+    )
+    unknown = b"\xff" * 4
+    mobi = (
+        b"MOBI"
+        + struct.pack(">IIIII", 232, 2, 65001, rng.getrandbits(32), 6)
+        + unknown * 10  # No index records
+        + struct.pack(">III", first_image, 248, len(name))
+        + struct.pack(">IIIII", 9, 0, 0, 6, first_image)
+        + struct.pack(">IIIII", 0, 0, 0, 0, 0)  # No huffman tables, no EXTH
+        + bytes(32)
+        + unknown * 2
+        + struct.pack(">III", 0, 0, 0)  # No DRM
+        + bytes(8)
+        + struct.pack(">HHI", 1, len(text_records), 1)
+        + unknown
+        + struct.pack(">I", 1)
+        + unknown
+        + struct.pack(">I", 1)
+        + bytes(8)
+        + unknown
+        + struct.pack(">II", 0, 0)
+        + unknown
+        + struct.pack(">I", 0)  # No trailing entries in text records
+        + unknown
+    )
+    header = palmdoc + mobi + name
+    header += bytes(4 - len(header) % 4 + 4)
+
+    records = (
+        [header]
+        + text_records
+        + [_png(rng, size) for size in image_sizes]
+        + [b"\xe9\x8e\r\n"]
+    )
+
+    # Dates are left at zero so that a spec always produces identical bytes
+    pdb_header = struct.pack(
+        ">32sHHIIIIII4s4sIIH",
+        name[:31],
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        b"BOOK",
+        b"MOBI",
+        2 * len(records) - 1,
+        0,
+        len(records),
+    )
+    offset = len(pdb_header) + 8 * len(records) + 2
+    record_list = b""
+    for i, record in enumerate(records):
+        record_list += struct.pack(">II", offset, 2 * i)
+        offset += len(record)
+
+    path.write_bytes(pdb_header + record_list + b"\x00\x00" + b"".join(records))
+
+
+def _write_txt(path: Path, title: str, rng: random.Random, spec: CorpusSpec):
+    """Write a synthetic plain text book (image density does not apply)."""
+    text_size = max(1, spec.size_kb) * 1024
+    path.write_text(
+        f"{title}\n\n" + "\n\n".join(_paragraphs(rng, text_size)), encoding="ascii"
+    )
+
+
+_WRITERS = {"epub": _write_epub, "mobi": _write_mobi, "txt": _write_txt}
+
+
+def generate_corpus(output_dir: Path, spec: CorpusSpec) -> List[Path]:
+    """
+    Generate a synthetic benchmark corpus.
+
+    The same spec always produces byte-identical books.
+
+    Args:
+        output_dir: Directory to write the books to
+        spec: Corpus shape
+
+    Returns:
+        Paths of the generated books
+
+    Raises:
+        ValueError: If a requested format cannot be generated
+    """
+    unsupported = [fmt for fmt in spec.formats if fmt.lower() not in _WRITERS]
+    if unsupported:
+        raise ValueError(
+            f"Cannot generate {', '.join(unsupported)} books; "
+            f"supported formats: {', '.join(CORPUS_FORMATS)}"
+        )
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(spec.seed)
+    files = []
+    for fmt in spec.formats:
+        fmt = fmt.lower()
+        for i in range(spec.files_per_format):
+            title = f"Benchmark {fmt.upper()} {i + 1:04d}"
+            path = output_dir / f"benchmark_{fmt}_{i + 1:04d}.{fmt}"
+            _WRITERS[fmt](path, title, rng, spec)
+            files.append(path)
+    return files
+
+
+def _cpu_seconds() -> Optional[float]:
+    """CPU seconds used so far by this process and its finished children."""
+    if resource is None:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _descendant_rss(pid: int) -> int:
+    """
+    Combined resident memory of the live descendants of a process.
+
+    Args:
+        pid: Process whose children, grandchildren etc. are summed
+
+    Returns:
+        RSS in bytes, read from /proc
+    """
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                # The command name may contain spaces, the fields after it not
+                ppid = int(f.read().rsplit(b")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue  # Exited meanwhile
+        children.setdefault(ppid, []).append(int(name))
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    rss = 0
+    pending = list(children.get(pid, []))
+    while pending:
+        child = pending.pop()
+        pending.extend(children.get(child, []))
+        try:
+            with open(f"/proc/{child}/statm", "rb") as f:
+                rss += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return rss
+
+
+class _ChildMemorySampler:
+    """
+    Track the peak combined RSS of this process's children during a run.
+
+    ``ru_maxrss`` cannot be used for this: it is the largest single child
+    of the whole process lifetime, so it never goes down between runs and
+    ignores that several conversions run at once. Instead the live child
+    processes are sampled every ``interval`` seconds on Linux; children
+    living shorter than that may be missed.
+    """
+
+    def __init__(self, interval: float = MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self) -> "_ChildMemorySampler":
+        if os.path.isdir("/proc/self"):
+            self.peak = 0
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._thread.is_alive():
+            self._stop.set()
+            self._thread.join()
+
+    def _sample(self) -> None:
+        pid = os.getpid()
+        while True:
+            self.peak = max(self.peak, _descendant_rss(pid))
+            if self._stop.wait(self.interval):
+                return
+
+
+class ConversionBenchmark:
+    """
+    Benchmark batch conversions over worker counts and quality settings.
+    """
+
+    def __init__(
+        self,
+        converter: FormatConverter,
+        kfx_converter=None,
+    ):
+        """
+        Initialize the benchmark.
+
+        Args:
+            converter: FormatConverter running ``convert_batch``
+            kfx_converter: KFXConverter running ``parallel_batch_convert``,
+                required for KFX benchmarks
+        """
+        self.converter = converter
+        self.kfx_converter = kfx_converter
+        self.logger = logging.getLogger(__name__)
+
+        # Cached outputs would measure the cache, not the conversion
+        for format_converter in (
+            converter,
+            getattr(kfx_converter, "_format_converter", None),
+        ):
+            if format_converter is not None:
+                format_converter.cache_enabled = False
+
+    def run_matrix(
+        self,
+        files: List[Path],
+        output_format: str = "epub",
+        workers: Sequence[int] = (1, 2, 4),
+        qualities: Sequence[str] = ("high",),
+        work_dir: Optional[Path] = None,
+        test_name: str = "Conversion Benchmark",
+        progress_callback=None,
+    ) -> List[ConversionBenchmarkResult]:
+        """
+        Run a benchmark for every combination of worker count and quality.
+
+        Args:
+            files: Corpus to convert
+            output_format: Target format; ``kfx`` uses the KFX converter
+            workers: Worker counts to measure
+            qualities: Quality settings to measure (ignored for KFX)
+            work_dir: Directory for conversion outputs (temporary if None)
+            test_name: Name of the benchmark run
+            progress_callback: Called with a description before each run
+
+        Returns:
+            One result per configuration
+        """
+        if output_format == "kfx":
+            qualities = qualities[:1]
+
+        results = []
+        with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+            for quality in qualities:
+                for worker_count in workers:
+                    if progress_callback:
+                        progress_callback(
+                            f"{output_format} with {worker_count} workers, "
+                            f"{quality} quality"
+                        )
+                    # Fresh output directory, so no run skips converted books
+                    output_dir = Path(tmp) / f"{quality}_{worker_count}"
+                    results.append(
+                        self.run_benchmark(
+                            files,
+                            output_dir,
+                            output_format=output_format,
+                            workers=worker_count,
+                            quality=quality,
+                            test_name=test_name,
+                        )
+                    )
+        return results
+
+    def run_benchmark(
+        self,
+        files: List[Path],
+        output_dir: Path,
+        output_format: str = "epub",
+        workers: int = 2,
+        quality: str = "high",
+        test_name: str = "Conversion Benchmark",
+    ) -> ConversionBenchmarkResult:
+        """
+        Convert a corpus once and measure the batch.
+
+        Args:
+            files: Corpus to convert
+            output_dir: Empty directory for the outputs
+            output_format: Target format; ``kfx`` uses the KFX converter
+            workers: Number of parallel conversions
+            quality: Conversion quality setting
+            test_name: Name of the benchmark run
+
+        Returns:
+            Benchmark result
+        """
+        self.logger.info(
+            f"Benchmarking {len(files)} files → {output_format} "
+            f"(workers: {workers}, quality: {quality})"
+        )
+        if output_format == "kfx" and self.kfx_converter is None:
+            raise ValueError("KFX benchmarks require a KFXConverter")
+
+        cpu_before = _cpu_seconds()
+        start_time = time.perf_counter()
+
+        with _ChildMemorySampler() as memory:
+            if output_format == "kfx":
+                results = self._run_kfx_batch(files, output_dir, workers)
+                converter_name = "kfx"
+            else:
+                results = self.converter.convert_batch(
+                    files,
+                    output_dir=output_dir,
+                    output_format=output_format,
+                    parallel=workers,
+                    quality=quality,
+                )
+                converter_name = "format"
+
+        total_time = time.perf_counter() - start_time
+        cpu_after = _cpu_seconds()
+
+        input_bytes = sum(path.stat().st_size for path in files)
+        success_count = sum(1 for r in results if r.success)
+        latencies = sorted(r.conversion_time or 0.0 for r in results)
+
+        timing_percentiles = {}
+        if latencies:
+            timing_percentiles = {
+                "p50": statistics.median(latencies),
+                "p95": (
+                    statistics.quantiles(latencies, n=20, method="inclusive")[18]
+                    if len(latencies) > 1
+                    else latencies[0]
+                ),
+                "max": latencies[-1],
+            }
+
+        cpu_utilisation = None
+        if cpu_before is not None and cpu_after is not None and total_time > 0:
+            cores = os.cpu_count() or 1
+            cpu_utilisation = (cpu_after - cpu_before) / (total_time * cores) * 100
+
+        return ConversionBenchmarkResult(
+            test_name=test_name,
+            converter=converter_name,
+            output_format=output_format,
+            workers=workers,
+            quality=quality,
+            file_count=len(files),
+            input_bytes=input_bytes,
+            total_time=total_time,
+            success_count=success_count,
+            success_rate=success_count / len(files) * 100 if files else 0.0,
+            error_count=len(results) - success_count,
+            errors=[r.error for r in results if not r.success and r.error][:10],
+            timestamp=datetime.now().isoformat(),
+            files_per_second=len(files) / total_time if total_time > 0 else 0.0,
+            mb_per_second=(
+                input_bytes / 1024 / 1024 / total_time if total_time > 0 else 0.0
+            ),
+            timing_percentiles=timing_percentiles,
+            cpu_utilisation=cpu_utilisation,
+            peak_memory_usage=memory.peak,
+            calibre_version=self.converter.calibre_version(),
+        )
+
+    def _run_kfx_batch(self, files: List[Path], output_dir: Path, workers: int):
+        """Convert a corpus directory with KFXConverter.parallel_batch_convert."""
+        input_dirs = {path.parent for path in files}
+        if len(input_dirs) != 1:
+            raise ValueError("KFX benchmarks need the corpus in a single directory")
+
+        return self.kfx_converter.parallel_batch_convert(
+            input_dirs.pop(),
+            output_dir=output_dir,
+            input_formats=sorted({path.suffix for path in files}),
+            parallel=workers,
+        )
+
+    def compare_benchmarks(
+        self,
+        baseline: ConversionBenchmarkResult,
+        optimized: ConversionBenchmarkResult,
+    ) -> ConversionBenchmarkComparison:
+        """
+        Compare two results of the same configuration.
+
+        Args:
+            baseline: Baseline benchmark result
+            optimized: Optimized benchmark result
+
+        Returns:
+            Detailed comparison with improvements and regressions
+        """
+        improvements = {}
+        regressions = {}
+
+        def p95(result: ConversionBenchmarkResult) -> float:
+            return result.timing_percentiles.get("p95", 0.0)
+
+        # (metric, value getter, higher is better)
+        metrics = [
+            ("total_time", lambda r: r.total_time, False),
+            ("p95_latency", p95, False),
+            ("peak_memory_usage", lambda r: r.peak_memory_usage or 0, False),
+            ("error_count", lambda r: r.error_count, False),
+            ("files_per_second", lambda r: r.files_per_second, True),
+            ("mb_per_second", lambda r: r.mb_per_second, True),
+            ("success_rate", lambda r: r.success_rate, True),
+        ]
+
+        for metric, value, higher_better in metrics:
+            baseline_val = value(baseline)
+            optimized_val = value(optimized)
+            if baseline_val == 0:
+                continue
+
+            if higher_better:
+                improvement = (optimized_val - baseline_val) / baseline_val * 100
+            else:
+                improvement = (baseline_val - optimized_val) / baseline_val * 100
+
+            if improvement > 0:
+                improvements[metric] = improvement
+            elif improvement < 0:
+                regressions[metric] = abs(improvement)
+
+        # Throughput is the primary metric
+        weights = {
+            "files_per_second": 0.4,
+            "p95_latency": 0.2,
+            "success_rate": 0.2,
+            "peak_memory_usage": 0.2,
+        }
+
+        weighted_improvement = 0.0
+        for metric, weight in weights.items():
+            improvement = improvements.get(metric, 0) - regressions.get(metric, 0)
+            weighted_improvement += improvement * weight
+
+        return ConversionBenchmarkComparison(
+            baseline=baseline,
+            optimized=optimized,
+            improvements=improvements,
+            regressions=regressions,
+            overall_improvement=weighted_improvement,
+        )
+
+    def compare_runs(
+        self,
+        baseline: List[ConversionBenchmarkResult],
+        optimized: List[ConversionBenchmarkResult],
+    ) -> List[ConversionBenchmarkComparison]:
+        """
+        Compare the results of two benchmark runs configuration by configuration.
+
+        Configurations measured in only one of the runs are left out.
+
+        Args:
+            baseline: Results of the baseline run
+            optimized: Results of the optimized run
+
+        Returns:
+            Comparisons in the order of the optimized run
+        """
+        baseline_by_key = {result.key: result for result in baseline}
+        return [
+            self.compare_benchmarks(baseline_by_key[result.key], result)
+            for result in optimized
+            if result.key in baseline_by_key
+        ]
+
+    def save_results(self, results: List[ConversionBenchmarkResult], file_path: Path):
+        """Save benchmark results to a JSON file."""
+        try:
+            with open(file_path, "w") as f:
+                json.dump([asdict(r) for r in results], f, indent=2, default=str)
+            self.logger.info(f"Saved benchmark results to {file_path}")
+        except Exception as e:
+            self.logger.error(f"Failed to save benchmark results: {e}")
+
+    def load_results(self, file_path: Path) -> List[ConversionBenchmarkResult]:
+        """Load benchmark results from a JSON file (empty if unreadable)."""
+        try:
+            with open(file_path, "r") as f:
+                data = json.load(f)
+            return [ConversionBenchmarkResult(**entry) for entry in data]
+        except Exception as e:
+            self.logger.error(f"Failed to load benchmark results: {e}")
+            return []
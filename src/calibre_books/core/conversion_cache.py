@@ -0,0 +1,302 @@
+"""
+Content-addressed conversion output cache for Calibre Books CLI.
+
+A conversion is identified by what actually determines its output: the
+content hash of the input file, the output format, the normalized
+ebook-convert options and the Calibre version. File names and output
+directories are not part of the key, so renaming a source or converting
+into a different directory reuses an earlier result, while changing the
+quality options or upgrading Calibre converts again.
+
+Outputs are stored once under the SHA-256 of their content
+(``objects/ab/abcdef...``) and placed at conversion targets as a reflink
+(copy-on-write clone) where the filesystem supports it, a hardlink
+otherwise, and a plain copy across filesystems. Stored objects are
+read-only, so an in-place edit of a hardlinked target fails instead of
+silently corrupting the cache.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import stat
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+from ..utils.files import file_digest
+
+try:
+    import fcntl
+
+    # ioctl request cloning a whole file on Linux (btrfs, XFS, ...)
+    FICLONE = 0x40049409
+    REFLINK_AVAILABLE = hasattr(fcntl, "ioctl")
+except ImportError:  # Windows
+    REFLINK_AVAILABLE = False
+
+# Default upper bound of the object store
+DEFAULT_CACHE_MAX_MB = 10240
+
+
+def normalize_options(cmd: Sequence[Union[str, Path]]) -> List[Tuple[str, str]]:
+    """
+    Extract the conversion options of an ebook-convert command.
+
+    The input and output paths are dropped, repeated flags collapse into
+    one and options are sorted, so equivalent commands normalize to the
+    same list regardless of how they were assembled.
+
+    Args:
+        cmd: Command as built by ``_build_conversion_command``
+
+    Returns:
+        Sorted list of (option, value) pairs; flags have an empty value
+    """
+    args = [str(part) for part in cmd[3:]]
+    options = {}
+    i = 0
+    while i < len(args):
+        name = args[i]
+        value = ""
+        if i + 1 < len(args) and not args[i + 1].startswith("--"):
+            value = args[i + 1]
+            i += 1
+        options[name] = value
+        i += 1
+    return sorted(options.items())
+
+
+def clone_file(source: Path, destination: Path) -> str:
+    """
+    Place a copy of ``source`` at ``destination`` as cheaply as possible.
+
+    Args:
+        source: Existing file
+        destination: Path to create or replace
+
+    Returns:
+        How the file was placed: ``"reflink"``, ``"hardlink"`` or ``"copy"``
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destination.with_name(f".{destination.name}.part")
+    tmp.unlink(missing_ok=True)
+
+    method = None
+    if REFLINK_AVAILABLE:
+        try:
+            with open(source, "rb") as src, open(tmp, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            os.chmod(tmp, stat.S_IMODE(source.stat().st_mode) | stat.S_IWUSR)
+            method = "reflink"
+        except OSError:
+            tmp.unlink(missing_ok=True)
+
+    if method is None:
+        try:
+            os.link(source, tmp)
+            method = "hardlink"
+        except OSError:
+            shutil.copyfile(source, tmp)
+            method = "copy"
+
+    os.replace(tmp, destination)
+    return method
+
+
+class ConversionCache:
+    """
+    Store of conversion outputs keyed by conversion inputs.
+    """
+
+    def __init__(self, cache_dir: Path, max_size: int = DEFAULT_CACHE_MAX_MB << 20):
+        """
+        Initialize the conversion cache.
+
+        Args:
+            cache_dir: Directory holding the index and object store
+            max_size: Size in bytes above which least recently used
+                objects are evicted
+        """
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.objects_dir = self.cache_dir / "objects"
+        self.db_path = self.cache_dir / "index.db"
+        self.max_size = max_size
+        self.logger = logging.getLogger(__name__)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS conversions (
+                        key TEXT PRIMARY KEY,
+                        digest TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        last_used REAL NOT NULL
+                    )
+                """
+                )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the index database."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        return sqlite3.connect(str(self.db_path), timeout=10.0)
+
+    def _object_path(self, digest: str) -> Path:
+        """Path of a stored object."""
+        return self.objects_dir / digest[:2] / digest
+
+    @staticmethod
+    def key(
+        input_file: Path,
+        output_format: str,
+        cmd: Sequence[Union[str, Path]],
+        calibre_version: str,
+        input_digest: Optional[str] = None,
+    ) -> str:
+        """
+        Compute the cache key of a conversion.
+
+        Args:
+            input_file: Input file of the conversion
+            output_format: Requested output format
+            cmd: ebook-convert command of the conversion
+            calibre_version: Version of the Calibre installation
+            input_digest: Precomputed content hash of the input file
+
+        Returns:
+            Hex digest identifying the conversion
+        """
+        material = {
+            "input": input_digest or file_digest(input_file),
+            "format": output_format.lower(),
+            # ebook-convert picks the output format from the extension
+            "extension": Path(str(cmd[2])).suffix.lower(),
+            "options": normalize_options(cmd),
+            "calibre": calibre_version,
+        }
+        return hashlib.sha256(
+            json.dumps(material, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def fetch(self, key: str, target: Path) -> Optional[str]:
+        """
+        Place a cached output at ``target``.
+
+        Args:
+            key: Conversion key from ``key``
+            target: Output path of the conversion
+
+        Returns:
+            How the output was placed (see ``clone_file``), or None on a miss
+        """
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT digest, size FROM conversions WHERE key = ?", (key,)
+                ).fetchone()
+                if not row:
+                    return None
+                digest, size = row
+                source = self._object_path(digest)
+                try:
+                    if source.stat().st_size != size:
+                        raise OSError("size mismatch")
+                except OSError:
+                    self.logger.debug(f"Dropping stale cache entry {key}")
+                    with conn:
+                        conn.execute("DELETE FROM conversions WHERE key = ?", (key,))
+                    return None
+                with conn:
+                    conn.execute(
+                        "UPDATE conversions SET last_used = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+            finally:
+                conn.close()
+            return clone_file(source, target)
+        except (sqlite3.Error, OSError) as e:
+            self.logger.debug(f"Conversion cache lookup failed: {e}")
+            return None
+
+    def store(self, key: str, output_file: Path):
+        """
+        Add a conversion output to the cache.
+
+        The output is copied into the store, so the caller's file stays
+        independent of the cached object.
+
+        Args:
+            key: Conversion key from ``key``
+            output_file: Successfully converted output
+        """
+        try:
+            digest = file_digest(output_file)
+            size = output_file.stat().st_size
+            object_path = self._object_path(digest)
+            if not object_path.exists():
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = object_path.with_name(f".{digest}.part")
+                shutil.copyfile(output_file, tmp)
+                os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                os.replace(tmp, object_path)
+
+            now = time.time()
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO conversions "
+                        "(key, digest, size, created_at, last_used) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, digest, size, now, now),
+                    )
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            self.logger.warning(f"Failed to cache conversion output: {e}")
+            return
+
+        self.prune()
+
+    def prune(self) -> int:
+        """
+        Evict least recently used objects until the store fits ``max_size``.
+
+        Returns:
+            Number of objects removed
+        """
+        removed = 0
+        try:
+            conn = self._connect()
+            try:
+                objects = conn.execute(
+                    "SELECT digest, MAX(size), MAX(last_used) AS used "
+                    "FROM conversions GROUP BY digest ORDER BY used"
+                ).fetchall()
+                total = sum(size for _, size, _ in objects)
+                for digest, size, _ in objects:
+                    if total <= self.max_size:
+                        break
+                    self._object_path(digest).unlink(missing_ok=True)
+                    with conn:
+                        conn.execute(
+                            "DELETE FROM conversions WHERE digest = ?", (digest,)
+                        )
+                    total -= size
+                    removed += 1
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError) as e:
+            self.logger.debug(f"Conversion cache pruning failed: {e}")
+
+        if removed:
+            self.logger.info(f"Evicted {removed} objects from conversion cache")
+        return removed
@@ -0,0 +1,279 @@
+"""
+Conversion cost model for Calibre Books CLI.
+
+Scheduling largest-first by file size treats a 50 MB comic EPUB and a
+50 MB text-only PDF the same, although their conversion times differ
+several-fold. This module predicts the conversion time of a job in
+seconds from its input format, size, number of images and output format,
+so batches can start the longest expected jobs first.
+
+Image counts come from cheap introspection: the ZIP central directory of
+EPUB-like containers and the record headers of MOBI/AZW3 (PalmDB) files.
+Predictions start from built-in per-format rates and are calibrated with
+the timings of finished jobs recorded in the conversion journals: for
+each (input format, output format) pair the model learns the median
+ratio of actual to predicted time.
+"""
+
+import logging
+import statistics
+import struct
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from .book import ConversionResult
+from .conversion_scheduler import ConversionJob
+
+# Seconds per conversion by input format: (base, per MB, per image)
+DEFAULT_COST_RATES: Dict[str, Tuple[float, float, float]] = {
+    "epub": (4.0, 0.8, 0.05),
+    "mobi": (4.0, 1.0, 0.05),
+    "azw": (4.0, 1.0, 0.05),
+    "azw3": (4.0, 1.0, 0.05),
+    "kfx": (8.0, 1.5, 0.05),
+    "pdf": (6.0, 2.5, 0.1),
+    "txt": (2.0, 1.0, 0.0),
+}
+FALLBACK_COST_RATES = (5.0, 1.0, 0.05)
+
+# Relative cost of producing an output format
+OUTPUT_COST_FACTORS: Dict[str, float] = {
+    "epub": 1.0,
+    "mobi": 1.2,
+    "azw3": 1.2,
+    "pdf": 2.0,
+    "kfx": 2.5,
+}
+
+# Containers whose images are listed in a ZIP central directory
+ZIP_FORMATS = {"epub", "kepub", "cbz", "zip"}
+
+# PalmDB based formats with image records
+PDB_FORMATS = {"mobi", "azw", "azw3", "prc"}
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".bmp"}
+_IMAGE_MAGIC = (b"\xff\xd8\xff", b"\x89PNG", b"GIF8", b"BM")
+
+# Timing samples kept per format pair
+MAX_SAMPLES = 500
+
+
+def _count_zip_images(path: Path) -> int:
+    """Count image entries in a ZIP container."""
+    with zipfile.ZipFile(path) as archive:
+        return sum(
+            1
+            for name in archive.namelist()
+            if Path(name).suffix.lower() in IMAGE_EXTENSIONS
+        )
+
+
+def _count_pdb_images(path: Path) -> int:
+    """Count image records of a MOBI/AZW3 file from its record headers."""
+    with open(path, "rb") as f:
+        header = f.read(78)
+        if len(header) < 78 or header[60:68] != b"BOOKMOBI":
+            return 0
+        record_count = struct.unpack(">H", header[76:78])[0]
+        offsets = [struct.unpack(">I", f.read(8)[:4])[0] for _ in range(record_count)]
+        if not offsets:
+            return 0
+
+        f.seek(offsets[0])
+        record0 = f.read(112)
+        if len(record0) < 112 or record0[16:20] != b"MOBI":
+            return 0
+        first_image = struct.unpack(">I", record0[108:112])[0]
+
+        images = 0
+        for offset in offsets[first_image:]:
+            f.seek(offset)
+            if f.read(4).startswith(_IMAGE_MAGIC):
+                images += 1
+        return images
+
+
+def count_images(path: Path) -> int:
+    """
+    Count the images of a book without parsing its content.
+
+    Args:
+        path: Book file
+
+    Returns:
+        Number of images, 0 for formats without cheap introspection (PDF,
+        plain text) and unreadable files
+    """
+    fmt = path.suffix.lower().lstrip(".")
+    try:
+        if fmt in ZIP_FORMATS:
+            return _count_zip_images(path)
+        if fmt in PDB_FORMATS:
+            return _count_pdb_images(path)
+    except (OSError, zipfile.BadZipFile, struct.error, ValueError) as e:
+        logging.getLogger(__name__).debug(f"Cannot count images of {path}: {e}")
+    return 0
+
+
+class ConversionCostModel:
+    """
+    Predicts conversion times and learns from finished jobs.
+    """
+
+    def __init__(self):
+        """Initialize the model with the built-in rates."""
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        # (input format, output format) -> {output path: actual/prior ratio}
+        self._samples: Dict[Tuple[str, str], "OrderedDict[str, float]"] = {}
+
+    @staticmethod
+    def _pair(input_path: Path, output_format: str) -> Tuple[str, str]:
+        """Format pair a job belongs to."""
+        return input_path.suffix.lower().lstrip("."), output_format.lower()
+
+    @staticmethod
+    def prior(
+        input_format: str, output_format: str, input_size: int, image_count: int
+    ) -> float:
+        """
+        Conversion time predicted by the built-in rates.
+
+        Args:
+            input_format: Input file extension without dot
+            output_format: Target format
+            input_size: Input size in bytes
+            image_count: Number of images in the input
+
+        Returns:
+            Predicted seconds
+        """
+        base, per_mb, per_image = DEFAULT_COST_RATES.get(
+            input_format, FALLBACK_COST_RATES
+        )
+        seconds = (
+            base
+            + per_mb * max(input_size, 0) / 1024 / 1024
+            + per_image * max(image_count, 0)
+        )
+        return seconds * OUTPUT_COST_FACTORS.get(output_format, 1.0)
+
+    def _job_prior(self, job: ConversionJob) -> float:
+        """Built-in prediction for a job, counting its images on first use."""
+        if job.image_count < 0:
+            job.image_count = count_images(job.input_file)
+        return self.prior(
+            *self._pair(job.input_file, job.output_format),
+            job.input_size,
+            job.image_count,
+        )
+
+    def scale(self, input_format: str, output_format: str) -> float:
+        """Learned ratio of actual to built-in predicted time (1.0 if unknown)."""
+        with self._lock:
+            samples = self._samples.get((input_format, output_format))
+            if not samples:
+                return 1.0
+            return statistics.median(samples.values())
+
+    def predict(self, job: ConversionJob) -> float:
+        """
+        Predict the conversion time of a job.
+
+        Args:
+            job: Job to predict
+
+        Returns:
+            Expected seconds
+        """
+        return self._job_prior(job) * self.scale(
+            *self._pair(job.input_file, job.output_format)
+        )
+
+    def _add_sample(
+        self, pair: Tuple[str, str], key: str, prior: float, seconds: float
+    ):
+        """Remember the actual/prior ratio of a finished job."""
+        if prior <= 0 or seconds <= 0:
+            return
+        with self._lock:
+            samples = self._samples.setdefault(pair, OrderedDict())
+            samples.pop(key, None)
+            samples[key] = seconds / prior
+            while len(samples) > MAX_SAMPLES:
+                samples.popitem(last=False)
+
+    def observe(self, job: ConversionJob, result: ConversionResult):
+        """
+        Learn from a finished job.
+
+        Failed and cached conversions say nothing about conversion time and
+        are ignored.
+
+        Args:
+            job: Finished job
+            result: Its result
+        """
+        if not result.success or result.from_cache or not result.conversion_time:
+            return
+        self._add_sample(
+            self._pair(job.input_file, job.output_format),
+            str(job.output_file),
+            self._job_prior(job),
+            result.conversion_time,
+        )
+
+    def learn(self, timings: Iterable[Mapping]):
+        """
+        Learn from historical job timings.
+
+        Args:
+            timings: Rows with ``input_path``, ``output_path``,
+                ``output_format``, ``input_size``, ``image_count`` and
+                ``duration`` (see ``ConversionJournal.timings``)
+        """
+        count = 0
+        for row in timings:
+            pair = self._pair(Path(row["input_path"]), row["output_format"])
+            prior = self.prior(
+                *pair, row["input_size"] or 0, max(row["image_count"] or 0, 0)
+            )
+            self._add_sample(pair, row["output_path"], prior, row["duration"])
+            count += 1
+        if count:
+            self.logger.debug(f"Calibrated conversion cost model with {count} jobs")
+
+    def summary(
+        self, predictions: Mapping[Path, float], results: List[ConversionResult]
+    ) -> Optional[str]:
+        """
+        Compare predicted with actual conversion times of a batch.
+
+        Args:
+            predictions: Predicted seconds by output file
+            results: Results of the batch
+
+        Returns:
+            One line summary, or None if no conversion ran
+        """
+        pairs = [
+            (predictions[r.output_file], r.conversion_time)
+            for r in results
+            if r.success
+            and not r.from_cache
+            and r.conversion_time
+            and r.output_file in predictions
+        ]
+        if not pairs:
+            return None
+
+        predicted = sum(p for p, _ in pairs)
+        actual = sum(a for _, a in pairs)
+        error = statistics.mean(abs(p - a) / a for p, a in pairs) * 100
+        return (
+            f"Predicted {predicted:.1f}s of conversion time, took {actual:.1f}s "
+            f"(mean error per job {error:.0f}%)"
+        )
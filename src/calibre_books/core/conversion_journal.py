@@ -0,0 +1,370 @@
+"""
+Conversion job journal for Calibre Books CLI.
+
+Batch conversions record every job in a small SQLite database next to
+their outputs (``<output_dir>/.book-tool-journal.db``), moving it through
+queued → running → done or failed and remembering the content hash of the
+input. ebook-convert writes to a hidden partial file that is renamed over
+the final output only after a successful conversion, so an output path
+either holds a complete book or nothing.
+
+After an interruption (Ctrl-C, OOM kill, reboot) a batch started with
+``resume`` continues where the previous run stopped: jobs that finished
+with an unchanged input are skipped, jobs that were queued or running
+are started again (their partial files are discarded), and failed jobs
+are retried with exponential backoff until they run out of attempts. A
+job still backing off is deferred to a later run instead of holding a
+worker while it waits.
+"""
+
+import logging
+import sqlite3
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from ..utils.files import file_digest, partial_output_path
+from .book import ConversionResult
+from .conversion_scheduler import ConversionJob
+
+# Journal file created in each batch output directory
+JOURNAL_FILENAME = ".book-tool-journal.db"
+
+# Retry policy of failed jobs when resuming
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF = 30.0
+MAX_RETRY_DELAY = 600.0
+
+# Columns added after the first journal version
+_TIMING_COLUMNS = (
+    ("input_size", "INTEGER"),
+    ("image_count", "INTEGER"),
+    ("duration", "REAL"),
+)
+
+
+class JobState(Enum):
+    """State of a journaled conversion job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ConversionJournal:
+    """
+    Persistent record of the jobs of batch conversions into one directory.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_backoff: float = DEFAULT_RETRY_BACKOFF,
+    ):
+        """
+        Initialize the journal.
+
+        Args:
+            db_path: Path of the journal database
+            max_attempts: Attempts per job before it is given up on
+            retry_backoff: Delay before the first retry in seconds; doubled
+                with every further failed attempt
+        """
+        self.db_path = Path(db_path)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.logger = logging.getLogger(__name__)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS jobs (
+                        output_path TEXT PRIMARY KEY,
+                        input_path TEXT NOT NULL,
+                        input_hash TEXT,
+                        output_format TEXT NOT NULL,
+                        state TEXT NOT NULL,
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        error TEXT,
+                        next_attempt_at REAL NOT NULL DEFAULT 0,
+                        updated_at REAL NOT NULL,
+                        input_size INTEGER,
+                        image_count INTEGER,
+                        duration REAL
+                    )
+                """
+                )
+                # Journals written before conversion timings were recorded
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+                for column, sql_type in _TIMING_COLUMNS:
+                    if column not in columns:
+                        conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {sql_type}")
+        finally:
+            conn.close()
+
+    @classmethod
+    def for_output_dir(cls, output_dir: Path, **kwargs) -> "ConversionJournal":
+        """Open the journal of batch conversions into ``output_dir``."""
+        return cls(Path(output_dir) / JOURNAL_FILENAME, **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the journal database."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def plan(
+        self, jobs: List[ConversionJob], resume: bool = False
+    ) -> List[ConversionJob]:
+        """
+        Decide which jobs of a batch need to run and queue them.
+
+        Without ``resume`` every job whose output does not exist yet runs
+        with a fresh attempt count. With ``resume`` the journal decides for
+        the jobs it knows: finished jobs with an unchanged input and an
+        existing output are skipped, interrupted and retryable failed jobs
+        run again, failed jobs still backing off are deferred and jobs that
+        used up their attempts are skipped. Jobs unknown to the journal fall
+        back to the output check.
+
+        Args:
+            jobs: All jobs of the batch
+            resume: Continue a previous run of the batch
+
+        Returns:
+            Jobs to run, in input order
+        """
+        pending = []
+        now = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                for job in jobs:
+                    row = conn.execute(
+                        "SELECT * FROM jobs WHERE output_path = ?",
+                        (str(job.output_file),),
+                    ).fetchone()
+                    partial_output_path(job.output_file).unlink(missing_ok=True)
+
+                    if resume and row is not None:
+                        state = JobState(row["state"])
+                        if state == JobState.DONE and self._is_current(job, row):
+                            self.logger.debug(f"Already converted: {job.input_file}")
+                            continue
+                        if (
+                            state == JobState.FAILED
+                            and row["attempts"] >= self.max_attempts
+                        ):
+                            self.logger.info(
+                                f"Skipping {job.input_file.name} - failed "
+                                f"{row['attempts']} times: {row['error']}"
+                            )
+                            continue
+                        if state == JobState.FAILED and row["next_attempt_at"] > now:
+                            self.logger.info(
+                                f"Deferring {job.input_file.name} - retry due in "
+                                f"{row['next_attempt_at'] - now:.0f} seconds"
+                            )
+                            continue
+                        if state == JobState.DONE:
+                            # Input changed or output removed since
+                            attempts, next_attempt_at = 0, 0.0
+                        else:
+                            attempts = row["attempts"]
+                            next_attempt_at = row["next_attempt_at"]
+                    elif job.output_file.exists():
+                        self.logger.info(
+                            f"Skipping {job.input_file.name} - output already "
+                            f"exists: {job.output_file.name}"
+                        )
+                        continue
+                    else:
+                        attempts, next_attempt_at = 0, 0.0
+
+                    conn.execute(
+                        "INSERT OR REPLACE INTO jobs (output_path, input_path, "
+                        "input_hash, output_format, state, attempts, error, "
+                        "next_attempt_at, updated_at) "
+                        "VALUES (?, ?, NULL, ?, ?, ?, NULL, ?, ?)",
+                        (
+                            str(job.output_file),
+                            str(job.input_file),
+                            job.output_format,
+                            JobState.QUEUED.value,
+                            attempts,
+                            next_attempt_at,
+                            now,
+                        ),
+                    )
+                    pending.append(job)
+        finally:
+            conn.close()
+
+        return pending
+
+    def _is_current(self, job: ConversionJob, row: sqlite3.Row) -> bool:
+        """Check that a finished job's output is still valid for its input."""
+        if not job.output_file.exists() or not row["input_hash"]:
+            return False
+        try:
+            return file_digest(job.input_file) == row["input_hash"]
+        except OSError:
+            return False
+
+    def _update(self, job: ConversionJob, **fields):
+        """Update columns of a job."""
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    f"UPDATE jobs SET {assignments} WHERE output_path = ?",
+                    (*fields.values(), str(job.output_file)),
+                )
+        finally:
+            conn.close()
+
+    def _row(self, job: ConversionJob) -> Optional[sqlite3.Row]:
+        """Read the journal entry of a job."""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT * FROM jobs WHERE output_path = ?", (str(job.output_file),)
+            ).fetchone()
+        finally:
+            conn.close()
+
+    def mark_running(self, job: ConversionJob):
+        """Record that a job started, with the hash of its input."""
+        try:
+            input_hash = file_digest(job.input_file)
+        except OSError:
+            input_hash = None
+        self._update(job, state=JobState.RUNNING.value, input_hash=input_hash)
+
+    def mark_done(self, job: ConversionJob, duration: Optional[float] = None):
+        """
+        Record that a job produced its output.
+
+        Args:
+            job: Finished job
+            duration: Conversion time in seconds, kept to calibrate the
+                conversion cost model (None if nothing was converted)
+        """
+        self._update(
+            job,
+            state=JobState.DONE.value,
+            error=None,
+            input_size=job.input_size,
+            image_count=job.image_count,
+            duration=duration,
+        )
+
+    def mark_failed(self, job: ConversionJob, error: Optional[str]) -> bool:
+        """
+        Record a failed attempt of a job.
+
+        Args:
+            job: Failed job
+            error: Error message of the attempt
+
+        Returns:
+            True if the job has attempts left
+        """
+        row = self._row(job)
+        attempts = (row["attempts"] if row else 0) + 1
+        delay = min(self.retry_backoff * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+        self._update(
+            job,
+            state=JobState.FAILED.value,
+            attempts=attempts,
+            error=error,
+            next_attempt_at=time.time() + delay,
+        )
+        return attempts < self.max_attempts
+
+    def run(
+        self,
+        job: ConversionJob,
+        convert: Callable[[ConversionJob], ConversionResult],
+        retry: bool = False,
+    ) -> ConversionResult:
+        """
+        Run a job and record its outcome.
+
+        Failed attempts are only retried right away when their backoff has
+        already passed; otherwise the job stays failed and a later resumed
+        run picks it up once ``next_attempt_at`` is reached.
+
+        Args:
+            job: Job to run
+            convert: Function converting the job
+            retry: Retry failed attempts without backoff while attempts are
+                left
+
+        Returns:
+            Result of the last attempt
+        """
+        while True:
+            self.mark_running(job)
+            try:
+                result = convert(job)
+            except Exception as e:
+                self.mark_failed(job, str(e))
+                raise
+
+            if result.success:
+                self.mark_done(
+                    job, None if result.from_cache else result.conversion_time
+                )
+                return result
+            if not self.mark_failed(job, result.error) or not retry:
+                return result
+
+            delay = self._row(job)["next_attempt_at"] - time.time()
+            if delay > 0:
+                self.logger.info(
+                    f"Deferring retry of {job.input_file.name} by "
+                    f"{delay:.0f} seconds to a resumed run"
+                )
+                return result
+
+    def timings(self, limit: int = 1000) -> List[sqlite3.Row]:
+        """
+        Timings of the most recently finished conversions.
+
+        Args:
+            limit: Maximum number of jobs
+
+        Returns:
+            Rows with ``input_path``, ``output_path``, ``output_format``,
+            ``input_size``, ``image_count`` and ``duration``
+        """
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT input_path, output_path, output_format, input_size, "
+                "image_count, duration FROM jobs "
+                "WHERE state = ? AND duration IS NOT NULL "
+                "ORDER BY updated_at DESC LIMIT ?",
+                (JobState.DONE.value, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def counts(self) -> dict:
+        """Number of journaled jobs per state."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT state, COUNT(*) FROM jobs GROUP BY state"
+            ).fetchall()
+        finally:
+            conn.close()
+        return {state: count for state, count in rows}
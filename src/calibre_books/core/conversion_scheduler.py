@@ -0,0 +1,462 @@
+"""
+Conversion scheduling for Calibre Books CLI.
+
+Every conversion runs in its own ``ebook-convert`` child process. This
+module decides how many of those children run at once and in which order,
+and confines each child with per-job resource limits:
+
+- concurrency is sized from the usable CPU cores and the memory currently
+  available, assuming each child stays resident at its expected memory use
+  (an explicitly requested number of workers is used as given)
+- jobs are started largest-first, so a few big PDFs do not end up running
+  alone at the end of a batch while the other workers sit idle
+- each child gets an address space limit (RLIMIT_AS), a CPU time limit
+  (RLIMIT_CPU) and a lower scheduling priority (nice), so a runaway
+  conversion is killed by the kernel instead of starving the machine
+- child output is streamed: progress lines become progress callbacks and
+  only a bounded tail of the log is kept for error reports
+
+The worker threads only wait on their child process, so the GIL is never a
+bottleneck; the actual work happens in the ``ebook-convert`` processes.
+"""
+
+import concurrent.futures
+import os
+import re
+import subprocess
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from ..utils.logging import LoggerMixin
+
+try:
+    import resource
+
+    RESOURCE_LIMITS_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_LIMITS_AVAILABLE = False
+
+# Default per-job limits (overridable in the conversion config)
+DEFAULT_JOB_MEMORY_MB = 4096
+DEFAULT_JOB_CPU_SECONDS = 1800
+DEFAULT_JOB_NICE = 10
+
+# Expected resident memory of one ebook-convert child. Most books need far
+# less; the address space limit above still stops a runaway conversion.
+DEFAULT_JOB_RSS_MB = 1024
+
+# Wall clock limit of a single conversion
+DEFAULT_JOB_TIMEOUT = 600
+
+# Upper bound on concurrent conversions regardless of machine size
+MAX_CONCURRENCY = 16
+
+# Trailing lines of conversion output kept for error reports
+LOG_TAIL_LINES = 50
+
+# Progress line of ebook-convert output, e.g. "34% Running transforms"
+_PROGRESS_LINE = re.compile(r"^\s*(\d{1,3})%\s*(.*)$")
+
+
+@dataclass
+class ResourceLimits:
+    """Limits applied to every ebook-convert child process."""
+
+    memory_bytes: Optional[int] = DEFAULT_JOB_MEMORY_MB * 1024 * 1024
+    cpu_seconds: Optional[int] = DEFAULT_JOB_CPU_SECONDS
+    nice: int = DEFAULT_JOB_NICE
+
+    @classmethod
+    def from_config(cls, conversion_config: Dict[str, Any]) -> "ResourceLimits":
+        """
+        Create limits from the ``conversion`` configuration section.
+
+        A value of 0 for ``job_memory_mb`` or ``job_cpu_seconds`` disables
+        that limit.
+
+        Args:
+            conversion_config: Conversion configuration dictionary
+
+        Returns:
+            ResourceLimits
+        """
+        memory_mb = conversion_config.get("job_memory_mb", DEFAULT_JOB_MEMORY_MB)
+        cpu_seconds = conversion_config.get("job_cpu_seconds", DEFAULT_JOB_CPU_SECONDS)
+        return cls(
+            memory_bytes=memory_mb * 1024 * 1024 if memory_mb else None,
+            cpu_seconds=cpu_seconds or None,
+            nice=conversion_config.get("job_nice", DEFAULT_JOB_NICE),
+        )
+
+    def preexec_fn(self) -> Optional[Callable[[], None]]:
+        """
+        Get a function applying the limits in the child before exec.
+
+        ``preexec_fn`` is documented as unsafe in threaded programs: the
+        function runs in the child between fork and exec, where a lock held
+        by another thread at fork time is never released. The function is
+        therefore kept to ``setrlimit`` and ``nice`` calls on modules that
+        are already imported, which do not take such locks. This narrows
+        the risk for the scheduler's threads but is not a guarantee.
+
+        Returns:
+            Function for ``subprocess.Popen(preexec_fn=...)``, or None where
+            resource limits are not supported
+        """
+        if not RESOURCE_LIMITS_AVAILABLE:
+            return None
+
+        memory_bytes = self.memory_bytes
+        cpu_seconds = self.cpu_seconds
+        nice = self.nice
+
+        def apply_limits():
+            if memory_bytes:
+                resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+            if cpu_seconds:
+                # SIGXCPU at the soft limit, SIGKILL shortly after
+                resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 10))
+            if nice:
+                os.nice(nice)
+
+        return apply_limits
+
+
+def parse_progress_line(line: str) -> Optional[Tuple[float, str]]:
+    """
+    Parse a progress line of ebook-convert output.
+
+    ebook-convert reports its progress as lines like
+    ``34% Running transforms on e-book...``.
+
+    Args:
+        line: Line of output
+
+    Returns:
+        Tuple of (fraction between 0 and 1, message), or None for other lines
+    """
+    match = _PROGRESS_LINE.match(line)
+    if not match:
+        return None
+    return min(int(match.group(1)), 100) / 100, match.group(2).strip()
+
+
+def run_limited(
+    cmd: Sequence[Union[str, Path]],
+    limits: Optional[ResourceLimits] = None,
+    timeout: float = DEFAULT_JOB_TIMEOUT,
+    progress_callback: Optional[Callable[[float, str], Any]] = None,
+    tail_lines: int = LOG_TAIL_LINES,
+) -> subprocess.CompletedProcess:
+    """
+    Run a conversion command as a resource limited child process.
+
+    Output is streamed line by line instead of being buffered, so memory
+    use does not grow with the (often multi-MB) conversion log: only the
+    last ``tail_lines`` lines of each stream are kept for error reports,
+    and progress lines are passed on as they arrive.
+
+    Args:
+        cmd: Command to run
+        limits: Limits for the child (none if None)
+        timeout: Wall clock limit in seconds; the child is killed on expiry
+        progress_callback: Called with (fraction, message) for every
+            progress line the child prints
+        tail_lines: Number of trailing lines kept of stdout and stderr
+
+    Returns:
+        CompletedProcess with the output tails as text
+
+    Raises:
+        subprocess.TimeoutExpired: If the child ran longer than ``timeout``
+    """
+    args = [str(part) for part in cmd]
+    process = subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+        bufsize=1,
+        # Calibre's tools are Python programs that would otherwise block
+        # buffer their progress output when writing to a pipe
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+        preexec_fn=limits.preexec_fn() if limits else None,
+    )
+
+    stdout_tail: Deque[str] = deque(maxlen=tail_lines)
+    stderr_tail: Deque[str] = deque(maxlen=tail_lines)
+    stderr_reader = threading.Thread(
+        target=stderr_tail.extend, args=(process.stderr,), daemon=True
+    )
+    stderr_reader.start()
+
+    timed_out = threading.Event()
+
+    def expire():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, expire)
+    timer.start()
+    try:
+        for line in process.stdout:
+            stdout_tail.append(line)
+            if progress_callback:
+                progress = parse_progress_line(line)
+                if progress:
+                    progress_callback(*progress)
+        returncode = process.wait()
+        stderr_reader.join()
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+    stdout = "".join(stdout_tail)
+    stderr = "".join(stderr_tail)
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(args, timeout, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(args, returncode, stdout, stderr)
+
+
+def usable_cpus() -> int:
+    """Number of CPUs this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS and Windows
+        return os.cpu_count() or 1
+
+
+def available_memory() -> Optional[int]:
+    """
+    Memory available for new processes, in bytes.
+
+    Returns:
+        ``MemAvailable`` from /proc/meminfo on Linux, free physical memory
+        elsewhere, or None if it cannot be determined
+    """
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_concurrency(
+    memory_per_job: Optional[int] = DEFAULT_JOB_RSS_MB * 1024 * 1024,
+) -> int:
+    """
+    Number of conversions the machine can run at once.
+
+    One conversion per usable core, reduced so that the expected resident
+    memory of all children fits into available memory. The address space
+    limit of a child is not used here: it is a cap for runaway conversions
+    (and counts mapped but unused memory), not what a conversion needs.
+
+    Args:
+        memory_per_job: Expected resident memory of one conversion in
+            bytes, or None to size from the CPU cores only
+
+    Returns:
+        Concurrency of at least 1
+    """
+    concurrency = min(usable_cpus(), MAX_CONCURRENCY)
+    memory = available_memory()
+    if memory_per_job and memory:
+        concurrency = min(concurrency, memory // memory_per_job)
+    return max(1, concurrency)
+
+
+@dataclass
+class ConversionJob:
+    """A single file conversion waiting to be scheduled."""
+
+    input_file: Path
+    output_file: Path
+    output_format: str = "epub"
+    quality: str = "high"
+    include_cover: bool = True
+    preserve_metadata: bool = True
+    options: Dict[str, Any] = field(default_factory=dict)
+    input_size: int = -1
+    image_count: int = -1  # Counted on demand by the cost model
+
+    def __post_init__(self):
+        if self.input_size < 0:
+            try:
+                self.input_size = self.input_file.stat().st_size
+            except OSError:
+                self.input_size = 0
+
+
+def input_size_cost(job: ConversionJob) -> float:
+    """Default job cost: conversion time grows with input size."""
+    return float(job.input_size)
+
+
+class BatchProgress:
+    """
+    Combine the progress of concurrently running jobs into batch progress.
+
+    Each job owns an equal share of the batch. Progress reported by a job's
+    conversion fills its share, so the batch fraction advances while long
+    conversions run instead of only when they finish.
+    """
+
+    def __init__(
+        self, total: int, callback: Optional[Callable[[float, str], Any]] = None
+    ):
+        """
+        Initialize the batch progress.
+
+        Args:
+            total: Number of jobs in the batch
+            callback: Called with (batch fraction, message); nothing is
+                reported if None
+        """
+        self.total = max(1, total)
+        self.callback = callback
+        self._fractions: Dict[Path, float] = {}
+        self._lock = threading.Lock()
+
+    def _update(self, job: ConversionJob, fraction: float) -> float:
+        """Record a job's fraction and return the batch fraction."""
+        with self._lock:
+            # Retried jobs start over; the batch never moves backwards
+            previous = self._fractions.get(job.output_file, 0.0)
+            self._fractions[job.output_file] = max(previous, min(fraction, 1.0))
+            return sum(self._fractions.values()) / self.total
+
+    def for_job(self, job: ConversionJob) -> Optional[Callable[[float, str], Any]]:
+        """
+        Progress callback of a single job, scaled to its share of the batch.
+
+        Args:
+            job: Job of the batch
+
+        Returns:
+            Callback taking (job fraction, message), or None if the batch
+            has no callback
+        """
+        if self.callback is None:
+            return None
+
+        def report(fraction: float, message: str) -> None:
+            self.callback(
+                self._update(job, fraction), f"{job.input_file.name}: {message}"
+            )
+
+        return report
+
+    def finish(self, job: ConversionJob) -> float:
+        """
+        Mark a job as finished.
+
+        Args:
+            job: Finished job, successful or not
+
+        Returns:
+            Batch fraction
+        """
+        return self._update(job, 1.0)
+
+
+class ConversionScheduler(LoggerMixin):
+    """
+    Run conversion jobs most expensive first with bounded concurrency.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        cost: Callable[[ConversionJob], float] = input_size_cost,
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_workers: Maximum number of conversions running at once
+            cost: Estimated cost of a job; higher cost jobs start first
+        """
+        super().__init__()
+        self.max_workers = max(1, max_workers)
+        self.cost = cost
+        # Cost of each job of the last ordered batch, by output file
+        self.expected_costs: Dict[Path, float] = {}
+
+    def order(self, jobs: Iterable[ConversionJob]) -> List[ConversionJob]:
+        """
+        Order jobs for the shortest overall batch time.
+
+        Starting the most expensive jobs first (LPT scheduling) keeps all
+        workers busy until the end of the batch.
+
+        Args:
+            jobs: Jobs to order
+
+        Returns:
+            Jobs sorted by descending cost, ties in input order
+        """
+        jobs = list(jobs)
+        costs = [self.cost(job) for job in jobs]
+        self.expected_costs = {job.output_file: cost for job, cost in zip(jobs, costs)}
+        order = sorted(range(len(jobs)), key=costs.__getitem__, reverse=True)
+        return [jobs[i] for i in order]
+
+    def run(
+        self,
+        jobs: Iterable[ConversionJob],
+        convert: Callable[[ConversionJob], Any],
+    ) -> Iterator[Tuple[ConversionJob, "concurrent.futures.Future"]]:
+        """
+        Run ``convert`` for every job.
+
+        Args:
+            jobs: Jobs to run
+            convert: Function converting a single job (typically launching
+                a resource limited ebook-convert child)
+
+        Yields:
+            Tuples of (job, completed future) in completion order
+        """
+        ordered = self.order(jobs)
+        if not ordered:
+            return
+
+        self.logger.debug(
+            f"Scheduling {len(ordered)} conversions on {self.max_workers} workers, "
+            f"starting with {ordered[0].input_file.name}"
+        )
+
+        # The executor queue is FIFO, so jobs start in scheduled order
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(ordered))
+        ) as executor:
+            future_to_job = {executor.submit(convert, job): job for job in ordered}
+            for future in concurrent.futures.as_completed(future_to_job):
+                yield future_to_job[future], future
@@ -5,14 +5,36 @@ This module provides functionality for converting book formats
 using Calibre's conversion tools, with specialized support for KFX conversion.
 """
 
+import os
+import re
+import sqlite3
 import subprocess
 import time
-import concurrent.futures
 from pathlib import Path
 from typing import List, Optional, Dict, TYPE_CHECKING, Union
 
+from ..utils.files import file_digest, partial_output_path
 from ..utils.logging import LoggerMixin
 from .book import BookFormat, ConversionResult
+from .capabilities import calibre_plugin_paths, get_capability_registry
+from .conversion_cache import DEFAULT_CACHE_MAX_MB, ConversionCache
+from .conversion_cost import ConversionCostModel
+from .conversion_journal import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_RETRY_BACKOFF,
+    ConversionJournal,
+)
+from .conversion_scheduler import (
+    DEFAULT_JOB_RSS_MB,
+    DEFAULT_JOB_TIMEOUT,
+    BatchProgress,
+    ConversionJob,
+    ConversionScheduler,
+    ResourceLimits,
+    default_concurrency,
+    run_limited,
+)
+from .file_walker import walk_files
 
 if TYPE_CHECKING:
     from ..config.manager import ConfigManager
@@ -46,6 +68,23 @@ class FormatConverter(LoggerMixin):
             self.kfx_plugin_required = conversion_config.get(
                 "kfx_plugin_required", True
             )
+            self.resource_limits = ResourceLimits.from_config(conversion_config)
+            self.job_memory_bytes = (
+                conversion_config.get("job_rss_mb", DEFAULT_JOB_RSS_MB) * 1024 * 1024
+            )
+            self.cache_enabled = conversion_config.get("cache_enabled", True)
+            self.cache_path = Path(
+                conversion_config.get("cache_path", "~/.book-tool/cache/conversions")
+            ).expanduser()
+            self.cache_max_mb = conversion_config.get(
+                "cache_max_mb", DEFAULT_CACHE_MAX_MB
+            )
+            self.max_attempts = conversion_config.get(
+                "max_attempts", DEFAULT_MAX_ATTEMPTS
+            )
+            self.retry_backoff = conversion_config.get(
+                "retry_backoff", DEFAULT_RETRY_BACKOFF
+            )
 
             self.logger.debug(
                 f"Initialized FormatConverter with max_parallel: {self.max_parallel}, output: {self.output_path}"
@@ -57,47 +96,104 @@ class FormatConverter(LoggerMixin):
             self.max_parallel = 4
             self.output_path = Path("~/Converted-Books").expanduser()
             self.kfx_plugin_required = True
+            self.resource_limits = ResourceLimits()
+            self.job_memory_bytes = DEFAULT_JOB_RSS_MB * 1024 * 1024
+            self.cache_enabled = True
+            self.cache_path = Path("~/.book-tool/cache/conversions").expanduser()
+            self.cache_max_mb = DEFAULT_CACHE_MAX_MB
+            self.max_attempts = DEFAULT_MAX_ATTEMPTS
+            self.retry_backoff = DEFAULT_RETRY_BACKOFF
+
+        self._conversion_cache: Optional[ConversionCache] = None
+        self.capabilities = get_capability_registry()
+        self.cost_model = ConversionCostModel()
 
         self.logger.info(
             f"Initialized format converter with output path: {self.output_path}"
         )
 
-    def check_system_requirements(self) -> Dict[str, bool]:
+    @property
+    def conversion_cache(self) -> Optional[ConversionCache]:
+        """Lazy initialization of the conversion output cache (None if disabled)."""
+        if self._conversion_cache is None and self.cache_enabled:
+            self._conversion_cache = ConversionCache(
+                self.cache_path, self.cache_max_mb * 1024 * 1024
+            )
+        return self._conversion_cache
+
+    def calibre_version(self) -> Optional[str]:
         """
-        Check system requirements for conversion operations.
+        Get the version of the installed Calibre conversion tools.
 
         Returns:
-            Dict mapping requirement name to availability status
+            Version string such as ``"7.2.0"``, or None if ebook-convert is
+            unavailable
         """
-        requirements = {}
+        return self.capabilities.probe(
+            "calibre_version",
+            self._probe_calibre_version,
+            binaries=("ebook-convert",),
+        )
 
-        # Check Calibre tools
+    def _probe_calibre_version(self, binary: str = "ebook-convert") -> Optional[str]:
+        """Run ``<binary> --version`` and parse the Calibre version."""
         try:
-            subprocess.run(
-                ["calibre", "--version"], check=True, capture_output=True, timeout=10
+            result = subprocess.run(
+                [binary, "--version"],
+                capture_output=True,
+                text=True,
+                timeout=10,
             )
-            requirements["calibre"] = True
-        except (
-            subprocess.CalledProcessError,
-            FileNotFoundError,
-            subprocess.TimeoutExpired,
-        ):
-            requirements["calibre"] = False
+        except (subprocess.TimeoutExpired, FileNotFoundError) as e:
+            self.logger.debug(f"Could not determine Calibre version: {e}")
+            return None
+        match = (
+            re.search(r"calibre\s+([\d.]+)", result.stdout)
+            if result.returncode == 0 and isinstance(result.stdout, str)
+            else None
+        )
+        return match.group(1) if match else None
 
+    def _conversion_cache_key(
+        self, input_file: Path, output_format: str, cmd: List[Union[str, Path]]
+    ) -> Optional[str]:
+        """
+        Cache key of a conversion, or None if it cannot be cached.
+
+        Conversions are only cached when the Calibre version is known, so
+        that upgrading Calibre never serves outputs of an older converter.
+        """
+        if self.conversion_cache is None:
+            return None
+        version = self.calibre_version()
+        if not version:
+            return None
         try:
-            subprocess.run(
-                ["ebook-convert", "--version"],
-                check=True,
-                capture_output=True,
-                timeout=10,
+            return ConversionCache.key(
+                input_file, output_format, cmd, version, file_digest(input_file)
             )
-            requirements["ebook-convert"] = True
-        except (
-            subprocess.CalledProcessError,
-            FileNotFoundError,
-            subprocess.TimeoutExpired,
-        ):
-            requirements["ebook-convert"] = False
+        except OSError as e:
+            self.logger.debug(f"Cannot cache conversion of {input_file}: {e}")
+            return None
+
+    def check_system_requirements(self) -> Dict[str, bool]:
+        """
+        Check system requirements for conversion operations.
+
+        Returns:
+            Dict mapping requirement name to availability status
+        """
+        requirements = {}
+
+        # Check Calibre tools; both report the Calibre version they belong to,
+        # so the memoized version probes double as availability checks
+        calibre_gui_version = self.capabilities.probe(
+            "calibre_gui_version",
+            lambda: self._probe_calibre_version("calibre"),
+            binaries=("calibre",),
+        )
+        requirements["calibre"] = calibre_gui_version is not None
+        requirements["ebook-convert"] = self.calibre_version() is not None
 
         # Check KFX plugin
         requirements["kfx_plugin"] = self.validate_kfx_plugin()
@@ -109,24 +205,16 @@ class FormatConverter(LoggerMixin):
 
     def validate_kfx_plugin(self) -> bool:
         """Validate that KFX Output plugin is available in Calibre."""
-        import subprocess
-        import re
-
         self.logger.info("Validating KFX plugin availability")
 
         try:
-            # Run calibre-customize to list plugins
-            result = subprocess.run(
-                ["calibre-customize", "-l"], capture_output=True, text=True, timeout=10
-            )
-
-            if result.returncode != 0:
-                self.logger.error(f"Failed to list Calibre plugins: {result.stderr}")
+            plugins = self.list_calibre_plugins()
+            if plugins is None:
                 return False
 
             # Check for KFX Output plugin
             kfx_pattern = r"KFX Output.*Convert ebooks to KFX format"
-            if re.search(kfx_pattern, result.stdout, re.IGNORECASE):
+            if re.search(kfx_pattern, plugins, re.IGNORECASE):
                 self.logger.info("KFX Output plugin found and available")
                 return True
             else:
@@ -147,16 +235,50 @@ class FormatConverter(LoggerMixin):
             self.logger.error(f"Unexpected error checking KFX plugin: {e}")
             return False
 
+    def list_calibre_plugins(self) -> Optional[str]:
+        """
+        Get the plugin list of the Calibre installation.
+
+        The list is probed once and reused until Calibre or its plugin
+        configuration changes.
+
+        Returns:
+            Output of ``calibre-customize -l``, or None if listing failed
+
+        Raises:
+            subprocess.TimeoutExpired: If calibre-customize does not respond
+            FileNotFoundError: If calibre-customize is not installed
+        """
+        return self.capabilities.probe(
+            "calibre_plugins",
+            self._probe_calibre_plugins,
+            binaries=("calibre-customize",),
+            watch=calibre_plugin_paths(),
+        )
+
+    def _probe_calibre_plugins(self) -> Optional[str]:
+        """Run ``calibre-customize -l``."""
+        result = subprocess.run(
+            ["calibre-customize", "-l"], capture_output=True, text=True, timeout=10
+        )
+
+        if result.returncode != 0:
+            self.logger.error(f"Failed to list Calibre plugins: {result.stderr}")
+            return None
+
+        return result.stdout
+
     def convert_kfx_batch(
         self,
         kfx_files: List[Path],
         output_dir: Optional[Path] = None,
         output_format: str = "epub",
-        parallel: int = 4,
+        parallel: Optional[int] = None,
         quality: str = "high",
         preserve_metadata: bool = True,
         progress_callback=None,
         dry_run: bool = False,
+        resume: bool = False,
     ) -> List[ConversionResult]:
         """Convert multiple KFX files to another format with KFX-specific handling.
 
@@ -169,11 +291,14 @@ class FormatConverter(LoggerMixin):
             kfx_files: List of KFX files to convert
             output_dir: Output directory for converted files
             output_format: Target format for conversion
-            parallel: Number of parallel conversion processes
+            parallel: Number of parallel conversion processes (sized from
+                the configuration and machine resources if None)
             quality: Conversion quality setting
             preserve_metadata: Whether to preserve metadata
             progress_callback: Progress callback function
             dry_run: If True, only validate without converting
+            resume: Continue an interrupted batch from its job journal and
+                retry failed conversions with backoff
 
         Returns:
             List of conversion results
@@ -240,8 +365,8 @@ class FormatConverter(LoggerMixin):
         # Ensure output directory exists
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Limit parallel workers to configured maximum
-        parallel = min(parallel, self.max_parallel)
+        # Limit parallel workers to configured maximum and machine resources
+        parallel = self.effective_parallel(parallel)
 
         if dry_run:
             self.logger.info("DRY RUN: KFX batch conversion preview")
@@ -276,30 +401,23 @@ class FormatConverter(LoggerMixin):
 
             return non_kfx_results + kfx_results
 
-        # Prepare KFX conversion jobs with special naming
-        conversion_jobs = []
-        for kfx_file in actual_kfx_files:
-            # Use special naming for KFX conversions to avoid conflicts
-            output_file = (
-                output_dir / f"{kfx_file.stem}_from_kfx.{output_format.lower()}"
-            )
-
-            # Skip if output already exists
-            if output_file.exists():
-                self.logger.info(
-                    f"Skipping {kfx_file.name} - output already exists: {output_file.name}"
+        # Prepare KFX conversion jobs with special naming to avoid conflicts
+        journal = self._journal(output_dir)
+        conversion_jobs = journal.plan(
+            [
+                ConversionJob(
+                    input_file=kfx_file,
+                    output_file=output_dir
+                    / f"{kfx_file.stem}_from_kfx.{output_format.lower()}",
+                    output_format=output_format,
+                    quality=quality,
+                    include_cover=True,  # Always include cover for KFX
+                    preserve_metadata=preserve_metadata,
                 )
-                continue
-
-            conversion_jobs.append(
-                {
-                    "input_file": kfx_file,
-                    "output_file": output_file,
-                    "output_format": output_format,
-                    "quality": quality,
-                    "preserve_metadata": preserve_metadata,
-                }
-            )
+                for kfx_file in actual_kfx_files
+            ],
+            resume=resume,
+        )
 
         if not conversion_jobs:
             self.logger.info("No KFX files need conversion (all outputs already exist)")
@@ -311,91 +429,82 @@ class FormatConverter(LoggerMixin):
 
         results = []
         completed = 0
+        progress = BatchProgress(len(conversion_jobs), progress_callback)
+
+        # Execute KFX conversions, longest expected first
+        scheduler = self._scheduler(parallel, [journal])
+        for job, future in scheduler.run(
+            conversion_jobs,
+            lambda job: journal.run(
+                job,
+                lambda job: self._convert_job(job, progress.for_job(job)),
+                retry=resume,
+            ),
+        ):
+            try:
+                result = future.result()
+                results.append(result)
+                completed += 1
+                self.cost_model.observe(job, result)
 
-        def convert_kfx_job(job):
-            """Helper function to convert a single KFX job with enhanced options"""
-            return self.convert_single(
-                input_file=job["input_file"],
-                output_file=job["output_file"],
-                output_format=job["output_format"],
-                quality=job["quality"],
-                include_cover=True,  # Always include cover for KFX
-                preserve_metadata=job["preserve_metadata"],
-            )
-
-        # Execute KFX conversions in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=parallel) as executor:
-            # Submit all KFX jobs
-            future_to_job = {
-                executor.submit(convert_kfx_job, job): job for job in conversion_jobs
-            }
-
-            # Collect results as they complete
-            for future in concurrent.futures.as_completed(future_to_job):
-                job = future_to_job[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                    completed += 1
-
-                    # Progress reporting
-                    if progress_callback:
-                        progress_percentage = completed / len(conversion_jobs)
-                        status_msg = f"KFX Converted {completed}/{len(conversion_jobs)}"
-                        if result.success:
-                            status_msg += f" - ✓ {result.input_file.name}"
-                        else:
-                            status_msg += f" - ✗ {result.input_file.name}"
-                        progress_callback(progress_percentage, status_msg)
-
-                    # Log individual results with KFX-specific info
+                # Progress reporting
+                if progress_callback:
+                    progress_percentage = progress.finish(job)
+                    status_msg = f"KFX Converted {completed}/{len(conversion_jobs)}"
                     if result.success:
-                        size_mb = (
-                            result.file_size_after / 1024 / 1024
-                            if result.file_size_after
-                            else 0
-                        )
-                        self.logger.info(
-                            f"✓ Converted KFX {result.input_file.name} to {output_format.upper()} ({size_mb:.1f} MB)"
-                        )
+                        status_msg += f" - ✓ {result.input_file.name}"
                     else:
-                        self.logger.error(
-                            f"✗ Failed to convert KFX {result.input_file.name}: {result.error}"
-                        )
-
-                        # Provide KFX-specific error guidance
-                        if (
-                            "plugin" in result.error.lower()
-                            or "kfx" in result.error.lower()
-                        ):
-                            self.logger.error(
-                                "  💡 Try installing/updating the KFX Output plugin: calibre-customize -a KFXOutput.zip"
-                            )
-
-                except Exception as exc:
-                    # Handle unexpected exceptions with KFX context
-                    error_result = ConversionResult(
-                        input_file=job["input_file"],
-                        output_file=job["output_file"],
-                        input_format=BookFormat.KFX,
-                        output_format=BookFormat(output_format.lower()),
-                        success=False,
-                        error=f"Unexpected KFX conversion error: {str(exc)}",
+                        status_msg += f" - ✗ {result.input_file.name}"
+                    progress_callback(progress_percentage, status_msg)
+
+                # Log individual results with KFX-specific info
+                if result.success:
+                    size_mb = (
+                        result.file_size_after / 1024 / 1024
+                        if result.file_size_after
+                        else 0
                     )
-                    results.append(error_result)
-                    completed += 1
-
+                    self.logger.info(
+                        f"✓ Converted KFX {result.input_file.name} to {output_format.upper()} ({size_mb:.1f} MB)"
+                    )
+                else:
                     self.logger.error(
-                        f"✗ Exception converting KFX {job['input_file'].name}: {exc}"
+                        f"✗ Failed to convert KFX {result.input_file.name}: {result.error}"
                     )
 
-                    if progress_callback:
-                        progress_percentage = completed / len(conversion_jobs)
-                        progress_callback(
-                            progress_percentage,
-                            f"KFX Error {completed}/{len(conversion_jobs)}",
+                    # Provide KFX-specific error guidance
+                    if (
+                        "plugin" in result.error.lower()
+                        or "kfx" in result.error.lower()
+                    ):
+                        self.logger.error(
+                            "  💡 Try installing/updating the KFX Output plugin: calibre-customize -a KFXOutput.zip"
                         )
 
+            except Exception as exc:
+                # Handle unexpected exceptions with KFX context
+                error_result = ConversionResult(
+                    input_file=job.input_file,
+                    output_file=job.output_file,
+                    input_format=BookFormat.KFX,
+                    output_format=BookFormat(output_format.lower()),
+                    success=False,
+                    error=f"Unexpected KFX conversion error: {str(exc)}",
+                )
+                results.append(error_result)
+                completed += 1
+
+                self.logger.error(
+                    f"✗ Exception converting KFX {job.input_file.name}: {exc}"
+                )
+
+                if progress_callback:
+                    progress_percentage = progress.finish(job)
+                    progress_callback(
+                        progress_percentage,
+                        f"KFX Error {completed}/{len(conversion_jobs)}",
+                    )
+
         # Combine results from non-KFX files and KFX conversions
         all_results = non_kfx_results + results
 
@@ -422,6 +531,9 @@ class FormatConverter(LoggerMixin):
                 f"  📊 Total KFX output size: {total_kfx_size_after:.1f} MB"
             )
             self.logger.info(f"  ⏱️ Total KFX time: {total_kfx_time:.1f} seconds")
+            estimate = self.cost_model.summary(scheduler.expected_costs, results)
+            if estimate:
+                self.logger.info(f"  ⏱️ {estimate}")
 
             if kfx_failed:
                 self.logger.warning(f"Failed KFX conversions:")
@@ -527,39 +639,67 @@ class FormatConverter(LoggerMixin):
                 file_size_after=file_size_before,  # Estimate same size for dry run
             )
 
+        # ebook-convert writes next to the output, which is only replaced
+        # once the conversion succeeded
+        partial_file = partial_output_path(output_file)
+
         try:
             # Build ebook-convert command
             cmd = self._build_conversion_command(
                 input_file=input_file,
-                output_file=output_file,
+                output_file=partial_file,
                 output_format=output_format,
                 quality=quality,
                 include_cover=include_cover,
                 preserve_metadata=preserve_metadata,
             )
 
+            # Reuse the output of an identical earlier conversion
+            cache_key = self._conversion_cache_key(input_file, output_format, cmd)
+            if cache_key:
+                method = self.conversion_cache.fetch(cache_key, output_file)
+                if method:
+                    self.logger.info(
+                        f"Reused cached conversion of {input_file.name} ({method})"
+                    )
+                    return ConversionResult(
+                        input_file=input_file,
+                        output_file=output_file,
+                        input_format=input_format,
+                        output_format=BookFormat(output_format.lower()),
+                        success=True,
+                        conversion_time=time.time() - start_time,
+                        file_size_before=file_size_before,
+                        file_size_after=output_file.stat().st_size,
+                        from_cache=True,
+                    )
+
             self.logger.debug(
                 f"Running conversion command: {' '.join(str(x) for x in cmd)}"
             )
 
-            # Execute conversion
-            result = subprocess.run(
+            # Execute conversion in a resource limited child process
+            result = run_limited(
                 cmd,
-                capture_output=True,
-                text=True,
-                timeout=600,  # 10 minute timeout for single file conversion
+                self.resource_limits,
+                timeout=DEFAULT_JOB_TIMEOUT,
+                progress_callback=progress_callback,
             )
 
             conversion_time = time.time() - start_time
 
             if result.returncode == 0:
                 # Verify output file was created
-                if output_file.exists():
+                if partial_file.exists():
+                    os.replace(partial_file, output_file)
                     file_size_after = output_file.stat().st_size
                     self.logger.info(
                         f"Successfully converted {input_file.name} to {output_format} ({file_size_after / 1024 / 1024:.1f} MB)"
                     )
 
+                    if cache_key:
+                        self.conversion_cache.store(cache_key, output_file)
+
                     if progress_callback:
                         progress_callback(1.0, "Conversion completed")
 
@@ -588,10 +728,11 @@ class FormatConverter(LoggerMixin):
                     )
             else:
                 # Conversion failed
+                # Only the tail of the conversion log is kept
                 error_msg = (
                     result.stderr.strip()
-                    if result.stderr
-                    else "Unknown conversion error"
+                    or result.stdout.strip()
+                    or "Unknown conversion error"
                 )
                 self.logger.error(
                     f"Conversion failed for {input_file.name}: {error_msg}"
@@ -608,7 +749,7 @@ class FormatConverter(LoggerMixin):
                 )
 
         except subprocess.TimeoutExpired:
-            error_msg = f"Conversion timeout (600s exceeded) for {input_file.name}"
+            error_msg = f"Conversion timeout ({DEFAULT_JOB_TIMEOUT}s exceeded) for {input_file.name}"
             self.logger.error(error_msg)
             return ConversionResult(
                 input_file=input_file,
@@ -633,18 +774,22 @@ class FormatConverter(LoggerMixin):
                 conversion_time=time.time() - start_time,
                 file_size_before=file_size_before,
             )
+        finally:
+            # Never leave a partially written output behind
+            partial_file.unlink(missing_ok=True)
 
     def convert_batch(
         self,
         files: List[Path],
         output_dir: Optional[Path] = None,
         output_format: str = "epub",
-        parallel: int = 2,
+        parallel: Optional[int] = None,
         quality: str = "high",
         include_cover: bool = True,
         preserve_metadata: bool = True,
         progress_callback=None,
         dry_run: bool = False,
+        resume: bool = False,
     ) -> List[ConversionResult]:
         """Convert multiple files in batch with parallel processing.
 
@@ -652,12 +797,15 @@ class FormatConverter(LoggerMixin):
             files: List of input files to convert
             output_dir: Output directory (uses config default if None)
             output_format: Target format for conversion
-            parallel: Number of parallel conversion processes
+            parallel: Number of parallel conversion processes (sized from
+                the configuration and machine resources if None)
             quality: Conversion quality setting
             include_cover: Whether to include covers
             preserve_metadata: Whether to preserve metadata
             progress_callback: Progress callback function
             dry_run: If True, only validate without converting
+            resume: Continue an interrupted batch from its job journal and
+                retry failed conversions with backoff
 
         Returns:
             List of ConversionResult objects
@@ -673,8 +821,8 @@ class FormatConverter(LoggerMixin):
         # Ensure output directory exists
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Limit parallel workers to configured maximum
-        parallel = min(parallel, self.max_parallel)
+        # Limit parallel workers to configured maximum and machine resources
+        parallel = self.effective_parallel(parallel)
 
         self.logger.info(
             f"Starting batch conversion of {len(files)} files to {output_format} (parallel: {parallel})"
@@ -702,28 +850,23 @@ class FormatConverter(LoggerMixin):
                     )
             return results
 
-        # Prepare conversion jobs
-        conversion_jobs = []
-        for file_path in files:
-            output_file = output_dir / f"{file_path.stem}.{output_format.lower()}"
-
-            # Skip if output already exists (unless force conversion is enabled)
-            if output_file.exists():
-                self.logger.info(
-                    f"Skipping {file_path.name} - output already exists: {output_file.name}"
+        # Prepare conversion jobs, skipping finished ones
+        journal = self._journal(output_dir)
+        conversion_jobs = journal.plan(
+            [
+                ConversionJob(
+                    input_file=file_path,
+                    output_file=output_dir
+                    / f"{file_path.stem}.{output_format.lower()}",
+                    output_format=output_format,
+                    quality=quality,
+                    include_cover=include_cover,
+                    preserve_metadata=preserve_metadata,
                 )
-                continue
-
-            conversion_jobs.append(
-                {
-                    "input_file": file_path,
-                    "output_file": output_file,
-                    "output_format": output_format,
-                    "quality": quality,
-                    "include_cover": include_cover,
-                    "preserve_metadata": preserve_metadata,
-                }
-            )
+                for file_path in files
+            ],
+            resume=resume,
+        )
 
         if not conversion_jobs:
             self.logger.info("No files need conversion (all outputs already exist)")
@@ -735,82 +878,72 @@ class FormatConverter(LoggerMixin):
 
         results = []
         completed = 0
+        progress = BatchProgress(len(conversion_jobs), progress_callback)
+
+        # Execute conversions, longest expected first
+        scheduler = self._scheduler(parallel, [journal])
+        for job, future in scheduler.run(
+            conversion_jobs,
+            lambda job: journal.run(
+                job,
+                lambda job: self._convert_job(job, progress.for_job(job)),
+                retry=resume,
+            ),
+        ):
+            try:
+                result = future.result()
+                results.append(result)
+                completed += 1
+                self.cost_model.observe(job, result)
 
-        def convert_single_job(job):
-            """Helper function to convert a single job"""
-            return self.convert_single(
-                input_file=job["input_file"],
-                output_file=job["output_file"],
-                output_format=job["output_format"],
-                quality=job["quality"],
-                include_cover=job["include_cover"],
-                preserve_metadata=job["preserve_metadata"],
-            )
-
-        # Execute conversions in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=parallel) as executor:
-            # Submit all jobs
-            future_to_job = {
-                executor.submit(convert_single_job, job): job for job in conversion_jobs
-            }
-
-            # Collect results as they complete
-            for future in concurrent.futures.as_completed(future_to_job):
-                job = future_to_job[future]
-                try:
-                    result = future.result()
-                    results.append(result)
-                    completed += 1
-
-                    # Progress reporting
-                    if progress_callback:
-                        progress_percentage = completed / len(conversion_jobs)
-                        status_msg = f"Converted {completed}/{len(conversion_jobs)}"
-                        if result.success:
-                            status_msg += f" - ✓ {result.input_file.name}"
-                        else:
-                            status_msg += f" - ✗ {result.input_file.name}"
-                        progress_callback(progress_percentage, status_msg)
-
-                    # Log individual results
+                # Progress reporting
+                if progress_callback:
+                    progress_percentage = progress.finish(job)
+                    status_msg = f"Converted {completed}/{len(conversion_jobs)}"
                     if result.success:
-                        size_mb = (
-                            result.file_size_after / 1024 / 1024
-                            if result.file_size_after
-                            else 0
-                        )
-                        self.logger.info(
-                            f"✓ Converted {result.input_file.name} ({size_mb:.1f} MB)"
-                        )
+                        status_msg += f" - ✓ {result.input_file.name}"
                     else:
-                        self.logger.error(
-                            f"✗ Failed to convert {result.input_file.name}: {result.error}"
-                        )
-
-                except Exception as exc:
-                    # Handle unexpected exceptions
-                    error_result = ConversionResult(
-                        input_file=job["input_file"],
-                        output_file=job["output_file"],
-                        input_format=self._detect_format(job["input_file"])
-                        or BookFormat.EPUB,
-                        output_format=BookFormat(output_format.lower()),
-                        success=False,
-                        error=f"Unexpected error: {str(exc)}",
+                        status_msg += f" - ✗ {result.input_file.name}"
+                    progress_callback(progress_percentage, status_msg)
+
+                # Log individual results
+                if result.success:
+                    size_mb = (
+                        result.file_size_after / 1024 / 1024
+                        if result.file_size_after
+                        else 0
                     )
-                    results.append(error_result)
-                    completed += 1
-
+                    self.logger.info(
+                        f"✓ Converted {result.input_file.name} ({size_mb:.1f} MB)"
+                    )
+                else:
                     self.logger.error(
-                        f"✗ Exception converting {job['input_file'].name}: {exc}"
+                        f"✗ Failed to convert {result.input_file.name}: {result.error}"
                     )
 
-                    if progress_callback:
-                        progress_percentage = completed / len(conversion_jobs)
-                        progress_callback(
-                            progress_percentage,
-                            f"Error {completed}/{len(conversion_jobs)}",
-                        )
+            except Exception as exc:
+                # Handle unexpected exceptions
+                error_result = ConversionResult(
+                    input_file=job.input_file,
+                    output_file=job.output_file,
+                    input_format=self._detect_format(job.input_file) or BookFormat.EPUB,
+                    output_format=BookFormat(output_format.lower()),
+                    success=False,
+                    error=f"Unexpected error: {str(exc)}",
+                )
+                results.append(error_result)
+                completed += 1
+
+                self.logger.error(
+                    f"✗ Exception converting {job.input_file.name}: {exc}"
+                )
+
+                if progress_callback:
+                    progress_percentage = progress.finish(job)
+                    progress_callback(
+                        progress_percentage,
+                        f"Error {completed}/{len(conversion_jobs)}",
+                    )
 
         # Summary statistics
         successful = [r for r in results if r.success]
@@ -826,6 +959,9 @@ class FormatConverter(LoggerMixin):
         self.logger.info(f"  📊 Total input size: {total_size_before:.1f} MB")
         self.logger.info(f"  📊 Total output size: {total_size_after:.1f} MB")
         self.logger.info(f"  ⏱️ Total time: {total_time:.1f} seconds")
+        estimate = self.cost_model.summary(scheduler.expected_costs, results)
+        if estimate:
+            self.logger.info(f"  ⏱️ {estimate}")
 
         if failed:
             self.logger.warning(f"Failed conversions:")
@@ -836,6 +972,73 @@ class FormatConverter(LoggerMixin):
 
         return results
 
+    def effective_parallel(self, parallel: Optional[int] = None) -> int:
+        """
+        Number of conversion workers for a batch.
+
+        An explicitly requested number is used as given, with a warning if
+        the machine is not expected to hold that many conversions. Otherwise
+        the configured maximum is limited to the machine's resources.
+
+        Args:
+            parallel: Requested number of workers, or None for the default
+
+        Returns:
+            Number of workers, at least 1
+        """
+        machine = default_concurrency(self.job_memory_bytes)
+        if parallel is None:
+            return max(1, min(self.max_parallel, machine))
+        if parallel > machine:
+            self.logger.warning(
+                f"Running {parallel} conversions at once; available cores and "
+                f"memory are only expected to hold {machine}"
+            )
+        return max(1, parallel)
+
+    def _journal(self, output_dir: Path) -> ConversionJournal:
+        """Open the job journal of batch conversions into ``output_dir``."""
+        return ConversionJournal.for_output_dir(
+            output_dir,
+            max_attempts=self.max_attempts,
+            retry_backoff=self.retry_backoff,
+        )
+
+    def _scheduler(
+        self, parallel: int, journals: List[ConversionJournal]
+    ) -> ConversionScheduler:
+        """
+        Create a scheduler ordering jobs by their predicted conversion time.
+
+        Args:
+            parallel: Number of workers
+            journals: Journals of the batch, whose timings calibrate the
+                cost model
+
+        Returns:
+            Scheduler running the longest expected jobs first
+        """
+        for journal in journals:
+            try:
+                self.cost_model.learn(journal.timings())
+            except sqlite3.Error as e:
+                self.logger.debug(f"Cannot read timings of {journal.db_path}: {e}")
+        return ConversionScheduler(parallel, cost=self.cost_model.predict)
+
+    def _convert_job(
+        self, job: ConversionJob, progress_callback=None
+    ) -> ConversionResult:
+        """Convert a scheduled job with ``convert_single``."""
+        return self.convert_single(
+            input_file=job.input_file,
+            output_file=job.output_file,
+            output_format=job.output_format,
+            quality=job.quality,
+            include_cover=job.include_cover,
+            preserve_metadata=job.preserve_metadata,
+            progress_callback=progress_callback,
+        )
+
     def find_convertible_files(
         self,
         input_dir: Path,
@@ -845,6 +1048,8 @@ class FormatConverter(LoggerMixin):
     ) -> List[Path]:
         """Find convertible files in directory with format filtering.
 
+        Subdirectories are listed in parallel (see ``walk_files``).
+
         Args:
             input_dir: Directory to search in
             source_format: Filter by specific source format (e.g., 'mobi', 'epub')
@@ -899,46 +1104,34 @@ class FormatConverter(LoggerMixin):
                 self.logger.warning(f"Unsupported source format: {source_format}")
                 return []
 
-        convertible_files = []
-        total_checked = 0
+        def is_convertible(entry: os.DirEntry) -> bool:
+            stem, _, extension = entry.name.rpartition(".")
+            stem = stem.lower()
+            # Skip files that look like conversion outputs to avoid duplicates
+            return (
+                bool(stem)
+                and extension.lower() in supported_extensions
+                and "_kfx" not in stem
+                and "_converted" not in stem
+            )
 
+        convertible_files = []
         try:
-            # Use appropriate iteration method based on recursive flag
-            if recursive:
-                file_iterator = input_dir.rglob("*")
-            else:
-                file_iterator = input_dir.iterdir()
-
-            for file_path in file_iterator:
-                total_checked += 1
+            for entry in walk_files(
+                input_dir, recursive=recursive, match=is_convertible
+            ):
+                convertible_files.append(Path(entry.path))
+                self.logger.debug(f"Found convertible file: {entry.path}")
 
                 # Progress reporting every 100 files
-                if progress_callback and total_checked % 100 == 0:
+                if progress_callback and len(convertible_files) % 100 == 0:
                     progress_callback(
-                        f"Scanned {total_checked} files, found {len(convertible_files)} convertible"
+                        f"Found {len(convertible_files)} convertible files so far"
                     )
 
-                # Skip directories and non-files
-                if not file_path.is_file():
-                    continue
-
-                # Check file extension
-                extension = file_path.suffix.lower().lstrip(".")
-                if extension in supported_extensions:
-                    # Skip files that look like conversion outputs to avoid duplicates
-                    if (
-                        "_kfx" not in file_path.stem.lower()
-                        and "_converted" not in file_path.stem.lower()
-                    ):
-                        convertible_files.append(file_path)
-                        self.logger.debug(f"Found convertible file: {file_path}")
-
         except Exception as e:
             self.logger.error(f"Error scanning directory {input_dir}: {e}")
-            return convertible_files  # Return what we found so far
-
-        # Sort files by name for predictable order
-        convertible_files.sort(key=lambda p: p.name.lower())
+            # Keep what was found so far
 
         self.logger.info(
             f"Found {len(convertible_files)} convertible files in {input_dir}"
@@ -947,6 +1140,8 @@ class FormatConverter(LoggerMixin):
         if progress_callback:
             progress_callback(f"Found {len(convertible_files)} convertible files")
 
+        # Sort files by name for predictable order
+        convertible_files.sort(key=lambda p: p.name.lower())
         return convertible_files
 
     def get_supported_formats(self):
@@ -970,9 +1165,14 @@ class FormatConverter(LoggerMixin):
 
         # Try to get actual supported formats from Calibre
         try:
-            input_formats, output_formats = self._query_calibre_formats()
+            formats = self.capabilities.probe(
+                "calibre_formats",
+                self._probe_calibre_formats,
+                binaries=("ebook-convert",),
+            )
             return SupportedFormats(
-                input_formats=input_formats, output_formats=output_formats
+                input_formats=[Format(*f) for f in formats["input"]],
+                output_formats=[Format(*f) for f in formats["output"]],
             )
         except Exception as e:
             self.logger.warning(
@@ -1142,6 +1342,14 @@ class FormatConverter(LoggerMixin):
 
         return cmd
 
+    def _probe_calibre_formats(self) -> Dict[str, List[List[str]]]:
+        """Query Calibre formats in a form the capability registry can persist."""
+        input_formats, output_formats = self._query_calibre_formats()
+        return {
+            "input": [[f.name, f.extension, f.description] for f in input_formats],
+            "output": [[f.name, f.extension, f.description] for f in output_formats],
+        }
+
     def _query_calibre_formats(self) -> tuple[List, List]:
         """Query Calibre for supported input and output formats.
 
@@ -0,0 +1,310 @@
+"""
+Download ledger for Calibre Books CLI.
+
+Downloads into a directory are recorded in a small SQLite database
+(``<download_dir>/.book-tool-downloads.db``) keyed by the librarian hash
+of the book, moving through downloading → done or failed together with
+the size and SHA-256 of the downloaded file.
+
+librarian writes to a hidden partial file that is renamed to its final
+name only after the file passed validation, so a re-run of a failed or
+interrupted batch skips every book that is already on disk unchanged,
+adopts partial files that were completed just before an interruption and
+downloads everything else again. Each download reserves its file name in
+the ledger, so books with the same title never replace each other's files.
+"""
+
+import logging
+import sqlite3
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Optional
+
+from ..utils.files import file_digest
+
+# Ledger file created in each download directory
+LEDGER_FILENAME = ".book-tool-downloads.db"
+
+
+class DownloadState(Enum):
+    """State of a ledger entry."""
+
+    DOWNLOADING = "downloading"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class DownloadLedger:
+    """
+    Persistent record of the downloads into one directory.
+    """
+
+    def __init__(self, db_path: Path):
+        """
+        Initialize the ledger.
+
+        Args:
+            db_path: Path of the ledger database
+        """
+        self.db_path = Path(db_path)
+        self.logger = logging.getLogger(__name__)
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS downloads (
+                        hash TEXT PRIMARY KEY,
+                        title TEXT,
+                        author TEXT,
+                        format TEXT,
+                        path TEXT,
+                        state TEXT NOT NULL,
+                        size INTEGER,
+                        content_hash TEXT,
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        error TEXT,
+                        updated_at REAL NOT NULL
+                    )
+                """
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS downloads_content_hash "
+                    "ON downloads (content_hash)"
+                )
+        finally:
+            conn.close()
+
+    @classmethod
+    def for_download_dir(cls, download_dir: Path) -> "DownloadLedger":
+        """Open the ledger of downloads into ``download_dir``."""
+        return cls(Path(download_dir) / LEDGER_FILENAME)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the ledger database."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get(self, hash_id: str) -> Optional[sqlite3.Row]:
+        """Read the entry of a download."""
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT * FROM downloads WHERE hash = ?", (hash_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _is_intact(row: sqlite3.Row) -> bool:
+        """Whether the file of a finished download is still on disk unchanged."""
+        path = Path(row["path"])
+        try:
+            return (
+                path.stat().st_size == row["size"]
+                and file_digest(path) == row["content_hash"]
+            )
+        except OSError:
+            return False
+
+    def finished_file(self, hash_id: str) -> Optional[Path]:
+        """
+        Find the file of a finished download.
+
+        Args:
+            hash_id: librarian hash of the book
+
+        Returns:
+            Path of the downloaded file, or None if the book was not
+            downloaded or its file was changed or removed since
+        """
+        row = self.get(hash_id)
+        if row is None or row["state"] != DownloadState.DONE.value:
+            return None
+        if not self._is_intact(row):
+            self.logger.info(f"Downloaded file of {hash_id} changed, downloading again")
+            return None
+        return Path(row["path"])
+
+    def find_content(self, content_hash: str) -> Optional[Path]:
+        """
+        Find a finished download with the given content.
+
+        Args:
+            content_hash: SHA-256 of the file content
+
+        Returns:
+            Path of an intact file with that content, or None
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM downloads WHERE content_hash = ? AND state = ?",
+                (content_hash, DownloadState.DONE.value),
+            ).fetchall()
+        finally:
+            conn.close()
+        for row in rows:
+            if self._is_intact(row):
+                return Path(row["path"])
+        return None
+
+    def is_downloading(self, hash_id: str) -> bool:
+        """Whether a download was started but never finished."""
+        row = self.get(hash_id)
+        return row is not None and row["state"] == DownloadState.DOWNLOADING.value
+
+    def mark_downloading(
+        self, hash_id: str, title: str, author: str, format: str, path: Path
+    ) -> Path:
+        """
+        Record that a download started and reserve the file it is saved to.
+
+        The download keeps the file it reserved earlier, so an interrupted
+        download finds its partial file again. Otherwise it gets ``path``,
+        or ``path`` with a short suffix of the hash when that name belongs
+        to another download or to a file the ledger does not know.
+
+        Args:
+            hash_id: librarian hash of the book
+            title: Book title
+            author: Book author
+            format: Book format
+            path: Preferred path of the downloaded file
+
+        Returns:
+            Path the download is saved to
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                # Reserve the name before another download can check it
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT path FROM downloads WHERE hash = ?", (hash_id,)
+                ).fetchone()
+                previous = Path(row["path"]) if row and row["path"] else None
+                path = self._free_path(conn, hash_id, path, previous)
+
+                conn.execute(
+                    "INSERT OR IGNORE INTO downloads (hash, state, updated_at) "
+                    "VALUES (?, ?, ?)",
+                    (hash_id, DownloadState.DOWNLOADING.value, time.time()),
+                )
+                conn.execute(
+                    "UPDATE downloads SET title = ?, author = ?, format = ?, "
+                    "path = ?, state = ?, updated_at = ? WHERE hash = ?",
+                    (
+                        title,
+                        author,
+                        format,
+                        str(path),
+                        DownloadState.DOWNLOADING.value,
+                        time.time(),
+                        hash_id,
+                    ),
+                )
+        finally:
+            conn.close()
+        return path
+
+    @staticmethod
+    def _free_path(
+        conn: sqlite3.Connection, hash_id: str, path: Path, previous: Optional[Path]
+    ) -> Path:
+        """Pick the first file name no other download or unknown file uses."""
+        candidates = [
+            path,
+            path.with_name(f"{path.stem}_{hash_id[:8]}{path.suffix}"),
+        ]
+        if previous is not None:
+            candidates.insert(0, previous)
+        for candidate in candidates:
+            owned = conn.execute(
+                "SELECT 1 FROM downloads WHERE path = ? AND hash != ? LIMIT 1",
+                (str(candidate), hash_id),
+            ).fetchone()
+            if not owned and (candidate == previous or not candidate.exists()):
+                return candidate
+        return path.with_name(f"{path.stem}_{hash_id}{path.suffix}")
+
+    def _update(self, hash_id: str, **fields):
+        """Update columns of a download."""
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    f"UPDATE downloads SET {assignments} WHERE hash = ?",
+                    (*fields.values(), hash_id),
+                )
+        finally:
+            conn.close()
+
+    def mark_done(self, hash_id: str, path: Path, size: int, content_hash: str):
+        """Record a verified download."""
+        self._update(
+            hash_id,
+            path=str(path),
+            state=DownloadState.DONE.value,
+            size=size,
+            content_hash=content_hash,
+            error=None,
+        )
+
+    def update_content(self, path: Path):
+        """
+        Record that a downloaded file was changed on purpose.
+
+        Finished downloads stored at ``path`` keep counting as downloaded
+        with the file's new size and content, e.g. after an ASIN was
+        written into it.
+
+        Args:
+            path: Downloaded file that was rewritten
+        """
+        path = Path(path)
+        size = path.stat().st_size
+        content_hash = file_digest(path)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "UPDATE downloads SET size = ?, content_hash = ?, "
+                    "updated_at = ? WHERE path = ? AND state = ?",
+                    (
+                        size,
+                        content_hash,
+                        time.time(),
+                        str(path),
+                        DownloadState.DONE.value,
+                    ),
+                )
+        finally:
+            conn.close()
+
+    def mark_failed(self, hash_id: str, error: Optional[str]):
+        """Record a failed download attempt."""
+        row = self.get(hash_id)
+        self._update(
+            hash_id,
+            state=DownloadState.FAILED.value,
+            attempts=(row["attempts"] if row else 0) + 1,
+            error=error,
+        )
+
+    def counts(self) -> dict:
+        """Number of ledger entries per state."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT state, COUNT(*) FROM downloads GROUP BY state"
+            ).fetchall()
+        finally:
+            conn.close()
+        return {state: count for state, count in rows}
@@ -9,11 +9,20 @@ import subprocess
 import concurrent.futures
 import json
 import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Callable
 from dataclasses import dataclass
+from urllib.parse import urlparse
 
 from ..utils.logging import LoggerMixin
+from ..utils.files import file_digest, partial_output_path
+from ..utils.validation import ValidationResult
+from .download_ledger import DownloadLedger
 from .exceptions import (
     DownloadError,
     LibrarianError,
@@ -22,6 +31,10 @@ from .exceptions import (
     FormatError,
     ConfigurationError,
 )
+from .file_validator import FileValidator
+
+# Host of search results that do not name their mirror
+DEFAULT_DOWNLOAD_HOST = "librarian"
 
 
 @dataclass
@@ -72,8 +85,14 @@ class BookDownloader(LoggerMixin):
         ).expanduser()
         self.librarian_path = config.get("librarian_path", "librarian")
         self.max_parallel = config.get("max_parallel", 1)
+        self.max_per_host = config.get("max_per_host", 2)
         self.quality = config.get("quality", "high")
 
+        # Download slots per host, created on first use
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+        self._validator: Optional[FileValidator] = None
+
         # Validate configuration
         self._validate_configuration()
 
@@ -114,6 +133,13 @@ class BookDownloader(LoggerMixin):
                 config_value=str(self.max_parallel),
             )
 
+        if not isinstance(self.max_per_host, int) or self.max_per_host < 1:
+            raise ConfigurationError(
+                f"max_per_host must be a positive integer, got: {self.max_per_host}",
+                config_key="max_per_host",
+                config_value=str(self.max_per_host),
+            )
+
         # Validate quality setting
         valid_qualities = {"low", "medium", "high"}
         if self.quality not in valid_qualities:
@@ -192,6 +218,9 @@ class BookDownloader(LoggerMixin):
         """
         Download books based on search criteria.
 
+        Matching search results are downloaded on a pool of ``max_parallel``
+        workers with at most ``max_per_host`` downloads per host.
+
         Args:
             series: Series name to search for
             author: Author name to search for
@@ -254,24 +283,35 @@ class BookDownloader(LoggerMixin):
                 self.logger.warning(f"No books found in {format} format")
                 return []
 
-            # Download books
-            results = []
+            # Download books on a bounded pool, results in search order
             total_books = len(filtered_books)
+            results: List[Optional[DownloadResult]] = [None] * total_books
+            if progress_callback:
+                progress_callback(0, total_books)
 
-            for i, book_data in enumerate(filtered_books):
-                if progress_callback:
-                    progress_callback(i, total_books)
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=min(self.max_parallel, total_books)
+            ) as executor:
+                future_to_index = {
+                    executor.submit(
+                        self._download_single_book, book_data, target_dir, format
+                    ): i
+                    for i, book_data in enumerate(filtered_books)
+                }
 
-                result = self._download_single_book(book_data, target_dir, format)
-                results.append(result)
+                completed = 0
+                for future in concurrent.futures.as_completed(future_to_index):
+                    result = future.result()
+                    results[future_to_index[future]] = result
+                    completed += 1
 
-                if not result.success:
-                    self.logger.error(f"Failed to download: {result.title}")
-                else:
-                    self.logger.info(f"Downloaded: {result.title}")
+                    if not result.success:
+                        self.logger.error(f"Failed to download: {result.title}")
+                    else:
+                        self.logger.info(f"Downloaded: {result.title}")
 
-            if progress_callback:
-                progress_callback(total_books, total_books)
+                    if progress_callback:
+                        progress_callback(completed, total_books)
 
             successful = sum(1 for r in results if r.success)
             self.logger.info(
@@ -340,6 +380,27 @@ class BookDownloader(LoggerMixin):
 
         return results
 
+    def download_book(
+        self,
+        book: BookRequest,
+        format: str = "mobi",
+        output_dir: Optional[Path] = None,
+    ) -> DownloadResult:
+        """
+        Search for and download a single book.
+
+        Args:
+            book: Book request to download
+            format: Preferred download format
+            output_dir: Output directory (overrides default)
+
+        Returns:
+            Download result
+        """
+        target_dir = Path(output_dir).expanduser() if output_dir else self.download_path
+        target_dir.mkdir(parents=True, exist_ok=True)
+        return self._download_book_request(book, target_dir, format)
+
     def download_from_url(
         self,
         url: str,
@@ -621,25 +682,33 @@ class BookDownloader(LoggerMixin):
     def _search_books(
         self, search_query: str, target_dir: Path
     ) -> List[Dict[str, Any]]:
-        """Search for books using librarian CLI."""
-        try:
-            # Run librarian search
-            result = subprocess.run(
-                [self.librarian_path, "-p", str(target_dir), "search", search_query],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=60,
-            )
+        """
+        Search for books using librarian CLI.
 
-            # Load search results from JSON file
-            results_file = target_dir / "search_results.json"
-            if not results_file.exists():
-                self.logger.warning("Search results file not found")
-                return []
+        Each search writes its ``search_results.json`` into a private
+        temporary directory, so concurrent searches for the same target
+        directory cannot read each other's results. Results printed as JSON
+        on stdout are used directly.
+        """
+        try:
+            with tempfile.TemporaryDirectory(
+                prefix=".search-", dir=target_dir
+            ) as search_dir:
+                # Run librarian search
+                result = subprocess.run(
+                    [self.librarian_path, "-p", search_dir, "search", search_query],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                    timeout=60,
+                )
 
-            with open(results_file, "r") as f:
-                search_results = json.load(f)
+                search_results = self._parse_search_output(
+                    result.stdout, Path(search_dir) / "search_results.json"
+                )
+                if search_results is None:
+                    self.logger.warning("Search produced no results")
+                    return []
 
             self.logger.info(f"Found {len(search_results)} search results")
             return search_results
@@ -654,10 +723,60 @@ class BookDownloader(LoggerMixin):
             self.logger.error(f"Failed to parse search results: {e}")
             return []
 
+    @staticmethod
+    def _parse_search_output(
+        stdout: Optional[str], results_file: Path
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Parse librarian search results.
+
+        Args:
+            stdout: Output of the search command
+            results_file: Results file written by the search
+
+        Returns:
+            Search results, or None if the search produced none
+
+        Raises:
+            json.JSONDecodeError: If the results are not valid JSON
+        """
+        if stdout and stdout.lstrip().startswith("["):
+            return json.loads(stdout)
+        if not results_file.exists():
+            return None
+        with open(results_file, "r") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _download_host(book_data: Dict[str, Any]) -> str:
+        """Host a search result is downloaded from."""
+        if book_data.get("host"):
+            return str(book_data["host"]).lower()
+        url = book_data.get("url") or book_data.get("mirror") or ""
+        return urlparse(str(url)).hostname or DEFAULT_DOWNLOAD_HOST
+
+    @contextmanager
+    def _host_slot(self, host: str):
+        """Hold one of the ``max_per_host`` download slots of a host."""
+        with self._host_slots_lock:
+            slot = self._host_slots.setdefault(
+                host, threading.BoundedSemaphore(self.max_per_host)
+            )
+        with slot:
+            yield
+
     def _download_single_book(
         self, book_data: Dict[str, Any], target_dir: Path, format: str
     ) -> DownloadResult:
-        """Download a single book from search results."""
+        """
+        Download a single book from search results.
+
+        Books the download ledger of ``target_dir`` records as downloaded
+        are skipped while their file is unchanged. librarian writes to a
+        hidden partial file that is moved to its final name only after
+        passing the FileValidator checks; a download with the same content
+        as an earlier one reuses the existing file.
+        """
         title = book_data.get("title", "Unknown")
         author = book_data.get("author", "Unknown")
         hash_id = book_data.get("hash", "")
@@ -671,74 +790,138 @@ class BookDownloader(LoggerMixin):
                 error="No hash ID found",
             )
 
+        ledger = DownloadLedger.for_download_dir(target_dir)
+        existing = ledger.finished_file(hash_id)
+        if existing:
+            self.logger.info(f"Already downloaded: {title} ({existing.name})")
+            return DownloadResult(
+                title=title,
+                author=author,
+                filepath=existing,
+                success=True,
+                format=format,
+                file_size=existing.stat().st_size,
+            )
+
         # Create safe filename
         safe_filename = self._create_safe_filename(title, format)
 
         try:
-            # Download using librarian
-            result = subprocess.run(
-                [self.librarian_path, "download", hash_id, safe_filename],
-                cwd=target_dir,
-                capture_output=True,
-                text=True,
-                timeout=300,
+            interrupted = ledger.is_downloading(hash_id)
+            # Books sharing a title get distinct files
+            target_path = ledger.mark_downloading(
+                hash_id, title, author, format, target_dir / safe_filename
             )
+            partial_path = partial_output_path(target_path)
+
+            if (
+                interrupted
+                and partial_path.exists()
+                and self._validate_download(partial_path).is_valid
+            ):
+                # Interrupted after librarian finished writing the file
+                self.logger.info(f"Resuming interrupted download of {title}")
+            else:
+                partial_path.unlink(missing_ok=True)
 
-            if result.returncode != 0:
-                return DownloadResult(
-                    title=title,
-                    author=author,
-                    filepath=None,
-                    success=False,
-                    error=f"Download failed: {result.stderr}",
-                )
+                # Download using librarian, limiting concurrent downloads per host
+                with self._host_slot(self._download_host(book_data)):
+                    result = subprocess.run(
+                        [self.librarian_path, "download", hash_id, partial_path.name],
+                        cwd=target_dir,
+                        capture_output=True,
+                        text=True,
+                        timeout=300,
+                    )
 
-            # Check if file was downloaded to Downloads folder and move it
-            downloads_path = Path.home() / "Downloads" / safe_filename
-            target_path = target_dir / safe_filename
+                if result.returncode != 0:
+                    return self._failed_download(
+                        ledger,
+                        hash_id,
+                        title,
+                        author,
+                        f"Download failed: {result.stderr}",
+                    )
 
-            if downloads_path.exists():
-                downloads_path.rename(target_path)
+                # Check if file was downloaded to Downloads folder and move it
+                downloads_path = Path.home() / "Downloads" / partial_path.name
+                if downloads_path.exists():
+                    shutil.move(str(downloads_path), str(partial_path))
 
-            if target_path.exists():
-                file_size = target_path.stat().st_size
-                return DownloadResult(
-                    title=title,
-                    author=author,
-                    filepath=target_path,
-                    success=True,
-                    format=format,
-                    file_size=file_size,
+            if not partial_path.exists():
+                return self._failed_download(
+                    ledger, hash_id, title, author, "Downloaded file not found"
                 )
-            else:
-                return DownloadResult(
-                    title=title,
-                    author=author,
-                    filepath=None,
-                    success=False,
-                    error="Downloaded file not found",
+
+            validation = self._validate_download(partial_path)
+            if not validation.is_valid:
+                partial_path.unlink()
+                reason = "; ".join(validation.errors) or validation.status.value
+                return self._failed_download(
+                    ledger,
+                    hash_id,
+                    title,
+                    author,
+                    f"Downloaded file failed validation: {reason}",
                 )
 
-        except subprocess.TimeoutExpired:
+            content_hash = file_digest(partial_path)
+            duplicate = ledger.find_content(content_hash)
+            if duplicate:
+                self.logger.info(f"{title} duplicates {duplicate.name}, keeping it")
+                partial_path.unlink()
+                target_path = duplicate
+            else:
+                os.replace(partial_path, target_path)
+
+            file_size = target_path.stat().st_size
+            ledger.mark_done(hash_id, target_path, file_size, content_hash)
             return DownloadResult(
                 title=title,
                 author=author,
-                filepath=None,
-                success=False,
-                error="Download timed out",
+                filepath=target_path,
+                success=True,
+                format=format,
+                file_size=file_size,
+            )
+
+        except subprocess.TimeoutExpired:
+            return self._failed_download(
+                ledger, hash_id, title, author, "Download timed out"
             )
         except subprocess.CalledProcessError as e:
-            return DownloadResult(
-                title=title,
-                author=author,
-                filepath=None,
-                success=False,
-                error=f"Librarian command failed: {e.stderr if hasattr(e, 'stderr') else str(e)}",
+            return self._failed_download(
+                ledger,
+                hash_id,
+                title,
+                author,
+                f"Librarian command failed: {e.stderr if hasattr(e, 'stderr') else str(e)}",
             )
         except Exception as e:
-            return DownloadResult(
-                title=title, author=author, filepath=None, success=False, error=str(e)
-            )
+            return self._failed_download(ledger, hash_id, title, author, str(e))
+
+    def _failed_download(
+        self,
+        ledger: DownloadLedger,
+        hash_id: str,
+        title: str,
+        author: str,
+        error: str,
+    ) -> DownloadResult:
+        """Record a failed download in the ledger and build its result."""
+        try:
+            ledger.mark_failed(hash_id, error)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Cannot record failed download of {title}: {e}")
+        return DownloadResult(
+            title=title, author=author, filepath=None, success=False, error=error
+        )
+
+    def _validate_download(self, file_path: Path) -> ValidationResult:
+        """Check a downloaded file's format with the FileValidator."""
+        if self._validator is None:
+            self._validator = FileValidator(self.config)
+        return self._validator.validate_file(file_path, use_cache=False)
 
     def _download_book_request(
         self, book: BookRequest, target_dir: Path, format: str
@@ -0,0 +1,528 @@
+"""
+Duplicate detection for Calibre Books CLI.
+
+This module finds duplicate books in a Calibre library by combining three
+kinds of evidence:
+
+- byte-identical book files, found by bucketing files by size, then by a
+  hash of their first block, and only then by a full content hash
+- shared ISBN or Amazon ASIN identifiers
+- matching normalized title and author names
+
+File hashes are computed in parallel and cached by (path, size, mtime) so
+that repeated scans only rehash files that changed. For every group of
+duplicates a keeper is chosen by format preference and file size. Only
+books proven identical by their content (or, on request, by a shared
+identifier) are marked removable; metadata matches are reported only.
+"""
+
+import concurrent.futures
+import hashlib
+import os
+import re
+import sqlite3
+import unicodedata
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..utils.logging import LoggerMixin
+
+# Formats in order of preference when choosing which duplicate to keep
+DEFAULT_FORMAT_PREFERENCE = ("KFX", "AZW3", "EPUB", "MOBI", "AZW", "PDF", "TXT")
+
+# Bytes read from the start of a file for the partial hash
+PARTIAL_HASH_SIZE = 64 * 1024
+
+_READ_CHUNK_SIZE = 1024 * 1024
+
+# Evidence that proves two books identical without looking at metadata
+CONTENT_EVIDENCE = ("identical_file",)
+IDENTIFIER_EVIDENCE = ("isbn", "asin")
+
+# Leading articles and edition noise ignored when comparing titles
+_TITLE_NOISE = re.compile(r"\s*[(\[]([^)\]]*)[)\]]\s*")
+# Bracketed parts naming a volume, e.g. "(Band 1)" or "[Book II]", are kept
+_VOLUME_MARKER = re.compile(
+    r"\d|\b([ivxlc]+|band|book|buch|teil|part|vol|volume|tome|tomo)\b",
+    re.IGNORECASE,
+)
+_ARTICLES = re.compile(r"^(the|a|an|der|die|das|le|la|les|el)\s+")
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+def _fold(text: str) -> str:
+    """Lowercase text and strip accents and punctuation."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize a title for duplicate matching.
+
+    Bracketed suffixes such as ``(Special Edition)`` and leading articles
+    are removed. Bracketed volume markers such as ``(Band 1)`` are kept, so
+    volumes of a series do not compare equal.
+    """
+
+    def strip_noise(match: re.Match) -> str:
+        marker = match.group(1)
+        return f" {marker} " if _VOLUME_MARKER.search(marker) else " "
+
+    return _ARTICLES.sub("", _fold(_TITLE_NOISE.sub(strip_noise, title or "")))
+
+
+def normalize_author(author: str) -> str:
+    """
+    Normalize an author name for duplicate matching.
+
+    Name parts are sorted, so ``Sanderson, Brandon`` and ``Brandon
+    Sanderson`` compare equal.
+    """
+    return " ".join(sorted(_fold(author).split()))
+
+
+def normalize_isbn(isbn: str) -> Optional[str]:
+    """Normalize an ISBN to ISBN-13, or None if it is not a valid length."""
+    digits = re.sub(r"[^0-9Xx]", "", isbn or "").upper()
+    if len(digits) == 10:
+        core = "978" + digits[:9]
+        total = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(core))
+        return core + str((10 - total % 10) % 10)
+    if len(digits) == 13:
+        return digits
+    return None
+
+
+@dataclass
+class DuplicateGroup:
+    """A group of books considered duplicates of each other."""
+
+    book_ids: List[int]
+    keeper_id: int
+    reasons: Set[str] = field(default_factory=set)
+    removable_ids: List[int] = field(default_factory=list)
+
+    @property
+    def duplicate_ids(self) -> List[int]:
+        """Ids of all books of the group except the keeper."""
+        return [book_id for book_id in self.book_ids if book_id != self.keeper_id]
+
+
+class FileHashCache:
+    """
+    SQLite cache of partial and full file hashes.
+
+    Entries are keyed by path and only valid while the file's size and
+    mtime are unchanged.
+    """
+
+    def __init__(self, cache_path: Path):
+        """
+        Initialize the file hash cache.
+
+        Args:
+            cache_path: Path to SQLite cache database
+        """
+        self.cache_path = Path(cache_path).expanduser()
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS file_hashes (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    partial_hash TEXT,
+                    full_hash TEXT
+                )
+            """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the cache database."""
+        return sqlite3.connect(str(self.cache_path), timeout=10.0)
+
+    def get_many(self, paths: Iterable[Path]) -> Dict[str, Tuple]:
+        """
+        Get cached entries for several files.
+
+        Returns:
+            Mapping of path to ``(size, mtime_ns, partial_hash, full_hash)``
+        """
+        entries = {}
+        conn = self._connect()
+        try:
+            for path in paths:
+                row = conn.execute(
+                    "SELECT size, mtime_ns, partial_hash, full_hash "
+                    "FROM file_hashes WHERE path = ?",
+                    (str(path),),
+                ).fetchone()
+                if row:
+                    entries[str(path)] = row
+        finally:
+            conn.close()
+        return entries
+
+    def put_many(self, entries: Iterable[Tuple]):
+        """
+        Store hashes for several files.
+
+        Args:
+            entries: Tuples of ``(path, size, mtime_ns, partial_hash, full_hash)``
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO file_hashes "
+                    "(path, size, mtime_ns, partial_hash, full_hash) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(str(entry[0]), *entry[1:]) for entry in entries],
+                )
+        finally:
+            conn.close()
+
+
+@dataclass
+class _FileEntry:
+    """A book file and its hash state during a scan."""
+
+    book_id: int
+    path: Path
+    size: int
+    mtime_ns: int
+    partial_hash: Optional[str] = None
+    full_hash: Optional[str] = None
+
+
+class DuplicateFinder(LoggerMixin):
+    """
+    Find duplicate books by file content, identifiers and metadata.
+    """
+
+    def __init__(
+        self,
+        hash_cache: Optional[FileHashCache] = None,
+        max_workers: Optional[int] = None,
+        format_preference: Iterable[str] = DEFAULT_FORMAT_PREFERENCE,
+    ):
+        """
+        Initialize the duplicate finder.
+
+        Args:
+            hash_cache: Cache of file hashes (hashes are not cached if None)
+            max_workers: Number of hashing threads (CPU count, at most 8, if None)
+            format_preference: Formats ordered from most to least preferred
+        """
+        super().__init__()
+        self.hash_cache = hash_cache
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.format_preference = [fmt.upper() for fmt in format_preference]
+
+    def find(
+        self,
+        books: Iterable[Dict[str, Any]],
+        files: Iterable[Dict[str, Any]],
+        match_metadata: bool = True,
+        progress_callback=None,
+        removable_evidence: Iterable[str] = CONTENT_EVIDENCE,
+    ) -> List[DuplicateGroup]:
+        """
+        Find groups of duplicate books.
+
+        Groups join books linked by any kind of evidence. Within a group,
+        ``removable_ids`` only holds books linked to a kept book through
+        ``removable_evidence``; books matched by metadata alone are never
+        removable.
+
+        Args:
+            books: calibredb-style book dictionaries with ``id``, ``title``,
+                ``authors`` and ``identifiers``
+            files: Book file dictionaries with ``book_id``, ``format`` and
+                ``path`` (see ``CalibreMetadataStore.iter_files``)
+            match_metadata: Also group books by normalized title and authors
+            progress_callback: Optional progress callback function
+            removable_evidence: Kinds of evidence that allow removing a book
+                (``CONTENT_EVIDENCE`` and ``IDENTIFIER_EVIDENCE``)
+
+        Returns:
+            Duplicate groups with at least two books each, ordered by lowest
+            book id
+        """
+        books = {int(book["id"]): book for book in books}
+        files_by_book: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for file_info in files:
+            if int(file_info["book_id"]) in books:
+                files_by_book[int(file_info["book_id"])].append(file_info)
+
+        removable_evidence = set(removable_evidence) - {"metadata"}
+        parent = {book_id: book_id for book_id in books}
+        # Same grouping restricted to the evidence that allows removal
+        proven_parent = dict(parent)
+        reasons: Dict[Tuple[int, int], Set[str]] = defaultdict(set)
+
+        def find_root(book_id: int, parent: Dict[int, int] = parent) -> int:
+            while parent[book_id] != book_id:
+                parent[book_id] = parent[parent[book_id]]
+                book_id = parent[book_id]
+            return book_id
+
+        def union(parent: Dict[int, int], book_id: int, other: int):
+            first, second = find_root(book_id, parent), find_root(other, parent)
+            if first != second:
+                parent[max(first, second)] = min(first, second)
+
+        def link(book_ids: Iterable[int], reason: str):
+            book_ids = sorted(set(book_ids))
+            for other in book_ids[1:]:
+                union(parent, book_ids[0], other)
+                if reason in removable_evidence:
+                    union(proven_parent, book_ids[0], other)
+                reasons[(book_ids[0], other)].add(reason)
+
+        if progress_callback:
+            progress_callback(10, "Hashing book files...")
+
+        for paths_group in self.find_identical_files(
+            [
+                (file_info["book_id"], Path(file_info["path"]))
+                for book_files in files_by_book.values()
+                for file_info in book_files
+            ]
+        ):
+            link((book_id for book_id, _ in paths_group), "identical_file")
+
+        if progress_callback:
+            progress_callback(70, "Matching identifiers and metadata...")
+
+        by_key: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        for book_id, book in books.items():
+            identifiers = book.get("identifiers") or {}
+            isbn = normalize_isbn(identifiers.get("isbn") or book.get("isbn") or "")
+            if isbn:
+                by_key[("isbn", isbn)].append(book_id)
+            asin = (identifiers.get("amazon") or "").strip().upper()
+            if asin:
+                by_key[("asin", asin)].append(book_id)
+
+            if match_metadata:
+                title = normalize_title(book.get("title") or "")
+                authors = book.get("authors") or []
+                if isinstance(authors, str):
+                    authors = authors.split(" & ")
+                author_key = "|".join(sorted(normalize_author(a) for a in authors))
+                if title:
+                    by_key[("metadata", f"{title}\x1f{author_key}")].append(book_id)
+
+        for (reason, _value), book_ids in by_key.items():
+            if len(book_ids) > 1:
+                link(book_ids, reason)
+
+        members: Dict[int, List[int]] = defaultdict(list)
+        for book_id in books:
+            members[find_root(book_id)].append(book_id)
+
+        group_reasons: Dict[int, Set[str]] = defaultdict(set)
+        for (book_id, _other), pair_reasons in reasons.items():
+            group_reasons[find_root(book_id)].update(pair_reasons)
+
+        groups = []
+        for root, book_ids in sorted(members.items()):
+            if len(book_ids) < 2:
+                continue
+
+            # Keep the best book of every proven cluster in the group
+            proven: Dict[int, List[int]] = defaultdict(list)
+            for book_id in book_ids:
+                proven[find_root(book_id, proven_parent)].append(book_id)
+            removable = [
+                book_id
+                for cluster in proven.values()
+                if len(cluster) > 1
+                for book_id in cluster
+                if book_id != self.choose_keeper(cluster, files_by_book)
+            ]
+
+            groups.append(
+                DuplicateGroup(
+                    book_ids=sorted(book_ids),
+                    keeper_id=self.choose_keeper(book_ids, files_by_book),
+                    reasons=group_reasons[root],
+                    removable_ids=sorted(removable),
+                )
+            )
+
+        self.logger.info(f"Found {len(groups)} duplicate groups in {len(books)} books")
+        return groups
+
+    def choose_keeper(
+        self, book_ids: List[int], files_by_book: Dict[int, List[Dict[str, Any]]]
+    ) -> int:
+        """
+        Choose which book of a duplicate group to keep.
+
+        Prefers the book holding the most preferred format, then the largest
+        file of that format, then the most formats, then the oldest book.
+
+        Args:
+            book_ids: Ids of the books in the group
+            files_by_book: Book files per book id
+
+        Returns:
+            Id of the book to keep
+        """
+
+        def rank(book_id: int):
+            best_rank = len(self.format_preference)
+            best_size = 0
+            for file_info in files_by_book.get(book_id, []):
+                fmt = file_info["format"].upper()
+                fmt_rank = (
+                    self.format_preference.index(fmt)
+                    if fmt in self.format_preference
+                    else len(self.format_preference)
+                )
+                size = file_info.get("size") or 0
+                if (fmt_rank, -size) < (best_rank, -best_size):
+                    best_rank, best_size = fmt_rank, size
+            book_files = files_by_book.get(book_id, [])
+            return (best_rank, -best_size, -len(book_files), book_id)
+
+        return min(book_ids, key=rank)
+
+    def find_identical_files(
+        self, files: List[Tuple[int, Path]]
+    ) -> List[List[Tuple[int, Path]]]:
+        """
+        Find byte-identical files belonging to different books.
+
+        Files are bucketed by size first; only files sharing a size are
+        partially hashed, and only files sharing a partial hash are fully
+        hashed.
+
+        Args:
+            files: ``(book_id, path)`` pairs
+
+        Returns:
+            Groups of ``(book_id, path)`` pairs with identical content
+        """
+        by_size: Dict[int, List[_FileEntry]] = defaultdict(list)
+        for book_id, path in files:
+            try:
+                stat = path.stat()
+            except OSError as e:
+                self.logger.debug(f"Skipping unreadable file {path}: {e}")
+                continue
+            by_size[stat.st_size].append(
+                _FileEntry(book_id, path, stat.st_size, stat.st_mtime_ns)
+            )
+
+        candidates = [
+            entry
+            for entries in by_size.values()
+            if len({entry.book_id for entry in entries}) > 1
+            for entry in entries
+        ]
+        if not candidates:
+            return []
+
+        cached = {}
+        if self.hash_cache:
+            cached = self.hash_cache.get_many(entry.path for entry in candidates)
+        for entry in candidates:
+            hit = cached.get(str(entry.path))
+            if hit and hit[0] == entry.size and hit[1] == entry.mtime_ns:
+                entry.partial_hash, entry.full_hash = hit[2], hit[3]
+
+        self._hash_entries(
+            [entry for entry in candidates if entry.partial_hash is None], full=False
+        )
+
+        by_partial: Dict[Tuple[int, str], List[_FileEntry]] = defaultdict(list)
+        for entry in candidates:
+            if entry.partial_hash:
+                by_partial[(entry.size, entry.partial_hash)].append(entry)
+
+        full_candidates = [
+            entry
+            for entries in by_partial.values()
+            if len({entry.book_id for entry in entries}) > 1
+            for entry in entries
+        ]
+        self._hash_entries(
+            [entry for entry in full_candidates if entry.full_hash is None], full=True
+        )
+
+        if self.hash_cache:
+            self.hash_cache.put_many(
+                (e.path, e.size, e.mtime_ns, e.partial_hash, e.full_hash)
+                for e in candidates
+                if e.partial_hash
+            )
+
+        by_full: Dict[str, List[_FileEntry]] = defaultdict(list)
+        for entry in full_candidates:
+            if entry.full_hash:
+                by_full[entry.full_hash].append(entry)
+
+        return [
+            [(entry.book_id, entry.path) for entry in entries]
+            for entries in by_full.values()
+            if len({entry.book_id for entry in entries}) > 1
+        ]
+
+    def _hash_entries(self, entries: List[_FileEntry], full: bool):
+        """Hash files in parallel, storing the digest on each entry."""
+        if not entries:
+            return
+
+        self.logger.debug(
+            f"Computing {'full' if full else 'partial'} hashes for {len(entries)} files"
+        )
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers
+        ) as executor:
+            future_to_entry = {
+                executor.submit(
+                    _hash_file, entry.path, None if full else PARTIAL_HASH_SIZE
+                ): entry
+                for entry in entries
+            }
+            for future in concurrent.futures.as_completed(future_to_entry):
+                entry = future_to_entry[future]
+                try:
+                    digest = future.result()
+                except OSError as e:
+                    self.logger.warning(f"Could not hash {entry.path}: {e}")
+                    continue
+                if full:
+                    entry.full_hash = digest
+                else:
+                    entry.partial_hash = digest
+                    # Small files are read completely by the partial hash
+                    if entry.size <= PARTIAL_HASH_SIZE:
+                        entry.full_hash = digest
+
+
+def _hash_file(path: Path, limit: Optional[int] = None) -> str:
+    """Hash a file, or only its first ``limit`` bytes."""
+    digest = hashlib.blake2b(digest_size=20)
+    remaining = limit
+    with open(path, "rb") as f:
+        while remaining is None or remaining > 0:
+            chunk = f.read(
+                _READ_CHUNK_SIZE
+                if remaining is None
+                else min(remaining, _READ_CHUNK_SIZE)
+            )
+            if not chunk:
+                break
+            digest.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,530 @@
+"""
+Native eBook metadata reading and writing for Calibre Books CLI.
+
+Calibre's ebook-meta takes 0.5-1s to start for every file, which makes
+metadata of large collections slow to read. The common formats are read
+and written in-process instead:
+
+- EPUB: the OPF package document referenced by META-INF/container.xml
+- MOBI/AZW/AZW3: the MOBI header and EXTH records of the first record
+  (and of the KF8 header record of joint MOBI/KF8 files); the ASIN lives
+  in EXTH 113 and 504
+
+Only the headers are read, so reading metadata takes well under a
+millisecond per file. Other formats, and files these readers cannot
+parse, are left to ebook-meta by the callers.
+"""
+
+import os
+import re
+import struct
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.files import partial_output_path
+from ..utils.validation import validate_asin
+
+# Formats with a native reader and writer
+NATIVE_FORMATS = {"epub", "mobi", "azw", "azw3"}
+
+CONTAINER_PATH = "META-INF/container.xml"
+CONTAINER_NS = "urn:oasis:names:tc:opendocument:xmlns:container"
+OPF_NS = "http://www.idpf.org/2007/opf"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+
+# EXTH record types
+EXTH_AUTHOR = 100
+EXTH_PUBLISHER = 101
+EXTH_ISBN = 104
+EXTH_PUBLISHED = 106
+EXTH_ASIN = 113
+EXTH_KF8_BOUNDARY = 121
+EXTH_CDE_TYPE = 501
+EXTH_UPDATED_TITLE = 503
+EXTH_ASIN2 = 504
+EXTH_LANGUAGE = 524
+
+# Kindles only show Goodreads and X-Ray data for books of this type
+EBOOK_CDE_TYPE = b"EBOK"
+
+_EXTH_FLAG = 0x40
+_NULL_INDEX = 0xFFFFFFFF
+
+# Identifier schemes that hold an ASIN
+_ASIN_SCHEMES = ("amazon", "mobi-asin")
+
+_READ_ERRORS = (
+    OSError,
+    KeyError,
+    IndexError,
+    struct.error,
+    zipfile.BadZipFile,
+    ET.ParseError,
+    UnicodeDecodeError,
+)
+
+_IDENTIFIER_RE = re.compile(
+    r"<(?P<prefix>(?:[\w.-]+:)?)identifier\b(?P<attrs>[^>]*)>"
+    r"(?P<value>[^<]*)</(?P=prefix)identifier>\s*"
+)
+
+
+class MetadataError(Exception):
+    """Metadata of a file cannot be read or written natively."""
+
+
+def supports_native_metadata(file_path: Path) -> bool:
+    """Whether a file's format has a native metadata reader and writer."""
+    return Path(file_path).suffix.lower().lstrip(".") in NATIVE_FORMATS
+
+
+def _is_epub(file_path: Path) -> bool:
+    """Whether a file is handled as EPUB."""
+    return Path(file_path).suffix.lower() == ".epub"
+
+
+def read_metadata(file_path: Path) -> Dict[str, Any]:
+    """
+    Read the metadata of an EPUB or MOBI/AZW3 file.
+
+    Args:
+        file_path: Path to eBook file
+
+    Returns:
+        Metadata with the keys of parsed ebook-meta output: ``title``,
+        ``author``, ``identifiers``, ``publisher``, ``publication_year``
+        and ``language`` (keys without a value are left out)
+
+    Raises:
+        MetadataError: If the format is not supported or the file cannot
+            be parsed
+    """
+    file_path = Path(file_path)
+    if not supports_native_metadata(file_path):
+        raise MetadataError(f"No native metadata reader for {file_path.suffix}")
+
+    try:
+        if _is_epub(file_path):
+            with zipfile.ZipFile(file_path) as archive:
+                opf = archive.read(_opf_path(archive))
+            return _parse_opf(opf)
+        return _mobi_metadata(_read_mobi_record0(file_path))
+    except _READ_ERRORS as e:
+        raise MetadataError(f"Cannot read metadata of {file_path}: {e}") from e
+
+
+def read_asin(file_path: Path) -> Optional[str]:
+    """
+    Read the ASIN of an EPUB or MOBI/AZW3 file.
+
+    Args:
+        file_path: Path to eBook file
+
+    Returns:
+        ASIN if the file has a valid one, None otherwise
+
+    Raises:
+        MetadataError: If the format is not supported or the file cannot
+            be parsed
+    """
+    asin = read_metadata(file_path).get("identifiers", {}).get("amazon")
+    return asin if asin and validate_asin(asin) else None
+
+
+def write_asin(file_path: Path, asin: Optional[str]) -> None:
+    """
+    Set or remove the ASIN of an EPUB or MOBI/AZW3 file.
+
+    The file is rewritten next to the original and renamed over it, so an
+    interrupted write never leaves a broken book behind.
+
+    Args:
+        file_path: Path to eBook file
+        asin: ASIN to set, or None to remove the ASIN
+
+    Raises:
+        MetadataError: If the format is not supported or the file cannot
+            be parsed
+    """
+    file_path = Path(file_path)
+    if not supports_native_metadata(file_path):
+        raise MetadataError(f"No native metadata writer for {file_path.suffix}")
+
+    try:
+        if _is_epub(file_path):
+            _write_epub_asin(file_path, asin)
+        else:
+            _write_mobi_asin(file_path, asin)
+    except _READ_ERRORS as e:
+        raise MetadataError(f"Cannot write metadata of {file_path}: {e}") from e
+
+
+def _write_atomically(file_path: Path, write) -> None:
+    """Write a replacement of a file through a hidden partial file."""
+    partial = partial_output_path(file_path)
+    try:
+        write(partial)
+        os.replace(partial, file_path)
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+# EPUB
+
+
+def _opf_path(archive: zipfile.ZipFile) -> str:
+    """Name of the OPF package document of an EPUB."""
+    container = ET.fromstring(archive.read(CONTAINER_PATH))
+    rootfile = container.find(f".//{{{CONTAINER_NS}}}rootfile")
+    if rootfile is None or not rootfile.get("full-path"):
+        raise MetadataError("container.xml does not reference an OPF file")
+    return rootfile.get("full-path")
+
+
+def _split_identifier(scheme: Optional[str], value: str) -> Optional[Tuple[str, str]]:
+    """Scheme and value of an identifier given as attribute or prefix."""
+    value = value.strip()
+    if not scheme:
+        if value.lower().startswith("urn:"):
+            value = value[4:]
+        if ":" not in value:
+            return None
+        scheme, value = value.split(":", 1)
+    scheme = scheme.strip().lower()
+    if scheme in _ASIN_SCHEMES:
+        scheme = "amazon"
+    return scheme, value.strip()
+
+
+def _parse_opf(opf: bytes) -> Dict[str, Any]:
+    """Extract metadata from an OPF package document."""
+    package = ET.fromstring(opf)
+    metadata_element = package.find(f"{{{OPF_NS}}}metadata")
+    if metadata_element is None:
+        raise MetadataError("OPF file has no metadata")
+
+    def texts(tag: str) -> List[str]:
+        return [
+            element.text.strip()
+            for element in metadata_element.iter(f"{{{DC_NS}}}{tag}")
+            if element.text and element.text.strip()
+        ]
+
+    metadata: Dict[str, Any] = {}
+    titles = texts("title")
+    if titles:
+        metadata["title"] = titles[0]
+
+    authors = [
+        creator.text.strip()
+        for creator in metadata_element.iter(f"{{{DC_NS}}}creator")
+        if creator.text
+        and creator.text.strip()
+        and creator.get(f"{{{OPF_NS}}}role", "aut") == "aut"
+    ]
+    if authors:
+        metadata["author"] = " & ".join(authors)
+
+    identifiers = {}
+    for element in metadata_element.iter(f"{{{DC_NS}}}identifier"):
+        identifier = _split_identifier(
+            element.get(f"{{{OPF_NS}}}scheme"), element.text or ""
+        )
+        if identifier and identifier[1]:
+            identifiers.setdefault(*identifier)
+    if identifiers:
+        metadata["identifiers"] = identifiers
+
+    for key, tag in (
+        ("publication_year", "date"),
+        ("publisher", "publisher"),
+        ("language", "language"),
+    ):
+        values = texts(tag)
+        if values:
+            metadata[key] = values[0]
+
+    return metadata
+
+
+def _is_asin_identifier(attrs: str, value: str) -> bool:
+    """Whether an identifier element of an OPF file holds an ASIN."""
+    scheme = re.search(r"\bscheme\s*=\s*[\"']([^\"']*)[\"']", attrs)
+    if scheme:
+        return scheme.group(1).strip().lower() in _ASIN_SCHEMES
+    return value.strip().lower().startswith(tuple(f"{s}:" for s in _ASIN_SCHEMES))
+
+
+def _set_opf_asin(opf: str, asin: Optional[str]) -> str:
+    """
+    Replace the ASIN identifiers of an OPF document.
+
+    The document is edited as text so that everything else, including
+    namespace prefixes and formatting, stays byte for byte the same.
+    """
+    opf = _IDENTIFIER_RE.sub(
+        lambda m: (
+            "" if _is_asin_identifier(m.group("attrs"), m.group("value")) else m[0]
+        ),
+        opf,
+    )
+    if not asin:
+        return opf
+
+    dc = re.search(rf"xmlns:([\w.-]+)\s*=\s*[\"']{re.escape(DC_NS)}[\"']", opf)
+    end = re.search(r"</(?:[\w.-]+:)?metadata\s*>", opf)
+    if dc is None or end is None:
+        raise MetadataError("OPF file has no Dublin Core metadata")
+
+    version = re.search(r"<(?:[\w.-]+:)?package\b[^>]*\bversion\s*=\s*[\"'](\d)", opf)
+    opf_prefix = re.search(rf"xmlns:([\w.-]+)\s*=\s*[\"']{re.escape(OPF_NS)}[\"']", opf)
+    if opf_prefix and (version is None or version.group(1) == "2"):
+        # EPUB 2 style, as written by Calibre
+        identifier = (
+            f'<{dc.group(1)}:identifier {opf_prefix.group(1)}:scheme="AMAZON">'
+            f"{asin}</{dc.group(1)}:identifier>"
+        )
+    else:
+        identifier = (
+            f"<{dc.group(1)}:identifier>amazon:{asin}</{dc.group(1)}:identifier>"
+        )
+
+    return opf[: end.start()] + identifier + opf[end.start() :]
+
+
+def _write_epub_asin(file_path: Path, asin: Optional[str]) -> None:
+    """Set or remove the ASIN in the OPF file of an EPUB."""
+    with zipfile.ZipFile(file_path) as archive:
+        opf_name = _opf_path(archive)
+        opf = archive.read(opf_name)
+
+    encoding = "utf-8"
+    declared = re.match(rb"<\?xml[^>]*encoding=[\"']([\w.-]+)[\"']", opf)
+    if declared:
+        encoding = declared.group(1).decode("ascii")
+    updated = _set_opf_asin(opf.decode(encoding), asin).encode(encoding)
+    # Never write an OPF file readers cannot parse
+    _parse_opf(updated)
+
+    def write(partial: Path):
+        # Entries are copied in order with their compression, which keeps
+        # the uncompressed mimetype entry first
+        with (
+            zipfile.ZipFile(file_path) as source,
+            zipfile.ZipFile(partial, "w") as target,
+        ):
+            for info in source.infolist():
+                data = updated if info.filename == opf_name else source.read(info)
+                target.writestr(info, data)
+
+    _write_atomically(file_path, write)
+
+
+# MOBI/AZW3
+
+
+def _u32(data: bytes, offset: int) -> int:
+    """Big-endian unsigned int at an offset."""
+    return struct.unpack_from(">I", data, offset)[0]
+
+
+def _record_offsets(header: bytes, record_list: bytes) -> List[int]:
+    """Record offsets of a PalmDB file."""
+    if len(header) < 78 or header[60:68] != b"BOOKMOBI":
+        raise MetadataError("Not a MOBI file")
+    count = struct.unpack(">H", header[76:78])[0]
+    return [_u32(record_list, 8 * i) for i in range(count)]
+
+
+def _read_mobi_record0(file_path: Path) -> bytes:
+    """Read the first record of a MOBI file, which holds the MOBI header."""
+    with open(file_path, "rb") as f:
+        header = f.read(78)
+        if len(header) < 78 or header[60:68] != b"BOOKMOBI":
+            raise MetadataError("Not a MOBI file")
+        count = struct.unpack(">H", header[76:78])[0]
+        if count == 0:
+            raise MetadataError("MOBI file has no records")
+
+        record_list = f.read(16 if count > 1 else 8)
+        start = _u32(record_list, 0)
+        length = _u32(record_list, 8) - start if count > 1 else -1
+        f.seek(start)
+        return f.read(length)
+
+
+class _MobiHeader:
+    """MOBI header and EXTH records of a header record."""
+
+    def __init__(self, record: bytes):
+        if len(record) < 132 or record[16:20] != b"MOBI":
+            raise MetadataError("Missing MOBI header")
+        self.record = record
+        self.exth_start = 16 + _u32(record, 20)
+        self.codec = "utf-8" if _u32(record, 28) == 65001 else "cp1252"
+        self.name_offset = _u32(record, 84)
+        self.name_length = _u32(record, 88)
+        self.exth_flags = _u32(record, 128)
+        self.exth: List[Tuple[int, bytes]] = []
+        self.exth_end = self.exth_start
+
+        if self.exth_flags & _EXTH_FLAG:
+            if record[self.exth_start : self.exth_start + 4] != b"EXTH":
+                raise MetadataError("Missing EXTH header")
+            length, count = struct.unpack_from(">II", record, self.exth_start + 4)
+            position = self.exth_start + 12
+            for _ in range(count):
+                record_type, record_length = struct.unpack_from(">II", record, position)
+                if record_length < 8:
+                    raise MetadataError("Corrupt EXTH record")
+                self.exth.append(
+                    (record_type, record[position + 8 : position + record_length])
+                )
+                position += record_length
+
+            # Skip the padding after the EXTH block
+            self.exth_end = self.exth_start + length
+            while (
+                self.exth_end < len(record)
+                and self.exth_end - self.exth_start - length < 4
+                and self.exth_end < self.name_offset
+                and record[self.exth_end] == 0
+            ):
+                self.exth_end += 1
+
+    def values(self, record_type: int) -> List[str]:
+        """Decoded values of the EXTH records of a type."""
+        return [
+            value.decode(self.codec, errors="replace").strip("\x00 ")
+            for exth_type, value in self.exth
+            if exth_type == record_type
+        ]
+
+    def first(self, record_type: int) -> Optional[str]:
+        """Decoded value of the first EXTH record of a type."""
+        values = [value for value in self.values(record_type) if value]
+        return values[0] if values else None
+
+    @property
+    def title(self) -> Optional[str]:
+        """Updated title, or the full name of the book."""
+        name = self.record[self.name_offset : self.name_offset + self.name_length]
+        return self.first(EXTH_UPDATED_TITLE) or (
+            name.decode(self.codec, errors="replace").strip("\x00 ") or None
+        )
+
+    def with_exth(self, exth: List[Tuple[int, bytes]]) -> bytes:
+        """The header record with its EXTH records replaced."""
+        data = b"".join(
+            struct.pack(">II", record_type, len(value) + 8) + value
+            for record_type, value in exth
+        )
+        block = b"EXTH" + struct.pack(">II", len(data) + 12, len(exth)) + data
+        # Padded like Calibre pads it
+        block += bytes(4 - len(block) % 4)
+
+        record = bytearray(
+            self.record[: self.exth_start] + block + self.record[self.exth_end :]
+        )
+        if self.name_offset >= self.exth_start:
+            shift = len(block) - (self.exth_end - self.exth_start)
+            struct.pack_into(">I", record, 84, self.name_offset + shift)
+        struct.pack_into(">I", record, 128, self.exth_flags | _EXTH_FLAG)
+        return bytes(record)
+
+
+def _mobi_metadata(record0: bytes) -> Dict[str, Any]:
+    """Extract metadata from the header record of a MOBI file."""
+    header = _MobiHeader(record0)
+    metadata: Dict[str, Any] = {}
+
+    if header.title:
+        metadata["title"] = header.title
+    authors = [author for author in header.values(EXTH_AUTHOR) if author]
+    if authors:
+        metadata["author"] = " & ".join(authors)
+
+    identifiers = {}
+    isbn = header.first(EXTH_ISBN)
+    if isbn:
+        identifiers["isbn"] = isbn
+    for value in header.values(EXTH_ASIN) + header.values(EXTH_ASIN2):
+        if validate_asin(value):
+            identifiers["amazon"] = value
+            break
+    if identifiers:
+        metadata["identifiers"] = identifiers
+
+    for key, record_type in (
+        ("publication_year", EXTH_PUBLISHED),
+        ("publisher", EXTH_PUBLISHER),
+        ("language", EXTH_LANGUAGE),
+    ):
+        value = header.first(record_type)
+        if value:
+            metadata[key] = value
+
+    return metadata
+
+
+def _set_exth_asin(header: _MobiHeader, asin: Optional[str]) -> bytes:
+    """Header record with the ASIN records replaced."""
+    exth = [
+        (record_type, value)
+        for record_type, value in header.exth
+        if record_type not in (EXTH_ASIN, EXTH_ASIN2)
+    ]
+    if asin:
+        value = asin.encode("ascii")
+        exth += [(EXTH_ASIN, value), (EXTH_ASIN2, value)]
+        if not any(record_type == EXTH_CDE_TYPE for record_type, _ in exth):
+            exth.append((EXTH_CDE_TYPE, EBOOK_CDE_TYPE))
+    return header.with_exth(exth)
+
+
+def _write_mobi_asin(file_path: Path, asin: Optional[str]) -> None:
+    """Set or remove the ASIN in the EXTH records of a MOBI/AZW3 file."""
+    data = file_path.read_bytes()
+    offsets = _record_offsets(data[:78], data[78:])
+    if not offsets:
+        raise MetadataError("MOBI file has no records")
+    records = [
+        data[start:end] for start, end in zip(offsets, offsets[1:] + [len(data)])
+    ]
+
+    first = _MobiHeader(records[0])
+    records[0] = _set_exth_asin(first, asin)
+
+    # Joint MOBI/KF8 files carry a second header for the KF8 part
+    kf8 = [
+        _u32(value, 0)
+        for record_type, value in first.exth
+        if record_type == EXTH_KF8_BOUNDARY and len(value) >= 4
+    ]
+    if (
+        kf8
+        and kf8[0] != _NULL_INDEX
+        and 0 < kf8[0] < len(records)
+        and records[kf8[0] - 1].startswith(b"BOUNDARY")
+    ):
+        records[kf8[0]] = _set_exth_asin(_MobiHeader(records[kf8[0]]), asin)
+
+    list_end = 78 + 8 * len(offsets)
+    gap = data[list_end : offsets[0]]
+    record_list = bytearray(data[78:list_end])
+    position = list_end + len(gap)
+    for i, record in enumerate(records):
+        struct.pack_into(">I", record_list, 8 * i, position)
+        position += len(record)
+
+    def write(partial: Path):
+        with open(partial, "wb") as f:
+            f.write(data[:78])
+            f.write(record_list)
+            f.write(gap)
+            for record in records:
+                f.write(record)
+
+    _write_atomically(file_path, write)
@@ -5,14 +5,38 @@ This module provides functionality for scanning directories to find eBook files,
 extracting metadata, and checking for ASIN presence.
 """
 
+import concurrent.futures
 import json
+import os
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Callable
 
 from ..core.book import Book, BookMetadata, BookFormat
+from ..core.ebook_metadata import MetadataError, read_metadata, supports_native_metadata
+from ..core.file_walker import walk_files
+from ..core.scan_index import ScanDiff, ScanIndex, file_signature, index_key
 from ..utils.logging import LoggerMixin
 from ..utils.validation import validate_asin
 
+# Pools for parallel metadata extraction: threads for I/O bound work such
+# as ebook-meta subprocesses, processes for CPU bound parsing
+SCAN_EXECUTORS = ("thread", "process")
+
+# Files handed to a worker process at once
+MAX_PROCESS_BATCH = 64
+
+
+def default_scan_workers() -> int:
+    """Number of metadata extraction workers used by default."""
+    return os.cpu_count() or 1
+
+
+def _create_books_in_process(
+    file_paths: List[Path], extract_metadata: bool
+) -> List[Optional[Book]]:
+    """Create books from files in a worker process."""
+    return FileScanner({})._create_books(file_paths, extract_metadata)
+
 
 class FileScanner(LoggerMixin):
     """
@@ -44,6 +68,8 @@ class FileScanner(LoggerMixin):
         """
         super().__init__()
         self.config = config
+        # Changes found by the last scan with a scan index
+        self.last_diff: Optional[ScanDiff] = None
 
     def scan_directory(
         self,
@@ -52,6 +78,9 @@ class FileScanner(LoggerMixin):
         formats: Optional[List[str]] = None,
         check_metadata: bool = False,
         progress_callback: Optional[Callable] = None,
+        parallel: int = 1,
+        executor: str = "thread",
+        index: Optional[ScanIndex] = None,
     ) -> List[Book]:
         """
         Scan directory for eBook files.
@@ -61,48 +90,252 @@ class FileScanner(LoggerMixin):
             recursive: Whether to scan subdirectories
             formats: List of formats to include (e.g., ['mobi', 'epub'])
             check_metadata: Whether to extract metadata from files
-            progress_callback: Optional progress callback function
+            progress_callback: Optional progress callback function, called
+                with (completed, total) as files finish
+            parallel: Number of files to process concurrently
+            executor: 'thread' for I/O bound extraction (ebook-meta,
+                network storage) or 'process' for CPU bound parsing
+            index: Scan index; files unchanged since they were indexed are
+                taken from it instead of being processed again, and
+                ``last_diff`` is set to the changes since the last scan
 
         Returns:
-            List of discovered Book objects
+            List of discovered Book objects, sorted by path
         """
+        if executor not in SCAN_EXECUTORS:
+            raise ValueError(
+                f"Unknown executor: {executor} (expected one of "
+                f"{', '.join(SCAN_EXECUTORS)})"
+            )
+
         self.logger.info(f"Scanning directory: {directory} (recursive: {recursive})")
 
-        # Normalize format filter
-        format_filter = None
-        if formats:
-            format_filter = [f.lower().lstrip(".") for f in formats]
+        # Find all eBook files, in a reproducible order
+        ebook_files = self._find_ebook_files(
+            directory, recursive=recursive, formats=formats
+        )
 
-        books = []
+        self.logger.info(f"Found {len(ebook_files)} eBook files")
 
-        # Get file pattern
-        pattern = "**/*" if recursive else "*"
+        indexed: Dict[Path, Book] = {}
+        stats: Dict[Path, os.stat_result] = {}
+        pending = ebook_files
+        if index is not None:
+            entries = index.entries(directory)
+            pending = []
+            for file_path in ebook_files:
+                try:
+                    # Taken before processing, so a file changing meanwhile
+                    # is processed again by the next scan
+                    stats[file_path] = file_path.stat()
+                except OSError as e:
+                    self.logger.warning(f"Failed to process {file_path}: {e}")
+                    continue
+                row = entries.get(index_key(file_path))
+                if index.is_current(row, stats[file_path], check_metadata):
+                    try:
+                        indexed[file_path] = index.book(row, file_path)
+                        continue
+                    except ValueError as e:
+                        self.logger.debug(f"Ignoring index entry of {file_path}: {e}")
+                pending.append(file_path)
+            self.logger.info(
+                f"{len(indexed)} files unchanged since the last scan, "
+                f"processing {len(pending)}"
+            )
 
-        # Find all files
-        all_files = list(directory.glob(pattern))
-        ebook_files = [
-            f
-            for f in all_files
-            if f.is_file() and self._is_ebook_file(f, format_filter)
-        ]
+        if parallel > 1 and len(pending) > 1:
+            results = self._create_books_parallel(
+                pending, check_metadata, progress_callback, parallel, executor
+            )
+        else:
+            results = []
+            for i, file_path in enumerate(pending):
+                results.extend(self._create_books([file_path], check_metadata))
+                if progress_callback:
+                    progress_callback(i + 1, len(pending))
+        created = dict(zip(pending, results))
+
+        if index is not None:
+            self.last_diff = self._update_index(
+                index,
+                directory,
+                recursive,
+                formats,
+                entries,
+                created,
+                stats,
+                check_metadata,
+                unchanged=len(indexed),
+            )
 
-        self.logger.info(f"Found {len(ebook_files)} eBook files")
+        books = [
+            indexed.get(file_path) or created.get(file_path)
+            for file_path in ebook_files
+        ]
+        books = [book for book in books if book]
+        self.logger.info(f"Successfully processed {len(books)} books")
+        return books
 
-        for i, file_path in enumerate(ebook_files):
-            if progress_callback:
-                progress_callback(i + 1, len(ebook_files))
+    def _update_index(
+        self,
+        index: ScanIndex,
+        directory: Path,
+        recursive: bool,
+        formats: Optional[List[str]],
+        entries: Dict[str, Any],
+        created: Dict[Path, Optional[Book]],
+        stats: Dict[Path, os.stat_result],
+        check_metadata: bool,
+        unchanged: int,
+    ) -> ScanDiff:
+        """
+        Record processed files in the scan index.
 
+        Returns:
+            Changes since the previous scan of the directory
+        """
+        diff = ScanDiff(unchanged=unchanged)
+        index.store(
+            [(book, stats[file_path]) for file_path, book in created.items() if book],
+            check_metadata,
+        )
+
+        for file_path, book in created.items():
+            row = entries.get(index_key(file_path))
+            if book is None:
+                continue
+            if row is None:
+                diff.added.append(book)
+            elif (row["size"], row["mtime_ns"], row["inode"]) != file_signature(
+                stats[file_path]
+            ):
+                diff.changed.append(book)
+            else:
+                # Only re-read for metadata the earlier scan did not extract
+                diff.unchanged += 1
+
+        # Files this scan would have found but did not
+        root = index_key(directory)
+        format_filter = [f.lower().lstrip(".") for f in formats] if formats else None
+        found = {index_key(file_path) for file_path in stats}
+        removed = sorted(
+            path
+            for path in entries
+            if path not in found
+            and (recursive or os.path.dirname(path) == root)
+            and self._is_ebook_file(Path(path), format_filter)
+        )
+        diff.removed = [Path(path) for path in removed]
+
+        # Files that could not be processed must not keep a stale entry
+        failed = [
+            index_key(file_path)
+            for file_path, book in created.items()
+            if book is None and index_key(file_path) in entries
+        ]
+        index.remove(removed + failed)
+
+        self.logger.info(
+            f"Scan changes: {len(diff.added)} added, {len(diff.changed)} changed, "
+            f"{len(diff.removed)} removed"
+        )
+        return diff
+
+    def _create_books(
+        self, file_paths: List[Path], extract_metadata: bool
+    ) -> List[Optional[Book]]:
+        """Create books from files, with None for files that failed."""
+        books = []
+        for file_path in file_paths:
             try:
-                book = self._create_book_from_file(file_path, check_metadata)
-                if book:
-                    books.append(book)
+                books.append(self._create_book_from_file(file_path, extract_metadata))
             except Exception as e:
                 self.logger.warning(f"Failed to process {file_path}: {e}")
-                continue
-
-        self.logger.info(f"Successfully processed {len(books)} books")
+                books.append(None)
         return books
 
+    def _create_books_parallel(
+        self,
+        file_paths: List[Path],
+        extract_metadata: bool,
+        progress_callback: Optional[Callable],
+        parallel: int,
+        executor: str,
+    ) -> List[Optional[Book]]:
+        """
+        Create books from files in a thread or process pool.
+
+        Results keep the order of ``file_paths`` regardless of the order
+        in which the workers finish.
+        """
+        total = len(file_paths)
+        if executor == "process":
+            # Batches amortize pickling the books back from the workers
+            batch_size = max(1, min(MAX_PROCESS_BATCH, total // (parallel * 4)))
+            pool_class = concurrent.futures.ProcessPoolExecutor
+            create = _create_books_in_process
+        else:
+            batch_size = 1
+            pool_class = concurrent.futures.ThreadPoolExecutor
+            create = self._create_books
+
+        results: List[Optional[Book]] = [None] * total
+        completed = 0
+        with pool_class(max_workers=min(parallel, total)) as pool:
+            futures = {
+                pool.submit(create, file_paths[i : i + batch_size], extract_metadata): i
+                for i in range(0, total, batch_size)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                start = futures[future]
+                try:
+                    books = future.result()
+                except Exception as e:
+                    # A worker process died; its files count as failed
+                    self.logger.warning(f"Failed to process files: {e}")
+                    books = [None] * len(file_paths[start : start + batch_size])
+                results[start : start + len(books)] = books
+                completed += len(books)
+                if progress_callback:
+                    progress_callback(completed, total)
+
+        return results
+
+    def _find_ebook_files(
+        self,
+        directory: Path,
+        recursive: bool = False,
+        formats: Optional[List[str]] = None,
+    ) -> List[Path]:
+        """
+        Find eBook files in a directory.
+
+        Args:
+            directory: Directory to scan
+            recursive: Whether to scan subdirectories (in parallel)
+            formats: List of formats to include (e.g., ['mobi', 'epub'])
+
+        Returns:
+            Paths of eBook files, sorted by path
+        """
+        # Normalize format filter
+        format_filter = None
+        if formats:
+            format_filter = [f.lower().lstrip(".") for f in formats]
+
+        return [
+            Path(entry.path)
+            for entry in walk_files(
+                directory,
+                recursive=recursive,
+                match=lambda entry: self._is_ebook_file(
+                    Path(entry.name), format_filter
+                ),
+                sort=True,
+            )
+        ]
+
     def _is_ebook_file(
         self, file_path: Path, format_filter: Optional[List[str]] = None
     ) -> bool:
@@ -295,10 +528,18 @@ class FileScanner(LoggerMixin):
 
     def _extract_metadata_from_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
         """
-        Extract metadata from eBook file using ebook-meta.
+        Extract metadata from eBook file.
 
-        This requires Calibre to be installed.
+        EPUB and MOBI/AZW3 files are read natively; other formats and files
+        the native readers cannot parse use ebook-meta, which requires
+        Calibre to be installed.
         """
+        if supports_native_metadata(file_path):
+            try:
+                return read_metadata(file_path)
+            except MetadataError as e:
+                self.logger.debug(f"{e}, falling back to ebook-meta")
+
         try:
             import subprocess
 
@@ -393,35 +634,53 @@ class FileScanner(LoggerMixin):
 
         return BookMetadata(**merged_data)
 
-    def save_results(self, books: List[Book], output_file: Path) -> None:
-        """Save scan results to JSON file."""
+    def _book_record(self, book: Book) -> Dict[str, Any]:
+        """JSON record of a scanned book."""
+        publication_date = book.metadata.publication_date
+        return {
+            "file_path": str(book.file_path),
+            "title": book.metadata.title,
+            "author": book.metadata.author,
+            "format": book.format.value,
+            "file_size": book.file_size,
+            "has_asin": book.has_asin,
+            "asin": book.metadata.asin,
+            "isbn": book.metadata.isbn,
+            "publication_year": publication_date.year if publication_date else None,
+            "publisher": book.metadata.publisher,
+            "language": book.metadata.language,
+            "rating": book.metadata.rating,
+        }
+
+    def save_results(
+        self, books: List[Book], output_file: Path, diff: Optional[ScanDiff] = None
+    ) -> None:
+        """
+        Save scan results to JSON file.
+
+        Args:
+            books: Scanned books
+            output_file: JSON file to write
+            diff: Changes since the previous scan; if given, only the added,
+                changed and removed files are saved instead of all books
+        """
         try:
-            results = []
-            for book in books:
-                results.append(
-                    {
-                        "file_path": str(book.file_path),
-                        "title": book.metadata.title,
-                        "author": book.metadata.author,
-                        "format": book.format.value,
-                        "file_size": book.file_size,
-                        "has_asin": book.has_asin,
-                        "asin": book.metadata.asin,
-                        "isbn": book.metadata.isbn,
-                        "publication_year": book.metadata.publication_year,
-                        "publisher": book.metadata.publisher,
-                        "language": book.metadata.language,
-                        "rating": book.metadata.rating,
-                    }
-                )
+            if diff is None:
+                data = {
+                    "total_files": len(books),
+                    "books": [self._book_record(book) for book in books],
+                }
+            else:
+                data = {
+                    "total_files": len(books),
+                    "added": [self._book_record(book) for book in diff.added],
+                    "changed": [self._book_record(book) for book in diff.changed],
+                    "removed": [str(path) for path in diff.removed],
+                    "unchanged": diff.unchanged,
+                }
 
             with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(
-                    {"total_files": len(books), "books": results},
-                    f,
-                    indent=2,
-                    ensure_ascii=False,
-                )
+                json.dump(data, f, indent=2, ensure_ascii=False)
 
             self.logger.info(f"Saved {len(books)} book records to {output_file}")
 
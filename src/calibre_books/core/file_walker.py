@@ -0,0 +1,112 @@
+"""
+Parallel directory walking for Calibre Books CLI.
+
+``walk_files`` is the scanning primitive shared by FormatConverter and
+FileScanner. It lists directories with ``os.scandir``, so file type checks
+use the type information the directory listing already returned instead
+of a ``stat`` per entry, and lists subdirectories concurrently in a thread
+pool (directory listing releases the GIL, and on network or spinning
+storage the latency of many outstanding listings overlaps).
+
+Matches are yielded as soon as their directory has been listed. Callers
+that need a reproducible order ask for ``sort=True``, which collects the
+walk before yielding.
+"""
+
+import concurrent.futures
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Predicate selecting which files are yielded
+EntryFilter = Callable[[os.DirEntry], bool]
+
+
+def default_walk_workers() -> int:
+    """Number of directory listing threads used by default."""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def _scan_dir(
+    path: str, match: Optional[EntryFilter]
+) -> Tuple[List[os.DirEntry], List[str]]:
+    """List one directory.
+
+    Returns:
+        Tuple of (matching file entries, subdirectory paths); unreadable
+        directories are logged and treated as empty
+    """
+    files: List[os.DirEntry] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file() and (match is None or match(entry)):
+                        files.append(entry)
+                except OSError:
+                    continue
+    except OSError as e:
+        logger.debug(f"Cannot list directory {path}: {e}")
+    return files, subdirs
+
+
+def walk_files(
+    root: Union[str, Path],
+    recursive: bool = True,
+    match: Optional[EntryFilter] = None,
+    sort: bool = False,
+    max_workers: Optional[int] = None,
+) -> Iterator[os.DirEntry]:
+    """
+    Yield the files below a directory.
+
+    Symbolic links to files are yielded; symbolic links to directories are
+    not followed.
+
+    Args:
+        root: Directory to walk
+        recursive: Whether to descend into subdirectories
+        match: Optional predicate; only entries it accepts are yielded
+        sort: Yield entries sorted by path after the walk completed, instead
+            of in discovery order while walking
+        max_workers: Number of directory listing threads
+
+    Yields:
+        ``os.DirEntry`` of every matching file
+    """
+    if sort:
+        yield from sorted(
+            walk_files(root, recursive, match, max_workers=max_workers),
+            key=lambda entry: entry.path,
+        )
+        return
+
+    files, subdirs = _scan_dir(str(root), match)
+    yield from files
+    if not recursive or not subdirs:
+        return
+
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers or default_walk_workers()
+    )
+    try:
+        pending = {executor.submit(_scan_dir, path, match) for path in subdirs}
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                files, subdirs = future.result()
+                pending.update(
+                    executor.submit(_scan_dir, path, match) for path in subdirs
+                )
+                yield from files
+    finally:
+        # Stop listing when the caller abandons the walk early
+        executor.shutdown(wait=True, cancel_futures=True)
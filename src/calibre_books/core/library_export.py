@@ -0,0 +1,375 @@
+"""
+Streaming library export for Calibre Books CLI.
+
+Books are written one row at a time as they are read from the library, so
+memory use stays flat regardless of library size. Supported formats:
+
+- ``ndjson``: one JSON object per line
+- ``json``: a JSON array, written incrementally
+- ``csv``: one row per book, multi-valued fields joined into one cell
+- ``xml``: a ``<library>`` document written with a streaming XML generator
+- ``parquet``: columnar Apache Parquet, written in row groups (requires the
+  optional ``pyarrow`` package)
+
+Every export file is written to a temporary file in the destination
+directory and renamed into place, so an interrupted export never leaves a
+truncated file behind. Book files can be exported alongside the metadata;
+they are hardlinked when source and destination share a filesystem and
+copied otherwise, using a thread pool.
+"""
+
+import concurrent.futures
+import csv
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import XMLGenerator
+
+from ..utils.logging import LoggerMixin
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Columns written by every export format, in order
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "authors",
+    "series",
+    "series_index",
+    "isbn",
+    "identifiers",
+    "pubdate",
+    "rating",
+    "tags",
+    "formats",
+    "size",
+    "path",
+]
+
+EXPORT_FORMATS = ("ndjson", "json", "csv", "xml", "parquet")
+
+# Rows per Parquet row group (bounds memory of the columnar writer)
+PARQUET_BATCH_SIZE = 1000
+
+# Separators used when flattening multi-valued fields into a single value
+_JOINERS = {"authors": " & ", "tags": ", ", "formats": ", "}
+
+
+def normalize_row(book: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Bring a book record into the export shape.
+
+    Accepts rows from metadata.db as well as ``calibredb list`` output
+    (where authors may be a single ``" & "`` joined string).
+
+    Args:
+        book: Book dictionary in ``calibredb list --for-machine`` shape
+
+    Returns:
+        Dictionary with exactly the EXPORT_FIELDS keys
+    """
+    row = {name: book.get(name) for name in EXPORT_FIELDS}
+    if isinstance(row["authors"], str):
+        row["authors"] = [a.strip() for a in row["authors"].split("&") if a.strip()]
+    for name in ("authors", "tags", "formats"):
+        row[name] = list(row[name] or [])
+    row["identifiers"] = dict(row["identifiers"] or {})
+    return row
+
+
+def flatten_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flatten multi-valued fields of a normalized row into strings.
+
+    Args:
+        row: Row returned by ``normalize_row``
+
+    Returns:
+        Dictionary with scalar values only (used for CSV and XML)
+    """
+    flat = dict(row)
+    for name, joiner in _JOINERS.items():
+        flat[name] = joiner.join(str(value) for value in row[name])
+    flat["identifiers"] = ",".join(
+        f"{key}:{value}" for key, value in row["identifiers"].items()
+    )
+    return flat
+
+
+@contextmanager
+def atomic_path(destination: Path) -> Iterator[Path]:
+    """
+    Provide a temporary path that replaces ``destination`` on success.
+
+    Args:
+        destination: Final path of the file
+
+    Yields:
+        Temporary path in the destination directory
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=destination.parent, prefix=f".{destination.name}.", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        yield Path(tmp_name)
+        os.replace(tmp_name, destination)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def link_or_copy(source: Path, destination: Path) -> Tuple[int, bool]:
+    """
+    Hardlink a file, falling back to a copy across filesystems.
+
+    Files already present at the destination with the same size are
+    skipped, so an interrupted export can simply be run again.
+
+    Args:
+        source: Existing file
+        destination: Path to create
+
+    Returns:
+        Tuple of (bytes exported, whether the file was hardlinked)
+    """
+    size = source.stat().st_size
+    try:
+        if destination.stat().st_size == size:
+            return size, False
+    except OSError:
+        pass
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    tmp = destination.with_name(f".{destination.name}.part")
+    tmp.unlink(missing_ok=True)
+    linked = True
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copy2(source, tmp)
+        linked = False
+    os.replace(tmp, destination)
+    return size, linked
+
+
+class LibraryExporter(LoggerMixin):
+    """
+    Write library metadata and book files to an export destination.
+    """
+
+    def __init__(self, library_path: Path, max_workers: Optional[int] = None):
+        """
+        Initialize the exporter.
+
+        Args:
+            library_path: Path to the source Calibre library
+            max_workers: Number of file copying threads
+        """
+        super().__init__()
+        self.library_path = Path(library_path).expanduser()
+        self.max_workers = max_workers or min(16, (os.cpu_count() or 1) * 2)
+
+    def write(
+        self,
+        books: Iterable[Dict[str, Any]],
+        destination: Path,
+        export_format: str,
+        progress_callback=None,
+    ) -> int:
+        """
+        Stream book records to an export file.
+
+        Args:
+            books: Book dictionaries (see ``normalize_row``)
+            destination: Path of the export file
+            export_format: One of EXPORT_FORMATS
+            progress_callback: Optional progress callback function
+
+        Returns:
+            Number of books written
+
+        Raises:
+            ValueError: If the format is unknown or its dependency is missing
+        """
+        export_format = export_format.lower()
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        if export_format == "parquet" and not PARQUET_AVAILABLE:
+            raise ValueError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        count = 0
+
+        def rows() -> Iterator[Dict[str, Any]]:
+            nonlocal count
+            for book in books:
+                yield normalize_row(book)
+                count += 1
+                if progress_callback and count % 1000 == 0:
+                    progress_callback(50, f"Exported {count} books...")
+
+        writer = getattr(self, f"_write_{export_format}")
+        with atomic_path(Path(destination)) as tmp_path:
+            writer(rows(), tmp_path)
+
+        self.logger.info(f"Exported {count} books to {destination}")
+        return count
+
+    def _write_ndjson(self, rows: Iterator[Dict[str, Any]], path: Path):
+        """Write one JSON object per line."""
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str, ensure_ascii=False))
+                f.write("\n")
+
+    def _write_json(self, rows: Iterator[Dict[str, Any]], path: Path):
+        """Write a JSON array element by element."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("[")
+            for i, row in enumerate(rows):
+                f.write(",\n  " if i else "\n  ")
+                f.write(json.dumps(row, default=str, ensure_ascii=False))
+            f.write("\n]\n")
+
+    def _write_csv(self, rows: Iterator[Dict[str, Any]], path: Path):
+        """Write a CSV file with a header row."""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(flatten_row(row))
+
+    def _write_xml(self, rows: Iterator[Dict[str, Any]], path: Path):
+        """Write a ``<library>`` XML document."""
+        with open(path, "w", encoding="utf-8") as f:
+            xml = XMLGenerator(f, encoding="utf-8", short_empty_elements=True)
+            xml.startDocument()
+            xml.startElement("library", {})
+            for row in rows:
+                xml.startElement("book", {})
+                for key, value in flatten_row(row).items():
+                    if value is None or value == "":
+                        continue
+                    xml.startElement(key, {})
+                    xml.characters(str(value))
+                    xml.endElement(key)
+                xml.endElement("book")
+            xml.endElement("library")
+            xml.endDocument()
+
+    def _write_parquet(self, rows: Iterator[Dict[str, Any]], path: Path):
+        """Write a Parquet file one row group at a time."""
+        schema = pa.schema(
+            [
+                ("id", pa.int64()),
+                ("title", pa.string()),
+                ("authors", pa.list_(pa.string())),
+                ("series", pa.string()),
+                ("series_index", pa.float64()),
+                ("isbn", pa.string()),
+                ("identifiers", pa.map_(pa.string(), pa.string())),
+                ("pubdate", pa.string()),
+                ("rating", pa.int64()),
+                ("tags", pa.list_(pa.string())),
+                ("formats", pa.list_(pa.string())),
+                ("size", pa.int64()),
+                ("path", pa.string()),
+            ]
+        )
+
+        def to_arrow(batch: List[Dict[str, Any]]):
+            for row in batch:
+                row["identifiers"] = list(row["identifiers"].items())
+                if row["pubdate"] is not None:
+                    row["pubdate"] = str(row["pubdate"])
+            return pa.Table.from_pylist(batch, schema=schema)
+
+        with pq.ParquetWriter(str(path), schema) as writer:
+            batch: List[Dict[str, Any]] = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= PARQUET_BATCH_SIZE:
+                    writer.write_table(to_arrow(batch))
+                    batch = []
+            if batch:
+                writer.write_table(to_arrow(batch))
+
+    def _target(self, source: Path, destination_dir: Path, book_id: Any) -> Path:
+        """Destination of a book file, mirroring the library layout."""
+        try:
+            return destination_dir / source.relative_to(self.library_path)
+        except ValueError:
+            return destination_dir / str(book_id) / source.name
+
+    def export_files(
+        self,
+        files: Iterable[Dict[str, Any]],
+        destination_dir: Path,
+        progress_callback=None,
+    ) -> Tuple[int, int, int]:
+        """
+        Hardlink or copy book files into a directory in parallel.
+
+        At most a few tasks per worker are in flight at any time, so large
+        libraries do not queue up one future per file.
+
+        Args:
+            files: File dictionaries with ``book_id`` and ``path`` (see
+                ``CalibreMetadataStore.iter_files``)
+            destination_dir: Directory to export the files into
+            progress_callback: Optional progress callback function
+
+        Returns:
+            Tuple of (files exported, bytes exported, files hardlinked)
+        """
+        destination_dir = Path(destination_dir)
+        exported = 0
+        size = 0
+        linked = 0
+
+        def collect(future):
+            nonlocal exported, size, linked
+            try:
+                file_size, was_linked = future.result()
+            except OSError as e:
+                self.logger.warning(f"Failed to export file: {e}")
+                return
+            exported += 1
+            size += file_size
+            linked += was_linked
+            if progress_callback and exported % 100 == 0:
+                progress_callback(90, f"Exported {exported} book files...")
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers
+        ) as executor:
+            pending = set()
+            for file_info in files:
+                source = Path(file_info["path"])
+                target = self._target(source, destination_dir, file_info["book_id"])
+                pending.add(executor.submit(link_or_copy, source, target))
+                if len(pending) >= self.max_workers * 4:
+                    done, pending = concurrent.futures.wait(
+                        pending, return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+                    for future in done:
+                        collect(future)
+            for future in concurrent.futures.as_completed(pending):
+                collect(future)
+
+        self.logger.info(
+            f"Exported {exported} book files to {destination_dir} "
+            f"({linked} hardlinked)"
+        )
+        return exported, size, linked
@@ -0,0 +1,194 @@
+"""
+Paged library search support for Calibre Books CLI.
+
+This module provides the lightweight row and page objects returned by
+cursor-based library searches, and a small SQLite cache of the ordered
+book ids matching a query. The id cache lets follow-up pages skip running
+``calibredb search`` again as long as metadata.db is unchanged.
+"""
+
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Fields needed to render search results in the CLI
+DEFAULT_SEARCH_FIELDS = ("title", "authors", "series", "series_index", "rating")
+
+
+@dataclass
+class LibrarySearchRow:
+    """A single search hit with only the projected fields populated."""
+
+    book_id: int
+    title: Optional[str] = None
+    authors: List[str] = field(default_factory=list)
+    series: Optional[str] = None
+    series_index: Optional[float] = None
+    rating: Optional[float] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def author(self) -> Optional[str]:
+        """Primary author."""
+        return self.authors[0] if self.authors else None
+
+    @property
+    def stars(self) -> Optional[float]:
+        """Rating on a 0-5 star scale (Calibre stores ratings as 0-10)."""
+        if not self.rating:
+            return None
+        return self.rating / 2
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LibrarySearchRow":
+        """Create a row from a calibredb-style book dictionary."""
+        authors = data.get("authors") or []
+        if isinstance(authors, str):
+            authors = authors.split(" & ")
+
+        known = {"id", "title", "authors", "series", "series_index", "rating"}
+        return cls(
+            book_id=int(data["id"]),
+            title=data.get("title"),
+            authors=list(authors),
+            series=data.get("series") or None,
+            series_index=data.get("series_index"),
+            rating=data.get("rating") or None,
+            extra={key: value for key, value in data.items() if key not in known},
+        )
+
+
+@dataclass
+class SearchPage:
+    """One page of a library search."""
+
+    query: str
+    rows: List[LibrarySearchRow]
+    offset: int
+    limit: int
+    total: int
+    from_cache: bool = False
+
+    @property
+    def has_more(self) -> bool:
+        """Whether more results follow this page."""
+        return self.offset + len(self.rows) < self.total
+
+    @property
+    def next_offset(self) -> Optional[int]:
+        """Offset of the next page, or None on the last page."""
+        return self.offset + self.limit if self.has_more else None
+
+
+class SearchIdCache:
+    """
+    SQLite cache of ordered book ids per (library, query).
+
+    Entries are tied to a library version token (metadata.db size and
+    mtime), so any change to the library invalidates them.
+    """
+
+    def __init__(self, cache_path: Path, ttl_seconds: int = 3600):
+        """
+        Initialize the search id cache.
+
+        Args:
+            cache_path: Path to SQLite cache database
+            ttl_seconds: Lifetime of cached id lists in seconds
+        """
+        self.cache_path = Path(cache_path).expanduser()
+        self.ttl_seconds = ttl_seconds
+        self.logger = logging.getLogger(__name__)
+        self._init_database()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the cache database."""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        return sqlite3.connect(str(self.cache_path), timeout=10.0)
+
+    def _init_database(self):
+        """Create the cache table if needed."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS search_ids (
+                        library TEXT NOT NULL,
+                        query TEXT NOT NULL,
+                        version TEXT NOT NULL,
+                        book_ids TEXT NOT NULL,
+                        created_at REAL NOT NULL,
+                        PRIMARY KEY (library, query)
+                    )
+                """
+                )
+        finally:
+            conn.close()
+
+    def get(self, library: Path, query: str, version: str) -> Optional[List[int]]:
+        """
+        Get the cached ids for a query if still valid.
+
+        Args:
+            library: Library path
+            query: Search expression
+            version: Current library version token
+
+        Returns:
+            Ordered list of book ids, or None on a cache miss
+        """
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT book_ids FROM search_ids WHERE library = ? AND query = ? "
+                    "AND version = ? AND created_at > ?",
+                    (str(library), query, version, time.time() - self.ttl_seconds),
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.debug(f"Search cache read failed: {e}")
+            return None
+
+        return json.loads(row[0]) if row else None
+
+    def put(self, library: Path, query: str, version: str, book_ids: List[int]):
+        """
+        Store the ids matching a query.
+
+        Args:
+            library: Library path
+            query: Search expression
+            version: Current library version token
+            book_ids: Ordered list of matching book ids
+        """
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO search_ids "
+                        "(library, query, version, book_ids, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (
+                            str(library),
+                            query,
+                            version,
+                            json.dumps(book_ids),
+                            time.time(),
+                        ),
+                    )
+                    conn.execute(
+                        "DELETE FROM search_ids WHERE created_at <= ?",
+                        (time.time() - self.ttl_seconds,),
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.debug(f"Search cache write failed: {e}")
@@ -0,0 +1,436 @@
+"""
+Incremental library snapshot index for Calibre Books CLI.
+
+This module keeps a local SQLite copy of the per-book data that the stats,
+ASIN and conversion commands need (ids, last_modified, formats, file sizes
+and identifiers). A refresh only compares ``books.last_modified`` and the
+``data`` rows of metadata.db against the snapshot and re-reads the books
+that differ. Every refresh that finds changes starts a new generation, and
+named consumers keep a checkpoint generation so each command can ask for
+the books that changed since it last ran. Books a consumer failed to
+process stay pending for it until a later run succeeds.
+"""
+
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.logging import LoggerMixin
+from .metadata_store import CalibreMetadataStore, MetadataStoreError
+
+DEFAULT_SNAPSHOT_PATH = Path("~/.book-tool/cache/library_snapshot.db")
+
+# Fields copied from metadata.db into the snapshot
+SNAPSHOT_FIELDS = ["title", "authors", "series", "identifiers", "path"]
+
+# Separator of the entries in CalibreMetadataStore.iter_versions() signatures
+_SIGNATURE_SEPARATOR = "\x1f"
+
+# Largest number of bound parameters used in a single IN (...) clause.
+_ID_CHUNK_SIZE = 500
+
+
+@dataclass
+class SnapshotDiff:
+    """Books added, changed or removed since a given generation."""
+
+    added: List[int] = field(default_factory=list)
+    changed: List[int] = field(default_factory=list)
+    removed: List[int] = field(default_factory=list)
+    generation: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether any book was added, changed or removed."""
+        return bool(self.added or self.changed or self.removed)
+
+    @property
+    def modified_ids(self) -> List[int]:
+        """Ids of books that were added or changed."""
+        return sorted(self.added + self.changed)
+
+
+def _format_sizes(data_signature: str) -> Dict[str, int]:
+    """Extract ``{FORMAT: size}`` from a packed data signature."""
+    sizes = {}
+    for item in data_signature.split(_SIGNATURE_SEPARATOR) if data_signature else []:
+        fmt, size, _name = item.split(":", 2)
+        sizes[fmt.upper()] = int(size or 0)
+    return sizes
+
+
+class LibrarySnapshot(LoggerMixin):
+    """
+    Local snapshot of a Calibre library, refreshed incrementally.
+
+    Several libraries can share one snapshot database; all rows are keyed
+    by the library path.
+    """
+
+    def __init__(
+        self,
+        store: CalibreMetadataStore,
+        snapshot_path: Optional[Path] = None,
+    ):
+        """
+        Initialize the library snapshot.
+
+        Args:
+            store: Read-only metadata store of the library
+            snapshot_path: Path to the snapshot database
+        """
+        super().__init__()
+        self.store = store
+        self.library = str(store.library_path)
+        self.snapshot_path = Path(snapshot_path or DEFAULT_SNAPSHOT_PATH).expanduser()
+        self._init_database()
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection to the snapshot database."""
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.snapshot_path), timeout=10.0)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_database(self):
+        """Create the snapshot tables if needed."""
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS libraries (
+                    library TEXT PRIMARY KEY,
+                    generation INTEGER NOT NULL,
+                    refreshed_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS books (
+                    library TEXT NOT NULL,
+                    book_id INTEGER NOT NULL,
+                    last_modified TEXT,
+                    data_signature TEXT NOT NULL,
+                    created_generation INTEGER NOT NULL,
+                    generation INTEGER NOT NULL,
+                    title TEXT,
+                    authors TEXT NOT NULL,
+                    series TEXT,
+                    identifiers TEXT NOT NULL,
+                    format_sizes TEXT NOT NULL,
+                    path TEXT,
+                    PRIMARY KEY (library, book_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_books_generation
+                    ON books(library, generation);
+                CREATE TABLE IF NOT EXISTS removed_books (
+                    library TEXT NOT NULL,
+                    book_id INTEGER NOT NULL,
+                    generation INTEGER NOT NULL,
+                    PRIMARY KEY (library, book_id)
+                );
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    library TEXT NOT NULL,
+                    consumer TEXT NOT NULL,
+                    generation INTEGER NOT NULL,
+                    PRIMARY KEY (library, consumer)
+                );
+                CREATE TABLE IF NOT EXISTS pending_books (
+                    library TEXT NOT NULL,
+                    consumer TEXT NOT NULL,
+                    book_id INTEGER NOT NULL,
+                    PRIMARY KEY (library, consumer, book_id)
+                );
+                """
+            )
+
+    def _generation(self, conn: sqlite3.Connection) -> int:
+        """Current generation of this library's snapshot."""
+        row = conn.execute(
+            "SELECT generation FROM libraries WHERE library = ?", (self.library,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    @property
+    def generation(self) -> int:
+        """Current generation of this library's snapshot."""
+        with self._connect() as conn:
+            return self._generation(conn)
+
+    def refresh(self) -> SnapshotDiff:
+        """
+        Bring the snapshot up to date with metadata.db.
+
+        Only books whose ``last_modified`` or ``data`` rows differ from the
+        snapshot are read in full.
+
+        Returns:
+            SnapshotDiff of the changes applied by this refresh
+
+        Raises:
+            MetadataStoreError: If metadata.db cannot be read
+        """
+        start_time = time.time()
+        current: Dict[int, Tuple[Optional[str], str]] = {
+            book_id: (last_modified, signature)
+            for book_id, last_modified, signature in self.store.iter_versions()
+        }
+
+        try:
+            with self._connect() as conn:
+                known = {
+                    book_id: (last_modified, signature)
+                    for book_id, last_modified, signature in conn.execute(
+                        "SELECT book_id, last_modified, data_signature FROM books "
+                        "WHERE library = ?",
+                        (self.library,),
+                    )
+                }
+
+                diff = SnapshotDiff(
+                    added=sorted(current.keys() - known.keys()),
+                    changed=sorted(
+                        book_id
+                        for book_id in current.keys() & known.keys()
+                        if current[book_id] != known[book_id]
+                    ),
+                    removed=sorted(known.keys() - current.keys()),
+                    generation=self._generation(conn),
+                )
+
+                if diff.has_changes:
+                    diff.generation += 1
+                    self._apply(conn, diff, current)
+
+                conn.execute(
+                    "INSERT OR REPLACE INTO libraries (library, generation, "
+                    "refreshed_at) VALUES (?, ?, ?)",
+                    (self.library, diff.generation, time.time()),
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            raise MetadataStoreError(f"Failed to update library snapshot: {e}")
+
+        self.logger.info(
+            f"Library snapshot refreshed in {time.time() - start_time:.2f}s: "
+            f"{len(diff.added)} added, {len(diff.changed)} changed, "
+            f"{len(diff.removed)} removed (generation {diff.generation})"
+        )
+        return diff
+
+    def _apply(
+        self,
+        conn: sqlite3.Connection,
+        diff: SnapshotDiff,
+        current: Dict[int, Tuple[Optional[str], str]],
+    ):
+        """Write added, changed and removed books for a new generation."""
+        added = set(diff.added)
+        created: Dict[int, int] = {}
+        if diff.changed:
+            created = dict(
+                conn.execute(
+                    "SELECT book_id, created_generation FROM books WHERE library = ?",
+                    (self.library,),
+                ).fetchall()
+            )
+
+        rows = []
+        for book in self.store.iter_books(SNAPSHOT_FIELDS, book_ids=diff.modified_ids):
+            book_id = book["id"]
+            last_modified, signature = current[book_id]
+            rows.append(
+                (
+                    self.library,
+                    book_id,
+                    last_modified,
+                    signature,
+                    diff.generation if book_id in added else created[book_id],
+                    diff.generation,
+                    book.get("title"),
+                    json.dumps(book.get("authors") or []),
+                    book.get("series"),
+                    json.dumps(book.get("identifiers") or {}),
+                    json.dumps(_format_sizes(signature)),
+                    book.get("path"),
+                )
+            )
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO books (library, book_id, last_modified, "
+            "data_signature, created_generation, generation, title, authors, "
+            "series, identifiers, format_sizes, path) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.executemany(
+            "DELETE FROM removed_books WHERE library = ? AND book_id = ?",
+            [(self.library, book_id) for book_id in diff.added],
+        )
+        conn.executemany(
+            "DELETE FROM books WHERE library = ? AND book_id = ?",
+            [(self.library, book_id) for book_id in diff.removed],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO removed_books (library, book_id, generation) "
+            "VALUES (?, ?, ?)",
+            [(self.library, book_id, diff.generation) for book_id in diff.removed],
+        )
+
+    def changes_since(self, consumer: str) -> SnapshotDiff:
+        """
+        Get the books that changed since a consumer's last checkpoint.
+
+        A consumer without a checkpoint sees every book as added. Books left
+        pending by the consumer's previous run are reported as changed. Call
+        ``refresh()`` first to include the latest library changes.
+
+        Args:
+            consumer: Name of the consuming command (e.g. ``"asin"``)
+
+        Returns:
+            SnapshotDiff relative to the consumer's checkpoint, whose
+            ``generation`` should be passed to ``mark_processed()``
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT generation FROM checkpoints WHERE library = ? "
+                "AND consumer = ?",
+                (self.library, consumer),
+            ).fetchone()
+            checkpoint = row[0] if row else 0
+
+            diff = SnapshotDiff(generation=self._generation(conn))
+            for book_id, created_generation in conn.execute(
+                "SELECT book_id, created_generation FROM books "
+                "WHERE library = ? AND generation > ? ORDER BY book_id",
+                (self.library, checkpoint),
+            ):
+                if created_generation > checkpoint:
+                    diff.added.append(book_id)
+                else:
+                    diff.changed.append(book_id)
+
+            listed = set(diff.added) | set(diff.changed)
+            for (book_id,) in conn.execute(
+                "SELECT p.book_id FROM pending_books p JOIN books b "
+                "ON b.library = p.library AND b.book_id = p.book_id "
+                "WHERE p.library = ? AND p.consumer = ?",
+                (self.library, consumer),
+            ):
+                if book_id not in listed:
+                    diff.changed.append(book_id)
+            diff.changed.sort()
+
+            if checkpoint:
+                diff.removed = [
+                    book_id
+                    for (book_id,) in conn.execute(
+                        "SELECT book_id FROM removed_books "
+                        "WHERE library = ? AND generation > ? ORDER BY book_id",
+                        (self.library, checkpoint),
+                    )
+                ]
+
+        return diff
+
+    def mark_processed(
+        self,
+        consumer: str,
+        generation: int,
+        pending: Iterable[int] = (),
+        own_writes: Optional[Iterable[int]] = None,
+    ):
+        """
+        Record that a consumer has processed all changes up to a generation.
+
+        Args:
+            consumer: Name of the consuming command
+            generation: Generation of the SnapshotDiff that was processed
+            pending: Ids of books that failed and must be offered again
+            own_writes: Ids of books the consumer itself modified. If given,
+                ``refresh()`` must have run after those writes; the
+                checkpoint then moves past the generation they created, and
+                only books changed by others since ``generation`` stay pending
+        """
+        pending = {int(book_id) for book_id in pending}
+
+        with self._connect() as conn:
+            if own_writes is not None:
+                written = {int(book_id) for book_id in own_writes}
+                pending.update(
+                    book_id
+                    for (book_id,) in conn.execute(
+                        "SELECT book_id FROM books WHERE library = ? "
+                        "AND generation > ?",
+                        (self.library, generation),
+                    )
+                    if book_id not in written
+                )
+                generation = max(generation, self._generation(conn))
+
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (library, consumer, generation) "
+                "VALUES (?, ?, ?)",
+                (self.library, consumer, generation),
+            )
+            conn.execute(
+                "DELETE FROM pending_books WHERE library = ? AND consumer = ?",
+                (self.library, consumer),
+            )
+            conn.executemany(
+                "INSERT INTO pending_books (library, consumer, book_id) "
+                "VALUES (?, ?, ?)",
+                [(self.library, consumer, book_id) for book_id in sorted(pending)],
+            )
+            conn.commit()
+
+    def iter_books(
+        self, book_ids: Optional[List[int]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the books stored in the snapshot, ordered by id.
+
+        Args:
+            book_ids: Restrict results to these book ids
+
+        Yields:
+            calibredb-style dictionaries with ``id``, ``title``, ``authors``,
+            ``series``, ``identifiers``, ``formats``, ``size``,
+            ``format_sizes``, ``last_modified`` and ``path``
+        """
+        query = (
+            "SELECT book_id, title, authors, series, identifiers, format_sizes, "
+            "last_modified, path FROM books WHERE library = ?"
+        )
+        if book_ids is None:
+            chunks: List[List[int]] = [[]]
+        else:
+            ids = sorted({int(book_id) for book_id in book_ids})
+            chunks = [
+                ids[i : i + _ID_CHUNK_SIZE] for i in range(0, len(ids), _ID_CHUNK_SIZE)
+            ]
+            query += " AND book_id IN ({})"
+
+        with self._connect() as conn:
+            for chunk in chunks:
+                chunk_query = query.format(", ".join("?" * len(chunk)))
+                for row in conn.execute(
+                    chunk_query + " ORDER BY book_id", [self.library, *chunk]
+                ):
+                    format_sizes = json.loads(row[5])
+                    yield {
+                        "id": row[0],
+                        "title": row[1],
+                        "authors": json.loads(row[2]),
+                        "series": row[3],
+                        "identifiers": json.loads(row[4]),
+                        "formats": list(format_sizes),
+                        "size": max(format_sizes.values(), default=None),
+                        "format_sizes": format_sizes,
+                        "last_modified": (row[6] or "").replace(" ", "T", 1) or None,
+                        "path": row[7],
+                    }
@@ -0,0 +1,222 @@
+"""
+Library statistics computed inside metadata.db for Calibre Books CLI.
+
+This module computes LibraryStats with aggregate SQL queries (GROUP BY,
+COUNT, SUM) that SQLite evaluates over whole columns, instead of looping
+over every book in Python. Results are cached per library and keyed by a
+version derived from ``books.last_modified`` and the ``data`` table, so
+repeat calls on an unchanged library only run one cheap query.
+"""
+
+import logging
+import math
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from .book import LibraryStats
+from .metadata_store import CalibreMetadataStore, MetadataStoreError
+
+# Percentiles of per-book file size reported in LibraryStats.size_percentiles
+SIZE_PERCENTILES = (50, 90, 99)
+
+# Size of a book is that of its largest format, matching calibredb's "size"
+_BOOK_SIZES = "SELECT MAX(uncompressed_size) AS size FROM data GROUP BY book"
+
+
+class LibraryStatsReader(CalibreMetadataStore):
+    """
+    Aggregate statistics queries over a library's metadata.db.
+    """
+
+    def version_key(self) -> str:
+        """
+        Get a key that changes whenever books or their files change.
+
+        Returns:
+            Version string built from the newest ``last_modified``, the book
+            count and the number and total size of ``data`` rows
+        """
+        try:
+            with self._connect() as conn:
+                books = conn.execute(
+                    "SELECT MAX(last_modified), COUNT(*) FROM books"
+                ).fetchone()
+                data = conn.execute(
+                    "SELECT COUNT(*), TOTAL(uncompressed_size) FROM data"
+                ).fetchone()
+        except sqlite3.Error as e:
+            raise MetadataStoreError(f"Failed to query {self.db_path}: {e}")
+        return "|".join(str(value) for value in (*books, *data))
+
+    def _top(
+        self, conn: sqlite3.Connection, link: str, table: str, column: str, top_n: int
+    ) -> List[Tuple[str, int]]:
+        """Names with the most books through a link table."""
+        return [
+            (name, count)
+            for name, count in conn.execute(
+                f"SELECT {table}.name, COUNT(*) AS books FROM {link} "
+                f"JOIN {table} ON {table}.id = {link}.{column} "
+                f"GROUP BY {link}.{column} ORDER BY books DESC, {table}.name "
+                "LIMIT ?",
+                (top_n,),
+            )
+        ]
+
+    def read_stats(self, top_n: int = 10) -> LibraryStats:
+        """
+        Compute library statistics with aggregate queries.
+
+        Args:
+            top_n: Number of entries in the top authors and series lists
+
+        Returns:
+            LibraryStats (duplicate detection is not included)
+        """
+        stats = LibraryStats()
+        try:
+            with self._connect() as conn:
+                stats.total_books = conn.execute(
+                    "SELECT COUNT(*) FROM books"
+                ).fetchone()[0]
+                stats.total_authors = conn.execute(
+                    "SELECT COUNT(DISTINCT author) FROM books_authors_link"
+                ).fetchone()[0]
+                stats.total_series = conn.execute(
+                    "SELECT COUNT(DISTINCT series) FROM books_series_link"
+                ).fetchone()[0]
+                stats.books_without_asin = conn.execute(
+                    "SELECT COUNT(*) FROM books WHERE NOT EXISTS (SELECT 1 FROM "
+                    "identifiers WHERE identifiers.book = books.id "
+                    "AND identifiers.type = 'amazon')"
+                ).fetchone()[0]
+
+                stats.format_distribution = dict(
+                    conn.execute(
+                        "SELECT lower(format), COUNT(DISTINCT book) FROM data "
+                        "GROUP BY lower(format) ORDER BY 2 DESC, 1"
+                    ).fetchall()
+                )
+                stats.top_authors = self._top(
+                    conn, "books_authors_link", "authors", "author", top_n
+                )
+                stats.top_series = self._top(
+                    conn, "books_series_link", "series", "series", top_n
+                )
+
+                sized_books, total_size = conn.execute(
+                    f"SELECT COUNT(size), TOTAL(size) FROM ({_BOOK_SIZES})"
+                ).fetchone()
+                stats.library_size = int(total_size)
+
+                # Nearest-rank percentiles, each read with a single indexed
+                # offset into the sorted sizes
+                for percentile in SIZE_PERCENTILES if sized_books else ():
+                    rank = max(math.ceil(percentile / 100 * sized_books) - 1, 0)
+                    stats.size_percentiles[f"p{percentile}"] = conn.execute(
+                        f"SELECT size FROM ({_BOOK_SIZES}) WHERE size IS NOT NULL "
+                        "ORDER BY size LIMIT 1 OFFSET ?",
+                        (rank,),
+                    ).fetchone()[0]
+                if sized_books:
+                    stats.size_percentiles["max"] = conn.execute(
+                        f"SELECT MAX(size) FROM ({_BOOK_SIZES})"
+                    ).fetchone()[0]
+        except sqlite3.Error as e:
+            raise MetadataStoreError(f"Failed to compute statistics: {e}")
+
+        return stats
+
+
+class StatsCache:
+    """
+    SQLite cache of computed LibraryStats per library and version.
+    """
+
+    def __init__(self, cache_path: Path):
+        """
+        Initialize the statistics cache.
+
+        Args:
+            cache_path: Path to SQLite cache database
+        """
+        self.cache_path = Path(cache_path).expanduser()
+        self.logger = logging.getLogger(__name__)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS library_stats (
+                        library TEXT PRIMARY KEY,
+                        version TEXT NOT NULL,
+                        stats TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                """
+                )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the cache database."""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        return sqlite3.connect(str(self.cache_path), timeout=10.0)
+
+    def get(self, library: Path, version: str) -> Optional[LibraryStats]:
+        """
+        Get cached statistics if the library version is unchanged.
+
+        Args:
+            library: Library path
+            version: Current library version key
+
+        Returns:
+            LibraryStats, or None on a cache miss
+        """
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT stats FROM library_stats WHERE library = ? "
+                    "AND version = ?",
+                    (str(library), version),
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.debug(f"Stats cache read failed: {e}")
+            return None
+
+        if not row:
+            return None
+        try:
+            return LibraryStats.model_validate_json(row[0])
+        except ValueError as e:
+            self.logger.debug(f"Ignoring invalid cached stats: {e}")
+            return None
+
+    def put(self, library: Path, version: str, stats: LibraryStats):
+        """
+        Store statistics for a library version.
+
+        Args:
+            library: Library path
+            version: Library version key the statistics were computed for
+            stats: Computed statistics
+        """
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO library_stats "
+                        "(library, version, stats, created_at) VALUES (?, ?, ?, ?)",
+                        (str(library), version, stats.model_dump_json(), time.time()),
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            self.logger.debug(f"Stats cache write failed: {e}")
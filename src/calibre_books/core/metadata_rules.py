@@ -0,0 +1,288 @@
+"""
+Rule-based metadata checks for Calibre Books CLI.
+
+Each MetadataRule declares the calibredb fields it reads and returns the
+fixes for a single book. The MetadataRuleEngine loads only the union of
+those fields, checks books in batches (optionally on a process pool) and
+records per-rule counts and timings, so expensive rules are easy to spot.
+
+Adding a rule means subclassing MetadataRule and appending it to
+DEFAULT_RULES (or passing a custom rule list to the engine).
+"""
+
+import concurrent.futures
+import re
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.logging import LoggerMixin
+
+# Books checked per task
+DEFAULT_BATCH_SIZE = 500
+
+# Words kept lower case when fixing title case
+_SMALL_WORDS = re.compile(r"\b(And|Or|But|The|A|An|In|On|At|To|For|Of|With|By)\b")
+
+
+@dataclass
+class RuleStats:
+    """Counts and timing of a single rule."""
+
+    name: str
+    books_checked: int = 0
+    issues_found: int = 0
+    issues_fixed: int = 0
+    seconds: float = 0.0
+
+    def merge(self, other: "RuleStats"):
+        """Add the counts of another batch for the same rule."""
+        self.books_checked += other.books_checked
+        self.issues_found += other.issues_found
+        self.seconds += other.seconds
+
+
+class MetadataRule:
+    """
+    Base class for metadata rules.
+
+    Subclasses set ``name`` (the issue type reported) and ``fields`` (the
+    calibredb fields ``check`` reads) and implement ``check``.
+    """
+
+    name = "rule"
+    fields: Tuple[str, ...] = ()
+
+    def check(self, book: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Check a single book.
+
+        Args:
+            book: Book dictionary containing at least ``fields``
+
+        Returns:
+            Mapping of field name to fixed value, or None if the book is fine
+        """
+        raise NotImplementedError
+
+
+class TitleCaseRule(MetadataRule):
+    """Titles written entirely in upper or lower case."""
+
+    name = "title_case"
+    fields = ("title",)
+
+    def check(self, book: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        title = book.get("title") or ""
+        if not title or not (title.isupper() or title.islower()):
+            return None
+
+        # Don't capitalize common words incorrectly, except the first one
+        fixed_title = _SMALL_WORDS.sub(lambda m: m.group().lower(), title.title())
+        fixed_title = fixed_title[:1].upper() + fixed_title[1:]
+        if fixed_title == title:
+            return None
+        return {"title": fixed_title}
+
+
+class AuthorCaseRule(MetadataRule):
+    """Author names written entirely in upper or lower case."""
+
+    name = "author_case"
+    fields = ("authors",)
+
+    def check(self, book: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        authors = book.get("authors") or []
+        if isinstance(authors, str):
+            authors = [author.strip() for author in authors.split("&")]
+
+        fixed_authors = [
+            author.title() if author.isupper() or author.islower() else author
+            for author in authors
+        ]
+        if fixed_authors == authors:
+            return None
+        return {"authors": " & ".join(fixed_authors)}
+
+
+class MissingSeriesIndexRule(MetadataRule):
+    """Books in a series without a series index."""
+
+    name = "missing_series_index"
+    fields = ("series", "series_index")
+
+    def check(self, book: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if book.get("series") and book.get("series_index") is None:
+            return {"series_index": 1.0}  # Default to first book
+        return None
+
+
+class InvalidSeriesIndexRule(MetadataRule):
+    """Series indexes that are not positive numbers."""
+
+    name = "invalid_series_index"
+    fields = ("series_index",)
+
+    def check(self, book: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        series_index = book.get("series_index")
+        if series_index is None:
+            return None
+        try:
+            index_float = float(series_index)
+        except (ValueError, TypeError):
+            return {"series_index": 1.0}
+        if index_float != series_index or index_float <= 0:
+            return {"series_index": max(1.0, round(index_float, 1))}
+        return None
+
+
+DEFAULT_RULES: Tuple[MetadataRule, ...] = (
+    TitleCaseRule(),
+    AuthorCaseRule(),
+    MissingSeriesIndexRule(),
+    InvalidSeriesIndexRule(),
+)
+
+
+def check_batch(
+    rules: Tuple[MetadataRule, ...], books: List[Dict[str, Any]]
+) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, List[str]], List[RuleStats]]:
+    """
+    Run every rule over a batch of books.
+
+    Module level so it can be sent to a process pool.
+
+    Args:
+        rules: Rules to run
+        books: Book dictionaries with an ``id``
+
+    Returns:
+        Tuple of (fixes per book id, issue types per book id, stats per rule)
+    """
+    fixes: Dict[int, Dict[str, Any]] = {}
+    issues: Dict[int, List[str]] = {}
+    stats = []
+    for rule in rules:
+        rule_stats = RuleStats(rule.name, books_checked=len(books))
+        start = time.perf_counter()
+        for book in books:
+            fix = rule.check(book)
+            if fix:
+                book_id = int(book["id"])
+                fixes.setdefault(book_id, {}).update(fix)
+                issues.setdefault(book_id, []).append(rule.name)
+                rule_stats.issues_found += 1
+        rule_stats.seconds = time.perf_counter() - start
+        stats.append(rule_stats)
+    return fixes, issues, stats
+
+
+@dataclass
+class RuleBatchResult:
+    """Fixes found in one batch of books."""
+
+    fixes: Dict[int, Dict[str, Any]]
+    issues: Dict[int, List[str]]
+    books_checked: int
+
+
+class MetadataRuleEngine(LoggerMixin):
+    """
+    Run metadata rules over a stream of books in batches.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[Iterable[MetadataRule]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_workers: int = 1,
+    ):
+        """
+        Initialize the rule engine.
+
+        Args:
+            rules: Rules to run (DEFAULT_RULES if None)
+            batch_size: Books per batch
+            max_workers: Worker processes for checking batches; 1 checks
+                batches in the calling process
+        """
+        super().__init__()
+        self.rules = tuple(rules) if rules is not None else DEFAULT_RULES
+        self.batch_size = batch_size
+        self.max_workers = max(1, max_workers)
+        self.stats: Dict[str, RuleStats] = {
+            rule.name: RuleStats(rule.name) for rule in self.rules
+        }
+
+    @property
+    def fields(self) -> List[str]:
+        """Fields needed by all rules, starting with ``id``."""
+        fields = ["id"]
+        for rule in self.rules:
+            fields.extend(name for name in rule.fields if name not in fields)
+        return fields
+
+    def _batches(
+        self, books: Iterable[Dict[str, Any]]
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Split a stream of books into lists of ``batch_size``."""
+        iterator = iter(books)
+        while True:
+            batch = list(islice(iterator, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _collect(self, result, books_checked: int) -> RuleBatchResult:
+        """Merge per-rule stats of a checked batch."""
+        fixes, issues, stats = result
+        for rule_stats in stats:
+            self.stats[rule_stats.name].merge(rule_stats)
+        return RuleBatchResult(fixes, issues, books_checked)
+
+    def run(self, books: Iterable[Dict[str, Any]]) -> Iterator[RuleBatchResult]:
+        """
+        Check books batch by batch.
+
+        Batches are yielded in input order as soon as they are checked, so
+        callers can write the fixes of one batch while later batches are
+        still being checked.
+
+        Args:
+            books: Book dictionaries containing ``fields``
+
+        Yields:
+            RuleBatchResult per batch
+        """
+        if self.max_workers == 1:
+            for batch in self._batches(books):
+                yield self._collect(check_batch(self.rules, batch), len(batch))
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers
+        ) as executor:
+            # Keep a bounded number of batches in flight
+            pending = []
+            for batch in self._batches(books):
+                pending.append(
+                    (executor.submit(check_batch, self.rules, batch), len(batch))
+                )
+                if len(pending) >= self.max_workers * 2:
+                    future, size = pending.pop(0)
+                    yield self._collect(future.result(), size)
+            for future, size in pending:
+                yield self._collect(future.result(), size)
+
+    def record_fixed(self, issues: Dict[int, List[str]], book_ids: Iterable[int]):
+        """
+        Count fixes applied for the given books.
+
+        Args:
+            issues: Issue types per book id (from a RuleBatchResult)
+            book_ids: Books whose fixes were written
+        """
+        for book_id in book_ids:
+            for name in issues.get(book_id, []):
+                self.stats[name].issues_fixed += 1
@@ -0,0 +1,385 @@
+"""
+Read-only access to a Calibre library's metadata.db for Calibre Books CLI.
+
+This module reads book metadata directly from the SQLite database that
+backs a Calibre library. It is used for listing and statistics so that
+read paths no longer need to spawn ``calibredb list`` and parse its full
+JSON output. All writes still go through calibredb.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ..utils.logging import LoggerMixin
+
+
+# Separator used to pack multi-valued columns into a single group_concat()
+# result. Calibre never stores ASCII control characters in names or tags.
+_SEPARATOR = "\x1f"
+
+# Largest number of bound parameters used in a single IN (...) clause.
+_ID_CHUNK_SIZE = 500
+
+
+class MetadataStoreError(Exception):
+    """Base exception for direct metadata.db access."""
+
+
+class UnsupportedSchemaError(MetadataStoreError):
+    """metadata.db uses a schema version this module does not know."""
+
+
+def _multi(select: str) -> str:
+    """Wrap an ordered per-book sub-select into a packed scalar column."""
+    return f"(SELECT group_concat(v, char(31)) FROM ({select}))"
+
+
+# SQL expression for each supported calibredb field name. Every expression
+# is evaluated per row of ``books`` so only requested fields cost anything.
+_FIELD_SQL: Dict[str, str] = {
+    "id": "books.id",
+    "title": "books.title",
+    "sort": "books.sort",
+    "author_sort": "books.author_sort",
+    "timestamp": "books.timestamp",
+    "pubdate": "books.pubdate",
+    "last_modified": "books.last_modified",
+    "series_index": "books.series_index",
+    "path": "books.path",
+    "uuid": "books.uuid",
+    "authors": _multi(
+        "SELECT authors.name AS v FROM books_authors_link "
+        "JOIN authors ON authors.id = books_authors_link.author "
+        "WHERE books_authors_link.book = books.id ORDER BY books_authors_link.id"
+    ),
+    "series": (
+        "(SELECT series.name FROM books_series_link "
+        "JOIN series ON series.id = books_series_link.series "
+        "WHERE books_series_link.book = books.id)"
+    ),
+    "identifiers": _multi(
+        "SELECT identifiers.type || ':' || identifiers.val AS v FROM identifiers "
+        "WHERE identifiers.book = books.id ORDER BY identifiers.id"
+    ),
+    "isbn": (
+        "(SELECT identifiers.val FROM identifiers "
+        "WHERE identifiers.book = books.id AND identifiers.type = 'isbn')"
+    ),
+    "formats": _multi(
+        "SELECT data.format AS v FROM data "
+        "WHERE data.book = books.id ORDER BY data.id"
+    ),
+    "size": "(SELECT MAX(data.uncompressed_size) FROM data WHERE data.book = books.id)",
+    "tags": _multi(
+        "SELECT tags.name AS v FROM books_tags_link "
+        "JOIN tags ON tags.id = books_tags_link.tag "
+        "WHERE books_tags_link.book = books.id ORDER BY tags.name"
+    ),
+    "rating": (
+        "(SELECT ratings.rating FROM books_ratings_link "
+        "JOIN ratings ON ratings.id = books_ratings_link.rating "
+        "WHERE books_ratings_link.book = books.id)"
+    ),
+    "publisher": (
+        "(SELECT publishers.name FROM books_publishers_link "
+        "JOIN publishers ON publishers.id = books_publishers_link.publisher "
+        "WHERE books_publishers_link.book = books.id)"
+    ),
+    "languages": _multi(
+        "SELECT languages.lang_code AS v FROM books_languages_link "
+        "JOIN languages ON languages.id = books_languages_link.lang_code "
+        "WHERE books_languages_link.book = books.id "
+        "ORDER BY books_languages_link.item_order"
+    ),
+    "comments": "(SELECT comments.text FROM comments WHERE comments.book = books.id)",
+}
+
+_LIST_FIELDS = {"authors", "formats", "tags", "languages"}
+_DATE_FIELDS = {"timestamp", "pubdate", "last_modified"}
+
+
+class CalibreMetadataStore(LoggerMixin):
+    """
+    Read-only query engine over a Calibre library's metadata.db.
+
+    Rows are returned as dictionaries shaped like ``calibredb list
+    --for-machine`` entries, so existing consumers of the CLI output can use
+    them unchanged. The database is opened with ``mode=ro`` (optionally
+    ``immutable=1``) and is never written to.
+    """
+
+    # PRAGMA user_version values of metadata.db schemas this module has been
+    # checked against. Anything else is treated as unknown and callers are
+    # expected to fall back to calibredb.
+    SUPPORTED_SCHEMA_VERSIONS = range(20, 27)
+
+    REQUIRED_TABLES = (
+        "books",
+        "authors",
+        "books_authors_link",
+        "series",
+        "books_series_link",
+        "identifiers",
+        "data",
+        "tags",
+        "books_tags_link",
+    )
+
+    def __init__(self, library_path: Path, immutable: bool = False):
+        """
+        Initialize the metadata store.
+
+        Args:
+            library_path: Path to the Calibre library directory
+            immutable: Open the database with ``immutable=1``. Only safe when
+                no Calibre process is modifying the library concurrently.
+
+        Raises:
+            MetadataStoreError: If metadata.db is missing or unreadable
+            UnsupportedSchemaError: If the schema version is unknown
+        """
+        super().__init__()
+        self.library_path = Path(library_path).expanduser()
+        self.db_path = self.library_path / "metadata.db"
+        self.immutable = immutable
+
+        if not self.db_path.is_file():
+            raise MetadataStoreError(f"No metadata.db found at: {self.library_path}")
+
+        self.schema_version = self._check_schema()
+        self.logger.debug(
+            f"Opened metadata.db (schema {self.schema_version}) at {self.db_path}"
+        )
+
+    @contextmanager
+    def _connect(self):
+        """Open a read-only connection to metadata.db."""
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        if self.immutable:
+            uri += "&immutable=1"
+
+        try:
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        except sqlite3.Error as e:
+            raise MetadataStoreError(f"Cannot open {self.db_path}: {e}")
+
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _check_schema(self) -> int:
+        """Verify that metadata.db has a schema this module understands."""
+        try:
+            with self._connect() as conn:
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                tables = {
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')"
+                    )
+                }
+        except sqlite3.Error as e:
+            raise MetadataStoreError(f"Cannot read {self.db_path}: {e}")
+
+        if version not in self.SUPPORTED_SCHEMA_VERSIONS:
+            raise UnsupportedSchemaError(
+                f"Unknown metadata.db schema version {version} in {self.library_path}"
+            )
+
+        missing = [table for table in self.REQUIRED_TABLES if table not in tables]
+        if missing:
+            raise UnsupportedSchemaError(
+                f"metadata.db is missing tables: {', '.join(missing)}"
+            )
+
+        return version
+
+    def _where_clause(
+        self,
+        book_ids: Optional[List[int]],
+        without_identifier: Optional[str],
+    ):
+        """Build the WHERE clause and parameters for a book query."""
+        conditions = []
+        params: List[Any] = []
+
+        if book_ids is not None:
+            conditions.append(f"books.id IN ({', '.join('?' * len(book_ids))})")
+            params.extend(book_ids)
+
+        if without_identifier:
+            conditions.append(
+                "NOT EXISTS (SELECT 1 FROM identifiers WHERE identifiers.book = "
+                "books.id AND identifiers.type = ?)"
+            )
+            params.append(without_identifier)
+
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    def _convert_row(self, fields: List[str], row: tuple) -> Dict[str, Any]:
+        """Convert a raw SQLite row into a calibredb-style dictionary."""
+        book: Dict[str, Any] = {}
+        for name, value in zip(fields, row):
+            if name in _LIST_FIELDS:
+                value = value.split(_SEPARATOR) if value else []
+            elif name == "identifiers":
+                identifiers = {}
+                for item in value.split(_SEPARATOR) if value else []:
+                    key, _, val = item.partition(":")
+                    identifiers[key] = val
+                value = identifiers
+            elif name in _DATE_FIELDS and isinstance(value, str):
+                value = value.replace(" ", "T", 1)
+            elif name == "path" and value:
+                value = str(self.library_path / value)
+            book[name] = value
+        return book
+
+    def iter_books(
+        self,
+        fields: Optional[Iterable[str]] = None,
+        book_ids: Optional[Iterable[int]] = None,
+        without_identifier: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over books in the library ordered by id.
+
+        Rows are produced lazily from a single cursor, so memory use does not
+        grow with library size.
+
+        Args:
+            fields: calibredb field names to include (all supported if None).
+                Unknown field names are ignored.
+            book_ids: Restrict results to these book ids
+            without_identifier: Only yield books lacking this identifier type
+                (e.g. ``"amazon"``)
+
+        Yields:
+            Dictionaries shaped like ``calibredb list --for-machine`` entries
+        """
+        selected = [name for name in (fields or _FIELD_SQL) if name in _FIELD_SQL]
+        if "id" not in selected:
+            selected.insert(0, "id")
+        columns = ", ".join(f"{_FIELD_SQL[name]} AS {name}" for name in selected)
+
+        if book_ids is None:
+            chunks: List[Optional[List[int]]] = [None]
+        else:
+            ids = sorted({int(book_id) for book_id in book_ids})
+            chunks = [
+                ids[i : i + _ID_CHUNK_SIZE] for i in range(0, len(ids), _ID_CHUNK_SIZE)
+            ]
+
+        try:
+            with self._connect() as conn:
+                for chunk in chunks:
+                    where, params = self._where_clause(chunk, without_identifier)
+                    query = f"SELECT {columns} FROM books{where} ORDER BY books.id"
+                    for row in conn.execute(query, params):
+                        yield self._convert_row(selected, row)
+        except sqlite3.Error as e:
+            raise MetadataStoreError(f"Failed to query {self.db_path}: {e}")
+
+    def count_books(
+        self,
+        book_ids: Optional[Iterable[int]] = None,
+        without_identifier: Optional[str] = None,
+    ) -> int:
+        """
+        Count books matching the given restrictions.
+
+        Args:
+            book_ids: Restrict the count to these book ids
+            without_identifier: Only count books lacking this identifier type
+
+        Returns:
+            Number of matching books
+        """
+        if book_ids is not None:
+            return sum(1 for _ in self.iter_books(["id"], book_ids, without_identifier))
+
+        where, params = self._where_clause(None, without_identifier)
+        try:
+            with self._connect() as conn:
+                return conn.execute(
+                    f"SELECT COUNT(*) FROM books{where}", params
+                ).fetchone()[0]
+        except sqlite3.Error as e:
+            raise MetadataStoreError(f"Failed to query {self.db_path}: {e}")
+
+    def iter_versions(self) -> Iterator[tuple]:
+        """
+        Iterate over the change markers of every book, ordered by id.
+
+        Only ``books`` and ``data`` are read, which makes this much cheaper
+        than a full listing. It is used to detect which books changed since
+        a previous snapshot of the library.
+
+        Yields:
+            Tuples of ``(book_id, last_modified, data_signature)`` where the
+            data signature packs ``FORMAT:size:name`` for each book file
+        """
+        signature = _multi(
+            "SELECT data.format || ':' || data.uncompressed_size || ':' || "
+            "data.name AS v FROM data WHERE data.book = books.id ORDER BY data.format"
+        )
+        query = (
+            f"SELECT books.id, books.last_modified, {signature} "
+            "FROM books ORDER BY books.id"
+        )
+
+        try:
+            with self._connect() as conn:
+                for book_id, last_modified, data_signature in conn.execute(query):
+                    yield book_id, last_modified, data_signature or ""
+        except sqlite3.Error as e:
+            raise MetadataStoreError(f"Failed to query {self.db_path}: {e}")
+
+    def iter_files(
+        self, book_ids: Optional[Iterable[int]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the book files recorded in the ``data`` table.
+
+        Args:
+            book_ids: Restrict results to files of these book ids
+
+        Yields:
+            Dictionaries with ``book_id``, ``format`` (upper case), ``path``
+            (absolute Path of the file Calibre expects) and ``size`` as
+            recorded in metadata.db
+        """
+        if book_ids is None:
+            chunks: List[Optional[List[int]]] = [None]
+        else:
+            ids = sorted({int(book_id) for book_id in book_ids})
+            chunks = [
+                ids[i : i + _ID_CHUNK_SIZE] for i in range(0, len(ids), _ID_CHUNK_SIZE)
+            ]
+
+        try:
+            with self._connect() as conn:
+                for chunk in chunks:
+                    where, params = self._where_clause(chunk, None)
+                    query = (
+                        "SELECT books.id, books.path, data.format, data.name, "
+                        f"data.uncompressed_size FROM data JOIN books ON "
+                        f"books.id = data.book{where} ORDER BY books.id, data.format"
+                    )
+                    for book_id, book_path, fmt, name, size in conn.execute(
+                        query, params
+                    ):
+                        yield {
+                            "book_id": book_id,
+                            "format": fmt.upper(),
+                            "path": self.library_path
+                            / book_path
+                            / f"{name}.{fmt.lower()}",
+                            "size": size,
+                        }
+        except sqlite3.Error as e:
+            raise MetadataStoreError(f"Failed to query {self.db_path}: {e}")
@@ -0,0 +1,293 @@
+"""
+Transactional metadata writes to a Calibre library's metadata.db.
+
+This module applies batches of identifier updates (e.g. Amazon ASINs) and
+plain ``books`` column updates directly to metadata.db in a single
+transaction. Existing identifiers of
+other types are preserved. Every write is preceded by a backup of the
+database and takes SQLite's write lock up front, so it fails fast instead
+of interleaving with another writer such as a running Calibre instance.
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .metadata_store import CalibreMetadataStore, MetadataStoreError
+
+# Number of metadata.db backups kept per backup directory
+DEFAULT_BACKUP_COUNT = 5
+
+
+@dataclass
+class IdentifierWriteResult:
+    """Outcome of writing identifiers for a single book."""
+
+    book_id: int
+    success: bool
+    previous: Optional[Dict[str, str]] = None
+    error: Optional[str] = None
+
+
+class CalibreMetadataWriter(CalibreMetadataStore):
+    """
+    Batched identifier and column writer for metadata.db.
+
+    Shares schema validation with CalibreMetadataStore and only writes to
+    schemas that validation accepts.
+    """
+
+    # Columns of ``books`` that can be written without Calibre's help. Title
+    # and authors are deliberately absent: Calibre derives the book's folder
+    # and file names from them and must move the files when they change.
+    WRITABLE_BOOK_COLUMNS = ("series_index", "pubdate")
+
+    def __init__(
+        self,
+        library_path: Path,
+        backup_dir: Optional[Path] = None,
+        busy_timeout: float = 5.0,
+        keep_backups: int = DEFAULT_BACKUP_COUNT,
+    ):
+        """
+        Initialize the metadata writer.
+
+        Args:
+            library_path: Path to the Calibre library directory
+            backup_dir: Directory for metadata.db backups (library if None)
+            busy_timeout: Seconds to wait for the database write lock
+            keep_backups: Number of newest backups to keep (0 keeps all)
+
+        Raises:
+            MetadataStoreError: If metadata.db is missing or unreadable
+            UnsupportedSchemaError: If the schema version is unknown
+        """
+        super().__init__(library_path)
+        self.backup_dir = Path(backup_dir) if backup_dir else self.library_path
+        self.busy_timeout = busy_timeout
+        self.keep_backups = keep_backups
+
+    def backup(self) -> Path:
+        """
+        Write a consistent copy of metadata.db using SQLite's backup API.
+
+        Older backups beyond ``keep_backups`` are removed afterwards.
+
+        Returns:
+            Path to the backup file
+        """
+        # Microseconds keep names unique and sortable within the same second
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        backup_path = self.backup_dir / f"metadata_backup_{timestamp}.db"
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+
+        try:
+            with self._connect() as source:
+                target = sqlite3.connect(str(backup_path))
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        except sqlite3.Error as e:
+            raise MetadataStoreError(f"Failed to back up {self.db_path}: {e}")
+
+        self.logger.info(f"Backed up metadata.db to {backup_path}")
+        self._prune_backups()
+        return backup_path
+
+    def _prune_backups(self) -> None:
+        """Remove all but the newest ``keep_backups`` backups."""
+        if self.keep_backups <= 0:
+            return
+
+        backups = sorted(self.backup_dir.glob("metadata_backup_*.db"))
+        for stale in backups[: -self.keep_backups]:
+            try:
+                stale.unlink()
+                self.logger.debug(f"Removed old metadata.db backup {stale}")
+            except OSError as e:
+                self.logger.warning(f"Could not remove old backup {stale}: {e}")
+
+    def _connect_rw(self) -> sqlite3.Connection:
+        """Open a writable connection in manual transaction mode."""
+        conn = sqlite3.connect(
+            str(self.db_path), timeout=self.busy_timeout, isolation_level=None
+        )
+        # Calibre's books_update_trg references title_sort(), a function that
+        # only exists inside Calibre. It is evaluated solely when a title
+        # changes, which never happens here, but must resolve at prepare time.
+        conn.create_function("title_sort", 1, lambda title: title)
+        return conn
+
+    def upsert_identifiers(
+        self,
+        updates: Dict[int, Dict[str, str]],
+        backup: bool = True,
+    ) -> Dict[int, IdentifierWriteResult]:
+        """
+        Merge identifiers into books in a single transaction.
+
+        Only the identifier types present in each update are inserted or
+        replaced; all other identifiers of the book are left untouched.
+
+        Args:
+            updates: Mapping of book id to ``{identifier_type: value}``
+            backup: Whether to back up metadata.db before writing
+
+        Returns:
+            Mapping of book id to its IdentifierWriteResult
+
+        Raises:
+            MetadataStoreError: If the transaction cannot be applied. No
+                changes are written in that case.
+        """
+        if not updates:
+            return {}
+
+        if backup:
+            self.backup()
+
+        results: Dict[int, IdentifierWriteResult] = {}
+        modified = datetime.now(timezone.utc).isoformat(sep=" ")
+
+        conn = self._connect_rw()
+        try:
+            has_dirtied = bool(
+                conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'metadata_dirtied'"
+                ).fetchone()
+            )
+
+            # Take the write lock before reading so no other writer can
+            # change identifiers between our read and our write.
+            conn.execute("BEGIN IMMEDIATE")
+
+            for book_id, identifiers in updates.items():
+                if not conn.execute(
+                    "SELECT 1 FROM books WHERE id = ?", (book_id,)
+                ).fetchone():
+                    results[book_id] = IdentifierWriteResult(
+                        book_id, False, error="Book not found"
+                    )
+                    continue
+
+                previous = dict(
+                    conn.execute(
+                        "SELECT type, val FROM identifiers WHERE book = ?",
+                        (book_id,),
+                    ).fetchall()
+                )
+
+                conn.executemany(
+                    "INSERT INTO identifiers (book, type, val) VALUES (?, ?, ?) "
+                    "ON CONFLICT(book, type) DO UPDATE SET val = excluded.val",
+                    [
+                        (book_id, id_type.lower(), value)
+                        for id_type, value in identifiers.items()
+                    ],
+                )
+                conn.execute(
+                    "UPDATE books SET last_modified = ? WHERE id = ?",
+                    (modified, book_id),
+                )
+                if has_dirtied:
+                    # Tells Calibre to regenerate the book's metadata.opf
+                    conn.execute(
+                        "INSERT OR IGNORE INTO metadata_dirtied (book) VALUES (?)",
+                        (book_id,),
+                    )
+
+                results[book_id] = IdentifierWriteResult(
+                    book_id, True, previous=previous
+                )
+
+            conn.execute("COMMIT")
+
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise MetadataStoreError(f"Identifier update failed: {e}")
+        finally:
+            conn.close()
+
+        self.logger.info(
+            f"Wrote identifiers for {sum(r.success for r in results.values())} "
+            f"of {len(updates)} books in one transaction"
+        )
+        return results
+
+    def update_book_columns(
+        self,
+        updates: Dict[int, Dict[str, Any]],
+        backup: bool = True,
+    ) -> Dict[int, bool]:
+        """
+        Update ``books`` columns of many books in a single transaction.
+
+        Args:
+            updates: Mapping of book id to ``{column: value}``; columns must
+                be listed in WRITABLE_BOOK_COLUMNS
+            backup: Whether to back up metadata.db before writing
+
+        Returns:
+            Mapping of book id to whether the book was found and updated
+
+        Raises:
+            ValueError: If an update names a column that cannot be written
+            MetadataStoreError: If the transaction cannot be applied. No
+                changes are written in that case.
+        """
+        for columns in updates.values():
+            unsupported = set(columns) - set(self.WRITABLE_BOOK_COLUMNS)
+            if unsupported:
+                raise ValueError(
+                    f"Cannot write columns directly: {', '.join(sorted(unsupported))}"
+                )
+
+        if not updates:
+            return {}
+
+        if backup:
+            self.backup()
+
+        results: Dict[int, bool] = {}
+        modified = datetime.now(timezone.utc).isoformat(sep=" ")
+
+        conn = self._connect_rw()
+        try:
+            has_dirtied = bool(
+                conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'metadata_dirtied'"
+                ).fetchone()
+            )
+            conn.execute("BEGIN IMMEDIATE")
+
+            for book_id, columns in updates.items():
+                assignments = ", ".join(f"{column} = ?" for column in columns)
+                cursor = conn.execute(
+                    f"UPDATE books SET {assignments}, last_modified = ? WHERE id = ?",
+                    (*columns.values(), modified, book_id),
+                )
+                results[book_id] = cursor.rowcount > 0
+                if results[book_id] and has_dirtied:
+                    conn.execute(
+                        "INSERT OR IGNORE INTO metadata_dirtied (book) VALUES (?)",
+                        (book_id,),
+                    )
+
+            conn.execute("COMMIT")
+
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise MetadataStoreError(f"Column update failed: {e}")
+        finally:
+            conn.close()
+
+        self.logger.info(
+            f"Updated {sum(results.values())} of {len(updates)} books "
+            "in one transaction"
+        )
+        return results
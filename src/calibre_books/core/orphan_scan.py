@@ -0,0 +1,437 @@
+"""
+Native orphan detection for Calibre libraries.
+
+This module compares the files Calibre expects (the ``data`` table of
+metadata.db) with what is actually on disk. The library tree is walked with
+``os.scandir`` in parallel, one task per top-level (author) directory, and
+every entry is classified as:
+
+- ``orphaned_file``: a file inside the library that no book references
+- ``missing_file``: a file referenced by metadata.db that does not exist
+- ``extra_directory``: a directory that belongs to no book
+
+Files book-tool itself keeps in a library (metadata.db backups, job
+journals, download ledgers and KFX outputs) are never reported.
+
+The result is an OrphanReport that can be written to JSON in a dry run and
+later fed back to ``delete_orphans`` to remove exactly what was reported.
+"""
+
+import concurrent.futures
+import fnmatch
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..utils.logging import LoggerMixin
+
+# Files and directories Calibre keeps at the top of a library
+LIBRARY_FILES = {
+    "metadata.db",
+    "metadata.db-journal",
+    "metadata.db-wal",
+    "metadata.db-shm",
+    "metadata_db_prefs_backup.json",
+    "full-text-search.db",
+    "full-text-search.db-journal",
+    "full-text-search.db-wal",
+    "full-text-search.db-shm",
+}
+
+# Files Calibre keeps next to the book files of each book
+BOOK_DIR_FILES = {"metadata.opf", "cover.jpg"}
+
+# Subdirectory of a book directory holding Calibre's "extra files"
+BOOK_DATA_DIR = "data"
+
+# Files written by book-tool: metadata.db backups, journals and ledgers
+TOOL_FILE_PATTERNS = ("metadata_backup_*.db", ".book-tool-*")
+
+# Subdirectories of a book directory holding book-tool outputs
+TOOL_BOOK_DIRS = {"kfx_output"}
+
+# File name patterns treated as temporary leftovers
+TEMPORARY_SUFFIXES = (".tmp", ".bak", ".part", "~")
+TEMPORARY_NAMES = {".DS_Store", "Thumbs.db"}
+
+
+@dataclass
+class OrphanEntry:
+    """A single finding of an orphan scan."""
+
+    kind: str
+    path: str
+    size: int = 0
+    book_id: Optional[int] = None
+    temporary: bool = False
+
+
+@dataclass
+class OrphanReport:
+    """Result of comparing a library's metadata with its files on disk."""
+
+    library: str
+    generated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    files_scanned: int = 0
+    orphaned_files: List[OrphanEntry] = field(default_factory=list)
+    missing_files: List[OrphanEntry] = field(default_factory=list)
+    extra_directories: List[OrphanEntry] = field(default_factory=list)
+
+    @property
+    def reclaimable_size(self) -> int:
+        """Bytes freed by deleting orphaned files and extra directories."""
+        return sum(e.size for e in self.orphaned_files + self.extra_directories)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the report to a JSON-serializable dictionary."""
+        data = asdict(self)
+        data["summary"] = {
+            "orphaned_files": len(self.orphaned_files),
+            "missing_files": len(self.missing_files),
+            "extra_directories": len(self.extra_directories),
+            "reclaimable_size": self.reclaimable_size,
+        }
+        return data
+
+    def write_json(self, path: Path):
+        """
+        Write the report to a JSON file atomically.
+
+        Args:
+            path: Destination path of the report
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.to_dict(), f, indent=2)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    @classmethod
+    def from_json(cls, path: Path) -> "OrphanReport":
+        """
+        Load a report written by ``write_json``.
+
+        Args:
+            path: Path of the report
+
+        Returns:
+            OrphanReport
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data.pop("summary", None)
+        for key in ("orphaned_files", "missing_files", "extra_directories"):
+            data[key] = [OrphanEntry(**entry) for entry in data.get(key, [])]
+        return cls(**data)
+
+
+def _is_temporary(name: str) -> bool:
+    """Whether a file name looks like a temporary leftover."""
+    return name in TEMPORARY_NAMES or name.endswith(TEMPORARY_SUFFIXES)
+
+
+def _is_tool_file(name: str) -> bool:
+    """Whether a file name belongs to a file written by book-tool."""
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in TOOL_FILE_PATTERNS)
+
+
+def _walk(root: Path, rel: str) -> Tuple[List[Tuple[str, int]], List[str]]:
+    """Walk a directory tree with os.scandir.
+
+    Returns:
+        Tuple of ([(relative file path, size)], [relative directory paths]),
+        with paths relative to the library and ``/`` separated
+    """
+    files: List[Tuple[str, int]] = []
+    directories: List[str] = [rel]
+    stack = [rel]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(root / current) as entries:
+                for entry in entries:
+                    entry_rel = f"{current}/{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry_rel)
+                        stack.append(entry_rel)
+                    else:
+                        try:
+                            size = entry.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            size = 0
+                        files.append((entry_rel, size))
+        except OSError:
+            continue
+    return files, directories
+
+
+class OrphanScanner(LoggerMixin):
+    """
+    Compare a library's expected book files with the files on disk.
+    """
+
+    def __init__(self, library_path: Path, max_workers: Optional[int] = None):
+        """
+        Initialize the orphan scanner.
+
+        Args:
+            library_path: Path to the Calibre library directory
+            max_workers: Number of directory walking threads
+        """
+        super().__init__()
+        self.library_path = Path(library_path).expanduser()
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+
+    def _relative(self, path: Path) -> str:
+        """Library-relative, ``/`` separated form of a path."""
+        path_str = str(path)
+        prefix = str(self.library_path) + os.sep
+        if path_str.startswith(prefix):
+            # Plain string slicing; os.path.relpath dominates large scans
+            return path_str[len(prefix) :].replace(os.sep, "/")
+        return Path(os.path.relpath(path, self.library_path)).as_posix()
+
+    def scan(
+        self,
+        expected_files: Iterable[Dict[str, Any]],
+        book_dirs: Iterable[Path],
+        progress_callback=None,
+    ) -> OrphanReport:
+        """
+        Scan the library for orphaned files, missing files and extra directories.
+
+        Args:
+            expected_files: File dictionaries with ``book_id``, ``path`` and
+                ``size`` (see ``CalibreMetadataStore.iter_files``)
+            book_dirs: Directories of all books in the library
+            progress_callback: Optional progress callback function
+
+        Returns:
+            OrphanReport
+        """
+        report = OrphanReport(library=str(self.library_path))
+
+        expected: Dict[str, Dict[str, Any]] = {
+            self._relative(Path(file_info["path"])): file_info
+            for file_info in expected_files
+        }
+        book_dir_set: Set[str] = {self._relative(Path(d)) for d in book_dirs}
+        # Author directories and any other ancestors of book directories
+        parent_dirs: Set[str] = set()
+        for book_dir in book_dir_set:
+            parts = book_dir.split("/")
+            parent_dirs.update("/".join(parts[:i]) for i in range(1, len(parts)))
+
+        files: List[Tuple[str, int]] = []
+        directories: List[str] = []
+        top_level = []
+        with os.scandir(self.library_path) as entries:
+            for entry in entries:
+                if entry.name in LIBRARY_FILES or entry.name.startswith("."):
+                    continue
+                if _is_tool_file(entry.name):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    top_level.append(entry.name)
+                else:
+                    files.append((entry.name, entry.stat().st_size))
+
+        if progress_callback:
+            progress_callback(10, f"Scanning {len(top_level)} directories...")
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers
+        ) as executor:
+            for dir_files, dir_dirs in executor.map(
+                lambda name: _walk(self.library_path, name), top_level
+            ):
+                files.extend(dir_files)
+                directories.extend(dir_dirs)
+
+        report.files_scanned = len(files)
+
+        if progress_callback:
+            progress_callback(70, f"Classifying {len(files)} files...")
+
+        # Extra directories: neither a book directory, an ancestor of one,
+        # nor a book's extra files directory. Only the outermost extra
+        # directory is reported; sorting visits parents before children.
+        extra_dirs: Dict[str, int] = {}
+        for directory in sorted(directories):
+            if directory in book_dir_set or directory in parent_dirs:
+                continue
+            if self._in_book_dir(directory, book_dir_set):
+                continue
+            if self._inside(directory, extra_dirs):
+                continue
+            extra_dirs[directory] = 0
+
+        found: Set[str] = set()
+        for rel, size in files:
+            if rel in expected:
+                found.add(rel)
+                continue
+
+            extra = self._inside(rel, extra_dirs)
+            if extra:
+                extra_dirs[extra] += size
+                continue
+
+            if self._in_book_dir(rel, book_dir_set):
+                continue
+            if _is_tool_file(rel.rsplit("/", 1)[-1]):
+                continue
+
+            report.orphaned_files.append(
+                OrphanEntry(
+                    kind="orphaned_file",
+                    path=rel,
+                    size=size,
+                    temporary=_is_temporary(rel.rsplit("/", 1)[-1]),
+                )
+            )
+
+        report.extra_directories = [
+            OrphanEntry(kind="extra_directory", path=directory, size=size)
+            for directory, size in sorted(extra_dirs.items())
+        ]
+        report.missing_files = [
+            OrphanEntry(
+                kind="missing_file",
+                path=rel,
+                size=file_info.get("size") or 0,
+                book_id=file_info.get("book_id"),
+            )
+            for rel, file_info in sorted(expected.items())
+            if rel not in found
+        ]
+
+        self.logger.info(
+            f"Orphan scan of {report.files_scanned} files: "
+            f"{len(report.orphaned_files)} orphaned, "
+            f"{len(report.missing_files)} missing, "
+            f"{len(report.extra_directories)} extra directories"
+        )
+        return report
+
+    def _in_book_dir(self, rel: str, book_dirs: Set[str]) -> bool:
+        """Whether a path is one of the files Calibre keeps in a book directory."""
+        book_dir = self._inside(rel, book_dirs)
+        if not book_dir:
+            return False
+        inner = rel[len(book_dir) + 1 :]
+        return inner in BOOK_DIR_FILES or inner.split("/", 1)[0] in (
+            BOOK_DATA_DIR,
+            *TOOL_BOOK_DIRS,
+        )
+
+    @classmethod
+    def _holds_book(cls, rel: str, book_dirs: Set[str]) -> bool:
+        """Whether a directory is, contains or lies inside a book directory."""
+        prefix = f"{rel}/"
+        return (
+            rel in book_dirs
+            or cls._inside(rel, book_dirs) is not None
+            or any(book_dir.startswith(prefix) for book_dir in book_dirs)
+        )
+
+    @staticmethod
+    def _inside(rel: str, directories) -> Optional[str]:
+        """Return the directory of ``directories`` containing ``rel``, if any."""
+        parts = rel.split("/")
+        for i in range(1, len(parts)):
+            candidate = "/".join(parts[:i])
+            if candidate in directories:
+                return candidate
+        return None
+
+    def delete_orphans(
+        self,
+        report: OrphanReport,
+        include_temporary_only: bool = False,
+        expected_files: Optional[Iterable[Dict[str, Any]]] = None,
+        book_dirs: Optional[Iterable[Path]] = None,
+    ) -> Tuple[int, int]:
+        """
+        Delete the orphaned files and extra directories listed in a report.
+
+        Entries whose size changed since the report was written are skipped,
+        so files that were modified or reused in the meantime are kept. When
+        the library's current files and book directories are given, entries
+        that belong to a book by now are skipped as well; extra directories
+        are only deleted after this check. Missing files are only reported,
+        never acted upon.
+
+        Args:
+            report: Report produced by ``scan`` (possibly loaded from JSON)
+            include_temporary_only: Only delete orphaned temporary files
+            expected_files: Current book files of the library (see ``scan``)
+            book_dirs: Current directories of all books in the library
+
+        Returns:
+            Tuple of (entries removed, bytes freed)
+        """
+        if Path(report.library).resolve() != self.library_path.resolve():
+            raise ValueError(f"Report is for {report.library}, not {self.library_path}")
+
+        expected: Set[str] = {
+            self._relative(Path(file_info["path"]))
+            for file_info in expected_files or []
+        }
+        book_dir_set: Optional[Set[str]] = None
+        if book_dirs is not None:
+            book_dir_set = {self._relative(Path(d)) for d in book_dirs}
+        elif not include_temporary_only:
+            self.logger.warning(
+                "Deleting extra directories without checking current book paths"
+            )
+
+        removed = 0
+        freed = 0
+        for entry in report.orphaned_files:
+            if include_temporary_only and not entry.temporary:
+                continue
+            path = self.library_path / entry.path
+            if entry.path in expected:
+                self.logger.warning(f"Skipping file now used by a book: {path}")
+                continue
+            try:
+                if path.stat().st_size != entry.size:
+                    self.logger.warning(f"Skipping changed file: {path}")
+                    continue
+                path.unlink()
+            except OSError as e:
+                self.logger.warning(f"Failed to remove {path}: {e}")
+                continue
+            removed += 1
+            freed += entry.size
+            self.logger.debug(f"Removed orphaned file: {path}")
+
+        if not include_temporary_only:
+            for entry in report.extra_directories:
+                path = self.library_path / entry.path
+                if book_dir_set is not None and self._holds_book(
+                    entry.path, book_dir_set
+                ):
+                    self.logger.warning(f"Skipping directory of a book: {path}")
+                    continue
+                try:
+                    shutil.rmtree(path)
+                except OSError as e:
+                    self.logger.warning(f"Failed to remove {path}: {e}")
+                    continue
+                removed += 1
+                freed += entry.size
+                self.logger.debug(f"Removed extra directory: {path}")
+
+        return removed, freed
@@ -0,0 +1,476 @@
+"""
+Streaming book pipeline for Calibre Books CLI.
+
+Downloads, validates, tags with ASINs, converts and imports books into a
+Calibre library as one stream instead of separate batch runs. Every stage
+has its own pool of worker threads and hands finished books to the next
+stage through a bounded queue, so a book can be converting while the next
+one is still downloading. A full queue blocks the stage feeding it, which
+keeps the number of books in flight constant however long the list is.
+"""
+
+import dataclasses
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence
+
+from ..utils.logging import LoggerMixin
+from .asin_lookup import ASINLookupService
+from .asin_manager import ASINManager
+from .calibre import CalibreIntegration
+from .converter import FormatConverter
+from .download_ledger import LEDGER_FILENAME, DownloadLedger
+from .downloader import BookDownloader, BookRequest
+from .file_validator import FileValidator
+
+if TYPE_CHECKING:
+    from ..config.manager import ConfigManager
+
+# Books waiting between two stages
+DEFAULT_QUEUE_SIZE = 4
+
+# Stages of the library pipeline in order
+PIPELINE_STAGES = ("download", "validate", "asin", "convert", "import")
+
+# Marks the end of a stage's input
+_DONE = object()
+
+
+class PipelineError(Exception):
+    """A book cannot continue through the pipeline."""
+
+
+@dataclass
+class PipelineItem:
+    """A book moving through the pipeline."""
+
+    request: BookRequest
+    position: int = 0
+    file_path: Optional[Path] = None
+    asin: Optional[str] = None
+    book_ids: List[int] = field(default_factory=list)
+    failed_stage: Optional[str] = None
+    error: Optional[str] = None
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def success(self) -> bool:
+        """Whether the book passed every stage."""
+        return self.failed_stage is None
+
+
+@dataclass
+class PipelineStage:
+    """A pipeline stage processing one book at a time per worker."""
+
+    name: str
+    process: Callable[[PipelineItem], None]
+    workers: int = 1
+
+
+@dataclass
+class StageStats:
+    """Throughput and backlog of a pipeline stage."""
+
+    name: str
+    workers: int
+    processed: int = 0
+    failed: int = 0
+    busy_time: float = 0.0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Books per minute processed by the stage."""
+        return self.processed / self.elapsed * 60 if self.elapsed > 0 else 0.0
+
+    @property
+    def utilisation(self) -> float:
+        """Fraction of the stage's worker time spent processing books."""
+        capacity = self.elapsed * self.workers
+        return min(self.busy_time / capacity, 1.0) if capacity > 0 else 0.0
+
+
+class StreamingPipeline(LoggerMixin):
+    """
+    Run books through stages connected by bounded queues.
+    """
+
+    def __init__(
+        self, stages: Sequence[PipelineStage], queue_size: int = DEFAULT_QUEUE_SIZE
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            stages: Stages in processing order
+            queue_size: Maximum number of books waiting in front of a stage
+        """
+        super().__init__()
+        self.stages = list(stages)
+        self.queue_size = max(1, queue_size)
+        self._lock = threading.Lock()
+        self._queues: List[queue.Queue] = []
+        self._stats: Dict[str, StageStats] = {
+            stage.name: StageStats(stage.name, max(1, stage.workers))
+            for stage in self.stages
+        }
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    def stats(self) -> List[StageStats]:
+        """
+        Statistics of every stage.
+
+        Safe to call from another thread while the pipeline runs.
+
+        Returns:
+            Snapshot of the stage statistics with current queue depths
+        """
+        with self._lock:
+            if self._started is None:
+                elapsed = 0.0
+            else:
+                elapsed = (self._finished or time.monotonic()) - self._started
+            return [
+                dataclasses.replace(
+                    self._stats[stage.name],
+                    queue_depth=self._queues[i].qsize() if self._queues else 0,
+                    elapsed=elapsed,
+                )
+                for i, stage in enumerate(self.stages)
+            ]
+
+    def _put(self, index: int, item):
+        """Queue an item for a stage, blocking while its queue is full."""
+        inbox = self._queues[index]
+        inbox.put(item)
+        if item is not _DONE:
+            with self._lock:
+                stats = self._stats[self.stages[index].name]
+                stats.max_queue_depth = max(stats.max_queue_depth, inbox.qsize())
+
+    def run(
+        self,
+        requests: Iterable[BookRequest],
+        progress_callback: Optional[Callable[[PipelineItem], None]] = None,
+    ) -> List[PipelineItem]:
+        """
+        Run books through all stages.
+
+        Args:
+            requests: Books to process; consumed lazily as the first stage
+                makes room
+            progress_callback: Called with each book that finished or
+                failed, from the worker thread that finished it
+
+        Returns:
+            Processed books in request order
+        """
+        if not self.stages:
+            return []
+
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        with self._lock:
+            self._started = time.monotonic()
+            self._finished = None
+        results: List[PipelineItem] = []
+        live_workers = [self._stats[stage.name].workers for stage in self.stages]
+
+        def work(index: int):
+            stage = self.stages[index]
+            stats = self._stats[stage.name]
+            last_stage = index + 1 == len(self.stages)
+
+            while True:
+                item = self._queues[index].get()
+                if item is _DONE:
+                    break
+
+                started = time.monotonic()
+                try:
+                    stage.process(item)
+                except Exception as e:
+                    item.failed_stage = stage.name
+                    item.error = str(e)
+                    self.logger.warning(
+                        f"{item.request.title}: {stage.name} failed: {e}"
+                    )
+
+                with self._lock:
+                    stats.busy_time += time.monotonic() - started
+                    stats.processed += 1
+                    if not item.success:
+                        stats.failed += 1
+
+                if item.success and not last_stage:
+                    self._put(index + 1, item)
+                else:
+                    with self._lock:
+                        results.append(item)
+                    if progress_callback:
+                        # A failing callback must not stop the worker, or the
+                        # next stage would never see the end of its input
+                        try:
+                            progress_callback(item)
+                        except Exception as e:
+                            self.logger.warning(f"Progress callback failed: {e}")
+
+            # The last worker of a stage ends the input of the next one
+            with self._lock:
+                live_workers[index] -= 1
+                stage_done = live_workers[index] == 0
+            if stage_done and not last_stage:
+                for _ in range(self._stats[self.stages[index + 1].name].workers):
+                    self._put(index + 1, _DONE)
+
+        threads = [
+            threading.Thread(
+                target=work,
+                args=(index,),
+                name=f"pipeline-{stage.name}-{n}",
+                daemon=True,
+            )
+            for index, stage in enumerate(self.stages)
+            for n in range(self._stats[stage.name].workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for position, request in enumerate(requests):
+                self._put(0, PipelineItem(request=request, position=position))
+        finally:
+            # Let the workers drain and exit even if reading the input failed
+            for _ in range(self._stats[self.stages[0].name].workers):
+                self._put(0, _DONE)
+
+        for thread in threads:
+            thread.join()
+
+        with self._lock:
+            self._finished = time.monotonic()
+
+        return sorted(results, key=lambda item: item.position)
+
+
+class BookPipeline(LoggerMixin):
+    """
+    Download → validate → ASIN → convert → import pipeline.
+
+    Connects BookDownloader, FileValidator, the ASIN lookup, FormatConverter
+    and the Calibre library import on a StreamingPipeline.
+    """
+
+    def __init__(
+        self,
+        config_manager: "ConfigManager",
+        output_dir: Optional[Path] = None,
+        download_format: str = "mobi",
+        convert_to: Optional[str] = None,
+        lookup_asin: bool = True,
+        import_books: bool = True,
+        workers: Optional[Dict[str, int]] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            config_manager: ConfigManager instance for accessing configuration
+            output_dir: Directory for downloads and conversions (defaults to
+                the configured download path)
+            download_format: Format to download
+            convert_to: Format to convert downloads to (None: no conversion)
+            lookup_asin: Whether to look up and write ASINs
+            import_books: Whether to import books into the Calibre library
+            workers: Worker count per stage name, overriding the defaults
+            queue_size: Maximum number of books waiting in front of a stage
+        """
+        super().__init__()
+        self.config_manager = config_manager
+        self._output_dir = Path(output_dir).expanduser() if output_dir else None
+        self.download_format = download_format
+        self.convert_to = convert_to
+        self.lookup_asin = lookup_asin
+        self.import_books = import_books
+        self.workers = dict(workers or {})
+        self.queue_size = queue_size
+
+        # Components (lazy initialization)
+        self._downloader: Optional[BookDownloader] = None
+        self._validator: Optional[FileValidator] = None
+        self._lookup_service: Optional[ASINLookupService] = None
+        self._asin_manager: Optional[ASINManager] = None
+        self._converter: Optional[FormatConverter] = None
+        self._calibre: Optional[CalibreIntegration] = None
+
+        self.pipeline: Optional[StreamingPipeline] = None
+
+    @property
+    def downloader(self) -> BookDownloader:
+        """Lazy initialization of the book downloader."""
+        if self._downloader is None:
+            self._downloader = BookDownloader(self.config_manager.get_download_config())
+        return self._downloader
+
+    @property
+    def validator(self) -> FileValidator:
+        """Lazy initialization of the file validator."""
+        if self._validator is None:
+            self._validator = FileValidator(self.config_manager.get_config())
+        return self._validator
+
+    @property
+    def lookup_service(self) -> ASINLookupService:
+        """Lazy initialization of the ASIN lookup service."""
+        if self._lookup_service is None:
+            self._lookup_service = ASINLookupService(self.config_manager)
+        return self._lookup_service
+
+    @property
+    def asin_manager(self) -> ASINManager:
+        """Lazy initialization of the ASIN manager."""
+        if self._asin_manager is None:
+            self._asin_manager = ASINManager(self.config_manager)
+        return self._asin_manager
+
+    @property
+    def converter(self) -> FormatConverter:
+        """Lazy initialization of the format converter."""
+        if self._converter is None:
+            self._converter = FormatConverter(self.config_manager)
+        return self._converter
+
+    @property
+    def calibre(self) -> CalibreIntegration:
+        """Lazy initialization of the Calibre integration."""
+        if self._calibre is None:
+            self._calibre = CalibreIntegration(self.config_manager)
+        return self._calibre
+
+    @property
+    def output_dir(self) -> Path:
+        """Directory for downloads and conversions."""
+        return self._output_dir or self.downloader.download_path
+
+    def stages(self) -> List[PipelineStage]:
+        """
+        Stages of the pipeline with their worker counts.
+
+        Returns:
+            Enabled stages in processing order
+        """
+        stages = [
+            PipelineStage("download", self._download, self.downloader.max_parallel),
+            PipelineStage("validate", self._validate, 2),
+        ]
+        if self.lookup_asin:
+            stages.append(PipelineStage("asin", self._add_asin, 2))
+        if self.convert_to:
+            stages.append(
+                PipelineStage(
+                    "convert",
+                    self._convert,
+                    self.converter.effective_parallel(),
+                )
+            )
+        if self.import_books:
+            # calibredb serializes writes to the library anyway
+            stages.append(PipelineStage("import", self._import, 1))
+
+        for stage in stages:
+            stage.workers = max(1, self.workers.get(stage.name, stage.workers))
+        return stages
+
+    def run(
+        self,
+        requests: Iterable[BookRequest],
+        progress_callback: Optional[Callable[[PipelineItem], None]] = None,
+    ) -> List[PipelineItem]:
+        """
+        Run books through the pipeline.
+
+        Args:
+            requests: Books to download
+            progress_callback: Called with each finished or failed book
+
+        Returns:
+            Processed books in request order
+        """
+        self.pipeline = StreamingPipeline(self.stages(), self.queue_size)
+        items = self.pipeline.run(requests, progress_callback)
+
+        successful = sum(1 for item in items if item.success)
+        self.logger.info(f"Pipeline completed: {successful}/{len(items)} successful")
+        return items
+
+    def stats(self) -> List[StageStats]:
+        """Statistics of every stage of the current or last run."""
+        return self.pipeline.stats() if self.pipeline else []
+
+    def _download(self, item: PipelineItem):
+        """Search for and download a book."""
+        result = self.downloader.download_book(
+            item.request, format=self.download_format, output_dir=self.output_dir
+        )
+        if not result.success:
+            raise PipelineError(result.error or "Download failed")
+        item.file_path = result.filepath
+
+    def _validate(self, item: PipelineItem):
+        """Check the downloaded file's format."""
+        result = self.validator.validate_file(item.file_path)
+        if not result.is_valid:
+            raise PipelineError("; ".join(result.errors) or result.status.value)
+
+    def _add_asin(self, item: PipelineItem):
+        """Look up the book's ASIN and write it into the file."""
+        item.asin = self.asin_manager.get_asin_from_file(item.file_path)
+        if item.asin:
+            return
+
+        result = self.lookup_service.lookup_by_title(
+            item.request.title, item.request.author
+        )
+        if not result.success or not result.asin:
+            # Books without an ASIN are still worth converting and importing
+            item.warnings.append(result.error or "No ASIN found")
+            return
+
+        try:
+            self.asin_manager.write_file_asin(item.file_path, result.asin)
+            item.asin = result.asin
+        except (RuntimeError, ValueError) as e:
+            item.warnings.append(f"ASIN {result.asin} not written: {e}")
+            return
+
+        # The tagged file is still the download; without this a re-run would
+        # see a changed file and download the book again
+        ledger_path = item.file_path.parent / LEDGER_FILENAME
+        if ledger_path.exists():
+            DownloadLedger(ledger_path).update_content(item.file_path)
+
+    def _convert(self, item: PipelineItem):
+        """Convert the book to the target format."""
+        output_file = item.file_path.with_suffix(f".{self.convert_to.lower()}")
+        if output_file == item.file_path:
+            return
+
+        result = self.converter.convert_single(
+            item.file_path, output_file=output_file, output_format=self.convert_to
+        )
+        if not result.success:
+            raise PipelineError(result.error or "Conversion failed")
+        item.file_path = result.output_file
+
+    def _import(self, item: PipelineItem):
+        """Add the book to the Calibre library."""
+        item.book_ids = self.calibre.add_books([item.file_path])
+        if not item.book_ids:
+            item.warnings.append("Already in the library")
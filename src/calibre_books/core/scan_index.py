@@ -0,0 +1,187 @@
+"""
+Persistent scan index for Calibre Books CLI.
+
+FileScanner derives metadata for every file of a scan from its name and,
+with metadata checks, from its content. The scan index records the result
+per file in a SQLite database (``~/.cache/book-tool/scan_index.db`` by
+default) together with the file's size, modification time and inode, so a
+rescan only stats each file and re-extracts the ones that were added or
+changed since the last scan. Comparing a scan with the index also yields
+the files that were added, changed or removed in between.
+"""
+
+import logging
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .book import Book, BookMetadata
+
+# Index database used when no path is given
+DEFAULT_SCAN_INDEX = Path.home() / ".cache" / "book-tool" / "scan_index.db"
+
+
+def index_key(path: Path) -> str:
+    """Absolute path a file is indexed under."""
+    return os.path.abspath(str(path))
+
+
+def file_signature(stat: os.stat_result) -> Tuple[int, int, int]:
+    """Size, modification time and inode identifying a file version."""
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+@dataclass
+class ScanDiff:
+    """Changes of a directory since its previous scan."""
+
+    added: List[Book] = field(default_factory=list)
+    changed: List[Book] = field(default_factory=list)
+    removed: List[Path] = field(default_factory=list)
+    unchanged: int = 0
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether any file was added, changed or removed."""
+        return bool(self.added or self.changed or self.removed)
+
+
+class ScanIndex:
+    """
+    Persistent record of scanned files and their metadata.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        """
+        Initialize the index.
+
+        Args:
+            db_path: Path of the index database (defaults to the user cache)
+        """
+        self.db_path = Path(db_path) if db_path else DEFAULT_SCAN_INDEX
+        self.logger = logging.getLogger(__name__)
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS files (
+                        path TEXT PRIMARY KEY,
+                        size INTEGER NOT NULL,
+                        mtime_ns INTEGER NOT NULL,
+                        inode INTEGER NOT NULL,
+                        format TEXT,
+                        metadata TEXT NOT NULL,
+                        file_metadata INTEGER NOT NULL DEFAULT 0,
+                        scanned_at REAL NOT NULL
+                    )
+                """
+                )
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the index database."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def entries(self, directory: Path) -> Dict[str, sqlite3.Row]:
+        """
+        Read the entries of all files below a directory.
+
+        Args:
+            directory: Scanned directory
+
+        Returns:
+            Entries by indexed path
+        """
+        prefix = os.path.join(index_key(directory), "")
+        # Every path starting with the prefix sorts between these bounds
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT * FROM files WHERE path >= ? AND path < ?", (prefix, upper)
+            ).fetchall()
+        finally:
+            conn.close()
+        return {row["path"]: row for row in rows}
+
+    @staticmethod
+    def is_current(
+        row: Optional[sqlite3.Row], stat: os.stat_result, file_metadata: bool
+    ) -> bool:
+        """
+        Whether an entry still describes a file.
+
+        Args:
+            row: Index entry of the file
+            stat: Current stat of the file
+            file_metadata: Whether the scan needs metadata from file content
+
+        Returns:
+            True if the file is unchanged and its entry has the metadata
+            the scan needs
+        """
+        return (
+            row is not None
+            and (row["size"], row["mtime_ns"], row["inode"]) == file_signature(stat)
+            and (bool(row["file_metadata"]) or not file_metadata)
+        )
+
+    @staticmethod
+    def book(row: sqlite3.Row, file_path: Path) -> Book:
+        """Book of an index entry, at the path the scan found it under."""
+        return Book(
+            metadata=BookMetadata.model_validate_json(row["metadata"]),
+            file_path=file_path,
+        )
+
+    def store(self, books: Iterable[Tuple[Book, os.stat_result]], file_metadata: bool):
+        """
+        Record scanned books.
+
+        Args:
+            books: Books with the stat of their file taken before the scan
+            file_metadata: Whether the metadata was read from file content
+        """
+        now = time.time()
+        rows = [
+            (
+                index_key(book.file_path),
+                *file_signature(stat),
+                book.metadata.format.value if book.metadata.format else None,
+                book.metadata.model_dump_json(),
+                int(file_metadata),
+                now,
+            )
+            for book, stat in books
+        ]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, "
+                    "format, metadata, file_metadata, scanned_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        finally:
+            conn.close()
+
+    def remove(self, paths: Iterable[str]):
+        """Forget indexed paths."""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "DELETE FROM files WHERE path = ?", [(path,) for path in paths]
+                )
+        finally:
+            conn.close()
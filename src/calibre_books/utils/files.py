@@ -0,0 +1,46 @@
+"""
+File helpers for Calibre Books CLI.
+
+This module provides helpers shared by the download, conversion and
+metadata code: content hashing and the hidden partial files that outputs
+are written to before they are complete.
+"""
+
+import hashlib
+from pathlib import Path
+
+# Read size when hashing files
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: Path) -> str:
+    """
+    Compute the SHA-256 of a file's content.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def partial_output_path(output_file: Path) -> Path:
+    """
+    Path a file is written to before it is complete.
+
+    The extension is kept, since tools like ebook-convert pick the output
+    format from it.
+
+    Args:
+        output_file: Final output path
+
+    Returns:
+        Hidden sibling of ``output_file``
+    """
+    return output_file.with_name(f".{output_file.stem}.partial{output_file.suffix}")
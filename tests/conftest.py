@@ -0,0 +1,24 @@
+"""
+Shared pytest fixtures for the Calibre Books CLI test suite.
+"""
+
+import pytest
+
+from calibre_books.core.capabilities import (
+    CapabilityRegistry,
+    set_capability_registry,
+)
+
+
+@pytest.fixture(autouse=True)
+def isolated_capability_registry():
+    """
+    Give every test its own in-memory capability registry.
+
+    Keeps probe results persisted by a real Calibre installation from
+    leaking into tests that mock subprocess calls.
+    """
+    registry = CapabilityRegistry()
+    set_capability_registry(registry)
+    yield registry
+    set_capability_registry(None)
@@ -0,0 +1,174 @@
+"""
+Helpers for building minimal Calibre libraries in tests.
+
+Creates a metadata.db with the subset of Calibre's schema used by the
+direct database readers, plus the matching book directories and files.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List
+
+CALIBRE_SCHEMA = """
+CREATE TABLE books (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL DEFAULT 'Unknown',
+    sort TEXT,
+    timestamp TIMESTAMP,
+    pubdate TIMESTAMP,
+    series_index REAL NOT NULL DEFAULT 1.0,
+    author_sort TEXT,
+    isbn TEXT DEFAULT '',
+    lccn TEXT DEFAULT '',
+    path TEXT NOT NULL DEFAULT '',
+    flags INTEGER NOT NULL DEFAULT 1,
+    uuid TEXT,
+    has_cover BOOL DEFAULT 0,
+    last_modified TIMESTAMP NOT NULL DEFAULT '2000-01-01 00:00:00+00:00'
+);
+CREATE TABLE authors (id INTEGER PRIMARY KEY, name TEXT NOT NULL, sort TEXT, link TEXT);
+CREATE TABLE books_authors_link (id INTEGER PRIMARY KEY, book INTEGER, author INTEGER);
+CREATE TABLE series (id INTEGER PRIMARY KEY, name TEXT NOT NULL, sort TEXT);
+CREATE TABLE books_series_link (id INTEGER PRIMARY KEY, book INTEGER, series INTEGER);
+CREATE TABLE identifiers (
+    id INTEGER PRIMARY KEY, book INTEGER, type TEXT, val TEXT, UNIQUE(book, type)
+);
+CREATE TABLE data (
+    id INTEGER PRIMARY KEY, book INTEGER, format TEXT,
+    uncompressed_size INTEGER, name TEXT
+);
+CREATE TABLE tags (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE books_tags_link (id INTEGER PRIMARY KEY, book INTEGER, tag INTEGER);
+CREATE TABLE ratings (id INTEGER PRIMARY KEY, rating INTEGER);
+CREATE TABLE books_ratings_link (id INTEGER PRIMARY KEY, book INTEGER, rating INTEGER);
+CREATE TABLE publishers (id INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE books_publishers_link (id INTEGER PRIMARY KEY, book INTEGER, publisher INTEGER);
+CREATE TABLE languages (id INTEGER PRIMARY KEY, lang_code TEXT NOT NULL);
+CREATE TABLE books_languages_link (
+    id INTEGER PRIMARY KEY, book INTEGER, lang_code INTEGER, item_order INTEGER
+);
+CREATE TABLE comments (id INTEGER PRIMARY KEY, book INTEGER, text TEXT);
+CREATE TABLE metadata_dirtied (id INTEGER PRIMARY KEY, book INTEGER NOT NULL, UNIQUE(book));
+"""
+
+# Trigger shipped with Calibre that calls a Calibre-only SQL function. It is
+# created after the rows are inserted since the function is undefined here.
+CALIBRE_TRIGGERS = """
+CREATE TRIGGER books_update_trg AFTER UPDATE ON books
+BEGIN
+    UPDATE books SET sort = title_sort(NEW.title)
+    WHERE id = NEW.id AND OLD.title <> NEW.title;
+END;
+"""
+
+
+def _get_or_create(conn: sqlite3.Connection, table: str, column: str, value) -> int:
+    row = conn.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,))
+    found = row.fetchone()
+    if found:
+        return found[0]
+    return conn.execute(
+        f"INSERT INTO {table} ({column}) VALUES (?)", (value,)
+    ).lastrowid
+
+
+def create_calibre_library(
+    library_path: Path,
+    books: List[Dict[str, Any]],
+    schema_version: int = 25,
+    write_files: bool = True,
+) -> Path:
+    """
+    Create a minimal Calibre library on disk.
+
+    Args:
+        library_path: Directory to create the library in
+        books: Book dictionaries with ``title``, ``authors`` and optional
+            ``series``, ``series_index``, ``identifiers``, ``formats``
+            (format -> file content bytes), ``tags``, ``pubdate`` and
+            ``last_modified``
+        schema_version: Value stored in ``PRAGMA user_version``
+        write_files: Whether to create the book files on disk
+
+    Returns:
+        Path to the created metadata.db
+    """
+    library_path.mkdir(parents=True, exist_ok=True)
+    db_path = library_path / "metadata.db"
+
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(CALIBRE_SCHEMA)
+    conn.execute(f"PRAGMA user_version = {schema_version}")
+
+    for book in books:
+        authors = book.get("authors", ["Unknown"])
+        title = book["title"]
+        book_id = conn.execute(
+            "INSERT INTO books (title, sort, pubdate, series_index, author_sort, "
+            "last_modified) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                title,
+                title,
+                book.get("pubdate", "2020-01-01 00:00:00+00:00"),
+                book.get("series_index", 1.0),
+                authors[0],
+                book.get("last_modified", "2024-01-01 00:00:00+00:00"),
+            ),
+        ).lastrowid
+
+        rel_path = f"{authors[0]}/{title} ({book_id})"
+        conn.execute("UPDATE books SET path = ? WHERE id = ?", (rel_path, book_id))
+
+        for author in authors:
+            author_id = _get_or_create(conn, "authors", "name", author)
+            conn.execute(
+                "INSERT INTO books_authors_link (book, author) VALUES (?, ?)",
+                (book_id, author_id),
+            )
+
+        if book.get("series"):
+            series_id = _get_or_create(conn, "series", "name", book["series"])
+            conn.execute(
+                "INSERT INTO books_series_link (book, series) VALUES (?, ?)",
+                (book_id, series_id),
+            )
+
+        for id_type, value in book.get("identifiers", {}).items():
+            conn.execute(
+                "INSERT INTO identifiers (book, type, val) VALUES (?, ?, ?)",
+                (book_id, id_type, value),
+            )
+
+        for tag in book.get("tags", []):
+            tag_id = _get_or_create(conn, "tags", "name", tag)
+            conn.execute(
+                "INSERT INTO books_tags_link (book, tag) VALUES (?, ?)",
+                (book_id, tag_id),
+            )
+
+        file_name = f"{title} - {authors[0]}"
+        for fmt, content in book.get("formats", {}).items():
+            conn.execute(
+                "INSERT INTO data (book, format, uncompressed_size, name) "
+                "VALUES (?, ?, ?, ?)",
+                (book_id, fmt.upper(), len(content), file_name),
+            )
+            if write_files:
+                book_dir = library_path / rel_path
+                book_dir.mkdir(parents=True, exist_ok=True)
+                (book_dir / f"{file_name}.{fmt.lower()}").write_bytes(content)
+
+    conn.executescript(CALIBRE_TRIGGERS)
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def modify_library(library_path: Path, *statements: str):
+    """Run SQL statements against a library's metadata.db."""
+    conn = sqlite3.connect(str(library_path / "metadata.db"))
+    conn.create_function("title_sort", 1, lambda title: title)
+    for statement in statements:
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
@@ -255,7 +255,10 @@ class TestASINCliCommands:
             Book(metadata=BookMetadata(title="Book 2", author="Author 2")),
         ]
         mock_calibre.get_books_for_asin_update.return_value = test_books
-        mock_calibre.update_asins.return_value = 2
+        mock_calibre.update_asins_batch.return_value = [
+            Mock(book_id=None, success=True),
+            Mock(book_id=None, success=True),
+        ]
 
         # Mock ASIN service
         mock_service = Mock()
@@ -140,6 +140,61 @@ class TestCalibreDB:
             )
 
 
+class TestCalibreDBStreaming:
+    """Test streaming calibredb list output."""
+
+    @pytest.fixture
+    def fake_calibredb(self, tmp_path):
+        """Create a fake calibredb script that prints a JSON book list."""
+        books = [{"id": i, "title": f"Book {i}"} for i in range(1, 501)]
+        (tmp_path / "books.json").write_text(json.dumps(books, indent=2))
+        script = tmp_path / "calibredb"
+        script.write_text(
+            "#!/bin/sh\n"
+            f'cat "{tmp_path / "books.json"}"\n'
+            'if [ -n "$FAKE_CALIBREDB_FAIL" ]; then echo boom >&2; exit 3; fi\n'
+        )
+        script.chmod(0o755)
+        return script
+
+    def test_list_books_iter_streams_books(self, fake_calibredb):
+        """Test that books are yielded one by one from calibredb output."""
+        with (
+            patch.object(CalibreDB, "_validate_library"),
+            patch.object(CalibreDB, "_validate_cli"),
+        ):
+            calibre_db = CalibreDB(Path("/test/library"), str(fake_calibredb))
+
+            books = calibre_db.list_books_iter(fields=["id", "title"])
+
+            assert next(books) == {"id": 1, "title": "Book 1"}
+            assert sum(1 for _ in books) == 499
+
+    def test_list_books_iter_failure(self, fake_calibredb, monkeypatch):
+        """Test that a failing calibredb raises after the output is consumed."""
+        monkeypatch.setenv("FAKE_CALIBREDB_FAIL", "1")
+
+        with (
+            patch.object(CalibreDB, "_validate_library"),
+            patch.object(CalibreDB, "_validate_cli"),
+        ):
+            calibre_db = CalibreDB(Path("/test/library"), str(fake_calibredb))
+
+            with pytest.raises(CalibreError, match="boom"):
+                list(calibre_db.list_books_iter())
+
+    @pytest.mark.parametrize("chunk_size", [1, 5, 65536])
+    def test_iter_json_array_chunking(self, chunk_size):
+        """Test incremental decoding across arbitrary chunk boundaries."""
+        import io
+        from src.calibre_books.core.calibre import _iter_json_array
+
+        data = [{"id": i, "title": "Tïtle, [with] {braces}"} for i in range(20)]
+        stream = io.StringIO(json.dumps(data))
+
+        assert list(_iter_json_array(stream, chunk_size)) == data
+
+
 class TestCalibreIntegration:
     """Test the CalibreIntegration class functionality."""
 
@@ -193,11 +248,7 @@ class TestCalibreIntegration:
         ]
 
         mock_db = calibre_integration._calibre_db
-        mock_result = Mock()
-        mock_result.success = True
-        mock_result.has_data = True
-        mock_result.output = json.dumps(mock_books_data)
-        mock_db.list_books.return_value = mock_result
+        mock_db.list_books_iter.side_effect = lambda **kwargs: iter(mock_books_data)
 
         # Mock additional calls for detailed stats
         mock_db.find_duplicates.return_value = Mock(success=True, output="")
@@ -214,10 +265,7 @@ class TestCalibreIntegration:
     def test_get_library_stats_calibre_error(self, calibre_integration):
         """Test library stats when Calibre command fails."""
         mock_db = calibre_integration._calibre_db
-        mock_result = Mock()
-        mock_result.success = False
-        mock_result.error = "Library not accessible"
-        mock_db.list_books.return_value = mock_result
+        mock_db.list_books_iter.side_effect = CalibreError("Library not accessible")
 
         with pytest.raises(CalibreError):
             calibre_integration.get_library_stats()
@@ -239,11 +287,7 @@ class TestCalibreIntegration:
         ]
 
         mock_db = calibre_integration._calibre_db
-        mock_result = Mock()
-        mock_result.success = True
-        mock_result.has_data = True
-        mock_result.output = json.dumps(mock_books_data)
-        mock_db.list_books.return_value = mock_result
+        mock_db.list_books_iter.return_value = iter(mock_books_data)
 
         books = calibre_integration.get_books_for_asin_update(missing_only=True)
 
@@ -288,11 +332,23 @@ class TestCalibreIntegration:
 
         mock_db = calibre_integration._calibre_db
         mock_db.set_metadata.return_value = Mock(success=True)
+        existing = [
+            {"id": 1, "identifiers": {"isbn": "9780765326355"}},
+            {"id": 2, "identifiers": {}},
+        ]
 
-        updated_count = calibre_integration.update_asins(mock_results, dry_run=False)
+        with patch.object(
+            calibre_integration, "_read_books_data", return_value=existing
+        ):
+            updated_count = calibre_integration.update_asins(
+                mock_results, dry_run=False
+            )
 
         assert updated_count == 2
         assert mock_db.set_metadata.call_count == 2
+        mock_db.set_metadata.assert_any_call(
+            1, {"identifiers": "isbn:9780765326355,amazon:B01234567X"}
+        )
 
     def test_update_asins_dry_run(self, calibre_integration):
         """Test ASIN updates in dry run mode."""
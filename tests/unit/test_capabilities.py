@@ -0,0 +1,156 @@
+"""
+Unit tests for the capability registry.
+
+Tests memoization and persistence of probe results, invalidation when
+probed binaries or watched paths change, and probe sharing between the
+converters.
+"""
+
+import os
+import stat
+import subprocess
+from unittest.mock import Mock, patch
+
+import pytest
+
+from calibre_books.config.manager import ConfigManager
+from calibre_books.core.capabilities import CapabilityRegistry
+from calibre_books.core.conversion.kfx import KFXConverter
+
+
+@pytest.fixture
+def fake_bin(tmp_path, monkeypatch):
+    """Put a fake calibre-customize executable on PATH."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    binary = bin_dir / "calibre-customize"
+    binary.write_text("#!/bin/sh\n")
+    binary.chmod(binary.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("PATH", str(bin_dir))
+    return binary
+
+
+class TestCapabilityRegistry:
+    """Test memoization of probe results."""
+
+    def test_probe_runs_once(self, fake_bin):
+        """Test that an unchanged installation is probed only once."""
+        registry = CapabilityRegistry()
+        probe = Mock(return_value="plugins")
+
+        for _ in range(3):
+            value = registry.probe("plugins", probe, binaries=("calibre-customize",))
+
+        assert value == "plugins"
+        probe.assert_called_once()
+
+    def test_results_persist(self, fake_bin, tmp_path):
+        """Test that a new registry reuses persisted results."""
+        cache_path = tmp_path / "capabilities.json"
+        CapabilityRegistry(cache_path).probe(
+            "plugins", lambda: "plugins", binaries=("calibre-customize",)
+        )
+        probe = Mock(return_value="other")
+
+        value = CapabilityRegistry(cache_path).probe(
+            "plugins", probe, binaries=("calibre-customize",)
+        )
+
+        assert value == "plugins"
+        probe.assert_not_called()
+
+    def test_binary_change_invalidates(self, fake_bin):
+        """Test that upgrading a binary probes again."""
+        registry = CapabilityRegistry()
+        registry.probe("plugins", lambda: "old", binaries=("calibre-customize",))
+        mtime = fake_bin.stat().st_mtime_ns + 1_000_000_000
+        os.utime(fake_bin, ns=(mtime, mtime))
+
+        value = registry.probe(
+            "plugins", lambda: "new", binaries=("calibre-customize",)
+        )
+
+        assert value == "new"
+
+    def test_watched_path_invalidates(self, fake_bin, tmp_path):
+        """Test that installing a plugin probes again."""
+        plugins = tmp_path / "plugins"
+        registry = CapabilityRegistry()
+        registry.probe("plugins", lambda: "without", watch=[plugins])
+        plugins.mkdir()
+
+        assert registry.probe("plugins", lambda: "with", watch=[plugins]) == "with"
+
+    def test_missing_binary_not_memoized(self, fake_bin):
+        """Test that results are not remembered while a tool is not installed."""
+        registry = CapabilityRegistry()
+        probe = Mock(return_value="value")
+
+        registry.probe("version", probe, binaries=("ebook-convert",))
+        registry.probe("version", probe, binaries=("ebook-convert",))
+
+        assert probe.call_count == 2
+
+    def test_failed_probe_not_memoized(self, fake_bin):
+        """Test that None results and exceptions are probed again."""
+        registry = CapabilityRegistry()
+        with pytest.raises(subprocess.TimeoutExpired):
+            registry.probe(
+                "plugins",
+                Mock(side_effect=subprocess.TimeoutExpired("calibre-customize", 10)),
+                binaries=("calibre-customize",),
+            )
+        registry.probe("plugins", lambda: None, binaries=("calibre-customize",))
+
+        assert (
+            registry.probe("plugins", lambda: "ok", binaries=("calibre-customize",))
+            == "ok"
+        )
+
+
+class TestSharedProbes:
+    """Test that the converters share probe results."""
+
+    def test_plugin_list_probed_once(self, fake_bin, monkeypatch, tmp_path):
+        """Test that KFX checks in both converters run calibre-customize once."""
+        monkeypatch.setenv("CALIBRE_CONFIG_DIRECTORY", str(tmp_path / "calibre"))
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_conversion_config.return_value = {}
+        config_manager.get_calibre_config.return_value = {}
+        result = Mock(
+            returncode=0, stdout="KFX Output (2, 17) - Convert ebooks to KFX format"
+        )
+
+        with patch("subprocess.run", return_value=result) as mock_run:
+            first = KFXConverter(config_manager)
+            second = KFXConverter(config_manager)
+            assert first._check_advanced_kfx_plugin()
+            assert second._format_converter.validate_kfx_plugin()
+
+        mock_run.assert_called_once_with(
+            ["calibre-customize", "-l"], capture_output=True, text=True, timeout=10
+        )
+
+    def test_requirement_checks_probed_once(self, fake_bin, monkeypatch, tmp_path):
+        """Test that repeated requirement checks run each version probe once."""
+        for name in ("calibre", "ebook-convert"):
+            binary = fake_bin.parent / name
+            binary.write_text("#!/bin/sh\n")
+            binary.chmod(binary.stat().st_mode | stat.S_IXUSR)
+        monkeypatch.setenv("CALIBRE_CONFIG_DIRECTORY", str(tmp_path / "calibre"))
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_conversion_config.return_value = {}
+        config_manager.get_calibre_config.return_value = {}
+
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = Mock(returncode=0, stdout="calibre 7.2.0")
+            converter = KFXConverter(config_manager)._format_converter
+            for _ in range(3):
+                requirements = converter.check_system_requirements()
+            assert converter.calibre_version() == "7.2.0"
+
+        assert requirements["calibre"] is True
+        assert requirements["ebook-convert"] is True
+        commands = [call.args[0] for call in mock_run.call_args_list]
+        assert commands.count(["calibre", "--version"]) == 1
+        assert commands.count(["ebook-convert", "--version"]) == 1
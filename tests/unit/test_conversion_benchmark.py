@@ -0,0 +1,275 @@
+"""
+Unit tests for conversion benchmarking.
+
+Tests synthetic corpus generation, benchmark metrics, JSON round trips,
+comparisons between runs and the benchmark convert command.
+"""
+
+import os
+import struct
+import subprocess
+import sys
+import zipfile
+from unittest.mock import Mock, patch
+
+import pytest
+from click.testing import CliRunner
+
+from calibre_books.cli.main import main
+from calibre_books.config.manager import ConfigManager
+from calibre_books.core.book import BookFormat, ConversionResult
+from calibre_books.core.conversion_benchmark import (
+    ConversionBenchmark,
+    CorpusSpec,
+    generate_corpus,
+)
+from calibre_books.core.converter import FormatConverter
+
+
+def fake_batch(files, output_dir=None, output_format="epub", **kwargs):
+    """Pretend to convert a batch, each book taking 0.1s per 100 KB."""
+    return [
+        ConversionResult(
+            input_file=path,
+            output_file=output_dir / f"{path.stem}.{output_format}",
+            input_format=BookFormat.EPUB,
+            output_format=BookFormat.EPUB,
+            success=not path.name.endswith("0002.txt"),
+            error=None if not path.name.endswith("0002.txt") else "bad input",
+            conversion_time=path.stat().st_size / 1024 / 1000,
+        )
+        for path in files
+    ]
+
+
+@pytest.fixture
+def converter():
+    """Create a FormatConverter without a Calibre installation."""
+    config_manager = Mock(spec=ConfigManager)
+    config_manager.get_conversion_config.return_value = {}
+    converter = FormatConverter(config_manager)
+    converter.calibre_version = Mock(return_value="7.0.0")
+    return converter
+
+
+class TestCorpus:
+    """Test synthetic corpus generation."""
+
+    def test_generates_requested_books(self, tmp_path):
+        """Test that every format gets the requested number of books."""
+        files = generate_corpus(tmp_path, CorpusSpec(files_per_format=2, size_kb=20))
+
+        assert sorted(path.suffix for path in files) == [
+            ".epub",
+            ".epub",
+            ".mobi",
+            ".mobi",
+            ".txt",
+            ".txt",
+        ]
+
+    def test_corpus_is_deterministic(self, tmp_path):
+        """Test that the same spec produces identical books."""
+        spec = CorpusSpec(files_per_format=1, size_kb=40, seed=7)
+        first = generate_corpus(tmp_path / "a", spec)
+        second = generate_corpus(tmp_path / "b", spec)
+
+        assert [p.read_bytes() for p in first] == [p.read_bytes() for p in second]
+
+    def test_epub_structure_and_image_density(self, tmp_path):
+        """Test that EPUBs are valid containers with the requested images."""
+        sparse = generate_corpus(
+            tmp_path / "sparse",
+            CorpusSpec(formats=["epub"], files_per_format=1, size_kb=256),
+        )
+        dense = generate_corpus(
+            tmp_path / "dense",
+            CorpusSpec(
+                formats=["epub"], files_per_format=1, size_kb=256, image_density=0.75
+            ),
+        )
+
+        with zipfile.ZipFile(dense[0]) as book:
+            names = book.namelist()
+            assert names[0] == "mimetype"
+            assert book.getinfo("mimetype").compress_type == zipfile.ZIP_STORED
+            assert "OEBPS/content.opf" in names
+            images = [n for n in names if n.endswith(".png")]
+        with zipfile.ZipFile(sparse[0]) as book:
+            sparse_images = [n for n in book.namelist() if n.endswith(".png")]
+
+        assert len(images) == 6
+        assert len(sparse_images) == 3
+        assert dense[0].stat().st_size > sparse[0].stat().st_size
+
+    def test_mobi_header(self, tmp_path):
+        """Test that MOBI books carry a PalmDB and MOBI header."""
+        files = generate_corpus(
+            tmp_path, CorpusSpec(formats=["mobi"], files_per_format=1, size_kb=64)
+        )
+        data = files[0].read_bytes()
+
+        assert data[60:68] == b"BOOKMOBI"
+        record0 = struct.unpack(">I", data[78:82])[0]
+        assert data[record0 + 16 : record0 + 20] == b"MOBI"
+
+    def test_unsupported_format(self, tmp_path):
+        """Test that formats without a generator are rejected."""
+        with pytest.raises(ValueError, match="pdf"):
+            generate_corpus(tmp_path, CorpusSpec(formats=["pdf"]))
+
+
+class TestConversionBenchmark:
+    """Test benchmark runs and comparisons."""
+
+    @pytest.fixture
+    def corpus(self, tmp_path):
+        """Generate a small corpus."""
+        return generate_corpus(
+            tmp_path / "corpus", CorpusSpec(files_per_format=2, size_kb=20)
+        )
+
+    def test_run_matrix_metrics(self, converter, corpus, tmp_path):
+        """Test that every configuration is measured."""
+        bench = ConversionBenchmark(converter)
+
+        with patch.object(converter, "convert_batch", side_effect=fake_batch) as run:
+            results = bench.run_matrix(
+                corpus, workers=[1, 2], qualities=["high", "low"], work_dir=tmp_path
+            )
+
+        assert [(r.quality, r.workers) for r in results] == [
+            ("high", 1),
+            ("high", 2),
+            ("low", 1),
+            ("low", 2),
+        ]
+        assert run.call_args.kwargs["parallel"] == 2
+        assert run.call_args.kwargs["quality"] == "low"
+        result = results[0]
+        assert result.file_count == 6
+        assert result.success_count == 5
+        assert result.errors == ["bad input"]
+        assert result.files_per_second > 0
+        assert result.mb_per_second > 0
+        assert 0 < result.timing_percentiles["p95"] <= result.timing_percentiles["max"]
+        assert result.calibre_version == "7.0.0"
+        assert not converter.cache_enabled
+
+    @pytest.mark.skipif(
+        not os.path.isdir("/proc/self"), reason="Child memory is read from /proc"
+    )
+    def test_peak_memory_of_concurrent_children(self, converter, corpus, tmp_path):
+        """Test that memory of concurrent children is summed per run."""
+        hold_memory = (
+            "import time; data = bytearray(40 * 1024 * 1024); "
+            "data[::4096] = b'x' * len(data[::4096]); time.sleep(0.5)"
+        )
+
+        def batch_with_children(files, output_dir=None, **kwargs):
+            children = [
+                subprocess.Popen([sys.executable, "-c", hold_memory]) for _ in range(2)
+            ]
+            for child in children:
+                child.wait()
+            return fake_batch(files, output_dir, **kwargs)
+
+        bench = ConversionBenchmark(converter)
+        with patch.object(converter, "convert_batch", side_effect=batch_with_children):
+            first = bench.run_benchmark(corpus, tmp_path / "one")
+        with patch.object(converter, "convert_batch", side_effect=fake_batch):
+            second = bench.run_benchmark(corpus, tmp_path / "two")
+
+        assert first.peak_memory_usage >= 80 * 1024 * 1024
+        assert second.peak_memory_usage == 0
+
+    def test_save_load_and_compare(self, converter, corpus, tmp_path):
+        """Test that saved runs are compared per configuration."""
+        bench = ConversionBenchmark(converter)
+        with patch.object(converter, "convert_batch", side_effect=fake_batch):
+            baseline = bench.run_matrix(corpus, workers=[1, 2], work_dir=tmp_path)
+        baseline[0].files_per_second = 1.0
+        baseline[0].peak_memory_usage = 100
+        bench.save_results(baseline, tmp_path / "baseline.json")
+
+        loaded = bench.load_results(tmp_path / "baseline.json")
+        optimized = [
+            type(r)(**{**vars(r), "files_per_second": 2.0, "peak_memory_usage": 150})
+            for r in loaded[:1]
+        ]
+        comparisons = bench.compare_runs(loaded, optimized)
+
+        assert loaded == baseline
+        assert len(comparisons) == 1
+        assert comparisons[0].improvements["files_per_second"] == pytest.approx(100)
+        assert comparisons[0].regressions["peak_memory_usage"] == pytest.approx(50)
+
+    def test_kfx_requires_converter(self, converter, corpus, tmp_path):
+        """Test that KFX benchmarks need a KFXConverter."""
+        bench = ConversionBenchmark(converter)
+
+        with pytest.raises(ValueError, match="KFXConverter"):
+            bench.run_benchmark(corpus, tmp_path / "out", output_format="kfx")
+
+    def test_kfx_uses_requested_workers(self, converter, corpus, tmp_path):
+        """Test that KFX runs pass the worker count of the configuration."""
+        kfx_converter = Mock(_format_converter=converter)
+        kfx_converter.parallel_batch_convert.side_effect = (
+            lambda input_dir, output_dir, **kwargs: fake_batch(corpus, output_dir)
+        )
+        bench = ConversionBenchmark(converter, kfx_converter=kfx_converter)
+
+        result = bench.run_benchmark(
+            corpus, tmp_path / "out", output_format="kfx", workers=3
+        )
+
+        assert kfx_converter.parallel_batch_convert.call_args.kwargs["parallel"] == 3
+        assert (result.workers, result.file_count) == (3, 6)
+
+
+class TestBenchmarkCommand:
+    """Test book-tool benchmark convert."""
+
+    def test_dry_run(self):
+        """Test that a dry run only shows the plan."""
+        result = CliRunner().invoke(
+            main, ["--dry-run", "benchmark", "convert", "--workers", "1,8"]
+        )
+
+        assert result.exit_code == 0
+        assert "Workers: 1, 8" in result.output
+
+    def test_invalid_workers(self):
+        """Test that worker counts are validated."""
+        result = CliRunner().invoke(main, ["benchmark", "convert", "-w", "0"])
+
+        assert result.exit_code != 0
+        assert "positive" in result.output
+
+    def test_runs_and_saves_results(self, tmp_path):
+        """Test a benchmark run writing JSON results."""
+        output = tmp_path / "results.json"
+
+        with (
+            patch.object(FormatConverter, "convert_batch", side_effect=fake_batch),
+            patch.object(FormatConverter, "calibre_version", return_value=None),
+        ):
+            result = CliRunner().invoke(
+                main,
+                [
+                    "benchmark",
+                    "convert",
+                    "-n",
+                    "1",
+                    "--size-kb",
+                    "8",
+                    "-w",
+                    "2",
+                    "-o",
+                    str(output),
+                ],
+            )
+
+        assert result.exit_code == 0, result.output
+        assert "Conversion Benchmark (3 files)" in result.output
+        assert output.exists()
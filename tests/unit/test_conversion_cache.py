@@ -0,0 +1,181 @@
+"""
+Unit tests for the content-addressed conversion cache.
+
+Tests cache keys, storing and placing outputs, eviction and the cache
+lookup in FormatConverter.convert_single.
+"""
+
+import subprocess
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from calibre_books.config.manager import ConfigManager
+from calibre_books.core.conversion_cache import ConversionCache, normalize_options
+from calibre_books.core.converter import FormatConverter
+from calibre_books.utils.files import file_digest
+
+
+def command(input_file, output_file, *options):
+    """Build an ebook-convert command."""
+    return ["ebook-convert", str(input_file), str(output_file), *options]
+
+
+class TestCacheKey:
+    """Test what identifies a conversion."""
+
+    def test_normalize_options(self):
+        """Test that paths are dropped and repeated flags collapse."""
+        cmd = command(
+            "a.epub",
+            "a.mobi",
+            "--preserve-cover-aspect-ratio",
+            "--jpeg-quality",
+            "60",
+            "--preserve-cover-aspect-ratio",
+        )
+
+        assert normalize_options(cmd) == [
+            ("--jpeg-quality", "60"),
+            ("--preserve-cover-aspect-ratio", ""),
+        ]
+
+    def test_key_ignores_names_and_directories(self, tmp_path):
+        """Test that a renamed input in another directory has the same key."""
+        first = tmp_path / "first.epub"
+        second = tmp_path / "moved" / "renamed.epub"
+        second.parent.mkdir()
+        first.write_bytes(b"same content")
+        second.write_bytes(b"same content")
+
+        key = ConversionCache.key(
+            first, "mobi", command(first, tmp_path / "out/first.mobi"), "7.0"
+        )
+
+        assert key == ConversionCache.key(
+            second, "mobi", command(second, tmp_path / "x/renamed.mobi"), "7.0"
+        )
+
+    def test_key_changes_with_options_and_version(self, tmp_path):
+        """Test that options, output type and Calibre version matter."""
+        source = tmp_path / "book.epub"
+        source.write_bytes(b"content")
+        out = tmp_path / "book.mobi"
+        key = ConversionCache.key(source, "mobi", command(source, out), "7.0")
+
+        assert key != ConversionCache.key(
+            source, "mobi", command(source, out, "--compress-images"), "7.0"
+        )
+        assert key != ConversionCache.key(source, "mobi", command(source, out), "7.1")
+        assert key != ConversionCache.key(
+            source, "azw3", command(source, tmp_path / "book.azw3"), "7.0"
+        )
+
+
+class TestConversionCache:
+    """Test storing and placing outputs."""
+
+    def test_store_and_fetch(self, tmp_path):
+        """Test that a stored output is placed at a new target."""
+        cache = ConversionCache(tmp_path / "cache")
+        output = tmp_path / "out.mobi"
+        output.write_bytes(b"converted")
+
+        assert cache.fetch("key", tmp_path / "target.mobi") is None
+        cache.store("key", output)
+        output.write_bytes(b"changed by the user")
+
+        target = tmp_path / "elsewhere" / "target.mobi"
+        method = cache.fetch("key", target)
+
+        assert method in ("reflink", "hardlink", "copy")
+        assert target.read_bytes() == b"converted"
+        obj = cache._object_path(file_digest(target))
+        assert not obj.stat().st_mode & 0o222
+
+    def test_missing_object_is_a_miss(self, tmp_path):
+        """Test that a removed object does not produce a broken target."""
+        cache = ConversionCache(tmp_path / "cache")
+        output = tmp_path / "out.mobi"
+        output.write_bytes(b"converted")
+        cache.store("key", output)
+        obj = cache._object_path(file_digest(output))
+        obj.chmod(0o644)
+        obj.unlink()
+
+        assert cache.fetch("key", tmp_path / "target.mobi") is None
+        assert not (tmp_path / "target.mobi").exists()
+
+    def test_prune_evicts_least_recently_used(self, tmp_path):
+        """Test eviction once the store exceeds its size limit."""
+        cache = ConversionCache(tmp_path / "cache", max_size=25)
+        for name in ("old", "new"):
+            output = tmp_path / f"{name}.mobi"
+            output.write_bytes(name.encode() * 5)
+            cache.store(name, output)
+
+        assert cache.fetch("old", tmp_path / "a.mobi") is None
+        assert cache.fetch("new", tmp_path / "b.mobi") is not None
+
+
+class TestConvertSingleCache:
+    """Test the cache lookup of convert_single."""
+
+    @pytest.fixture
+    def converter(self, tmp_path):
+        """Create a FormatConverter with a temporary cache."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_conversion_config.return_value = {
+            "output_path": str(tmp_path / "out"),
+            "cache_path": str(tmp_path / "cache"),
+        }
+        converter = FormatConverter(config_manager)
+        converter.calibre_version = Mock(return_value="7.0")
+        return converter
+
+    def test_renamed_input_reuses_conversion(self, converter, tmp_path):
+        """Test that converting a renamed copy does not run ebook-convert."""
+        first = tmp_path / "first.epub"
+        first.write_bytes(b"epub content")
+
+        def run(cmd, limits, timeout, **kwargs):
+            Path(cmd[2]).write_bytes(b"mobi content")
+            return subprocess.CompletedProcess(cmd, 0, "", "")
+
+        with patch(
+            "calibre_books.core.converter.run_limited", side_effect=run
+        ) as mock_run:
+            converted = converter.convert_single(
+                first, tmp_path / "out" / "first.mobi", output_format="mobi"
+            )
+            renamed = tmp_path / "library" / "renamed.epub"
+            renamed.parent.mkdir()
+            first.rename(renamed)
+            reused = converter.convert_single(
+                renamed, tmp_path / "other" / "renamed.mobi", output_format="mobi"
+            )
+            changed = converter.convert_single(
+                renamed,
+                tmp_path / "low" / "renamed.mobi",
+                output_format="mobi",
+                quality="low",
+            )
+
+        assert converted.success and not converted.from_cache
+        assert reused.success and reused.from_cache
+        assert (tmp_path / "other" / "renamed.mobi").read_bytes() == b"mobi content"
+        assert not changed.from_cache
+        assert mock_run.call_count == 2
+
+    def test_unknown_calibre_version_bypasses_cache(self, converter, tmp_path):
+        """Test that nothing is cached without a Calibre version."""
+        converter.calibre_version.return_value = None
+        source = tmp_path / "book.epub"
+        source.write_bytes(b"content")
+
+        key = converter._conversion_cache_key(
+            source, "mobi", command(source, tmp_path / "book.mobi")
+        )
+
+        assert key is None
@@ -0,0 +1,209 @@
+"""
+Unit tests for the conversion cost model.
+
+Tests image introspection, predictions from the built-in rates,
+calibration from journal timings and cost based scheduling.
+"""
+
+import sqlite3
+from unittest.mock import Mock, patch
+
+import pytest
+
+from calibre_books.config.manager import ConfigManager
+from calibre_books.core.book import BookFormat, ConversionResult
+from calibre_books.core.conversion_benchmark import CorpusSpec, generate_corpus
+from calibre_books.core.conversion_cost import ConversionCostModel, count_images
+from calibre_books.core.conversion_journal import ConversionJournal
+from calibre_books.core.conversion_scheduler import ConversionJob
+from calibre_books.core.converter import FormatConverter
+
+
+def make_job(tmp_path, name, size, output_format="mobi"):
+    """Create an input file of ``size`` bytes and a job converting it."""
+    input_file = tmp_path / name
+    input_file.write_bytes(b"x" * size)
+    return ConversionJob(
+        input_file,
+        tmp_path / "out" / f"{input_file.stem}.{output_format}",
+        output_format,
+    )
+
+
+def result_for(job, seconds, success=True, from_cache=False):
+    """Create a conversion result for a job."""
+    return ConversionResult(
+        input_file=job.input_file,
+        output_file=job.output_file,
+        input_format=BookFormat.EPUB,
+        output_format=BookFormat.MOBI,
+        success=success,
+        conversion_time=seconds,
+        from_cache=from_cache,
+    )
+
+
+class TestImageCount:
+    """Test cheap image introspection."""
+
+    @pytest.mark.parametrize("fmt", ["epub", "mobi"])
+    def test_counts_images(self, tmp_path, fmt):
+        """Test that images are counted from the container headers."""
+        files = generate_corpus(
+            tmp_path,
+            CorpusSpec(
+                formats=[fmt], files_per_format=1, size_kb=256, image_density=0.75
+            ),
+        )
+
+        assert count_images(files[0]) == 6
+
+    def test_unreadable_files_have_no_images(self, tmp_path):
+        """Test that broken and unsupported files count as image free."""
+        broken = tmp_path / "broken.epub"
+        broken.write_bytes(b"not a zip")
+        pdf = tmp_path / "book.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+
+        assert count_images(broken) == 0
+        assert count_images(pdf) == 0
+
+
+class TestConversionCostModel:
+    """Test predictions and learning."""
+
+    def test_prior_depends_on_formats_and_images(self):
+        """Test that the built-in rates weigh formats, size and images."""
+        mb = 1024 * 1024
+        epub = ConversionCostModel.prior("epub", "mobi", 20 * mb, 0)
+
+        assert ConversionCostModel.prior("pdf", "mobi", 20 * mb, 0) > epub
+        assert ConversionCostModel.prior("epub", "kfx", 20 * mb, 0) > epub
+        assert ConversionCostModel.prior("epub", "mobi", 20 * mb, 200) > epub
+
+    def test_learns_from_journal_timings(self, tmp_path):
+        """Test that finished job timings calibrate the format pair."""
+        journal = ConversionJournal(tmp_path / "journal.db")
+        job = make_job(tmp_path, "book.epub", 1024)
+        journal.plan([job])
+        journal.mark_done(job, duration=3 * ConversionCostModel().predict(job))
+        model = ConversionCostModel()
+
+        model.learn(journal.timings())
+
+        assert model.scale("epub", "mobi") == pytest.approx(3.0)
+        assert model.scale("pdf", "mobi") == 1.0
+
+    def test_observe_ignores_cached_and_failed(self, tmp_path):
+        """Test that only real conversions are learned from."""
+        model = ConversionCostModel()
+        job = make_job(tmp_path, "book.epub", 1024)
+        expected = model.predict(job)
+
+        model.observe(job, result_for(job, 10 * expected, from_cache=True))
+        model.observe(job, result_for(job, 10 * expected, success=False))
+        assert model.scale("epub", "mobi") == 1.0
+
+        model.observe(job, result_for(job, 2 * expected))
+        assert model.predict(job) == pytest.approx(2 * expected)
+
+    def test_summary(self, tmp_path):
+        """Test the predicted vs actual time of a batch."""
+        model = ConversionCostModel()
+        first = make_job(tmp_path, "a.epub", 10)
+        second = make_job(tmp_path, "b.epub", 10)
+        predictions = {first.output_file: 10.0, second.output_file: 10.0}
+
+        summary = model.summary(
+            predictions, [result_for(first, 8.0), result_for(second, 12.0)]
+        )
+
+        assert summary == (
+            "Predicted 20.0s of conversion time, took 20.0s (mean error per job 21%)"
+        )
+        assert (
+            model.summary(predictions, [result_for(first, 1.0, from_cache=True)])
+            is None
+        )
+
+
+class TestJournalTimings:
+    """Test timings recorded in the conversion journal."""
+
+    def test_migrates_old_journal(self, tmp_path):
+        """Test that journals without timing columns are upgraded."""
+        db_path = tmp_path / "journal.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            """
+            CREATE TABLE jobs (
+                output_path TEXT PRIMARY KEY,
+                input_path TEXT NOT NULL,
+                input_hash TEXT,
+                output_format TEXT NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+        """
+        )
+        conn.close()
+
+        journal = ConversionJournal(db_path)
+        job = make_job(tmp_path, "book.epub", 2048)
+        job.image_count = 4
+        journal.plan([job])
+        journal.mark_done(job, duration=5.0)
+
+        (row,) = journal.timings()
+        assert (row["input_size"], row["image_count"], row["duration"]) == (
+            2048,
+            4,
+            5.0,
+        )
+
+    def test_cached_results_record_no_duration(self, tmp_path):
+        """Test that cache hits do not pollute the timings."""
+        journal = ConversionJournal(tmp_path / "journal.db")
+        job = make_job(tmp_path, "book.epub", 10)
+        journal.plan([job])
+
+        journal.run(job, lambda job: result_for(job, 0.5, from_cache=True))
+
+        assert journal.timings() == []
+
+
+class TestCostScheduling:
+    """Test that batches run longest expected first."""
+
+    def test_batch_order_and_summary(self, tmp_path):
+        """Test that a slow format starts before a larger fast one."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_conversion_config.return_value = {
+            "max_parallel": 1,
+            "cache_enabled": False,
+        }
+        converter = FormatConverter(config_manager)
+        files = [
+            make_job(tmp_path, "large.epub", 300_000).input_file,
+            make_job(tmp_path, "small.pdf", 200_000).input_file,
+        ]
+        order = []
+
+        def convert(job, progress_callback=None):
+            order.append(job.input_file.name)
+            return result_for(job, 1.0)
+
+        with (
+            patch.object(converter, "_convert_job", side_effect=convert),
+            patch.object(converter.logger, "info") as info,
+        ):
+            converter.convert_batch(files, tmp_path / "out", output_format="mobi")
+
+        assert order == ["small.pdf", "large.epub"]
+        logged = [c.args[0] for c in info.call_args_list]
+        assert any("Predicted" in line and "took 2.0s" in line for line in logged)
+        # The next batch starts from the timings of this one
+        assert converter.cost_model.scale("pdf", "mobi") < 1.0
@@ -0,0 +1,233 @@
+"""
+Unit tests for the conversion job journal.
+
+Tests job planning for fresh and resumed batches, retries with backoff,
+atomic output writes and resuming FormatConverter.convert_batch.
+"""
+
+import subprocess
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from calibre_books.config.manager import ConfigManager
+from calibre_books.core.book import BookFormat, ConversionResult
+from calibre_books.core.conversion_journal import ConversionJournal, JobState
+from calibre_books.core.conversion_scheduler import ConversionJob
+from calibre_books.core.converter import FormatConverter
+from calibre_books.utils.files import partial_output_path
+
+
+def make_job(tmp_path, name, content=b"book"):
+    """Create an input file and a job converting it."""
+    input_file = tmp_path / f"{name}.epub"
+    input_file.write_bytes(content)
+    return ConversionJob(input_file, tmp_path / "out" / f"{name}.mobi", "mobi")
+
+
+def result_for(job, success=True):
+    """Create a conversion result for a job."""
+    return ConversionResult(
+        input_file=job.input_file,
+        output_file=job.output_file,
+        input_format=BookFormat.EPUB,
+        output_format=BookFormat.MOBI,
+        success=success,
+        error=None if success else "conversion failed",
+    )
+
+
+def finish(job):
+    """Write a job's output and report success."""
+    job.output_file.parent.mkdir(parents=True, exist_ok=True)
+    job.output_file.write_bytes(b"converted")
+    return result_for(job)
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """Create a journal without retry delays."""
+    return ConversionJournal(tmp_path / "journal.db", retry_backoff=0)
+
+
+class TestPlan:
+    """Test which jobs of a batch run."""
+
+    def test_partial_output_path_keeps_extension(self):
+        """Test that ebook-convert still sees the output format."""
+        partial = partial_output_path(Path("/books/Title.azw3"))
+
+        assert partial == Path("/books/.Title.partial.azw3")
+
+    def test_fresh_batch_skips_existing_outputs(self, journal, tmp_path):
+        """Test that a batch without resume only converts missing outputs."""
+        done, todo = make_job(tmp_path, "done"), make_job(tmp_path, "todo")
+        finish(done)
+
+        assert journal.plan([done, todo]) == [todo]
+        assert journal.counts() == {JobState.QUEUED.value: 1}
+
+    def test_resume_skips_finished_jobs(self, journal, tmp_path):
+        """Test that finished jobs with unchanged input are not converted."""
+        job = make_job(tmp_path, "book")
+        journal.plan([job])
+        journal.run(job, finish)
+
+        assert journal.plan([job], resume=True) == []
+
+    def test_resume_reconverts_changed_input(self, journal, tmp_path):
+        """Test that a changed input invalidates a finished job."""
+        job = make_job(tmp_path, "book")
+        journal.plan([job])
+        journal.run(job, finish)
+        job.input_file.write_bytes(b"new edition")
+
+        assert journal.plan([job], resume=True) == [job]
+
+    def test_resume_restarts_interrupted_jobs(self, journal, tmp_path):
+        """Test that a job running during a crash runs again from scratch."""
+        job = make_job(tmp_path, "book")
+        journal.plan([job])
+        journal.mark_running(job)
+        partial = partial_output_path(job.output_file)
+        partial.parent.mkdir(parents=True)
+        partial.write_bytes(b"half written")
+
+        assert journal.plan([job], resume=True) == [job]
+        assert not partial.exists()
+
+    def test_resume_gives_up_after_max_attempts(self, tmp_path):
+        """Test that jobs without attempts left are skipped."""
+        journal = ConversionJournal(
+            tmp_path / "journal.db", max_attempts=2, retry_backoff=0
+        )
+        job = make_job(tmp_path, "book")
+        journal.plan([job])
+        journal.run(job, lambda job: result_for(job, success=False))
+
+        assert journal.plan([job], resume=True) == [job]
+        journal.run(job, lambda job: result_for(job, success=False))
+        assert journal.plan([job], resume=True) == []
+
+
+class TestRun:
+    """Test running journaled jobs."""
+
+    def test_retry_until_success(self, journal, tmp_path):
+        """Test that failed attempts are retried while attempts are left."""
+        job = make_job(tmp_path, "book")
+        journal.plan([job])
+        convert = Mock(side_effect=[result_for(job, success=False), result_for(job)])
+
+        result = journal.run(job, convert, retry=True)
+
+        assert result.success
+        assert convert.call_count == 2
+        assert journal.counts() == {JobState.DONE.value: 1}
+
+    def test_no_retry_without_resume(self, journal, tmp_path):
+        """Test that a fresh batch attempts each job once."""
+        job = make_job(tmp_path, "book")
+        journal.plan([job])
+        convert = Mock(return_value=result_for(job, success=False))
+
+        assert not journal.run(job, convert).success
+        convert.assert_called_once()
+
+    def test_backoff_defers_retry(self, tmp_path):
+        """Test that a backed off job is deferred to a later run, not waited for."""
+        journal = ConversionJournal(tmp_path / "journal.db", retry_backoff=5)
+        job = make_job(tmp_path, "book")
+        journal.plan([job])
+        convert = Mock(side_effect=[result_for(job, success=False), result_for(job)])
+
+        with patch("calibre_books.core.conversion_journal.time.sleep") as sleep:
+            assert not journal.run(job, convert, retry=True).success
+
+        sleep.assert_not_called()
+        convert.assert_called_once()
+        assert journal.plan([job], resume=True) == []
+        later = time.time() + 6
+        with patch(
+            "calibre_books.core.conversion_journal.time.time", return_value=later
+        ):
+            assert journal.plan([job], resume=True) == [job]
+
+
+class TestConverterJournal:
+    """Test journaled FormatConverter conversions."""
+
+    @pytest.fixture
+    def converter(self, tmp_path):
+        """Create a FormatConverter without retry delays."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_conversion_config.return_value = {
+            "output_path": str(tmp_path / "out"),
+            "cache_enabled": False,
+            "retry_backoff": 0,
+        }
+        return FormatConverter(config_manager)
+
+    def test_failed_conversion_leaves_no_output(self, converter, tmp_path):
+        """Test that a crashed ebook-convert does not leave a truncated file."""
+        source = tmp_path / "book.epub"
+        source.write_bytes(b"epub")
+        output = tmp_path / "out" / "book.mobi"
+
+        def run(cmd, limits, timeout, **kwargs):
+            Path(cmd[2]).write_bytes(b"trunc")
+            raise subprocess.TimeoutExpired(cmd, timeout)
+
+        with patch("calibre_books.core.converter.run_limited", side_effect=run):
+            result = converter.convert_single(source, output, output_format="mobi")
+
+        assert not result.success
+        assert list(output.parent.iterdir()) == []
+
+    def test_resume_converts_only_failed_books(self, converter, tmp_path):
+        """Test that resuming a batch retries exactly the failed books."""
+        files = []
+        for name in ("good", "flaky"):
+            path = tmp_path / f"{name}.epub"
+            path.write_bytes(name.encode())
+            files.append(path)
+        attempts = []
+
+        def convert_single(input_file, output_file, **kwargs):
+            attempts.append(input_file.name)
+            if input_file.name == "flaky.epub" and len(attempts) <= 2:
+                return ConversionResult(
+                    input_file=input_file,
+                    output_file=output_file,
+                    input_format=BookFormat.EPUB,
+                    output_format=BookFormat.MOBI,
+                    success=False,
+                    error="ebook-convert crashed",
+                )
+            output_file.write_bytes(b"converted")
+            return ConversionResult(
+                input_file=input_file,
+                output_file=output_file,
+                input_format=BookFormat.EPUB,
+                output_format=BookFormat.MOBI,
+                success=True,
+            )
+
+        with patch.object(converter, "convert_single", side_effect=convert_single):
+            first = converter.convert_batch(
+                files, output_dir=tmp_path / "out", output_format="mobi", parallel=1
+            )
+            resumed = converter.convert_batch(
+                files,
+                output_dir=tmp_path / "out",
+                output_format="mobi",
+                parallel=1,
+                resume=True,
+            )
+
+        assert sum(r.success for r in first) == 1
+        assert [r.input_file.name for r in resumed] == ["flaky.epub"]
+        assert resumed[0].success
+        assert sorted(attempts) == ["flaky.epub"] * 2 + ["good.epub"]
@@ -0,0 +1,303 @@
+"""
+Unit tests for conversion scheduling.
+
+Tests resource limits of conversion child processes, concurrency sizing,
+the largest-first job order and the progress reporting of the batch
+converters.
+"""
+
+import subprocess
+import sys
+from unittest.mock import Mock, patch
+
+import pytest
+
+from calibre_books.config.manager import ConfigManager
+from calibre_books.core.book import BookFormat, ConversionResult
+from calibre_books.core.conversion_scheduler import (
+    RESOURCE_LIMITS_AVAILABLE,
+    ConversionJob,
+    ConversionScheduler,
+    ResourceLimits,
+    default_concurrency,
+    parse_progress_line,
+    run_limited,
+)
+from calibre_books.core.converter import FormatConverter
+
+GiB = 1024 * 1024 * 1024
+
+
+def make_jobs(tmp_path, sizes):
+    """Create input files of the given sizes and a job for each."""
+    jobs = []
+    for i, size in enumerate(sizes):
+        input_file = tmp_path / f"book{i}.epub"
+        input_file.write_bytes(b"x" * size)
+        jobs.append(ConversionJob(input_file, tmp_path / f"book{i}.mobi", "mobi"))
+    return jobs
+
+
+class TestResourceLimits:
+    """Test per-job resource limits."""
+
+    def test_from_config(self):
+        """Test that 0 disables a limit."""
+        limits = ResourceLimits.from_config(
+            {"job_memory_mb": 0, "job_cpu_seconds": 60, "job_nice": 5}
+        )
+
+        assert limits.memory_bytes is None
+        assert limits.cpu_seconds == 60
+        assert limits.nice == 5
+
+    @pytest.mark.skipif(
+        not RESOURCE_LIMITS_AVAILABLE, reason="resource limits not supported"
+    )
+    def test_limits_applied_to_child(self):
+        """Test that the child runs with the CPU limit and niceness."""
+        result = run_limited(
+            [
+                sys.executable,
+                "-c",
+                "import os, resource; "
+                "print(resource.getrlimit(resource.RLIMIT_CPU)[0], os.nice(0))",
+            ],
+            ResourceLimits(memory_bytes=None, cpu_seconds=120, nice=3),
+        )
+
+        cpu_limit, niceness = result.stdout.split()
+        assert result.returncode == 0
+        assert int(cpu_limit) == 120
+        assert int(niceness) >= 3
+
+    def test_timeout_kills_child(self):
+        """Test that a runaway conversion is stopped."""
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_limited(
+                [sys.executable, "-c", "import time; time.sleep(30)"], timeout=0.5
+            )
+
+
+class TestStreamedOutput:
+    """Test streaming of conversion output."""
+
+    def test_parse_progress_line(self):
+        """Test that ebook-convert percentage lines are recognised."""
+        assert parse_progress_line("34% Running transforms on e-book...\n") == (
+            0.34,
+            "Running transforms on e-book...",
+        )
+        assert parse_progress_line("Output saved to book.mobi") is None
+
+    def test_progress_and_bounded_tail(self):
+        """Test that progress is reported and only the log tail is kept."""
+        script = (
+            "import sys\n"
+            "for i in range(5000):\n"
+            "    print('log line', i)\n"
+            "    if i % 1000 == 0:\n"
+            "        print(f'{i // 50}% Converting')\n"
+            "print('fatal: bad input', file=sys.stderr)\n"
+            "sys.exit(1)\n"
+        )
+        progress = []
+
+        result = run_limited(
+            [sys.executable, "-c", script],
+            progress_callback=lambda fraction, msg: progress.append((fraction, msg)),
+            tail_lines=10,
+        )
+
+        assert result.returncode == 1
+        assert progress == [(i / 100, "Converting") for i in (0, 20, 40, 60, 80)]
+        assert result.stdout.splitlines()[-1] == "log line 4999"
+        assert len(result.stdout.splitlines()) == 10
+        assert result.stderr.strip() == "fatal: bad input"
+
+    def test_convert_single_reports_progress(self, tmp_path, monkeypatch):
+        """Test that convert_single forwards ebook-convert progress."""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        fake = bin_dir / "ebook-convert"
+        fake.write_text(
+            f"#!{sys.executable}\n"
+            "import sys\n"
+            "if sys.argv[1] == '--version':\n"
+            "    sys.exit(1)\n"
+            "print('1% Converting input to HTML...')\n"
+            "print('67% Creating MOBI Output...')\n"
+            "open(sys.argv[2], 'w').write('mobi')\n"
+        )
+        fake.chmod(0o755)
+        monkeypatch.setenv("PATH", str(bin_dir))
+        source = tmp_path / "book.epub"
+        source.write_bytes(b"epub")
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_conversion_config.return_value = {}
+        progress = []
+
+        result = FormatConverter(config_manager).convert_single(
+            source,
+            tmp_path / "book.mobi",
+            output_format="mobi",
+            progress_callback=lambda fraction, msg: progress.append(fraction),
+        )
+
+        assert result.success
+        assert progress == [0.01, 0.67, 1.0]
+
+
+class TestConcurrency:
+    """Test concurrency sizing from cores and memory."""
+
+    @patch("calibre_books.core.conversion_scheduler.usable_cpus", return_value=8)
+    @patch(
+        "calibre_books.core.conversion_scheduler.available_memory",
+        return_value=10 * GiB,
+    )
+    def test_memory_bound(self, mock_memory, mock_cpus):
+        """Test that concurrency leaves every job its expected memory."""
+        assert default_concurrency(4 * GiB) == 2
+        assert default_concurrency() == 8
+        assert default_concurrency(None) == 8
+
+    @patch("calibre_books.core.conversion_scheduler.usable_cpus", return_value=4)
+    @patch("calibre_books.core.conversion_scheduler.available_memory", return_value=GiB)
+    def test_at_least_one(self, mock_memory, mock_cpus):
+        """Test that a low memory machine still converts."""
+        assert default_concurrency(4 * GiB) == 1
+
+
+class TestConversionScheduler:
+    """Test job ordering and execution."""
+
+    def test_order_largest_first(self, tmp_path):
+        """Test that larger inputs are scheduled first, ties in input order."""
+        jobs = make_jobs(tmp_path, [10, 300, 20, 300])
+
+        ordered = ConversionScheduler(2).order(jobs)
+
+        assert [job.input_file.name for job in ordered] == [
+            "book1.epub",
+            "book3.epub",
+            "book2.epub",
+            "book0.epub",
+        ]
+
+    def test_run_yields_every_job(self, tmp_path):
+        """Test that results and exceptions are returned per job."""
+        jobs = make_jobs(tmp_path, [10, 20, 30])
+
+        def convert(job):
+            if job.input_size == 20:
+                raise RuntimeError("boom")
+            return job.input_size
+
+        outcomes = {}
+        for job, future in ConversionScheduler(2).run(jobs, convert):
+            outcomes[job.input_size] = future.exception() or future.result()
+
+        assert outcomes[10] == 10
+        assert outcomes[30] == 30
+        assert isinstance(outcomes[20], RuntimeError)
+
+
+class TestBatchScheduling:
+    """Test that batch conversion uses the scheduler."""
+
+    @pytest.fixture
+    def converter(self, tmp_path):
+        """Create a FormatConverter."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_conversion_config.return_value = {
+            "max_parallel": 4,
+            "output_path": str(tmp_path / "out"),
+            "job_nice": 0,
+        }
+        return FormatConverter(config_manager)
+
+    def test_convert_batch_largest_first(self, converter, tmp_path):
+        """Test that a single worker converts the largest file first."""
+        sizes = [10, 500, 50]
+        files = []
+        for i, size in enumerate(sizes):
+            path = tmp_path / f"in{i}.epub"
+            path.write_bytes(b"x" * size)
+            files.append(path)
+        started = []
+
+        def convert_single(input_file, output_file, **kwargs):
+            started.append(input_file.name)
+            return ConversionResult(
+                input_file=input_file,
+                output_file=output_file,
+                input_format=BookFormat.EPUB,
+                output_format=BookFormat.MOBI,
+                success=True,
+            )
+
+        with patch.object(converter, "convert_single", side_effect=convert_single):
+            results = converter.convert_batch(
+                files, output_dir=tmp_path / "out", output_format="mobi", parallel=1
+            )
+
+        assert started == ["in1.epub", "in2.epub", "in0.epub"]
+        assert len(results) == 3
+
+    def test_convert_batch_reports_file_progress(
+        self, converter, tmp_path, monkeypatch
+    ):
+        """Test that ebook-convert progress advances the batch progress."""
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        fake = bin_dir / "ebook-convert"
+        fake.write_text(
+            f"#!{sys.executable}\n"
+            "import sys\n"
+            "if sys.argv[1] == '--version':\n"
+            "    sys.exit(1)\n"
+            "print('50% Creating MOBI Output...')\n"
+            "open(sys.argv[2], 'w').write('mobi')\n"
+        )
+        fake.chmod(0o755)
+        monkeypatch.setenv("PATH", str(bin_dir))
+        files = []
+        for i, size in enumerate([500, 10]):
+            path = tmp_path / f"in{i}.epub"
+            path.write_bytes(b"x" * size)
+            files.append(path)
+        progress = []
+
+        results = converter.convert_batch(
+            files,
+            output_dir=tmp_path / "out",
+            output_format="mobi",
+            parallel=1,
+            progress_callback=lambda fraction, msg: progress.append((fraction, msg)),
+        )
+
+        assert all(result.success for result in results)
+        assert [fraction for fraction, _ in progress] == [
+            0.25,
+            0.5,
+            0.5,
+            0.75,
+            1.0,
+            1.0,
+        ]
+        assert progress[0][1] == "in0.epub: Creating MOBI Output..."
+
+    @patch("calibre_books.core.converter.default_concurrency", return_value=2)
+    def test_default_parallel_limited_by_resources(self, mock_concurrency, converter):
+        """Test that the default is capped by config and machine resources."""
+        assert converter.effective_parallel() == 2
+        mock_concurrency.assert_called_with(1024 * 1024 * 1024)
+        mock_concurrency.return_value = 16
+        assert converter.effective_parallel() == 4
+
+    @patch("calibre_books.core.converter.default_concurrency", return_value=2)
+    def test_explicit_parallel_is_respected(self, mock_concurrency, converter, caplog):
+        """Test that a requested worker count is used, with a warning."""
+        assert converter.effective_parallel(8) == 8
+        assert "only expected to hold 2" in caplog.text
@@ -0,0 +1,165 @@
+"""
+Unit tests for the download ledger.
+
+Tests that downloads are skipped across runs, verified before they count
+as done, resumed after interruptions and deduplicated by content.
+"""
+
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from calibre_books.core.download_ledger import DownloadLedger, DownloadState
+from calibre_books.core.downloader import BookDownloader
+from calibre_books.utils.files import partial_output_path
+
+# A minimal MOBI file with the BOOKMOBI signature
+MOBI_BOOK = b"\x00" * 60 + b"BOOKMOBI" + b"\x00" * 956
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    """Create a BookDownloader without a librarian installation."""
+    with patch.object(BookDownloader, "_validate_configuration"):
+        return BookDownloader({"download_path": str(tmp_path / "downloads")})
+
+
+def librarian(content=MOBI_BOOK):
+    """Fake librarian download writing ``content`` into the working directory."""
+
+    def download(cmd, cwd, **kwargs):
+        (Path(cwd) / cmd[3]).write_bytes(content)
+        return Mock(returncode=0, stdout="", stderr="")
+
+    return Mock(side_effect=download)
+
+
+def book(hash_id="hash1", title="Test Book"):
+    """Create a search result."""
+    return {"title": title, "author": "Author", "hash": hash_id}
+
+
+class TestDownloadLedger:
+    """Test downloads recorded in the ledger."""
+
+    def test_skips_finished_downloads_across_runs(self, downloader, tmp_path):
+        """Test that a finished book is not downloaded again."""
+        target = tmp_path / "downloads"
+        run = librarian()
+
+        with patch("subprocess.run", run):
+            first = downloader._download_single_book(book(), target, "mobi")
+            second = downloader._download_single_book(book(), target, "mobi")
+
+        assert first.success and second.success
+        assert second.filepath == first.filepath
+        assert run.call_count == 1
+        row = DownloadLedger.for_download_dir(target).get("hash1")
+        assert row["state"] == DownloadState.DONE.value
+        assert row["size"] == len(MOBI_BOOK)
+
+    def test_changed_file_is_downloaded_again(self, downloader, tmp_path):
+        """Test that a file modified after its download does not count."""
+        target = tmp_path / "downloads"
+        run = librarian()
+
+        with patch("subprocess.run", run):
+            first = downloader._download_single_book(book(), target, "mobi")
+            first.filepath.write_bytes(b"truncated")
+            downloader._download_single_book(book(), target, "mobi")
+
+        assert run.call_count == 2
+        assert first.filepath.read_bytes() == MOBI_BOOK
+
+    def test_invalid_download_fails(self, downloader, tmp_path):
+        """Test that files failing the magic-byte check are discarded."""
+        target = tmp_path / "downloads"
+
+        with patch("subprocess.run", librarian(b"<html>Not found</html>")):
+            result = downloader._download_single_book(book(), target, "mobi")
+
+        assert not result.success
+        assert "failed validation" in result.error
+        assert not (target / "Test_Book.mobi").exists()
+        assert not partial_output_path(target / "Test_Book.mobi").exists()
+        row = DownloadLedger.for_download_dir(target).get("hash1")
+        assert (row["state"], row["attempts"]) == (DownloadState.FAILED.value, 1)
+
+    def test_resumes_interrupted_download(self, downloader, tmp_path):
+        """Test that a complete partial file of an interrupted run is kept."""
+        target = tmp_path / "downloads"
+        final = target / "Test_Book.mobi"
+        ledger = DownloadLedger.for_download_dir(target)
+        ledger.mark_downloading("hash1", "Test Book", "Author", "mobi", final)
+        partial_output_path(final).write_bytes(MOBI_BOOK)
+        run = librarian()
+
+        with patch("subprocess.run", run):
+            result = downloader._download_single_book(book(), target, "mobi")
+
+        assert result.success
+        assert result.filepath == final
+        run.assert_not_called()
+
+    def test_restarts_incomplete_download(self, downloader, tmp_path):
+        """Test that an unusable partial file is downloaded again."""
+        target = tmp_path / "downloads"
+        final = target / "Test_Book.mobi"
+        ledger = DownloadLedger.for_download_dir(target)
+        ledger.mark_downloading("hash1", "Test Book", "Author", "mobi", final)
+        partial_output_path(final).write_bytes(b"%PDF-1.4 truncated")
+        run = librarian()
+
+        with patch("subprocess.run", run):
+            result = downloader._download_single_book(book(), target, "mobi")
+
+        assert result.success
+        assert run.call_count == 1
+        assert final.read_bytes() == MOBI_BOOK
+
+    def test_same_content_is_kept_once(self, downloader, tmp_path):
+        """Test that different hashes with identical files share one file."""
+        target = tmp_path / "downloads"
+
+        with patch("subprocess.run", librarian()):
+            first = downloader._download_single_book(book(), target, "mobi")
+            second = downloader._download_single_book(
+                book("hash2", "Other Title"), target, "mobi"
+            )
+
+        assert second.success
+        assert second.filepath == first.filepath
+        assert not (target / "Other_Title.mobi").exists()
+        assert DownloadLedger.for_download_dir(target).counts() == {
+            DownloadState.DONE.value: 2
+        }
+
+    def test_same_title_gets_distinct_files(self, downloader, tmp_path):
+        """Test that books sharing a title never replace each other's file."""
+        target = tmp_path / "downloads"
+        other_book = MOBI_BOOK[:-1] + b"\x01"
+
+        with patch("subprocess.run", librarian()):
+            first = downloader._download_single_book(book(), target, "mobi")
+        with patch("subprocess.run", librarian(other_book)):
+            second = downloader._download_single_book(book("hash2"), target, "mobi")
+
+        assert first.filepath == target / "Test_Book.mobi"
+        assert second.filepath == target / "Test_Book_hash2.mobi"
+        assert first.filepath.read_bytes() == MOBI_BOOK
+        assert second.filepath.read_bytes() == other_book
+
+    def test_unknown_file_is_not_replaced(self, downloader, tmp_path):
+        """Test that a file the ledger does not know is kept."""
+        target = tmp_path / "downloads"
+        target.mkdir(exist_ok=True)
+        (target / "Test_Book.mobi").write_bytes(b"my own copy")
+
+        with patch("subprocess.run", librarian()):
+            result = downloader._download_single_book(
+                book("abcdef123456"), target, "mobi"
+            )
+
+        assert result.filepath == target / "Test_Book_abcdef12.mobi"
+        assert (target / "Test_Book.mobi").read_bytes() == b"my own copy"
@@ -2,8 +2,11 @@
 Unit tests for BookDownloader functionality.
 """
 
+import concurrent.futures
 import pytest
 import tempfile
+import threading
+import time
 import json
 import subprocess
 from pathlib import Path
@@ -15,6 +18,9 @@ from calibre_books.core.exceptions import (
     FormatError,
 )
 
+# A minimal MOBI file with the BOOKMOBI signature
+MOBI_BOOK = b"\x00" * 60 + b"BOOKMOBI" + b"\x00" * 956
+
 
 class TestDownloadResult:
     """Test DownloadResult dataclass."""
@@ -262,6 +268,58 @@ class TestBookDownloader:
                 assert len(progress_calls) >= 2
                 assert progress_calls[-1] == (1, 1)  # Final call
 
+    @patch("subprocess.run")
+    def test_download_books_parallel_per_host(self, mock_run, downloader):
+        """Test that downloads run in parallel within the per-host cap."""
+        downloader.max_parallel = 4
+        downloader.max_per_host = 1
+        hosts = ["a.example", "a.example", "b.example", "b.example"]
+        downloader._search_books = Mock(
+            return_value=[
+                {
+                    "title": f"Book {i}",
+                    "author": "Author",
+                    "format": "mobi",
+                    "hash": f"hash{i}",
+                    "url": f"https://{host}/book/{i}",
+                }
+                for i, host in enumerate(hosts)
+            ]
+        )
+        host_of = {f"hash{i}": host for i, host in enumerate(hosts)}
+        running = {"a.example": 0, "b.example": 0}
+        peak = {"total": 0}
+        lock = threading.Lock()
+
+        def download(cmd, cwd, **kwargs):
+            host = host_of[cmd[2]]
+            with lock:
+                running[host] += 1
+                assert running[host] == 1
+                peak["total"] = max(peak["total"], sum(running.values()))
+            time.sleep(0.05)
+            with lock:
+                running[host] -= 1
+            (Path(cwd) / cmd[3]).write_bytes(MOBI_BOOK + cmd[2].encode())
+            return Mock(returncode=0, stdout="", stderr="")
+
+        mock_run.side_effect = download
+        results = downloader.download_books(author="Author", format="mobi")
+
+        assert [r.title for r in results] == [f"Book {i}" for i in range(4)]
+        assert all(r.success for r in results)
+        assert peak["total"] == 2
+
+    def test_download_host(self):
+        """Test which host a search result is downloaded from."""
+        assert BookDownloader._download_host({"host": "Mirror.Example"}) == (
+            "mirror.example"
+        )
+        assert (
+            BookDownloader._download_host({"url": "https://x.example/a"}) == "x.example"
+        )
+        assert BookDownloader._download_host({"hash": "abc"}) == "librarian"
+
     def test_download_batch_empty_list(self, downloader):
         """Test download_batch with empty book list."""
         results = downloader.download_batch([])
@@ -508,19 +566,42 @@ Book Title 4|Another Author|Another Series|Extra Field"""
             }
         ]
 
-        # Mock subprocess call
-        mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
-
-        # Create mock results file
-        results_file = downloader.download_path / "search_results.json"
-        results_file.parent.mkdir(parents=True, exist_ok=True)
-        results_file.write_text(json.dumps(search_results))
+        # Mock subprocess call printing the results
+        mock_run.return_value = Mock(
+            returncode=0, stdout=json.dumps(search_results), stderr=""
+        )
 
         results = downloader._search_books("test query", downloader.download_path)
 
         assert len(results) == 1
         assert results[0]["title"] == "Test Book"
 
+    @patch("subprocess.run")
+    def test_search_books_private_results_file(self, mock_run, downloader):
+        """Test that concurrent searches read their own results file."""
+        barrier = threading.Barrier(4, timeout=5)
+
+        def search(cmd, **kwargs):
+            # librarian -p <dir> search <query>
+            results_file = Path(cmd[2]) / "search_results.json"
+            results_file.write_text(json.dumps([{"title": cmd[4]}]))
+            barrier.wait()
+            return Mock(returncode=0, stdout="Searching...", stderr="")
+
+        mock_run.side_effect = search
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(
+                    lambda query: downloader._search_books(
+                        query, downloader.download_path
+                    ),
+                    ["a", "b", "c", "d"],
+                )
+            )
+
+        assert [r[0]["title"] for r in results] == ["a", "b", "c", "d"]
+        assert list(downloader.download_path.iterdir()) == []
+
     @patch("subprocess.run")
     def test_search_books_command_failed(self, mock_run, downloader):
         """Test search books when command fails."""
@@ -542,12 +623,13 @@ Book Title 4|Another Author|Another Series|Extra Field"""
     @patch("subprocess.run")
     def test_search_books_invalid_json(self, mock_run, downloader, temp_dir):
         """Test search books with invalid JSON results."""
-        mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
 
-        # Create invalid JSON file
-        results_file = downloader.download_path / "search_results.json"
-        results_file.parent.mkdir(parents=True, exist_ok=True)
-        results_file.write_text("invalid json")
+        def search(cmd, **kwargs):
+            # Create invalid JSON file
+            (Path(cmd[2]) / "search_results.json").write_text("invalid json")
+            return Mock(returncode=0, stdout="", stderr="")
+
+        mock_run.side_effect = search
 
         results = downloader._search_books("test query", downloader.download_path)
 
@@ -576,25 +658,21 @@ Book Title 4|Another Author|Another Series|Extra Field"""
         """Test successful single book download."""
         book_data = {"title": "Test Book", "author": "Test Author", "hash": "testhash"}
 
-        mock_run.return_value = Mock(returncode=0, stdout="", stderr="")
-
-        # Mock file operations
-        downloader.download_path / "Test_Book.mobi"
-        with patch("pathlib.Path.exists") as mock_exists:
-            with patch("pathlib.Path.stat") as mock_stat:
-                with patch("pathlib.Path.rename") as mock_rename:
-                    # File exists in target location
-                    mock_exists.return_value = True
-                    mock_stat.return_value = Mock(st_size=1024)
-
-                    result = downloader._download_single_book(
-                        book_data, downloader.download_path, "mobi"
-                    )
-
-                    assert result.success is True
-                    assert result.title == "Test Book"
-                    assert result.author == "Test Author"
-                    assert result.file_size == 1024
+        def download(cmd, cwd, **kwargs):
+            (Path(cwd) / cmd[3]).write_bytes(MOBI_BOOK)
+            return Mock(returncode=0, stdout="", stderr="")
+
+        mock_run.side_effect = download
+
+        result = downloader._download_single_book(
+            book_data, downloader.download_path, "mobi"
+        )
+
+        assert result.success is True
+        assert result.title == "Test Book"
+        assert result.author == "Test Author"
+        assert result.file_size == 1024
+        assert result.filepath == downloader.download_path / "Test_Book.mobi"
 
     @patch("subprocess.run")
     def test_download_single_book_no_hash(self, mock_run, downloader):
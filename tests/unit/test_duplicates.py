@@ -0,0 +1,224 @@
+"""
+Unit tests for duplicate detection.
+
+Tests normalization helpers, the staged file hashing with its cache, keeper
+selection and CalibreIntegration.remove_duplicates on a minimal library.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from calibre_books.core.calibre import CalibreIntegration
+from calibre_books.core.duplicates import (
+    DuplicateFinder,
+    FileHashCache,
+    normalize_author,
+    normalize_isbn,
+    normalize_title,
+)
+from calibre_books.config.manager import ConfigManager
+from tests.fixtures.calibre_library import create_calibre_library
+
+
+SAMPLE_BOOKS = [
+    {
+        "title": "Elantris",
+        "authors": ["Brandon Sanderson"],
+        "formats": {"mobi": b"same-content" * 100},
+    },
+    {
+        "title": "Elantris (Tenth Anniversary Edition)",
+        "authors": ["Sanderson, Brandon"],
+        "formats": {"epub": b"e" * 500},
+    },
+    {
+        "title": "Copied Upload",
+        "authors": ["Unknown"],
+        "formats": {"mobi": b"same-content" * 100},
+    },
+    {
+        "title": "Warbreaker",
+        "authors": ["Brandon Sanderson"],
+        "identifiers": {"isbn": "0-7653-2030-6"},
+        "formats": {"pdf": b"p" * 10},
+    },
+    {
+        "title": "Warbreaker: A Novel",
+        "authors": ["B. Sanderson"],
+        "identifiers": {"isbn": "9780765320308"},
+        "formats": {"azw3": b"a" * 10},
+    },
+    {"title": "Mistborn", "authors": ["Brandon Sanderson"]},
+]
+
+
+class TestNormalization:
+    """Test title, author and ISBN normalization."""
+
+    def test_normalize_title(self):
+        """Test removal of articles, brackets, accents and punctuation."""
+        assert normalize_title("The Way of Kings (Deluxe)") == "way of kings"
+        assert normalize_title("Café: A Story!") == "cafe a story"
+
+    def test_normalize_title_keeps_volume_markers(self):
+        """Test that volumes of a series do not compare equal."""
+        assert normalize_title("Der Weg der Könige (Band 1)") != normalize_title(
+            "Der Weg der Könige (Band 2)"
+        )
+        assert normalize_title("Mistborn [Book 1]") == "mistborn book 1"
+        assert normalize_title("Mistborn (Book II)") == "mistborn book ii"
+
+    def test_normalize_author(self):
+        """Test that name order does not matter."""
+        assert normalize_author("Sanderson, Brandon") == normalize_author(
+            "Brandon Sanderson"
+        )
+
+    def test_normalize_isbn(self):
+        """Test ISBN-10 to ISBN-13 conversion."""
+        assert normalize_isbn("0-7653-2030-6") == "9780765320308"
+        assert normalize_isbn("978-0-7653-2030-8") == "9780765320308"
+        assert normalize_isbn("123") is None
+
+
+class TestDuplicateFinder:
+    """Test staged hashing and grouping."""
+
+    def test_identical_files_across_books(self, tmp_path):
+        """Test that only same-size files are hashed and matches are found."""
+        (tmp_path / "a").write_bytes(b"x" * 100)
+        (tmp_path / "b").write_bytes(b"x" * 100)
+        (tmp_path / "c").write_bytes(b"y" * 100)
+        (tmp_path / "d").write_bytes(b"x" * 7)
+        files = [(book_id, tmp_path / name) for book_id, name in enumerate("abcd")]
+        finder = DuplicateFinder()
+
+        with patch(
+            "calibre_books.core.duplicates._hash_file",
+            side_effect=lambda path, limit: path.read_bytes()[:1].hex(),
+        ) as mock_hash:
+            groups = finder.find_identical_files(files)
+
+        hashed = {call.args[0].name for call in mock_hash.call_args_list}
+        assert hashed == {"a", "b", "c"}
+        assert [sorted(book_id for book_id, _ in group) for group in groups] == [[0, 1]]
+
+    def test_hash_cache_skips_unchanged_files(self, tmp_path):
+        """Test that cached hashes are reused until a file changes."""
+        for name in "ab":
+            (tmp_path / name).write_bytes(b"x" * 100)
+        files = [(1, tmp_path / "a"), (2, tmp_path / "b")]
+        finder = DuplicateFinder(hash_cache=FileHashCache(tmp_path / "hashes.db"))
+
+        finder.find_identical_files(files)
+        with patch("calibre_books.core.duplicates._hash_file") as mock_hash:
+            groups = finder.find_identical_files(files)
+
+        mock_hash.assert_not_called()
+        assert len(groups) == 1
+
+        (tmp_path / "b").write_bytes(b"z" * 100)
+        assert finder.find_identical_files(files) == []
+
+    def test_keeper_prefers_format_then_size(self):
+        """Test keeper selection by format preference and file size."""
+        finder = DuplicateFinder()
+        files_by_book = {
+            1: [{"format": "PDF", "size": 900}],
+            2: [{"format": "EPUB", "size": 100}],
+            3: [{"format": "EPUB", "size": 300}],
+        }
+
+        assert finder.choose_keeper([1, 2, 3], files_by_book) == 3
+
+
+class TestRemoveDuplicates:
+    """Test CalibreIntegration.remove_duplicates."""
+
+    @pytest.fixture
+    def integration(self, tmp_path):
+        """Create a CalibreIntegration for a library with duplicates."""
+        create_calibre_library(tmp_path / "library", SAMPLE_BOOKS)
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(tmp_path / "library"),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        integration.cache_dir = tmp_path / "cache"
+        return integration
+
+    def test_dry_run_groups(self, integration):
+        """Test grouping by content, metadata and ISBN without removal."""
+        result = integration.remove_duplicates(dry_run=True)
+
+        groups = {tuple(group.book_ids): group for group in result.groups}
+        assert set(groups) == {(1, 2, 3), (4, 5)}
+        assert groups[(1, 2, 3)].reasons == {"identical_file", "metadata"}
+        assert groups[(1, 2, 3)].keeper_id == 2
+        assert groups[(4, 5)].reasons == {"isbn"}
+        assert groups[(4, 5)].keeper_id == 5
+        assert result.duplicates_found == 3
+        assert result.duplicate_groups[0] == [2, 1, 3]
+        assert groups[(1, 2, 3)].removable_ids == [3]
+        assert groups[(4, 5)].removable_ids == []
+        integration._calibre_db.remove_books.assert_not_called()
+        integration._calibre_db.find_duplicates.assert_not_called()
+
+    def test_removal(self, integration):
+        """Test that only books with identical files are removed by default."""
+        integration._calibre_db.remove_books.return_value = Mock(success=True)
+
+        result = integration.remove_duplicates(dry_run=False)
+
+        integration._calibre_db.remove_books.assert_called_once_with([3])
+        assert result.books_removed == 1
+        assert result.duplicates_for_review == 2
+        assert result.space_freed == 1200
+
+    def test_removal_of_identifier_matches(self, integration):
+        """Test that shared identifiers are removed only on request."""
+        integration._calibre_db.remove_books.return_value = Mock(success=True)
+
+        result = integration.remove_duplicates(
+            dry_run=False, match_metadata=False, remove_identifier_matches=True
+        )
+
+        integration._calibre_db.remove_books.assert_called_once_with([3, 4])
+        assert result.books_removed == 2
+        assert result.space_freed == 1200 + 10
+
+    def test_series_volumes_are_not_removed(self, tmp_path):
+        """Test that volumes of one series are never merged or removed."""
+        books = [
+            {
+                "title": f"Der Weg der Könige ({volume})",
+                "authors": ["Brandon Sanderson"],
+                "formats": {"epub": volume.encode() * 50},
+            }
+            for volume in ("Band 1", "Band 2")
+        ] + [
+            {
+                "title": "Der Weg der Könige (Band 2)",
+                "authors": ["Sanderson, Brandon"],
+                "formats": {"mobi": b"m" * 80},
+            }
+        ]
+        create_calibre_library(tmp_path / "library", books)
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(tmp_path / "library"),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        integration.cache_dir = tmp_path / "cache"
+
+        result = integration.remove_duplicates(dry_run=False)
+
+        # Only the two copies of volume 2 match, by metadata alone
+        assert [group.book_ids for group in result.groups] == [[2, 3]]
+        assert result.groups[0].removable_ids == []
+        assert result.duplicates_for_review == 1
+        integration._calibre_db.remove_books.assert_not_called()
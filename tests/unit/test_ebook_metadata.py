@@ -0,0 +1,231 @@
+"""
+Unit tests for the native eBook metadata readers and writers.
+
+Tests OPF and EXTH parsing, ASIN round trips that keep the books
+readable, and the ebook-meta fallback of the scanner and ASIN manager.
+"""
+
+import struct
+import zipfile
+from unittest.mock import Mock, patch
+
+import pytest
+
+from calibre_books.core.asin_manager import ASINManager
+from calibre_books.core.conversion_benchmark import CorpusSpec, generate_corpus
+from calibre_books.core.conversion_cost import count_images
+from calibre_books.core.ebook_metadata import (
+    EXTH_ASIN,
+    EXTH_ASIN2,
+    EXTH_AUTHOR,
+    EXTH_CDE_TYPE,
+    MetadataError,
+    _MobiHeader,
+    _read_mobi_record0,
+    read_asin,
+    read_metadata,
+    write_asin,
+)
+from calibre_books.core.file_scanner import FileScanner
+
+CALIBRE_OPF = """<?xml version="1.0" encoding="utf-8"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="2.0" unique-identifier="uid">
+  <metadata xmlns:dc="http://purl.org/dc/elements/1.1/"
+            xmlns:opf="http://www.idpf.org/2007/opf">
+    <dc:title>The Final Empire</dc:title>
+    <dc:creator opf:role="aut">Brandon Sanderson</dc:creator>
+    <dc:creator opf:role="edt">Moshe Feder</dc:creator>
+    <dc:identifier id="uid">urn:uuid:0d6c1f2e</dc:identifier>
+    <dc:identifier opf:scheme="ISBN">9780765311788</dc:identifier>
+    <dc:identifier opf:scheme="AMAZON">B002GYI9C4</dc:identifier>
+    <dc:publisher>Tor</dc:publisher>
+    <dc:date>2006-07-17</dc:date>
+    <dc:language>en</dc:language>
+  </metadata>
+  <manifest/>
+  <spine/>
+</package>
+"""
+
+# Titles of the generated books
+TITLE_OF = {".epub": "Benchmark EPUB 0001", ".mobi": "Benchmark MOBI 0001"}
+
+
+def corpus_book(tmp_path, fmt):
+    """Generate a small synthetic book."""
+    (book,) = generate_corpus(
+        tmp_path / "corpus",
+        CorpusSpec(formats=[fmt], files_per_format=1, size_kb=16, image_density=0.5),
+    )
+    return book
+
+
+def epub_with_opf(path, opf):
+    """Write a minimal EPUB with the given OPF file."""
+    with zipfile.ZipFile(path, "w") as book:
+        book.writestr(
+            zipfile.ZipInfo("mimetype"), "application/epub+zip", zipfile.ZIP_STORED
+        )
+        book.writestr(
+            "META-INF/container.xml",
+            '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="content.opf"/></rootfiles></container>',
+        )
+        book.writestr("content.opf", opf)
+    return path
+
+
+def exth_records(path):
+    """EXTH records of a MOBI file."""
+    return _MobiHeader(_read_mobi_record0(path)).exth
+
+
+class TestEpubMetadata:
+    """Test metadata of EPUB files."""
+
+    def test_reads_opf(self, tmp_path):
+        """Test that OPF metadata is mapped like ebook-meta output."""
+        book = epub_with_opf(tmp_path / "book.epub", CALIBRE_OPF)
+
+        assert read_metadata(book) == {
+            "title": "The Final Empire",
+            "author": "Brandon Sanderson",
+            "identifiers": {
+                "uuid": "0d6c1f2e",
+                "isbn": "9780765311788",
+                "amazon": "B002GYI9C4",
+            },
+            "publication_year": "2006-07-17",
+            "publisher": "Tor",
+            "language": "en",
+        }
+
+    def test_replaces_asin(self, tmp_path):
+        """Test that a new ASIN replaces the old one in EPUB 2 style."""
+        book = epub_with_opf(tmp_path / "book.epub", CALIBRE_OPF)
+
+        write_asin(book, "B00ZVA3XL6")
+
+        assert read_asin(book) == "B00ZVA3XL6"
+        with zipfile.ZipFile(book) as archive:
+            opf = archive.read("content.opf").decode()
+            assert archive.infolist()[0].filename == "mimetype"
+            assert archive.infolist()[0].compress_type == zipfile.ZIP_STORED
+        assert opf.count("B002GYI9C4") == 0
+        assert 'opf:scheme="AMAZON">B00ZVA3XL6<' in opf
+        assert "9780765311788" in opf
+
+    def test_adds_and_removes_asin(self, tmp_path):
+        """Test ASINs in books without an opf prefix."""
+        book = corpus_book(tmp_path, "epub")
+        images = count_images(book)
+        assert read_asin(book) is None
+
+        write_asin(book, "B00ZVA3XL6")
+        assert read_asin(book) == "B00ZVA3XL6"
+        write_asin(book, None)
+
+        assert read_asin(book) is None
+        assert read_metadata(book)["title"] == TITLE_OF[book.suffix]
+        assert count_images(book) == images
+
+
+class TestMobiMetadata:
+    """Test metadata of MOBI/AZW3 files."""
+
+    def test_reads_full_name(self, tmp_path):
+        """Test that books without EXTH records use the full name."""
+        book = corpus_book(tmp_path, "mobi")
+
+        assert read_metadata(book) == {"title": TITLE_OF[book.suffix]}
+
+    def test_adds_exth_with_asin(self, tmp_path):
+        """Test that an ASIN adds EXTH 113/504 and keeps the book intact."""
+        book = corpus_book(tmp_path, "mobi")
+        images = count_images(book)
+
+        write_asin(book, "B00ZVA3XL6")
+
+        assert read_asin(book) == "B00ZVA3XL6"
+        assert read_metadata(book)["title"] == TITLE_OF[book.suffix]
+        assert exth_records(book) == [
+            (EXTH_ASIN, b"B00ZVA3XL6"),
+            (EXTH_ASIN2, b"B00ZVA3XL6"),
+            (EXTH_CDE_TYPE, b"EBOK"),
+        ]
+        # Records after the header record moved with it
+        assert count_images(book) == images
+
+    def test_keeps_other_exth_records(self, tmp_path):
+        """Test replacing and removing the ASIN of a book with EXTH records."""
+        book = corpus_book(tmp_path, "mobi")
+        write_asin(book, "B00ZVA3XL6")
+        data = bytearray(book.read_bytes())
+        record0 = struct.unpack_from(">I", data, 78)[0]
+        # Turn the cde type record into an author record of the same size
+        position = data.index(b"EBOK", record0) - 8
+        data[position : position + 12] = struct.pack(">II", EXTH_AUTHOR, 12) + b"Anon"
+        book.write_bytes(bytes(data))
+
+        write_asin(book, "B002GYI9C4")
+        assert read_metadata(book)["author"] == "Anon"
+        assert read_asin(book) == "B002GYI9C4"
+
+        write_asin(book, None)
+        assert read_asin(book) is None
+        assert exth_records(book) == [(EXTH_AUTHOR, b"Anon"), (EXTH_CDE_TYPE, b"EBOK")]
+        assert read_metadata(book)["title"] == TITLE_OF[book.suffix]
+
+    def test_rejects_other_files(self, tmp_path):
+        """Test that files without a MOBI header raise MetadataError."""
+        book = tmp_path / "book.azw3"
+        book.write_bytes(b"\x00" * 100)
+
+        with pytest.raises(MetadataError):
+            read_metadata(book)
+        with pytest.raises(MetadataError):
+            read_metadata(tmp_path / "book.pdf")
+
+
+class TestEbookMetaFallback:
+    """Test that callers only use ebook-meta when needed."""
+
+    def test_scanner_reads_natively(self, tmp_path):
+        """Test that the scanner does not start ebook-meta for EPUBs."""
+        book = epub_with_opf(tmp_path / "book.epub", CALIBRE_OPF)
+        scanner = FileScanner(Mock())
+
+        with patch("subprocess.run") as run:
+            metadata = scanner._extract_metadata_from_file(book)
+
+        run.assert_not_called()
+        assert metadata["identifiers"]["amazon"] == "B002GYI9C4"
+
+    def test_asin_manager_falls_back_to_ebook_meta(self, tmp_path):
+        """Test that unparseable and unsupported files use ebook-meta."""
+        broken = tmp_path / "broken.epub"
+        broken.write_bytes(b"not a zip")
+        pdf = tmp_path / "book.pdf"
+        pdf.write_bytes(b"%PDF-1.4")
+        manager = ASINManager({})
+        output = "Title : Book\nIdentifiers : amazon:B00ZVA3XL6\n"
+
+        with patch(
+            "subprocess.run", return_value=Mock(returncode=0, stdout=output)
+        ) as run:
+            assert manager.get_asin_from_file(broken) == "B00ZVA3XL6"
+            assert manager.get_asin_from_file(pdf) == "B00ZVA3XL6"
+            assert run.call_count == 2
+
+    def test_asin_manager_writes_natively(self, tmp_path):
+        """Test that ASINs are written and removed without ebook-meta."""
+        book = corpus_book(tmp_path, "mobi")
+        manager = ASINManager({})
+
+        with patch("subprocess.run") as run:
+            manager.write_file_asin(book, "B00ZVA3XL6")
+            assert manager.get_asin_from_file(book) == "B00ZVA3XL6"
+            assert manager.remove_asin_from_file(book)
+            assert manager.get_asin_from_file(book) is None
+
+        run.assert_not_called()
@@ -0,0 +1,201 @@
+"""
+Unit tests for FileScanner directory scans.
+
+Tests parallel metadata extraction in thread and process pools and
+incremental rescans with the scan index.
+"""
+
+import json
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+from click.testing import CliRunner
+
+from calibre_books.cli.process import scan
+from calibre_books.core.conversion_benchmark import CorpusSpec, generate_corpus
+from calibre_books.core.file_scanner import FileScanner
+from calibre_books.core.scan_index import ScanIndex
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Generate a directory of EPUB and MOBI books."""
+    generate_corpus(
+        tmp_path,
+        CorpusSpec(formats=["epub", "mobi"], files_per_format=6, size_kb=8),
+    )
+    return tmp_path
+
+
+def summary(books):
+    """File names and titles of scanned books."""
+    return [(book.file_path.name, book.metadata.title) for book in books]
+
+
+class TestParallelScan:
+    """Test scan_directory with worker pools."""
+
+    @pytest.mark.parametrize("executor", ["thread", "process"])
+    def test_matches_serial_scan(self, library, executor):
+        """Test that parallel scans return the serial results in order."""
+        scanner = FileScanner({})
+        serial = scanner.scan_directory(library, check_metadata=True)
+
+        books = scanner.scan_directory(
+            library, check_metadata=True, parallel=3, executor=executor
+        )
+
+        assert summary(books) == summary(serial)
+        assert books[0].metadata.title == "Benchmark EPUB 0001"
+
+    def test_order_and_progress(self, library):
+        """Test that files finishing out of order keep their position."""
+        scanner = FileScanner({})
+        original = scanner._create_book_from_file
+        progress = []
+
+        def slow_first(file_path, extract_metadata=False):
+            # Earlier files finish last
+            time.sleep(0.02 if file_path.name.endswith("0001.epub") else 0)
+            return original(file_path, extract_metadata)
+
+        with patch.object(scanner, "_create_book_from_file", side_effect=slow_first):
+            books = scanner.scan_directory(
+                library,
+                parallel=4,
+                progress_callback=lambda done, total: progress.append((done, total)),
+            )
+
+        assert [book.file_path for book in books] == sorted(
+            book.file_path for book in books
+        )
+        assert progress == [(i, 12) for i in range(1, 13)]
+
+    def test_failed_files_are_skipped(self, library):
+        """Test that a file raising an error does not stop the scan."""
+        scanner = FileScanner({})
+        original = scanner._create_book_from_file
+
+        def fail_one(file_path, extract_metadata=False):
+            if file_path.name.endswith("0002.mobi"):
+                raise OSError("unreadable")
+            return original(file_path, extract_metadata)
+
+        with patch.object(scanner, "_create_book_from_file", side_effect=fail_one):
+            books = scanner.scan_directory(library, parallel=2)
+
+        assert len(books) == 11
+        assert "benchmark_mobi_0002.mobi" not in [b.file_path.name for b in books]
+
+    def test_rejects_unknown_executor(self, library):
+        """Test that executor names are validated."""
+        with pytest.raises(ValueError, match="Unknown executor"):
+            FileScanner({}).scan_directory(library, executor="fiber")
+
+
+class TestScanIndex:
+    """Test incremental rescans."""
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        """Create an empty scan index."""
+        return ScanIndex(tmp_path / "index" / "scan_index.db")
+
+    def test_rescan_only_processes_changes(self, library, index):
+        """Test that unchanged files come from the index."""
+        scanner = FileScanner({})
+        first = scanner.scan_directory(library, check_metadata=True, index=index)
+        assert len(scanner.last_diff.added) == 12
+
+        changed = library / "benchmark_epub_0002.epub"
+        changed.write_bytes(changed.read_bytes() + b"\0")
+        (library / "benchmark_mobi_0003.mobi").unlink()
+        (library / "new.epub").write_bytes(b"not really a book")
+
+        with patch.object(
+            scanner, "_create_book_from_file", wraps=scanner._create_book_from_file
+        ) as create:
+            books = scanner.scan_directory(library, check_metadata=True, index=index)
+
+        assert sorted(c.args[0].name for c in create.call_args_list) == [
+            "benchmark_epub_0002.epub",
+            "new.epub",
+        ]
+        diff = scanner.last_diff
+        assert [b.file_path.name for b in diff.added] == ["new.epub"]
+        assert [b.file_path.name for b in diff.changed] == ["benchmark_epub_0002.epub"]
+        assert [p.name for p in diff.removed] == ["benchmark_mobi_0003.mobi"]
+        assert diff.unchanged == 10
+        assert summary(books)[:3] == summary(first)[:3]
+        assert [b.file_path for b in books] == sorted(b.file_path for b in books)
+
+    def test_metadata_scan_reextracts_name_only_entries(self, library, index):
+        """Test that entries without file metadata are completed."""
+        scanner = FileScanner({})
+        scanner.scan_directory(library, index=index)
+
+        books = scanner.scan_directory(library, check_metadata=True, index=index)
+
+        assert books[0].metadata.title == "Benchmark EPUB 0001"
+        assert not scanner.last_diff.has_changes
+        assert scanner.last_diff.unchanged == 12
+
+    def test_removed_is_limited_to_the_scan(self, library, index):
+        """Test that files outside a scan are not reported as removed."""
+        scanner = FileScanner({})
+        (library / "sub").mkdir()
+        (library / "sub" / "nested.epub").write_bytes(b"x")
+        scanner.scan_directory(library, recursive=True, index=index)
+
+        scanner.scan_directory(library, formats=["mobi"], index=index)
+
+        assert not scanner.last_diff.has_changes
+        assert len(index.entries(library)) == 13
+
+    def test_saves_diff(self, library, index, tmp_path):
+        """Test the JSON written for a diff."""
+        scanner = FileScanner({})
+        scanner.scan_directory(library, index=index)
+        (library / "benchmark_epub_0001.epub").unlink()
+        books = scanner.scan_directory(library, index=index)
+        output = tmp_path / "diff.json"
+
+        scanner.save_results(books, output, diff=scanner.last_diff)
+
+        data = json.loads(output.read_text())
+        assert data["added"] == data["changed"] == []
+        assert data["removed"] == [str(library / "benchmark_epub_0001.epub")]
+        assert (data["total_files"], data["unchanged"]) == (11, 11)
+
+    def test_scan_command_diff(self, library, tmp_path):
+        """Test process scan --diff against the previous scan."""
+        output = tmp_path / "changes.json"
+        args = ["-i", str(library), "--diff", "-o", str(output), "-p", "1"]
+        obj = {"config": Mock(), "dry_run": False}
+
+        with patch(
+            "calibre_books.core.scan_index.DEFAULT_SCAN_INDEX",
+            tmp_path / "index.db",
+        ):
+            CliRunner().invoke(scan, args, obj=obj)
+            (library / "extra.mobi").write_bytes(b"x")
+            result = CliRunner().invoke(scan, args, obj=obj)
+
+        assert result.exit_code == 0, result.output
+        assert "1 added, 0 changed, 0 removed, 12 unchanged" in result.output
+        data = json.loads(output.read_text())
+        assert [book["file_path"] for book in data["added"]] == [
+            str(library / "extra.mobi")
+        ]
+
+    def test_diff_needs_index(self, library):
+        """Test that --diff cannot be combined with --no-index."""
+        result = CliRunner().invoke(
+            scan,
+            ["-i", str(library), "--diff", "--no-index"],
+            obj={"config": Mock(), "dry_run": False},
+        )
+
+        assert result.exit_code != 0
+        assert "needs the scan index" in result.output
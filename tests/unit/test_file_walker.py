@@ -0,0 +1,120 @@
+"""
+Unit tests for the parallel directory walker.
+
+Tests recursive and flat walks, filtering, sorted mode, streaming of
+matches and its use by FormatConverter and FileScanner.
+"""
+
+import os
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from calibre_books.config.manager import ConfigManager
+from calibre_books.core.converter import FormatConverter
+from calibre_books.core.file_scanner import FileScanner
+from calibre_books.core.file_walker import walk_files
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """Create a small library tree."""
+    files = [
+        "a.epub",
+        "notes.txt",
+        "Author/Book One/b.mobi",
+        "Author/Book Two/c.epub",
+        "Other/deep/er/d.pdf",
+    ]
+    for name in files:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+    return tmp_path
+
+
+def relative(paths, root):
+    """Relative, ``/`` separated form of paths or walked entries."""
+    return [Path(path).relative_to(root).as_posix() for path in paths]
+
+
+class TestWalkFiles:
+    """Test walk_files."""
+
+    def test_recursive_walk_finds_all_files(self, tree):
+        """Test that every file below the root is found exactly once."""
+        found = relative(walk_files(tree, max_workers=4), tree)
+
+        assert sorted(found) == [
+            "Author/Book One/b.mobi",
+            "Author/Book Two/c.epub",
+            "Other/deep/er/d.pdf",
+            "a.epub",
+            "notes.txt",
+        ]
+
+    def test_flat_walk(self, tree):
+        """Test that subdirectories are not entered without recursion."""
+        found = relative(walk_files(tree, recursive=False), tree)
+
+        assert sorted(found) == ["a.epub", "notes.txt"]
+
+    def test_match_and_sort(self, tree):
+        """Test filtering and the sorted mode."""
+        found = relative(
+            walk_files(tree, match=lambda e: e.name.endswith(".epub"), sort=True),
+            tree,
+        )
+
+        assert found == ["Author/Book Two/c.epub", "a.epub"]
+
+    def test_symlinked_directories_not_followed(self, tree):
+        """Test that a directory symlink cannot make the walk loop."""
+        os.symlink(tree, tree / "Author" / "loop")
+
+        found = relative(walk_files(tree), tree)
+
+        assert len(found) == 5
+
+    def test_yields_before_walk_completes(self, tree):
+        """Test that the first match is available without walking the tree."""
+        walker = walk_files(tree, recursive=True)
+
+        first = next(walker)
+        walker.close()
+
+        assert Path(first.path).parent == tree
+
+
+class TestWalkUsers:
+    """Test the callers of walk_files."""
+
+    def test_find_convertible_files(self, tree):
+        """Test that conversion outputs and other files are filtered."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_conversion_config.return_value = {}
+        converter = FormatConverter(config_manager)
+        (tree / "Author" / "Book One" / "b_kfx.azw3").write_bytes(b"x")
+
+        files = converter.find_convertible_files(tree, recursive=True)
+
+        assert relative(files, tree) == [
+            "a.epub",
+            "Author/Book One/b.mobi",
+            "Author/Book Two/c.epub",
+            "Other/deep/er/d.pdf",
+            "notes.txt",
+        ]
+
+    def test_scan_directory_is_sorted(self, tree):
+        """Test that scan_directory returns books in path order."""
+        scanner = FileScanner({})
+
+        books = scanner.scan_directory(tree, recursive=True, formats=["epub", "mobi"])
+
+        assert relative([b.file_path for b in books], tree) == [
+            "Author/Book One/b.mobi",
+            "Author/Book Two/c.epub",
+            "a.epub",
+        ]
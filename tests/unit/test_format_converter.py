@@ -261,7 +261,7 @@ class TestConvertSingle:
         finally:
             test_file.unlink()
 
-    @patch("subprocess.run")
+    @patch("calibre_books.core.converter.run_limited")
     def test_convert_single_successful_conversion(self, mock_run):
         """Test successful single file conversion."""
         converter = self.create_converter()
@@ -270,13 +270,17 @@ class TestConvertSingle:
         # Mock successful subprocess run
         mock_result = Mock()
         mock_result.returncode = 0
-        mock_run.return_value = mock_result
+
+        def run(cmd, *args, **kwargs):
+            # ebook-convert writes the (partial) output file
+            Path(cmd[2]).write_bytes(b"converted content")
+            return mock_result
+
+        mock_run.side_effect = run
 
         try:
             with tempfile.TemporaryDirectory() as temp_dir:
                 output_file = Path(temp_dir) / "output.mobi"
-                # Create the output file to simulate successful conversion
-                output_file.write_bytes(b"converted content")
 
                 with patch.object(converter, "output_path", Path(temp_dir)):
                     result = converter.convert_single(
@@ -293,10 +297,12 @@ class TestConvertSingle:
                 assert result.conversion_time > 0
                 assert result.file_size_before > 0
                 assert result.file_size_after > 0
+                assert output_file.read_bytes() == b"converted content"
+                assert list(Path(temp_dir).iterdir()) == [output_file]
         finally:
             test_file.unlink()
 
-    @patch("subprocess.run")
+    @patch("calibre_books.core.converter.run_limited")
     def test_convert_single_conversion_fails(self, mock_run):
         """Test single file conversion when ebook-convert fails."""
         converter = self.create_converter()
@@ -320,7 +326,7 @@ class TestConvertSingle:
         finally:
             test_file.unlink()
 
-    @patch("subprocess.run")
+    @patch("calibre_books.core.converter.run_limited")
     def test_convert_single_timeout(self, mock_run):
         """Test single file conversion timeout handling."""
         converter = self.create_converter()
@@ -339,7 +345,7 @@ class TestConvertSingle:
         finally:
             test_file.unlink()
 
-    @patch("subprocess.run")
+    @patch("calibre_books.core.converter.run_limited")
     def test_convert_single_unexpected_exception(self, mock_run):
         """Test single file conversion with unexpected exception."""
         converter = self.create_converter()
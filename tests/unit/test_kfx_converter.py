@@ -283,12 +283,16 @@ class TestKFXConverterSystemRequirements:
             config_manager = ConfigManager(Path(config_file.name))
             converter = KFXConverter(config_manager)
 
-            # Mock subprocess calls for system requirements
-            with patch("subprocess.run") as mock_run:
-                mock_run.return_value = Mock(
+            def fake_run(cmd, **kwargs):
+                if cmd[-1] == "--version":
+                    return Mock(returncode=0, stdout=f"{cmd[0]} (calibre 7.2.0)")
+                return Mock(
                     returncode=0, stdout="KFX Output - Convert ebooks to KFX format"
                 )
 
+            # Mock subprocess calls for system requirements
+            with patch("subprocess.run", side_effect=fake_run):
+
                 requirements = converter.check_system_requirements()
 
                 # Base requirements should be available with successful mock
@@ -0,0 +1,227 @@
+"""
+Unit tests for Calibre library conversion to KFX.
+
+Tests that one source file per book is chosen from metadata.db (or from
+calibredb if metadata.db cannot be read) and converted on one shared
+worker pool with per-book progress.
+"""
+
+import json
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+
+from calibre_books.config.manager import ConfigManager
+from calibre_books.core.book import BookFormat, ConversionResult
+from calibre_books.core.conversion.kfx import KFXConverter
+from calibre_books.core.metadata_store import (
+    CalibreMetadataStore,
+    UnsupportedSchemaError,
+)
+from tests.fixtures.calibre_library import create_calibre_library
+
+
+SAMPLE_BOOKS = [
+    {
+        "title": "Elantris",
+        "authors": ["Brandon Sanderson"],
+        "formats": {"epub": b"e" * 100, "mobi": b"m" * 50},
+    },
+    {
+        "title": "Mistborn",
+        "authors": ["Brandon Sanderson"],
+        "formats": {"epub": b"e" * 70, "kfx": b"k" * 10},
+    },
+    {
+        "title": "Warbreaker",
+        "authors": ["Brandon Sanderson"],
+        "formats": {"pdf": b"p" * 20, "txt": b"t" * 5},
+    },
+]
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Create a library with one book already converted to KFX."""
+    library = tmp_path / "library"
+    create_calibre_library(library, SAMPLE_BOOKS)
+    return library
+
+
+@pytest.fixture
+def converter(library):
+    """Create a KFXConverter for the library."""
+    config_manager = Mock(spec=ConfigManager)
+    config_manager.get_conversion_config.return_value = {
+        "max_parallel": 4,
+        "cache_enabled": False,
+        "retry_backoff": 0,
+    }
+    config_manager.get_calibre_config.return_value = {"library_path": str(library)}
+    return KFXConverter(config_manager)
+
+
+def fake_convert(input_file, output_file, **kwargs):
+    """Write a KFX output and report success."""
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    output_file.write_bytes(b"kfx")
+    return ConversionResult(
+        input_file=input_file,
+        output_file=output_file,
+        input_format=BookFormat.EPUB,
+        output_format=BookFormat.KFX,
+        success=True,
+    )
+
+
+class TestLibraryKFXConversion:
+    """Test KFXConverter.convert_library_to_kfx."""
+
+    def test_converts_preferred_source_file(self, converter, library):
+        """Test that one preferred source file per book without KFX is converted."""
+        progress = []
+
+        with patch.object(
+            converter, "convert_single_to_kfx", side_effect=fake_convert
+        ) as convert:
+            results = converter.convert_library_to_kfx(
+                progress_callback=lambda fraction, msg: progress.append(fraction)
+            )
+
+        assert sorted(r.input_file.name for r in results) == [
+            "Elantris - Brandon Sanderson.epub",
+            "Warbreaker - Brandon Sanderson.pdf",
+        ]
+        assert convert.call_count == 2
+        assert progress == [1 / 2, 1.0]
+        output = results[0].output_file
+        assert output.parent.name == "kfx_output"
+        assert output.name.endswith("_kfx.azw3")
+
+    def test_source_format_preference(self, converter, tmp_path):
+        """Test that AZW3 is preferred over MOBI and PDF."""
+        library = tmp_path / "other"
+        create_calibre_library(
+            library,
+            [
+                {
+                    "title": "Oathbringer",
+                    "authors": ["Brandon Sanderson"],
+                    "formats": {"mobi": b"m" * 10, "azw3": b"a" * 10, "pdf": b"p"},
+                }
+            ],
+        )
+        store = CalibreMetadataStore(library)
+
+        jobs = converter._library_kfx_jobs(store.iter_files([1]))
+
+        assert [job.input_file.suffix for job in jobs.values()] == [".azw3"]
+
+    def test_files_share_one_worker_pool(self, converter):
+        """Test that files of different books convert concurrently."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def convert(input_file, output_file, **kwargs):
+            barrier.wait()
+            return fake_convert(input_file, output_file)
+
+        with (
+            patch.object(
+                converter._format_converter, "effective_parallel", return_value=2
+            ),
+            patch.object(converter, "convert_single_to_kfx", side_effect=convert),
+        ):
+            results = converter.convert_library_to_kfx()
+
+        assert len(results) == 2
+        assert all(r.success for r in results)
+
+    def test_filter_and_limit(self, converter):
+        """Test that the search filter and book limit select books."""
+        # calibredb search prints the matching ids
+        search = Mock(returncode=0, stdout="1,3", stderr="")
+
+        with (
+            patch(
+                "calibre_books.core.conversion.kfx.subprocess.run", return_value=search
+            ) as run,
+            patch.object(converter, "convert_single_to_kfx", side_effect=fake_convert),
+        ):
+            results = converter.convert_library_to_kfx(
+                book_filter="author:Sanderson", limit=1
+            )
+
+        assert run.call_args[0][0][-2:] == ["search", "author:Sanderson"]
+        assert {r.input_file.stem for r in results} == {"Elantris - Brandon Sanderson"}
+
+    def test_unsupported_schema_falls_back_to_calibredb(self, converter, library):
+        """Test that books are listed with calibredb if metadata.db is unreadable."""
+        store = CalibreMetadataStore(library)
+        listing = [
+            {
+                "id": book["id"],
+                "title": book["title"],
+                "authors": " & ".join(book["authors"]),
+                "formats": [
+                    str(book_file["path"])
+                    for book_file in store.iter_files([book["id"]])
+                ],
+            }
+            for book in store.iter_books(["title", "authors"])
+        ]
+        calibredb = Mock(returncode=0, stdout=json.dumps(listing), stderr="")
+
+        with (
+            patch(
+                "calibre_books.core.conversion.kfx.CalibreMetadataStore",
+                side_effect=UnsupportedSchemaError("Unknown schema version 99"),
+            ),
+            patch(
+                "calibre_books.core.conversion.kfx.subprocess.run",
+                return_value=calibredb,
+            ) as run,
+            patch.object(converter, "convert_single_to_kfx", side_effect=fake_convert),
+        ):
+            results = converter.convert_library_to_kfx()
+
+        assert "--for-machine" in run.call_args[0][0]
+        assert sorted(r.input_file.name for r in results) == [
+            "Elantris - Brandon Sanderson.epub",
+            "Warbreaker - Brandon Sanderson.pdf",
+        ]
+
+    def test_dry_run_converts_nothing(self, converter):
+        """Test that a dry run only previews the conversion."""
+        with patch.object(converter, "convert_single_to_kfx") as convert:
+            assert converter.convert_library_to_kfx(dry_run=True) == []
+
+        convert.assert_not_called()
+
+    def test_changed_only_retries_failed_books(self, converter, tmp_path):
+        """Test that books with failed conversions are converted again."""
+
+        def fail_pdf(input_file, output_file, **kwargs):
+            if input_file.suffix != ".pdf":
+                return fake_convert(input_file, output_file)
+            return ConversionResult(
+                input_file=input_file,
+                output_file=None,
+                input_format=BookFormat.PDF,
+                output_format=BookFormat.KFX,
+                success=False,
+                error="conversion failed",
+            )
+
+        with patch(
+            "calibre_books.core.library_snapshot.DEFAULT_SNAPSHOT_PATH",
+            tmp_path / "snapshot.db",
+        ):
+            with patch.object(converter, "convert_single_to_kfx", side_effect=fail_pdf):
+                converter.convert_library_to_kfx(changed_only=True)
+            with patch.object(
+                converter, "convert_single_to_kfx", side_effect=fake_convert
+            ) as convert:
+                converter.convert_library_to_kfx(changed_only=True)
+
+        assert [c.args[0].suffix for c in convert.call_args_list] == [".pdf"]
@@ -0,0 +1,183 @@
+"""
+Unit tests for streaming library export.
+
+Tests the NDJSON, JSON, CSV and XML writers, atomic replacement, the
+hardlink-or-copy file export and CalibreIntegration.export_library on a
+minimal library.
+"""
+
+import csv
+import json
+import os
+import xml.etree.ElementTree as ET
+import pytest
+from unittest.mock import Mock, patch
+
+from calibre_books.core.calibre import CalibreIntegration
+from calibre_books.core.library_export import LibraryExporter, link_or_copy
+from calibre_books.config.manager import ConfigManager
+from tests.fixtures.calibre_library import create_calibre_library
+
+
+SAMPLE_BOOKS = [
+    {
+        "title": "The Way of Kings",
+        "authors": ["Brandon Sanderson"],
+        "series": "The Stormlight Archive",
+        "identifiers": {"amazon": "B003P2WO5E"},
+        "tags": ["Fantasy"],
+        "formats": {"epub": b"x" * 100, "mobi": b"x" * 300},
+    },
+    {
+        "title": "Good Omens",
+        "authors": ["Terry Pratchett", "Neil Gaiman"],
+        "formats": {"pdf": b"x" * 50},
+    },
+]
+
+ROWS = [
+    {"id": 1, "title": "Elantris", "authors": "Brandon Sanderson", "size": 10},
+    {
+        "id": 2,
+        "title": "Good Omens",
+        "authors": ["Terry Pratchett", "Neil Gaiman"],
+        "identifiers": {"isbn": "9780060853983"},
+        "tags": ["Humor", "Fantasy"],
+    },
+]
+
+
+@pytest.fixture
+def exporter(tmp_path):
+    """Create an exporter for a library path under tmp_path."""
+    return LibraryExporter(tmp_path / "library", max_workers=2)
+
+
+class TestLibraryExporter:
+    """Test the streaming writers."""
+
+    def test_ndjson(self, exporter, tmp_path):
+        """Test one normalized JSON object per line."""
+        count = exporter.write(iter(ROWS), tmp_path / "out.ndjson", "ndjson")
+
+        lines = (tmp_path / "out.ndjson").read_text().splitlines()
+        assert count == 2
+        assert json.loads(lines[0])["authors"] == ["Brandon Sanderson"]
+        assert json.loads(lines[1])["identifiers"] == {"isbn": "9780060853983"}
+
+    def test_json_and_xml(self, exporter, tmp_path):
+        """Test that incrementally written documents are well-formed."""
+        exporter.write(iter(ROWS), tmp_path / "out.json", "json")
+        exporter.write(iter(ROWS), tmp_path / "out.xml", "xml")
+
+        books = json.loads((tmp_path / "out.json").read_text())
+        assert [book["id"] for book in books] == [1, 2]
+        root = ET.parse(tmp_path / "out.xml").getroot()
+        assert root.findall("book")[1].findtext("authors") == (
+            "Terry Pratchett & Neil Gaiman"
+        )
+
+    def test_csv_flattens_lists(self, exporter, tmp_path):
+        """Test CSV header and multi-valued fields."""
+        exporter.write(iter(ROWS), tmp_path / "out.csv", "csv")
+
+        with open(tmp_path / "out.csv", newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert rows[1]["tags"] == "Humor, Fantasy"
+        assert rows[1]["identifiers"] == "isbn:9780060853983"
+
+    def test_failed_export_keeps_previous_file(self, exporter, tmp_path):
+        """Test that an interrupted export leaves the old file untouched."""
+        destination = tmp_path / "out.ndjson"
+        destination.write_text("previous export\n")
+
+        def broken_rows():
+            yield ROWS[0]
+            raise RuntimeError("read failed")
+
+        with pytest.raises(RuntimeError):
+            exporter.write(broken_rows(), destination, "ndjson")
+
+        assert destination.read_text() == "previous export\n"
+        assert list(tmp_path.iterdir()) == [destination]
+
+    def test_unknown_format(self, exporter, tmp_path):
+        """Test that unknown formats are rejected."""
+        with pytest.raises(ValueError):
+            exporter.write(iter(ROWS), tmp_path / "out.txt", "txt")
+
+
+class TestLinkOrCopy:
+    """Test hardlink-or-copy file export."""
+
+    def test_hardlinks_on_same_filesystem(self, tmp_path):
+        """Test that files are hardlinked when possible."""
+        (tmp_path / "source.epub").write_bytes(b"x" * 10)
+
+        size, linked = link_or_copy(tmp_path / "source.epub", tmp_path / "a/b.epub")
+
+        assert (size, linked) == (10, True)
+        assert os.path.samefile(tmp_path / "source.epub", tmp_path / "a/b.epub")
+
+    def test_copies_across_filesystems(self, tmp_path):
+        """Test the copy fallback when hardlinking fails."""
+        (tmp_path / "source.epub").write_bytes(b"x" * 10)
+
+        with patch("os.link", side_effect=OSError("cross-device link")):
+            size, linked = link_or_copy(
+                tmp_path / "source.epub", tmp_path / "copy.epub"
+            )
+
+        assert (size, linked) == (10, False)
+        assert (tmp_path / "copy.epub").read_bytes() == b"x" * 10
+
+
+class TestExportLibrary:
+    """Test CalibreIntegration.export_library."""
+
+    @pytest.fixture
+    def integration(self, tmp_path):
+        """Create a CalibreIntegration for a small library."""
+        create_calibre_library(tmp_path / "library", SAMPLE_BOOKS)
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(tmp_path / "library"),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        integration.cache_dir = tmp_path / "cache"
+        return integration
+
+    def test_filtered_export_with_files(self, integration, tmp_path):
+        """Test that filtered books and only their files are exported."""
+        integration._calibre_db.search_ids.return_value = [2]
+
+        result = integration.export_library(
+            tmp_path / "library",
+            tmp_path / "export" / "books.ndjson",
+            export_format="ndjson",
+            include_files=True,
+            filter_pattern="author:Gaiman",
+        )
+
+        assert result.book_count == 1
+        assert result.files_exported == 1
+        assert result.files_size == 50
+        exported = tmp_path / "export" / "books_files" / "Terry Pratchett"
+        assert [p.name for p in exported.rglob("*.pdf")] == [
+            "Good Omens - Terry Pratchett.pdf"
+        ]
+        integration._calibre_db.list_books.assert_not_called()
+        integration._calibre_db.list_books_iter.assert_not_called()
+
+    def test_calibre_format_exports_directory(self, integration, tmp_path):
+        """Test that the calibre format writes metadata and all files."""
+        result = integration.export_library(
+            tmp_path / "library", tmp_path / "backup", export_format="calibre"
+        )
+
+        assert result.book_count == 2
+        assert result.files_exported == 3
+        lines = (tmp_path / "backup" / "metadata.ndjson").read_text().splitlines()
+        assert json.loads(lines[0])["series"] == "The Stormlight Archive"
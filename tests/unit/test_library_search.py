@@ -0,0 +1,166 @@
+"""
+Unit tests for paged library search.
+
+Tests the search row/page objects, the search id cache and
+CalibreIntegration.search_library_page against a minimal Calibre library.
+"""
+
+import os
+import pytest
+from unittest.mock import Mock
+
+from calibre_books.core.calibre import CalibreIntegration
+from calibre_books.core.library_search import (
+    LibrarySearchRow,
+    SearchIdCache,
+    SearchPage,
+)
+from calibre_books.config.manager import ConfigManager
+from tests.fixtures.calibre_library import create_calibre_library
+
+
+SAMPLE_BOOKS = [
+    {"title": f"Book {number}", "authors": ["Brandon Sanderson"]}
+    for number in range(1, 6)
+]
+
+
+class TestLibrarySearchRow:
+    """Test LibrarySearchRow construction."""
+
+    def test_from_dict(self):
+        """Test creating a row from calibredb-style data."""
+        row = LibrarySearchRow.from_dict(
+            {
+                "id": "7",
+                "title": "Mistborn",
+                "authors": "Brandon Sanderson & Someone Else",
+                "series": "",
+                "rating": 8,
+                "tags": ["Fantasy"],
+            }
+        )
+
+        assert row.book_id == 7
+        assert row.author == "Brandon Sanderson"
+        assert row.series is None
+        assert row.stars == 4
+        assert row.extra == {"tags": ["Fantasy"]}
+
+    def test_unrated(self):
+        """Test that missing ratings have no stars."""
+        row = LibrarySearchRow.from_dict({"id": 1, "title": "X", "rating": 0})
+
+        assert row.stars is None
+        assert row.author is None
+
+
+class TestSearchPage:
+    """Test SearchPage paging helpers."""
+
+    def test_has_more(self):
+        """Test next offset on a middle page."""
+        rows = [LibrarySearchRow(book_id=i) for i in range(2)]
+        page = SearchPage(query="q", rows=rows, offset=2, limit=2, total=5)
+
+        assert page.has_more
+        assert page.next_offset == 4
+
+    def test_last_page(self):
+        """Test that the last page has no next offset."""
+        rows = [LibrarySearchRow(book_id=1)]
+        page = SearchPage(query="q", rows=rows, offset=4, limit=2, total=5)
+
+        assert not page.has_more
+        assert page.next_offset is None
+
+
+class TestSearchIdCache:
+    """Test the search id cache."""
+
+    def test_round_trip(self, tmp_path):
+        """Test storing and reading ids for the same version."""
+        cache = SearchIdCache(tmp_path / "search.db")
+
+        cache.put(tmp_path, "author:x", "v1", [3, 1, 2])
+
+        assert cache.get(tmp_path, "author:x", "v1") == [3, 1, 2]
+        assert cache.get(tmp_path, "author:y", "v1") is None
+
+    def test_version_change_invalidates(self, tmp_path):
+        """Test that a new library version misses the cache."""
+        cache = SearchIdCache(tmp_path / "search.db")
+
+        cache.put(tmp_path, "author:x", "v1", [1])
+
+        assert cache.get(tmp_path, "author:x", "v2") is None
+
+    def test_expired_entries(self, tmp_path):
+        """Test that entries older than the TTL are ignored."""
+        cache = SearchIdCache(tmp_path / "search.db", ttl_seconds=-1)
+
+        cache.put(tmp_path, "author:x", "v1", [1])
+
+        assert cache.get(tmp_path, "author:x", "v1") is None
+
+
+class TestSearchLibraryPage:
+    """Test CalibreIntegration.search_library_page."""
+
+    @pytest.fixture
+    def library(self, tmp_path):
+        """Create a small Calibre library."""
+        create_calibre_library(tmp_path / "library", SAMPLE_BOOKS)
+        return tmp_path / "library"
+
+    @pytest.fixture
+    def integration(self, library, tmp_path):
+        """Create a CalibreIntegration with a mocked calibredb search."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(library),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        integration._calibre_db.search_ids.return_value = [5, 3, 1, 2, 4]
+        integration._search_cache = SearchIdCache(tmp_path / "search.db")
+        return integration
+
+    def test_pages_keep_search_order(self, integration):
+        """Test that pages follow the order returned by calibredb search."""
+        first = integration.search_library_page("author:Sanderson", limit=2)
+        second = integration.search_library_page(
+            "author:Sanderson", limit=2, offset=first.next_offset
+        )
+
+        assert [row.book_id for row in first.rows] == [5, 3]
+        assert [row.title for row in second.rows] == ["Book 1", "Book 2"]
+        assert first.total == 5
+        assert not first.from_cache
+        assert second.from_cache
+        integration._calibre_db.search_ids.assert_called_once_with("author:Sanderson")
+        integration._calibre_db.list_books.assert_not_called()
+
+    def test_library_change_invalidates_cache(self, integration, library):
+        """Test that modifying metadata.db re-runs the search."""
+        integration.search_library_page("author:Sanderson", limit=2)
+
+        db_path = library / "metadata.db"
+        stat = db_path.stat()
+        os.utime(db_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        page = integration.search_library_page("author:Sanderson", limit=2)
+
+        assert not page.from_cache
+        assert integration._calibre_db.search_ids.call_count == 2
+
+    def test_projection(self, integration):
+        """Test that only requested fields are loaded."""
+        page = integration.search_library_page(
+            "author:Sanderson", limit=1, fields=["title", "path"]
+        )
+
+        row = page.rows[0]
+        assert row.title == "Book 5"
+        assert row.authors == []
+        assert "path" in row.extra
@@ -0,0 +1,207 @@
+"""
+Unit tests for the incremental library snapshot index.
+
+Tests LibrarySnapshot refreshes and consumer checkpoints against a minimal
+Calibre library, and the CalibreIntegration APIs built on top of it.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from calibre_books.core.calibre import CalibreIntegration
+from calibre_books.core.library_snapshot import LibrarySnapshot, SnapshotDiff
+from calibre_books.core.metadata_store import CalibreMetadataStore
+from calibre_books.config.manager import ConfigManager
+from tests.fixtures.calibre_library import create_calibre_library, modify_library
+
+
+SAMPLE_BOOKS = [
+    {
+        "title": "The Way of Kings",
+        "authors": ["Brandon Sanderson"],
+        "identifiers": {"amazon": "B003P2WO5E"},
+        "formats": {"epub": b"x" * 100, "mobi": b"x" * 300},
+    },
+    {"title": "Mistborn", "authors": ["Brandon Sanderson"]},
+    {"title": "Good Omens", "authors": ["Terry Pratchett", "Neil Gaiman"]},
+]
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Create a small Calibre library in a subdirectory of tmp_path."""
+    create_calibre_library(tmp_path / "library", SAMPLE_BOOKS)
+    return tmp_path / "library"
+
+
+@pytest.fixture
+def snapshot(library, tmp_path):
+    """Create a snapshot stored next to the library."""
+    return LibrarySnapshot(
+        CalibreMetadataStore(library), snapshot_path=tmp_path / "snapshot.db"
+    )
+
+
+class TestSnapshotDiff:
+    """Test SnapshotDiff helpers."""
+
+    def test_modified_ids(self):
+        """Test that added and changed ids are merged in order."""
+        diff = SnapshotDiff(added=[5], changed=[2, 7], removed=[1])
+
+        assert diff.has_changes
+        assert diff.modified_ids == [2, 5, 7]
+        assert not SnapshotDiff().has_changes
+
+
+class TestLibrarySnapshot:
+    """Test incremental snapshot refreshes."""
+
+    def test_initial_refresh(self, snapshot, library):
+        """Test that the first refresh records every book."""
+        diff = snapshot.refresh()
+
+        assert diff.added == [1, 2, 3]
+        assert diff.generation == 1
+        books = list(snapshot.iter_books())
+        assert books[0]["format_sizes"] == {"EPUB": 100, "MOBI": 300}
+        assert books[0]["size"] == 300
+        assert books[0]["identifiers"] == {"amazon": "B003P2WO5E"}
+        assert books[2]["authors"] == ["Terry Pratchett", "Neil Gaiman"]
+        assert books[1]["formats"] == []
+
+    def test_unchanged_refresh(self, snapshot):
+        """Test that refreshing an unchanged library finds nothing."""
+        snapshot.refresh()
+
+        diff = snapshot.refresh()
+
+        assert not diff.has_changes
+        assert diff.generation == 1
+
+    def test_detects_changes(self, snapshot, library):
+        """Test last_modified, data row and removal detection."""
+        snapshot.refresh()
+        modify_library(
+            library,
+            "UPDATE books SET last_modified = '2025-01-01 00:00:00+00:00' "
+            "WHERE id = 2",
+            "INSERT INTO data (book, format, uncompressed_size, name) "
+            "VALUES (3, 'EPUB', 42, 'Good Omens')",
+            "DELETE FROM books WHERE id = 1",
+        )
+
+        diff = snapshot.refresh()
+
+        assert diff.added == []
+        assert diff.changed == [2, 3]
+        assert diff.removed == [1]
+        assert diff.generation == 2
+        assert [book["id"] for book in snapshot.iter_books()] == [2, 3]
+        assert list(snapshot.iter_books([3]))[0]["format_sizes"] == {"EPUB": 42}
+
+    def test_consumer_checkpoints(self, snapshot, library):
+        """Test that each consumer sees changes since its own checkpoint."""
+        snapshot.refresh()
+        first = snapshot.changes_since("asin")
+        assert first.added == [1, 2, 3]
+        snapshot.mark_processed("asin", first.generation)
+
+        modify_library(
+            library,
+            "UPDATE books SET last_modified = '2025-01-01 00:00:00+00:00' "
+            "WHERE id = 3",
+        )
+        snapshot.refresh()
+
+        assert snapshot.changes_since("asin").changed == [3]
+        assert snapshot.changes_since("asin").added == []
+        assert snapshot.changes_since("kfx").added == [1, 2, 3]
+
+    def test_failed_books_stay_pending(self, snapshot, library):
+        """Test that failed books are offered again until they succeed."""
+        snapshot.refresh()
+        first = snapshot.changes_since("asin")
+        snapshot.mark_processed("asin", first.generation, pending=[2])
+
+        second = snapshot.changes_since("asin")
+        assert second.changed == [2]
+        snapshot.mark_processed("asin", second.generation)
+
+        assert not snapshot.changes_since("asin").has_changes
+
+    def test_own_writes_are_not_changes(self, snapshot, library):
+        """Test that books written by the consumer are not reprocessed."""
+        snapshot.refresh()
+        changes = snapshot.changes_since("asin")
+        modify_library(
+            library,
+            "UPDATE books SET last_modified = '2025-01-01 00:00:00+00:00' "
+            "WHERE id IN (1, 3)",
+        )
+        snapshot.refresh()
+
+        # Book 1 was written by the consumer, book 3 changed meanwhile
+        snapshot.mark_processed("asin", changes.generation, own_writes=[1])
+
+        assert snapshot.changes_since("asin").changed == [3]
+
+
+class TestCalibreIntegrationSnapshot:
+    """Test CalibreIntegration change tracking."""
+
+    @pytest.fixture
+    def integration(self, library, tmp_path):
+        """Create a CalibreIntegration whose calibredb must not be used."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(library),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        integration.cache_dir = tmp_path / "cache"
+        return integration
+
+    def test_asin_update_processes_changed_books(self, integration, library):
+        """Test restricting ASIN updates to changed books."""
+        changes = integration.get_library_changes("asin")
+        integration.mark_library_changes_processed("asin", changes)
+
+        modify_library(
+            library,
+            "UPDATE books SET last_modified = '2025-01-01 00:00:00+00:00' "
+            "WHERE id = 3",
+        )
+        changes = integration.get_library_changes("asin")
+        books = integration.get_books_for_asin_update(
+            missing_only=True, book_ids=changes.modified_ids
+        )
+
+        assert [book.calibre_id for book in books] == [3]
+
+    def test_asin_writes_do_not_mark_books_changed(self, integration, library):
+        """Test that a changed-only run does not see its own ASIN writes."""
+        changes = integration.get_library_changes("asin")
+        outcomes = integration.update_asins_batch(
+            [{"book_id": 2, "asin": "B002GYI9C4"}]
+        )
+        assert outcomes[0].success
+
+        integration.mark_library_changes_processed(
+            "asin", changes, failed_ids=[3], written_ids=[2]
+        )
+
+        assert integration.get_library_changes("asin").modified_ids == [3]
+
+    def test_no_change_tracking_without_metadata_db(self, tmp_path):
+        """Test that libraries without metadata.db report no changes."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(tmp_path),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+
+        assert integration.get_library_changes("asin") is None
@@ -0,0 +1,143 @@
+"""
+Unit tests for library statistics computed in metadata.db.
+
+Tests the aggregate queries of LibraryStatsReader, the version keyed
+StatsCache and CalibreIntegration.get_library_stats on a minimal library.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+
+from calibre_books.core.calibre import CalibreIntegration
+from calibre_books.core.library_stats import LibraryStatsReader, StatsCache
+from calibre_books.config.manager import ConfigManager
+from tests.fixtures.calibre_library import create_calibre_library, modify_library
+
+
+SAMPLE_BOOKS = [
+    {
+        "title": "The Way of Kings",
+        "authors": ["Brandon Sanderson"],
+        "series": "The Stormlight Archive",
+        "identifiers": {"amazon": "B003P2WO5E"},
+        "formats": {"epub": b"x" * 100, "mobi": b"x" * 300},
+    },
+    {
+        "title": "Words of Radiance",
+        "authors": ["Brandon Sanderson"],
+        "series": "The Stormlight Archive",
+        "formats": {"epub": b"x" * 200},
+    },
+    {
+        "title": "Mistborn",
+        "authors": ["Brandon Sanderson"],
+        "series": "Mistborn",
+        "formats": {"epub": b"x" * 50},
+    },
+    {
+        "title": "Good Omens",
+        "authors": ["Terry Pratchett", "Neil Gaiman"],
+        "formats": {"pdf": b"x" * 1000},
+    },
+    {"title": "No Files", "authors": ["Neil Gaiman"]},
+]
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Create a small Calibre library in a subdirectory of tmp_path."""
+    create_calibre_library(tmp_path / "library", SAMPLE_BOOKS)
+    return tmp_path / "library"
+
+
+class TestLibraryStatsReader:
+    """Test aggregate statistics queries."""
+
+    def test_read_stats(self, library):
+        """Test counts, distributions and size percentiles."""
+        stats = LibraryStatsReader(library).read_stats()
+
+        assert stats.total_books == 5
+        assert stats.total_authors == 3
+        assert stats.total_series == 2
+        assert stats.library_size == 300 + 200 + 50 + 1000
+        assert stats.format_distribution == {"epub": 3, "mobi": 1, "pdf": 1}
+        assert stats.books_without_asin == 4
+        assert stats.top_authors == [
+            ("Brandon Sanderson", 3),
+            ("Neil Gaiman", 2),
+            ("Terry Pratchett", 1),
+        ]
+        assert stats.top_series == [
+            ("The Stormlight Archive", 2),
+            ("Mistborn", 1),
+        ]
+        assert stats.size_percentiles == {
+            "p50": 200,
+            "p90": 1000,
+            "p99": 1000,
+            "max": 1000,
+        }
+
+    def test_version_key_tracks_last_modified(self, library):
+        """Test that the version key changes with last_modified."""
+        reader = LibraryStatsReader(library)
+        version = reader.version_key()
+
+        assert reader.version_key() == version
+        modify_library(
+            library,
+            "UPDATE books SET last_modified = '2025-01-01 00:00:00+00:00' "
+            "WHERE id = 2",
+        )
+        assert reader.version_key() != version
+
+
+class TestStatsCache:
+    """Test the statistics cache."""
+
+    def test_round_trip(self, library, tmp_path):
+        """Test that cached statistics survive serialization."""
+        cache = StatsCache(tmp_path / "stats.db")
+        stats = LibraryStatsReader(library).read_stats()
+
+        cache.put(library, "v1", stats)
+
+        cached = cache.get(library, "v1")
+        assert cached.top_authors == stats.top_authors
+        assert cached.size_percentiles == stats.size_percentiles
+        assert cache.get(library, "v2") is None
+
+
+class TestGetLibraryStats:
+    """Test CalibreIntegration.get_library_stats."""
+
+    @pytest.fixture
+    def integration(self, library, tmp_path):
+        """Create a CalibreIntegration whose calibredb list must not be used."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(library),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        integration._calibre_db.find_duplicates.return_value = Mock(
+            success=True, output=""
+        )
+        integration.cache_dir = tmp_path / "cache"
+        return integration
+
+    def test_repeat_calls_use_cache(self, integration, library):
+        """Test that statistics are recomputed only after the library changes."""
+        first = integration.get_library_stats(detailed=True)
+
+        with patch.object(LibraryStatsReader, "read_stats") as mock_read:
+            second = integration.get_library_stats(detailed=True)
+        mock_read.assert_not_called()
+        assert second.total_books == first.total_books == 5
+        assert second.top_series == first.top_series
+
+        modify_library(library, "DELETE FROM books WHERE id = 5")
+        assert integration.get_library_stats().total_books == 4
+        integration._calibre_db.list_books_iter.assert_not_called()
@@ -0,0 +1,182 @@
+"""
+Unit tests for rule-based metadata fixing.
+
+Tests the built-in metadata rules, the batching MetadataRuleEngine with its
+per-rule statistics and CalibreIntegration.fix_metadata_issues on a minimal
+library.
+"""
+
+import sqlite3
+import pytest
+from unittest.mock import Mock
+
+from calibre_books.core.calibre import CalibreIntegration
+from calibre_books.core.metadata_rules import (
+    DEFAULT_BATCH_SIZE,
+    AuthorCaseRule,
+    InvalidSeriesIndexRule,
+    MetadataRule,
+    MetadataRuleEngine,
+    TitleCaseRule,
+)
+from calibre_books.config.manager import ConfigManager
+from tests.fixtures.calibre_library import create_calibre_library
+
+
+SAMPLE_BOOKS = [
+    {"title": "THE WAY OF KINGS", "authors": ["brandon sanderson"]},
+    {"title": "Mistborn", "authors": ["Brandon Sanderson"], "series_index": -1.0},
+    {"title": "Good Omens", "authors": ["Terry Pratchett", "Neil Gaiman"]},
+]
+
+
+class CountingRule(MetadataRule):
+    """Rule flagging every book, used to test batching."""
+
+    name = "counting"
+    fields = ("title", "tags")
+
+    def check(self, book):
+        return {"comments": "checked"}
+
+
+class TestRules:
+    """Test the built-in rules."""
+
+    def test_title_case(self):
+        """Test title case fixing with lower-case small words."""
+        rule = TitleCaseRule()
+
+        assert rule.check({"title": "THE WAY OF KINGS"}) == {
+            "title": "The Way of Kings"
+        }
+        assert rule.check({"title": "The Way of Kings"}) is None
+
+    def test_author_case(self):
+        """Test that only badly cased names are changed."""
+        rule = AuthorCaseRule()
+
+        assert rule.check({"authors": ["neil gaiman", "Terry Pratchett"]}) == {
+            "authors": "Neil Gaiman & Terry Pratchett"
+        }
+        assert rule.check({"authors": ["Neil Gaiman"]}) is None
+
+    def test_invalid_series_index(self):
+        """Test non-positive and non-numeric series indexes."""
+        rule = InvalidSeriesIndexRule()
+
+        assert rule.check({"series_index": -1.0}) == {"series_index": 1.0}
+        assert rule.check({"series_index": "x"}) == {"series_index": 1.0}
+        assert rule.check({"series_index": 3.0}) is None
+
+
+class TestMetadataRuleEngine:
+    """Test batching, field selection and statistics."""
+
+    def test_fields_are_union_of_rules(self):
+        """Test that only declared fields are requested."""
+        engine = MetadataRuleEngine([TitleCaseRule(), CountingRule()])
+
+        assert engine.fields == ["id", "title", "tags"]
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_batches_and_stats(self, max_workers):
+        """Test that batches keep input order and stats add up."""
+        books = [{"id": i, "title": "Title"} for i in range(1, 26)]
+        engine = MetadataRuleEngine(
+            [CountingRule()], batch_size=10, max_workers=max_workers
+        )
+
+        batches = list(engine.run(iter(books)))
+
+        assert [batch.books_checked for batch in batches] == [10, 10, 5]
+        assert list(batches[1].fixes) == list(range(11, 21))
+        stats = engine.stats["counting"]
+        assert (stats.books_checked, stats.issues_found) == (25, 25)
+        assert stats.seconds >= 0
+
+
+class TestFixMetadataIssues:
+    """Test CalibreIntegration.fix_metadata_issues."""
+
+    @pytest.fixture
+    def library(self, tmp_path):
+        """Create a small Calibre library."""
+        create_calibre_library(tmp_path / "library", SAMPLE_BOOKS)
+        return tmp_path / "library"
+
+    @pytest.fixture
+    def integration(self, library, tmp_path):
+        """Create a CalibreIntegration with a mocked calibredb."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(library),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        integration._calibre_db.set_metadata.return_value = Mock(success=True)
+        integration.cache_dir = tmp_path / "cache"
+        return integration
+
+    def test_dry_run_reports_rules(self, integration):
+        """Test per-rule counts without writing anything."""
+        result = integration.fix_metadata_issues(dry_run=True)
+
+        assert result.issues_found == 3
+        assert result.issues_by_type == {
+            "title_case": 1,
+            "author_case": 1,
+            "invalid_series_index": 1,
+        }
+        stats = {stats.name: stats for stats in result.rule_stats}
+        assert stats["missing_series_index"].books_checked == 3
+        integration._calibre_db.set_metadata.assert_not_called()
+        integration._calibre_db.list_books_iter.assert_not_called()
+
+    def test_fixes_split_between_writer_and_calibredb(self, integration, library):
+        """Test that series indexes are written directly, names via calibredb."""
+        result = integration.fix_metadata_issues(dry_run=False)
+
+        integration._calibre_db.set_metadata.assert_called_once_with(
+            1, {"title": "The Way of Kings", "authors": "Brandon Sanderson"}
+        )
+        conn = sqlite3.connect(str(library / "metadata.db"))
+        series_index = conn.execute(
+            "SELECT series_index FROM books WHERE id = 2"
+        ).fetchone()[0]
+        conn.close()
+        assert series_index == 1.0
+        assert result.issues_fixed == 3
+        assert all(
+            stats.issues_fixed == stats.issues_found for stats in result.rule_stats
+        )
+
+    def test_fixes_across_batches_written_directly(self, integration, tmp_path):
+        """Test that fixes spanning several batches do not fall back to calibredb."""
+        books = [
+            {"title": f"Book {i}", "authors": ["Test Author"], "series_index": -1.0}
+            for i in range(1, DEFAULT_BATCH_SIZE * 2 + 2)
+        ]
+        library = tmp_path / "large"
+        create_calibre_library(library, books)
+
+        result = integration.fix_metadata_issues(library_path=library, dry_run=False)
+
+        integration._calibre_db.set_metadata.assert_not_called()
+        conn = sqlite3.connect(str(library / "metadata.db"))
+        indexes = {row[0] for row in conn.execute("SELECT series_index FROM books")}
+        conn.close()
+        assert indexes == {1.0}
+        assert result.issues_found == result.issues_fixed == len(books)
+
+    def test_failed_writes_are_not_counted(self, integration):
+        """Test that issues only count as fixed once their write succeeded."""
+        integration._calibre_db.set_metadata.return_value = Mock(
+            success=False, error="database is locked"
+        )
+
+        result = integration.fix_metadata_issues(dry_run=False)
+
+        assert result.issues_found == 3
+        assert result.issues_fixed == 1
@@ -0,0 +1,215 @@
+"""
+Unit tests for direct read-only metadata.db access.
+
+Tests CalibreMetadataStore against a minimal Calibre library and the
+CalibreIntegration read paths that use it instead of calibredb list.
+"""
+
+import pytest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from calibre_books.core.calibre import CalibreIntegration
+from calibre_books.core.metadata_store import (
+    CalibreMetadataStore,
+    MetadataStoreError,
+    UnsupportedSchemaError,
+)
+from calibre_books.config.manager import ConfigManager
+from tests.fixtures.calibre_library import create_calibre_library
+
+
+SAMPLE_BOOKS = [
+    {
+        "title": "The Way of Kings",
+        "authors": ["Brandon Sanderson"],
+        "series": "Stormlight Archive",
+        "series_index": 1.0,
+        "identifiers": {"amazon": "B003P2WO5E", "isbn": "9780765326355"},
+        "formats": {"epub": b"x" * 100, "mobi": b"x" * 300},
+        "tags": ["Fantasy", "Epic"],
+    },
+    {
+        "title": "Good Omens",
+        "authors": ["Terry Pratchett", "Neil Gaiman"],
+        "formats": {"pdf": b"x" * 50},
+    },
+    {
+        "title": "Mistborn",
+        "authors": ["Brandon Sanderson"],
+        "identifiers": {"goodreads": "68428"},
+    },
+]
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Create a small Calibre library."""
+    create_calibre_library(tmp_path, SAMPLE_BOOKS)
+    return tmp_path
+
+
+class TestCalibreMetadataStore:
+    """Test the read-only metadata.db query engine."""
+
+    def test_missing_database(self, tmp_path):
+        """Test that a directory without metadata.db is rejected."""
+        with pytest.raises(MetadataStoreError):
+            CalibreMetadataStore(tmp_path)
+
+    def test_unknown_schema_version(self, tmp_path):
+        """Test that unknown schema versions are rejected."""
+        create_calibre_library(tmp_path, [], schema_version=99)
+
+        with pytest.raises(UnsupportedSchemaError):
+            CalibreMetadataStore(tmp_path)
+
+    def test_iter_books_joins_related_tables(self, library):
+        """Test that authors, series, identifiers and formats are joined."""
+        store = CalibreMetadataStore(library)
+
+        books = list(store.iter_books())
+
+        assert [book["id"] for book in books] == [1, 2, 3]
+        first = books[0]
+        assert first["title"] == "The Way of Kings"
+        assert first["authors"] == ["Brandon Sanderson"]
+        assert first["series"] == "Stormlight Archive"
+        assert first["identifiers"] == {
+            "amazon": "B003P2WO5E",
+            "isbn": "9780765326355",
+        }
+        assert first["isbn"] == "9780765326355"
+        assert first["formats"] == ["EPUB", "MOBI"]
+        assert first["size"] == 300
+        assert first["tags"] == ["Epic", "Fantasy"]
+        assert first["pubdate"] == "2020-01-01T00:00:00+00:00"
+        assert first["path"] == str(library / "Brandon Sanderson/The Way of Kings (1)")
+
+        assert books[1]["authors"] == ["Terry Pratchett", "Neil Gaiman"]
+        assert books[2]["formats"] == []
+        assert books[2]["series"] is None
+
+    def test_iter_books_field_projection(self, library):
+        """Test that only requested fields are returned."""
+        store = CalibreMetadataStore(library)
+
+        books = list(store.iter_books(["title", "unknown_field"]))
+
+        assert books[0] == {"id": 1, "title": "The Way of Kings"}
+
+    def test_iter_books_filters(self, library):
+        """Test restricting results by id and missing identifier."""
+        store = CalibreMetadataStore(library)
+
+        by_id = list(store.iter_books(["id"], book_ids=[3, 1]))
+        without_asin = list(store.iter_books(["id"], without_identifier="amazon"))
+
+        assert [book["id"] for book in by_id] == [1, 3]
+        assert [book["id"] for book in without_asin] == [2, 3]
+        assert store.count_books() == 3
+        assert store.count_books(without_identifier="amazon") == 2
+        assert store.count_books(book_ids=[2, 3], without_identifier="amazon") == 2
+
+    def test_database_opened_read_only(self, library):
+        """Test that connections cannot modify metadata.db."""
+        store = CalibreMetadataStore(library)
+
+        with store._connect() as conn:
+            with pytest.raises(Exception):
+                conn.execute("DELETE FROM books")
+
+
+class TestCalibreIntegrationMetadataStore:
+    """Test CalibreIntegration read paths backed by metadata.db."""
+
+    @pytest.fixture
+    def integration(self, library, tmp_path):
+        """Create a CalibreIntegration whose calibredb must not be used."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(library),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        integration.cache_dir = tmp_path / "cache"
+        return integration
+
+    def test_library_stats_from_metadata_db(self, integration):
+        """Test statistics without calling calibredb list."""
+        integration._calibre_db.find_duplicates.return_value = Mock(
+            success=True, output=""
+        )
+
+        stats = integration.get_library_stats(detailed=True)
+
+        assert stats.total_books == 3
+        assert stats.total_authors == 3
+        assert stats.total_series == 1
+        assert stats.library_size == 350
+        assert stats.format_distribution == {"epub": 1, "mobi": 1, "pdf": 1}
+        assert stats.books_without_asin == 2
+        assert stats.top_authors[0] == ("Brandon Sanderson", 2)
+        integration._calibre_db.list_books.assert_not_called()
+        integration._calibre_db.list_books_iter.assert_not_called()
+
+    def test_books_for_asin_update_missing_only(self, integration):
+        """Test that missing-ASIN filtering happens in SQL."""
+        books = integration.get_books_for_asin_update(missing_only=True)
+
+        assert [book.calibre_id for book in books] == [2, 3]
+        integration._calibre_db.list_books.assert_not_called()
+
+    def test_search_resolves_ids_with_calibredb(self, integration):
+        """Test that search expressions are resolved by calibredb search."""
+        integration._calibre_db.search_ids.return_value = [3, 1]
+
+        books = integration.search_library("author:Sanderson", limit=1)
+
+        integration._calibre_db.search_ids.assert_called_once_with("author:Sanderson")
+        assert [book.title for book in books] == ["The Way of Kings"]
+        assert books[0].asin == "B003P2WO5E"
+
+    def test_falls_back_to_calibredb_for_unknown_schema(self, tmp_path):
+        """Test the calibredb fallback when the schema version is unknown."""
+        create_calibre_library(tmp_path, SAMPLE_BOOKS, schema_version=99)
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(tmp_path),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        integration._calibre_db.list_books_iter.return_value = iter(
+            [{"id": 7, "title": "CLI Book"}]
+        )
+
+        stats = integration.get_library_stats()
+
+        assert stats.total_books == 1
+        integration._calibre_db.list_books_iter.assert_called_once()
+
+
+class TestCalibreDBSearchIds:
+    """Test resolving search expressions to book ids."""
+
+    def test_search_ids(self):
+        """Test parsing of calibredb search output."""
+        from calibre_books.core.calibre import CalibreDB, CalibreResult
+
+        with (
+            patch.object(CalibreDB, "_validate_library"),
+            patch.object(CalibreDB, "_validate_cli"),
+            patch.object(CalibreDB, "execute_command") as mock_exec,
+        ):
+            mock_exec.return_value = CalibreResult(True, "3,1,12", "", 0, [])
+            calibre_db = CalibreDB(Path("/test/library"), "calibredb")
+
+            assert calibre_db.search_ids("title:x") == [3, 1, 12]
+            mock_exec.assert_called_once_with(["search", "title:x"])
+
+            mock_exec.return_value = CalibreResult(
+                False, "", "No books matching the search expression", 1, []
+            )
+            assert calibre_db.search_ids("title:none") == []
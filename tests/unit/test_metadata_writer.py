@@ -0,0 +1,215 @@
+"""
+Unit tests for batched identifier writes to metadata.db.
+
+Tests CalibreMetadataWriter and the CalibreIntegration ASIN update paths
+that use it, including the calibredb fallback.
+"""
+
+import sqlite3
+import pytest
+from unittest.mock import Mock, patch
+
+from calibre_books.core.calibre import CalibreError, CalibreIntegration
+from calibre_books.core.metadata_store import MetadataStoreError
+from calibre_books.core.metadata_writer import CalibreMetadataWriter
+from calibre_books.config.manager import ConfigManager
+from tests.fixtures.calibre_library import create_calibre_library
+
+
+SAMPLE_BOOKS = [
+    {
+        "title": "The Way of Kings",
+        "authors": ["Brandon Sanderson"],
+        "identifiers": {"isbn": "9780765326355", "goodreads": "7235533"},
+    },
+    {
+        "title": "Mistborn",
+        "authors": ["Brandon Sanderson"],
+        "identifiers": {"amazon": "B000OLD000"},
+    },
+]
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Create a small Calibre library in a subdirectory of tmp_path."""
+    create_calibre_library(tmp_path / "library", SAMPLE_BOOKS)
+    return tmp_path / "library"
+
+
+def read_identifiers(library, book_id):
+    """Read a book's identifiers straight from metadata.db."""
+    conn = sqlite3.connect(str(library / "metadata.db"))
+    try:
+        return dict(
+            conn.execute(
+                "SELECT type, val FROM identifiers WHERE book = ?", (book_id,)
+            ).fetchall()
+        )
+    finally:
+        conn.close()
+
+
+class TestCalibreMetadataWriter:
+    """Test transactional identifier upserts."""
+
+    def test_upsert_merges_identifiers(self, library, tmp_path):
+        """Test that other identifier types are preserved."""
+        writer = CalibreMetadataWriter(library, backup_dir=tmp_path / "backups")
+
+        results = writer.upsert_identifiers(
+            {1: {"amazon": "B003P2WO5E"}, 2: {"amazon": "B002GYI9C4"}}
+        )
+
+        assert all(result.success for result in results.values())
+        assert results[2].previous == {"amazon": "B000OLD000"}
+        assert read_identifiers(library, 1) == {
+            "isbn": "9780765326355",
+            "goodreads": "7235533",
+            "amazon": "B003P2WO5E",
+        }
+        assert read_identifiers(library, 2) == {"amazon": "B002GYI9C4"}
+        assert len(list((tmp_path / "backups").glob("metadata_backup_*.db"))) == 1
+
+    def test_backup_keeps_newest_copies(self, library, tmp_path):
+        """Test that backups get unique names and old copies are pruned."""
+        backup_dir = tmp_path / "backups"
+        writer = CalibreMetadataWriter(library, backup_dir=backup_dir, keep_backups=2)
+
+        paths = [writer.backup() for _ in range(4)]
+
+        assert len(set(paths)) == 4
+        assert sorted(backup_dir.glob("metadata_backup_*.db")) == paths[-2:]
+
+    def test_upsert_marks_books_dirty(self, library):
+        """Test that Calibre is told to regenerate metadata.opf files."""
+        writer = CalibreMetadataWriter(library)
+
+        writer.upsert_identifiers({1: {"amazon": "B003P2WO5E"}}, backup=False)
+
+        conn = sqlite3.connect(str(library / "metadata.db"))
+        dirty = [row[0] for row in conn.execute("SELECT book FROM metadata_dirtied")]
+        modified = conn.execute(
+            "SELECT last_modified FROM books WHERE id = 1"
+        ).fetchone()[0]
+        conn.close()
+        assert dirty == [1]
+        assert not modified.startswith("2024-01-01")
+
+    def test_unknown_book_reported(self, library):
+        """Test per-book outcome for a missing book id."""
+        writer = CalibreMetadataWriter(library)
+
+        results = writer.upsert_identifiers(
+            {99: {"amazon": "B003P2WO5E"}}, backup=False
+        )
+
+        assert not results[99].success
+        assert results[99].error == "Book not found"
+
+    def test_locked_database_rolls_back(self, library):
+        """Test that a locked database raises without partial writes."""
+        writer = CalibreMetadataWriter(library, busy_timeout=0.1)
+        blocker = sqlite3.connect(str(library / "metadata.db"), isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+
+        try:
+            with pytest.raises(MetadataStoreError):
+                writer.upsert_identifiers({1: {"amazon": "B003P2WO5E"}}, backup=False)
+        finally:
+            blocker.execute("ROLLBACK")
+            blocker.close()
+
+        assert "amazon" not in read_identifiers(library, 1)
+
+    def test_update_book_columns(self, library):
+        """Test batched column updates in one transaction."""
+        writer = CalibreMetadataWriter(library)
+
+        results = writer.update_book_columns(
+            {1: {"series_index": 2.0}, 99: {"series_index": 1.0}}, backup=False
+        )
+
+        conn = sqlite3.connect(str(library / "metadata.db"))
+        series_index = conn.execute(
+            "SELECT series_index FROM books WHERE id = 1"
+        ).fetchone()[0]
+        conn.close()
+        assert results == {1: True, 99: False}
+        assert series_index == 2.0
+
+    def test_update_book_columns_rejects_title(self, library):
+        """Test that columns Calibre derives file paths from are refused."""
+        writer = CalibreMetadataWriter(library)
+
+        with pytest.raises(ValueError):
+            writer.update_book_columns({1: {"title": "Renamed"}}, backup=False)
+
+
+class TestCalibreIntegrationASINUpdates:
+    """Test CalibreIntegration.update_asins_batch."""
+
+    @pytest.fixture
+    def integration(self, library):
+        """Create a CalibreIntegration with a mocked calibredb."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(library),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        return integration
+
+    def test_batch_update_uses_single_transaction(self, integration, library):
+        """Test that direct writes bypass calibredb entirely."""
+        outcomes = integration.update_asins_batch(
+            [
+                {"book_id": 1, "asin": "B003P2WO5E"},
+                {"book_id": 2, "asin": "B002GYI9C4"},
+                {"book_id": None, "asin": "B000000000"},
+            ]
+        )
+
+        assert [outcome.success for outcome in outcomes] == [False, True, True]
+        assert outcomes[2].previous_asin == "B000OLD000"
+        integration._calibre_db.set_metadata.assert_not_called()
+        assert read_identifiers(library, 1)["isbn"] == "9780765326355"
+
+    def test_calibredb_fallback_merges_identifiers(self, integration, library):
+        """Test that the calibredb path sends the merged identifier set."""
+        integration._calibre_db.set_metadata.return_value = Mock(success=True)
+
+        with patch.object(
+            CalibreMetadataWriter,
+            "upsert_identifiers",
+            side_effect=MetadataStoreError("database is locked"),
+        ):
+            updated = integration.update_asins([{"book_id": 1, "asin": "B003P2WO5E"}])
+
+        assert updated == 1
+        integration._calibre_db.set_metadata.assert_called_once_with(
+            1,
+            {"identifiers": "isbn:9780765326355,goodreads:7235533,amazon:B003P2WO5E"},
+        )
+
+    def test_calibredb_fallback_skips_unknown_identifiers(self, integration, library):
+        """Test that books without readable identifiers are not overwritten."""
+        with (
+            patch.object(
+                CalibreMetadataWriter,
+                "upsert_identifiers",
+                side_effect=MetadataStoreError("database is locked"),
+            ),
+            patch.object(
+                integration, "_read_books_data", side_effect=CalibreError("list failed")
+            ),
+        ):
+            outcomes = integration.update_asins_batch(
+                [{"book_id": 1, "asin": "B003P2WO5E"}]
+            )
+
+        assert not outcomes[0].success
+        assert "identifiers" in outcomes[0].error
+        integration._calibre_db.set_metadata.assert_not_called()
+        assert read_identifiers(library, 1)["isbn"] == "9780765326355"
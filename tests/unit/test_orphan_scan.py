@@ -0,0 +1,194 @@
+"""
+Unit tests for native orphan detection.
+
+Tests OrphanScanner classification, the JSON report round trip and
+CalibreIntegration.cleanup_orphaned_files on a minimal library.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from calibre_books.core.calibre import CalibreIntegration
+from calibre_books.core.metadata_store import CalibreMetadataStore
+from calibre_books.core.orphan_scan import OrphanReport, OrphanScanner
+from calibre_books.config.manager import ConfigManager
+from tests.fixtures.calibre_library import create_calibre_library, modify_library
+
+
+SAMPLE_BOOKS = [
+    {
+        "title": "Elantris",
+        "authors": ["Brandon Sanderson"],
+        "formats": {"epub": b"e" * 100, "mobi": b"m" * 50},
+    },
+    {
+        "title": "Mistborn",
+        "authors": ["Brandon Sanderson"],
+        "formats": {"epub": b"e" * 70},
+    },
+]
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Create a library with orphans, a missing file and an extra directory."""
+    library = tmp_path / "library"
+    create_calibre_library(library, SAMPLE_BOOKS)
+
+    book_dir = library / "Brandon Sanderson" / "Elantris (1)"
+    (book_dir / "metadata.opf").write_text("<package/>")
+    (book_dir / "cover.jpg").write_bytes(b"c")
+    (book_dir / "data").mkdir()
+    (book_dir / "data" / "notes.txt").write_text("extra file")
+    (book_dir / "Elantris - old.pdf").write_bytes(b"p" * 30)
+    (book_dir / "convert.tmp").write_bytes(b"t" * 5)
+
+    mistborn_dir = library / "Brandon Sanderson" / "Mistborn (2)"
+    (mistborn_dir / "Mistborn - Brandon Sanderson.epub").unlink()
+
+    extra = library / "Removed Author" / "Old Book (9)"
+    extra.mkdir(parents=True)
+    (extra / "Old Book.epub").write_bytes(b"o" * 40)
+    (library / ".caltrash").mkdir()
+    (library / ".caltrash" / "deleted.epub").write_bytes(b"d")
+
+    # Files book-tool itself keeps in the library
+    (library / "metadata_backup_20250101_120000.db").write_bytes(b"b")
+    (book_dir / "kfx_output").mkdir()
+    (book_dir / "kfx_output" / "Elantris_kfx.azw3").write_bytes(b"k")
+    (book_dir / "kfx_output" / ".book-tool-journal.db").write_bytes(b"j")
+    return library
+
+
+def scan(library):
+    """Run an orphan scan using metadata.db."""
+    store = CalibreMetadataStore(library)
+    return OrphanScanner(library, max_workers=2).scan(
+        store.iter_files(), [book["path"] for book in store.iter_books(["path"])]
+    )
+
+
+class TestOrphanScanner:
+    """Test orphan classification."""
+
+    def test_classification(self, library):
+        """Test orphaned, missing and extra directory detection."""
+        report = scan(library)
+
+        assert sorted((e.path, e.size, e.temporary) for e in report.orphaned_files) == [
+            ("Brandon Sanderson/Elantris (1)/Elantris - old.pdf", 30, False),
+            ("Brandon Sanderson/Elantris (1)/convert.tmp", 5, True),
+        ]
+        assert [(e.path, e.book_id) for e in report.missing_files] == [
+            ("Brandon Sanderson/Mistborn (2)/Mistborn - Brandon Sanderson.epub", 2)
+        ]
+        assert [(e.path, e.size) for e in report.extra_directories] == [
+            ("Removed Author", 40)
+        ]
+        assert report.reclaimable_size == 75
+
+    def test_report_round_trip_feeds_delete(self, library, tmp_path):
+        """Test deleting exactly the entries of a saved dry-run report."""
+        report_path = tmp_path / "orphans.json"
+        scan(library).write_json(report_path)
+        book_dir = library / "Brandon Sanderson" / "Elantris (1)"
+        (book_dir / "convert.tmp").write_bytes(b"changed since the report")
+
+        report = OrphanReport.from_json(report_path)
+        removed, freed = OrphanScanner(library).delete_orphans(report)
+
+        assert (removed, freed) == (2, 70)
+        assert not (library / "Removed Author").exists()
+        assert (book_dir / "convert.tmp").exists()
+        assert (book_dir / "cover.jpg").exists()
+        assert (book_dir / "kfx_output" / "Elantris_kfx.azw3").exists()
+        assert (library / "metadata_backup_20250101_120000.db").exists()
+        assert (library / ".caltrash" / "deleted.epub").exists()
+
+    def test_report_for_other_library_rejected(self, library, tmp_path):
+        """Test that a report cannot be applied to a different library."""
+        report = OrphanReport(library=str(tmp_path / "elsewhere"))
+
+        with pytest.raises(ValueError):
+            OrphanScanner(library).delete_orphans(report)
+
+    def test_stale_report_keeps_current_books(self, library, tmp_path):
+        """Test that entries used by a book since the report are kept."""
+        report = scan(library)
+        # A book was added in the reported directory after the scan
+        modify_library(
+            library,
+            "INSERT INTO books (id, title, sort, author_sort, path) VALUES "
+            "(9, 'Old Book', 'Old Book', 'Removed Author', "
+            "'Removed Author/Old Book (9)')",
+        )
+        store = CalibreMetadataStore(library)
+
+        removed, _ = OrphanScanner(library).delete_orphans(
+            report,
+            expected_files=store.iter_files(),
+            book_dirs=[book["path"] for book in store.iter_books(["path"])],
+        )
+
+        assert removed == 2
+        assert (library / "Removed Author" / "Old Book (9)").exists()
+
+
+class TestCleanupOrphanedFiles:
+    """Test CalibreIntegration.cleanup_orphaned_files."""
+
+    @pytest.fixture
+    def integration(self, library, tmp_path):
+        """Create a CalibreIntegration whose calibredb must not be used."""
+        config_manager = Mock(spec=ConfigManager)
+        config_manager.get_calibre_config.return_value = {
+            "library_path": str(library),
+            "cli_path": "calibredb",
+        }
+        integration = CalibreIntegration(config_manager)
+        integration._calibre_db = Mock()
+        integration.cache_dir = tmp_path / "cache"
+        return integration
+
+    def test_dry_run_writes_report(self, integration, library, tmp_path):
+        """Test that a dry run reports without deleting anything."""
+        result = integration.cleanup_orphaned_files(
+            dry_run=True, report_path=tmp_path / "orphans.json"
+        )
+
+        assert result.orphaned_files_found == 2
+        assert result.missing_files_found == 1
+        assert result.extra_directories_found == 1
+        assert result.space_freed == 75
+        assert result.files_removed == 0
+        assert (tmp_path / "orphans.json").exists()
+        assert (library / "Removed Author").exists()
+        integration._calibre_db.check_library.assert_not_called()
+
+    def test_cleanup_removes_temporary_files_by_default(self, integration, library):
+        """Test that only temporary files are removed without opting in."""
+        book_dir = library / "Brandon Sanderson" / "Elantris (1)"
+
+        result = integration.cleanup_orphaned_files(dry_run=False)
+
+        assert result.files_removed == 1
+        assert not (book_dir / "convert.tmp").exists()
+        assert (book_dir / "Elantris - old.pdf").exists()
+        assert (library / "Removed Author").exists()
+        assert (library / "metadata_backup_20250101_120000.db").exists()
+
+    def test_cleanup_from_report(self, integration, library, tmp_path):
+        """Test that the delete step consumes the dry-run report."""
+        integration.cleanup_orphaned_files(
+            dry_run=True, report_path=tmp_path / "orphans.json"
+        )
+
+        result = integration.cleanup_orphaned_files(
+            dry_run=False,
+            from_report=tmp_path / "orphans.json",
+            remove_all_orphans=True,
+        )
+
+        assert result.files_removed == 3
+        assert result.space_freed_human == "75.0 B"
+        assert not (library / "Removed Author").exists()
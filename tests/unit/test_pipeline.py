@@ -0,0 +1,346 @@
+"""
+Unit tests for the streaming book pipeline.
+
+Tests that stages overlap, queues stay bounded, failures stop a book,
+the library stages are wired together and the pipeline command.
+"""
+
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+from click.testing import CliRunner
+
+from calibre_books.cli.pipeline import run
+from calibre_books.core.book import ASINLookupResult, ConversionResult, BookFormat
+from calibre_books.core.calibre import CalibreDB, CalibreResult
+from calibre_books.core.download_ledger import DownloadLedger
+from calibre_books.core.downloader import (
+    BookDownloader,
+    BookRequest,
+    DownloadResult,
+)
+from calibre_books.core.pipeline import (
+    BookPipeline,
+    PipelineError,
+    PipelineStage,
+    StreamingPipeline,
+)
+from calibre_books.utils.files import file_digest
+from calibre_books.utils.validation import ValidationResult, ValidationStatus
+
+
+def requests(count):
+    """Create book requests."""
+    return [BookRequest(title=f"Book {i}", author="Author") for i in range(count)]
+
+
+class TestStreamingPipeline:
+    """Test the staged execution."""
+
+    def test_stages_overlap(self):
+        """Test that a book converts while the next one downloads."""
+        events = []
+        lock = threading.Lock()
+
+        def stage(name):
+            def process(item):
+                with lock:
+                    events.append((name, "start", item.position))
+                time.sleep(0.05)
+                with lock:
+                    events.append((name, "end", item.position))
+
+            return PipelineStage(name, process)
+
+        StreamingPipeline([stage("download"), stage("convert")]).run(requests(2))
+
+        start = events.index(("convert", "start", 0))
+        end = events.index(("convert", "end", 0))
+        assert events.index(("download", "start", 1)) < end
+        assert events.index(("download", "end", 1)) > start
+
+    def test_queues_are_bounded(self):
+        """Test that a slow stage holds back the stages before it."""
+        fed = []
+        ahead = []
+
+        def books():
+            for request in requests(20):
+                fed.append(request)
+                yield request
+
+        def slow(item):
+            # Books pulled from the input but not yet through the slow stage
+            ahead.append(len(fed) - item.position)
+            time.sleep(0.02)
+
+        pipeline = StreamingPipeline(
+            [PipelineStage("fast", lambda item: None), PipelineStage("slow", slow)],
+            queue_size=2,
+        )
+        pipeline.run(books())
+
+        # queue_size books in front of each stage plus one per worker
+        assert max(ahead) <= 2 * 2 + 2 + 1
+        assert all(stats.max_queue_depth <= 2 for stats in pipeline.stats())
+
+    def test_failure_stops_later_stages(self):
+        """Test that a failed book skips the remaining stages."""
+        converted = []
+
+        def download(item):
+            if item.position == 1:
+                raise PipelineError("No results")
+
+        pipeline = StreamingPipeline(
+            [
+                PipelineStage("download", download),
+                PipelineStage("convert", lambda item: converted.append(item.position)),
+            ]
+        )
+        items = pipeline.run(requests(3))
+
+        assert converted == [0, 2]
+        assert [item.success for item in items] == [True, False, True]
+        assert (items[1].failed_stage, items[1].error) == ("download", "No results")
+        download_stats, convert_stats = pipeline.stats()
+        assert (download_stats.processed, download_stats.failed) == (3, 1)
+        assert (convert_stats.processed, convert_stats.failed) == (2, 0)
+
+    def test_results_in_input_order(self):
+        """Test that parallel workers do not reorder the results."""
+
+        def download(item):
+            time.sleep(0.01 * (5 - item.position))
+
+        pipeline = StreamingPipeline([PipelineStage("download", download, workers=5)])
+        items = pipeline.run(requests(5))
+        (stats,) = pipeline.stats()
+
+        assert [item.request.title for item in items] == [f"Book {i}" for i in range(5)]
+        assert stats.throughput > 0
+        assert 0 < stats.utilisation <= 1
+
+    def test_failing_progress_callback(self):
+        """Test that an exception in the progress callback does not hang the run."""
+
+        def download(item):
+            if item.position == 0:
+                raise PipelineError("No results")
+
+        pipeline = StreamingPipeline(
+            [
+                PipelineStage("download", download),
+                PipelineStage("convert", lambda item: None),
+            ]
+        )
+        items = []
+
+        def callback(item):
+            raise RuntimeError("display closed")
+
+        runner = threading.Thread(
+            target=lambda: items.extend(pipeline.run(requests(3), callback)),
+            daemon=True,
+        )
+        runner.start()
+        runner.join(timeout=5)
+
+        assert not runner.is_alive()
+        assert [item.success for item in items] == [False, True, True]
+
+
+class TestBookPipeline:
+    """Test the library stages."""
+
+    def make_pipeline(self, tmp_path, **kwargs):
+        """Create a pipeline with mocked components."""
+        book_pipeline = BookPipeline(Mock(), output_dir=tmp_path, **kwargs)
+        book_pipeline._downloader = Mock(max_parallel=2)
+        book_pipeline._validator = Mock()
+        book_pipeline._lookup_service = Mock()
+        book_pipeline._asin_manager = Mock()
+        book_pipeline._converter = Mock(max_parallel=2)
+        book_pipeline._converter.effective_parallel.return_value = 2
+        book_pipeline._calibre = Mock()
+
+        def download(book, format, output_dir):
+            path = Path(output_dir) / f"{book.title}.{format}"
+            path.write_bytes(b"book")
+            return DownloadResult(book.title, book.author, path, True, format=format)
+
+        def convert(input_file, output_file, output_format):
+            return ConversionResult(
+                input_file=input_file,
+                output_file=output_file,
+                input_format=BookFormat.MOBI,
+                output_format=BookFormat.EPUB,
+                success=True,
+            )
+
+        book_pipeline.downloader.download_book.side_effect = download
+        book_pipeline.validator.validate_file.side_effect = (
+            lambda path: ValidationResult(ValidationStatus.VALID, path)
+        )
+        book_pipeline.asin_manager.get_asin_from_file.return_value = None
+        book_pipeline.lookup_service.lookup_by_title.return_value = ASINLookupResult(
+            "Book 0", "Author", "B00ZVA3XL6", None, "amazon", True
+        )
+        book_pipeline.converter.convert_single.side_effect = convert
+        book_pipeline.calibre.add_books.return_value = [7]
+        return book_pipeline
+
+    def test_runs_all_stages(self, tmp_path):
+        """Test a book going from download into the library."""
+        book_pipeline = self.make_pipeline(tmp_path, convert_to="epub")
+
+        (item,) = book_pipeline.run(requests(1))
+
+        assert item.success, item.error
+        assert item.asin == "B00ZVA3XL6"
+        assert item.file_path == tmp_path / "Book 0.epub"
+        assert item.book_ids == [7]
+        book_pipeline.asin_manager.write_file_asin.assert_called_once_with(
+            tmp_path / "Book 0.mobi", "B00ZVA3XL6"
+        )
+        book_pipeline.calibre.add_books.assert_called_once_with(
+            [tmp_path / "Book 0.epub"]
+        )
+        assert [stats.name for stats in book_pipeline.stats()] == [
+            "download",
+            "validate",
+            "asin",
+            "convert",
+            "import",
+        ]
+
+    def test_tagged_download_stays_downloaded(self, tmp_path):
+        """Test that writing the ASIN does not make the download look changed."""
+        book_pipeline = self.make_pipeline(tmp_path)
+        ledger = DownloadLedger.for_download_dir(tmp_path)
+
+        def download(book, format, output_dir):
+            path = Path(output_dir) / f"{book.title}.{format}"
+            path.write_bytes(b"book")
+            ledger.mark_downloading("hash0", book.title, book.author, format, path)
+            ledger.mark_done("hash0", path, 4, file_digest(path))
+            return DownloadResult(book.title, book.author, path, True, format=format)
+
+        book_pipeline.downloader.download_book.side_effect = download
+        book_pipeline.asin_manager.write_file_asin.side_effect = (
+            lambda path, asin: path.write_bytes(b"book with " + asin.encode())
+        )
+
+        (item,) = book_pipeline.run(requests(1))
+
+        assert item.success, item.error
+        assert ledger.finished_file("hash0") == tmp_path / "Book 0.mobi"
+
+    def test_missing_asin_is_a_warning(self, tmp_path):
+        """Test that books without an ASIN are still imported."""
+        book_pipeline = self.make_pipeline(tmp_path)
+        book_pipeline.lookup_service.lookup_by_title.return_value = ASINLookupResult(
+            "Book 0", "Author", None, None, None, False, error="No ASIN found"
+        )
+
+        (item,) = book_pipeline.run(requests(1))
+
+        assert item.success
+        assert item.warnings == ["No ASIN found"]
+        book_pipeline.calibre.add_books.assert_called_once()
+
+    def test_invalid_download_is_not_imported(self, tmp_path):
+        """Test that validation failures stop the book."""
+        book_pipeline = self.make_pipeline(tmp_path, lookup_asin=False)
+        book_pipeline.validator.validate_file.side_effect = (
+            lambda path: ValidationResult(
+                ValidationStatus.INVALID, path, errors=["Not a MOBI file"]
+            )
+        )
+
+        (item,) = book_pipeline.run(requests(1))
+
+        assert (item.failed_stage, item.error) == ("validate", "Not a MOBI file")
+        book_pipeline.calibre.add_books.assert_not_called()
+
+    def test_stage_selection_and_workers(self, tmp_path):
+        """Test that skipped stages are left out and workers overridden."""
+        book_pipeline = self.make_pipeline(
+            tmp_path,
+            lookup_asin=False,
+            import_books=False,
+            workers={"download": 5},
+        )
+
+        stages = book_pipeline.stages()
+
+        assert [(stage.name, stage.workers) for stage in stages] == [
+            ("download", 5),
+            ("validate", 2),
+        ]
+
+
+class TestCalibreAdd:
+    """Test importing files with calibredb add."""
+
+    def test_parses_added_ids(self):
+        """Test parsing of calibredb add output."""
+        with (
+            patch.object(CalibreDB, "_validate_library"),
+            patch.object(CalibreDB, "_validate_cli"),
+            patch.object(CalibreDB, "execute_command") as mock_exec,
+        ):
+            mock_exec.return_value = CalibreResult(
+                True, "Added book ids: 12, 13\n", "", 0, []
+            )
+            calibre_db = CalibreDB(Path("/test/library"), "calibredb")
+
+            assert calibre_db.add_books([Path("a.epub"), Path("b.epub")]) == [12, 13]
+            mock_exec.assert_called_once_with(["add", "a.epub", "b.epub"], timeout=300)
+
+            mock_exec.return_value = CalibreResult(
+                True,
+                "The following books were not added as they already exist",
+                "",
+                0,
+                [],
+            )
+            assert calibre_db.add_books([Path("a.epub")]) == []
+
+
+class TestPipelineCommand:
+    """Test book-tool pipeline run."""
+
+    def test_dry_run(self, tmp_path):
+        """Test that a dry run only shows the plan."""
+        book_list = tmp_path / "books.txt"
+        book_list.write_text("Mistborn|Brandon Sanderson\n")
+        config_manager = Mock()
+        config_manager.get_download_config.return_value = {
+            "download_path": str(tmp_path / "downloads"),
+            "max_parallel": 2,
+        }
+        config_manager.get_conversion_config.return_value = {"max_parallel": 2}
+
+        with patch.object(BookDownloader, "_validate_configuration"):
+            result = CliRunner().invoke(
+                run,
+                [
+                    "-i",
+                    str(book_list),
+                    "--convert-to",
+                    "epub",
+                    "--download-workers",
+                    "3",
+                    "--skip-import",
+                ],
+                obj={"config": config_manager, "dry_run": True},
+            )
+
+        assert result.exit_code == 0, result.output
+        assert "download (3 workers)" in result.output
+        assert "convert (" in result.output
+        assert "import" not in result.output
+        assert "Mistborn by Brandon Sanderson" in result.output